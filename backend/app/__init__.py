@@ -8,13 +8,25 @@ from uuid import uuid4
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import func
 import logging
-from .database.db import OrderModel, SessionLocal
+from .database.db import OrderModel, ReadSessionLocal, SessionLocal, async_engine, async_read_engine, pool_metrics_snapshot
+from .database.query_metrics import UNMATCHED_ROUTE, query_metrics
 from .routes import router
 from .routes.auth import router as auth_router
 from .routes.streaming import get_stream_metrics_snapshot, router as streaming_router
 from .routes.ai_v2 import router as ai_v2_router
 from .routes.trade_journal import journal_router
+from .ai_engine import price_series_cache_snapshot
+from .idempotency_index import order_idempotency_index
+from .matching_engine import MATCHING_ENGINE_ENABLED, matching_engine
+from .mutual_fund_sync import MF_SYNC_ENABLED, mutual_fund_sync
+from .order_archive import ORDER_ARCHIVE_ENABLED, order_archiver
+from .order_executor import order_executor
+from .portfolio_aggregates import portfolio_aggregates
+from .recommendation_refresh import RECOMMENDATIONS_REFRESH_ENABLED, recommendation_refresher
+from .trigger_book import trigger_book
+from .trigger_engine import TRIGGER_ENGINE_ENABLED, trigger_engine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -106,20 +118,22 @@ def _http_metrics_snapshot() -> dict:
 
 
 def _order_outcome_snapshot() -> dict[str, int | float]:
-    db = SessionLocal()
+    db = ReadSessionLocal()
     try:
-        total = int(db.query(OrderModel).count())
-        completed = int(
-            db.query(OrderModel)
-            .filter(OrderModel.status.in_(["COMPLETED", "TRIGGER_EXECUTED"]))
-            .count()
-        )
-        rejected = int(db.query(OrderModel).filter(OrderModel.status == "REJECTED").count())
-        pending = int(db.query(OrderModel).filter(OrderModel.status == "PENDING").count())
-        cancelled = int(db.query(OrderModel).filter(OrderModel.status == "CANCELLED").count())
+        # One grouped pass over the status index instead of a COUNT per outcome.
+        by_status = {
+            status: int(count)
+            for status, count in db.query(OrderModel.status, func.count(OrderModel.id)).group_by(OrderModel.status)
+        }
     finally:
         db.close()
 
+    total = sum(by_status.values())
+    completed = by_status.get("COMPLETED", 0) + by_status.get("TRIGGER_EXECUTED", 0)
+    rejected = by_status.get("REJECTED", 0)
+    pending = by_status.get("PENDING", 0)
+    cancelled = by_status.get("CANCELLED", 0)
+
     return {
         "total": total,
         "completed": completed,
@@ -167,12 +181,20 @@ async def trace_context_middleware(request: Request, call_next):
     trace_id = (request.headers.get(TRACE_HEADER) or f"trc-{uuid4().hex[:16]}").strip()
     request.state.trace_id = trace_id
     started_at = time.perf_counter()
+    query_scope, query_scope_token = query_metrics.start_request(trace_id)
 
     try:
         response = await call_next(request)
     except Exception:
         logger.exception("Unhandled request error trace_id=%s path=%s", trace_id, request.url.path)
         raise
+    finally:
+        route_path = getattr(request.scope.get("route"), "path", None)
+        query_metrics.finish_request(
+            query_scope,
+            query_scope_token,
+            f"{request.method} {route_path}" if route_path else UNMATCHED_ROUTE,
+        )
 
     duration_ms = (time.perf_counter() - started_at) * 1000.0
     response.headers[TRACE_HEADER] = trace_id
@@ -220,6 +242,18 @@ async def slo_metrics_endpoint() -> dict:
     http_snapshot = _http_metrics_snapshot()
     order_outcomes = _order_outcome_snapshot()
     stream_snapshot = get_stream_metrics_snapshot()
+    trigger_engine_snapshot = trigger_engine.metrics_snapshot()
+    matching_engine_snapshot = matching_engine.metrics_snapshot()
+    order_executor_snapshot = order_executor.metrics_snapshot()
+    idempotency_snapshot = order_idempotency_index.metrics_snapshot()
+    aggregates_snapshot = portfolio_aggregates.metrics_snapshot()
+    mf_sync_snapshot = mutual_fund_sync.metrics_snapshot()
+    archive_snapshot = order_archiver.metrics_snapshot()
+    recommendations_snapshot = recommendation_refresher.metrics_snapshot()
+    price_series_snapshot = price_series_cache_snapshot()
+    price_series_lookups = price_series_snapshot["hits"] + price_series_snapshot["misses"]
+    pool_snapshot = pool_metrics_snapshot()
+    query_totals = query_metrics.totals_snapshot()
 
     counters = http_snapshot["counters"]
     stream_messages = int(stream_snapshot.get("quotes_messages_sent", 0) or 0)
@@ -250,10 +284,109 @@ async def slo_metrics_endpoint() -> dict:
                 "errorRatePct": _safe_rate(stream_send_errors, stream_total),
                 "rowsSent": int(stream_snapshot.get("quotes_rows_sent", 0) or 0),
                 "activeConnections": int(stream_snapshot.get("active_connections", 0) or 0),
+                "sseActiveConnections": int(stream_snapshot.get("sse_active_connections", 0) or 0),
                 "subscriptionsUpdated": int(stream_snapshot.get("subscriptions_updated", 0) or 0),
                 "resumeEventsSent": int(stream_snapshot.get("resume_events_sent", 0) or 0),
                 "lastSequenceSent": int(stream_snapshot.get("last_sequence_sent", 0) or 0),
             },
+            "triggerEngine": {
+                "running": bool(trigger_engine_snapshot.get("running")),
+                "ticksReceived": int(trigger_engine_snapshot.get("ticks_received", 0) or 0),
+                "evaluationCycles": int(trigger_engine_snapshot.get("evaluation_cycles", 0) or 0),
+                "triggersProcessed": int(trigger_engine_snapshot.get("triggers_processed", 0) or 0),
+                "alertsFired": int(trigger_engine_snapshot.get("alerts_fired", 0) or 0),
+                "pendingSymbols": int(trigger_engine_snapshot.get("pending_symbols", 0) or 0),
+                "lastCycleMs": trigger_engine_snapshot.get("last_cycle_ms"),
+                "errors": int(trigger_engine_snapshot.get("errors", 0) or 0),
+                "pendingTriggersIndexed": trigger_book.size(),
+            },
+            "matchingEngine": {
+                "running": bool(matching_engine_snapshot["running"]),
+                "restingOrders": matching_engine_snapshot["resting_orders"],
+                "symbols": matching_engine_snapshot["symbols"],
+                "ticksProcessed": matching_engine_snapshot["ticks_processed"],
+                "fills": matching_engine_snapshot["fills"],
+                "partialFills": matching_engine_snapshot["partial_fills"],
+            },
+            "orderExecutor": {
+                "running": bool(order_executor_snapshot.get("running")),
+                "workers": int(order_executor_snapshot.get("workers", 0) or 0),
+                "queueDepth": int(order_executor_snapshot.get("queue_depth", 0) or 0),
+                "jobsCompleted": int(order_executor_snapshot.get("jobs_completed", 0) or 0),
+                "jobsFailed": int(order_executor_snapshot.get("jobs_failed", 0) or 0),
+                "jobsCancelled": int(order_executor_snapshot.get("jobs_cancelled", 0) or 0),
+                "batchesCommitted": int(order_executor_snapshot.get("batches_committed", 0) or 0),
+                "batchFallbacks": int(order_executor_snapshot.get("batch_fallbacks", 0) or 0),
+                "maxBatchSize": int(order_executor_snapshot.get("max_batch_size", 0) or 0),
+                "lastBatchMs": order_executor_snapshot.get("last_batch_ms"),
+            },
+            "idempotencyIndex": {
+                "entries": idempotency_snapshot["entries"],
+                "hits": idempotency_snapshot["hits"],
+                "misses": idempotency_snapshot["misses"],
+            },
+            "portfolioAggregates": {
+                "users": aggregates_snapshot["users"],
+                "hits": aggregates_snapshot["hits"],
+                "loads": aggregates_snapshot["loads"],
+                "expired": aggregates_snapshot["expired"],
+                "deltasApplied": aggregates_snapshot["deltas_applied"],
+            },
+            "priceSeriesCache": {
+                "symbols": price_series_snapshot["symbols"],
+                "hits": price_series_snapshot["hits"],
+                "misses": price_series_snapshot["misses"],
+                "evictions": price_series_snapshot["evictions"],
+                "hitRatePct": (
+                    round(price_series_snapshot["hits"] / price_series_lookups * 100.0, 2) if price_series_lookups else None
+                ),
+            },
+            "orderArchive": {
+                "running": bool(archive_snapshot.get("running")),
+                "afterDays": archive_snapshot["after_days"],
+                "runs": archive_snapshot["runs"],
+                "errors": archive_snapshot["errors"],
+                "ordersArchived": archive_snapshot["orders_archived"],
+                "lastRunMs": archive_snapshot["last_run_ms"],
+            },
+            "recommendationsRefresh": {
+                "running": bool(recommendations_snapshot.get("running")),
+                "workers": recommendations_snapshot["workers"],
+                "runs": recommendations_snapshot["runs"],
+                "errors": recommendations_snapshot["errors"],
+                "lastScored": recommendations_snapshot["last_scored"],
+                "lastFailed": recommendations_snapshot["last_failed"],
+                "lastRefreshMs": recommendations_snapshot["last_refresh_ms"],
+                "lastRefreshedAt": recommendations_snapshot["last_refreshed_at"],
+            },
+            "mutualFundSync": {
+                "running": bool(mf_sync_snapshot.get("running")),
+                "runs": mf_sync_snapshot["runs"],
+                "errors": mf_sync_snapshot["errors"],
+                "rowsInserted": mf_sync_snapshot["rows_inserted"],
+                "rowsUpdated": mf_sync_snapshot["rows_updated"],
+                "lastSyncMs": mf_sync_snapshot["last_sync_ms"],
+                "lastSyncedAt": mf_sync_snapshot["last_synced_at"],
+            },
+            "databasePool": {
+                "poolClass": pool_snapshot["pool_class"],
+                "readMode": pool_snapshot["read_mode"],
+                "size": pool_snapshot.get("size"),
+                "checkedOut": pool_snapshot.get("checked_out"),
+                "overflow": pool_snapshot.get("overflow"),
+                "checkouts": pool_snapshot["checkouts"],
+                "timeouts": pool_snapshot["timeouts"],
+                "waitMsP95": pool_snapshot["wait_ms_p95"],
+                "waitMsMax": pool_snapshot["wait_ms_max"],
+            },
+            "databaseQueries": {
+                "queries": query_totals["queries"],
+                "dbMs": query_totals["db_ms"],
+                "slowQueries": query_totals["slow_queries"],
+                "nPlusOneRequests": query_totals["n_plus_one"],
+                "topStatements": query_metrics.top_statements(),
+                "routes": query_metrics.route_snapshot(),
+            },
             "targets": {
                 "crashFreeSessionsMinPct": 99.8,
                 "orderSuccessRateMinPct": 99.5,
@@ -266,10 +399,35 @@ async def slo_metrics_endpoint() -> dict:
 @app.on_event("startup")
 async def startup_event():
     logger.info("BYSEL Backend starting up...")
+    db = SessionLocal()
+    try:
+        trigger_book.rebuild(db)
+    finally:
+        db.close()
+    order_executor.start()
+    if TRIGGER_ENGINE_ENABLED:
+        trigger_engine.start()
+    if MATCHING_ENGINE_ENABLED:
+        matching_engine.start()
+    if MF_SYNC_ENABLED:
+        mutual_fund_sync.start()
+    if ORDER_ARCHIVE_ENABLED:
+        order_archiver.start()
+    if RECOMMENDATIONS_REFRESH_ENABLED:
+        recommendation_refresher.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("BYSEL Backend shutting down...")
+    trigger_engine.stop()
+    matching_engine.stop()
+    order_executor.stop()
+    mutual_fund_sync.stop()
+    order_archiver.stop()
+    recommendation_refresher.stop()
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
 
 if __name__ == "__main__":
     import uvicorn
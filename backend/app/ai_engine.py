@@ -16,9 +16,12 @@ import numpy as np
 import logging
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from html import unescape
-from threading import Lock
+from threading import Lock, Thread
 from typing import Dict, List, Optional, Tuple
 from .market_data import _yf_ticker, INDIAN_STOCKS, fetch_quote, search_stocks
 
@@ -41,10 +44,12 @@ _STOCK_DETAIL_CACHE_TTL = timedelta(seconds=20)
 _STOCK_DETAIL_CACHE: Dict[str, Tuple[datetime, Dict]] = {}
 _STOCK_DETAIL_CACHE_LOCK = Lock()
 
-# Recommendations Cache (5 min TTL - updated frequently for changing market)
+# Recommendations snapshot (5 min refresh - updated frequently for changing market)
 _RECOMMENDATIONS_CACHE = {"data": None, "timestamp": 0}
-_RECOMMENDATIONS_CACHE_TTL = 5 * 60  # 5 minutes
+_RECOMMENDATIONS_CACHE_TTL = max(30, int(os.getenv("RECOMMENDATIONS_REFRESH_SECONDS", "300")))
 _RECOMMENDATIONS_CACHE_LOCK = Lock()
+_RECOMMENDATIONS_REFRESH_LOCK = Lock()
+_RECOMMENDATIONS_WORKERS = max(1, int(os.getenv("RECOMMENDATIONS_WORKERS", "8")))
 
 # Model Performance Tracking (for accuracy improvement)
 _MODEL_PERFORMANCE: Dict[str, Dict] = {
@@ -81,6 +86,15 @@ _TRADE_LEVELS_CACHE: Dict[str, Tuple[datetime, Dict]] = {}
 _TRADE_LEVELS_CACHE_TTL = timedelta(minutes=15)
 _TRADE_LEVELS_CACHE_LOCK = Lock()
 
+# Shared OHLCV history (30m TTL) - one download per symbol serves every analytic
+_PRICE_SERIES_CACHE: Dict[str, Tuple[datetime, str, "PriceSeries"]] = {}
+_PRICE_SERIES_CACHE_TTL = timedelta(minutes=int(os.getenv("PRICE_SERIES_CACHE_TTL_MINUTES", "30")))
+_PRICE_SERIES_CACHE_MAX_SYMBOLS = max(20, int(os.getenv("PRICE_SERIES_CACHE_MAX_SYMBOLS", "300")))
+_PRICE_SERIES_MIN_PERIOD = os.getenv("PRICE_SERIES_MIN_PERIOD", "1y")
+_PRICE_SERIES_CACHE_LOCK = Lock()
+_PRICE_SERIES_METRICS = {"hits": 0, "misses": 0, "evictions": 0}
+_PERIOD_DAYS = {"1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827}
+
 _MARKET_NEWS_DEFAULT_SYMBOLS = ["RELIANCE", "TCS", "HDFCBANK", "INFY", "ICICIBANK"]
 
 _POSITIVE_HEADLINE_KEYWORDS = (
@@ -124,6 +138,91 @@ _NEGATIVE_HEADLINE_KEYWORDS = (
 )
 
 
+# ──────────────────────────────────────────────────────────────
+# PRICE HISTORY CACHE
+# ──────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class PriceSeries:
+    """Daily OHLCV bars as read-only NumPy arrays; ``timestamps`` are epoch seconds."""
+
+    timestamps: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.close) == 0
+
+    @classmethod
+    def from_history(cls, hist) -> "PriceSeries":
+        def column(name: str, dtype=float) -> np.ndarray:
+            values = hist[name].to_numpy(dtype=dtype) if name in hist else np.zeros(len(hist), dtype=dtype)
+            values.flags.writeable = False
+            return values
+
+        if len(hist):
+            timestamps = np.asarray(hist.index.values).astype("datetime64[s]").astype(np.int64)
+        else:
+            timestamps = np.zeros(0, dtype=np.int64)
+        timestamps.flags.writeable = False
+        return cls(timestamps, column("Open"), column("High"), column("Low"), column("Close"), column("Volume"))
+
+    def window(self, period: str, now: Optional[datetime] = None) -> "PriceSeries":
+        """The bars within ``period`` of ``now``, as views into the same arrays."""
+        cutoff = (now or datetime.now(timezone.utc)).timestamp() - _PERIOD_DAYS[period] * 86400
+        start = int(np.searchsorted(self.timestamps, cutoff))
+        if start == 0:
+            return self
+        return PriceSeries(*(values[start:] for values in (
+            self.timestamps, self.open, self.high, self.low, self.close, self.volume
+        )))
+
+
+def get_price_series(symbol: str, period: str = "1y", ticker=None) -> PriceSeries:
+    """
+    Daily history for ``symbol`` over ``period``, shared by all analytics.
+
+    Each symbol keeps the longest period downloaded so far (at least
+    PRICE_SERIES_MIN_PERIOD); shorter requests are served by slicing it, so
+    analyze_stock, predict_price, trade levels, drawdown and relative strength
+    cost one download per symbol between refreshes.
+    """
+    key = symbol.strip().upper()
+    now = datetime.utcnow()
+    with _PRICE_SERIES_CACHE_LOCK:
+        cached = _PRICE_SERIES_CACHE.get(key)
+        if cached and now - cached[0] <= _PRICE_SERIES_CACHE_TTL and _PERIOD_DAYS[cached[1]] >= _PERIOD_DAYS[period]:
+            _PRICE_SERIES_METRICS["hits"] += 1
+            return cached[2].window(period)
+        _PRICE_SERIES_METRICS["misses"] += 1
+
+    # Never shrink what is cached; a stale 2y entry is refreshed as 2y.
+    candidates = [period, _PRICE_SERIES_MIN_PERIOD] + ([cached[1]] if cached else [])
+    fetch_period = max(candidates, key=_PERIOD_DAYS.__getitem__)
+    ticker_obj = ticker or yf.Ticker(_yf_ticker(key))
+    series = PriceSeries.from_history(ticker_obj.history(period=fetch_period))
+
+    with _PRICE_SERIES_CACHE_LOCK:
+        _PRICE_SERIES_CACHE[key] = (now, fetch_period, series)
+        if len(_PRICE_SERIES_CACHE) > _PRICE_SERIES_CACHE_MAX_SYMBOLS:
+            oldest = min(_PRICE_SERIES_CACHE.items(), key=lambda item: item[1][0])
+            _PRICE_SERIES_CACHE.pop(oldest[0], None)
+            _PRICE_SERIES_METRICS["evictions"] += 1
+    return series.window(period)
+
+
+def price_series_cache_snapshot() -> Dict[str, int]:
+    with _PRICE_SERIES_CACHE_LOCK:
+        return {**_PRICE_SERIES_METRICS, "symbols": len(_PRICE_SERIES_CACHE)}
+
+
 # ──────────────────────────────────────────────────────────────
 # TECHNICAL INDICATORS
 # ──────────────────────────────────────────────────────────────
@@ -241,13 +340,12 @@ def predict_price(symbol: str) -> Dict:
     with confidence intervals.
     """
     try:
-        ticker = yf.Ticker(_yf_ticker(symbol))
-        hist = ticker.history(period="1y")
+        series = get_price_series(symbol, "1y")
 
-        if hist.empty or len(hist) < 30:
+        if series.empty or len(series) < 30:
             return {"error": f"Insufficient data for {symbol}", "predictions": []}
 
-        closes = hist["Close"].values.astype(float)
+        closes = series.close
         current_price = closes[-1]
 
         predictions = []
@@ -759,12 +857,12 @@ def analyze_stock(symbol: str) -> Dict:
     """
     try:
         ticker = yf.Ticker(_yf_ticker(symbol))
-        hist = ticker.history(period="1y")
+        series = get_price_series(symbol, "1y", ticker=ticker)
 
-        if hist.empty:
+        if series.empty:
             return {"error": f"No data available for {symbol}"}
 
-        closes = hist["Close"].values.astype(float)
+        closes = series.close
         current = closes[-1]
 
         # Technical Analysis
@@ -871,6 +969,125 @@ def analyze_stock(symbol: str) -> Dict:
         return {"error": str(e)}
 
 
+# Top NIFTY 50 stocks scored by every recommendations refresh
+_RECOMMENDATION_UNIVERSE = [
+    "RELIANCE", "TCS", "HDFCBANK", "INFY", "ICICIBANK",
+    "HINDUNILVR", "ITC", "SBIN", "BHARTIARTL", "KOTAKBANK",
+    "LT", "AXISBANK", "BAJFINANCE", "ASIANPAINT", "MARUTI",
+    "TITAN", "SUNPHARMA", "TATAMOTORS", "WIPRO", "ULTRACEMCO",
+    "NESTLEIND", "HCLTECH", "TATASTEEL", "NTPC", "POWERGRID",
+    "TECHM", "BAJAJFINSV", "ONGC", "JSWSTEEL", "ADANIENT",
+    "HDFCLIFE", "DIVISLAB", "DRREDDY", "SBILIFE", "BRITANNIA",
+    "CIPLA", "EICHERMOT", "HEROMOTOCO", "APOLLOHOSP", "GRASIM",
+]
+
+
+def _score_recommendation(symbol: str) -> Optional[Dict]:
+    """Timeframe scores for one symbol, or None when it cannot be analyzed."""
+    try:
+        analysis = analyze_stock(symbol)
+        if "error" in analysis:
+            return None
+
+        # Extract scores for each timeframe
+        predictions = analysis.get("predictions", [])
+        one_day_pred = next((p for p in predictions if p.get("days") == 7), {})
+        one_month_pred = next((p for p in predictions if p.get("days") == 30), {})
+        three_month_pred = next((p for p in predictions if p.get("days") == 90), {})
+
+        # Technical health (RSI)
+        technical = analysis.get("technical", {})
+        rsi = technical.get("rsi", 50)
+
+        # Calculate confidence scores (0-100)
+        one_day_score = _calculate_recommendation_score(
+            rsi=rsi,
+            momentum_pct=one_day_pred.get("changePercent", 0),
+            signal=analysis.get("signal", "HOLD"),
+            timeframe="day"
+        )
+
+        one_month_score = _calculate_recommendation_score(
+            rsi=rsi,
+            momentum_pct=one_month_pred.get("changePercent", 0),
+            signal=analysis.get("signal", "HOLD"),
+            pe_ratio=analysis.get("fundamental", {}).get("pe", 0),
+            timeframe="month"
+        )
+
+        three_month_score = _calculate_recommendation_score(
+            rsi=rsi,
+            momentum_pct=three_month_pred.get("changePercent", 0),
+            signal=analysis.get("signal", "HOLD"),
+            pe_ratio=analysis.get("fundamental", {}).get("pe", 0),
+            roe=analysis.get("fundamental", {}).get("roe", 0),
+            timeframe="quarter"
+        )
+
+        return {
+            "symbol": symbol,
+            "name": analysis.get("name", symbol),
+            "price": analysis.get("currentPrice", 0),
+            "sector": analysis.get("sector", "Unknown"),
+            "signal": analysis.get("signal", "HOLD"),
+            "overallScore": analysis.get("score", 50),
+            "oneDayScore": one_day_score,
+            "oneMonthScore": one_month_score,
+            "threeMonthScore": three_month_score,
+            "oneDayTarget": one_day_pred.get("predictedPrice", 0),
+            "oneMonthTarget": one_month_pred.get("predictedPrice", 0),
+            "threeMonthTarget": three_month_pred.get("predictedPrice", 0),
+            "rsi": round(float(rsi), 2),
+            "modelAccuracy": analysis.get("modelAccuracy", 65),
+        }
+    except Exception as e:
+        logger.warning(f"Error scoring {symbol}: {e}")
+        return None
+
+
+def refresh_recommendations(
+    workers: Optional[int] = None, blocking: bool = True, if_missing: bool = False
+) -> Optional[Dict[str, int]]:
+    """
+    Score the whole recommendation universe on a bounded thread pool and swap
+    the finished snapshot into _RECOMMENDATIONS_CACHE in one step.
+
+    Only one refresh runs at a time; with ``blocking=False`` a call that finds
+    a refresh in flight returns None straight away. With ``if_missing=True``
+    the call returns None once the lock is held if a snapshot already exists,
+    so cold requests queued behind the first refresh reuse its result. A run
+    that scores nothing keeps the previous snapshot.
+    """
+    if not _RECOMMENDATIONS_REFRESH_LOCK.acquire(blocking=blocking):
+        return None
+    try:
+        if if_missing:
+            with _RECOMMENDATIONS_CACHE_LOCK:
+                if _RECOMMENDATIONS_CACHE.get("data") is not None:
+                    return None
+        pool_size = max(1, min(workers or _RECOMMENDATIONS_WORKERS, len(_RECOMMENDATION_UNIVERSE)))
+        with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="bysel-recommendations") as pool:
+            results = list(pool.map(_score_recommendation, _RECOMMENDATION_UNIVERSE))
+        scored_stocks = [entry for entry in results if entry is not None]
+
+        # Sort by composite score; ties keep universe order
+        scored_stocks.sort(
+            key=lambda x: (x["oneMonthScore"] + x["threeMonthScore"]) / 2,
+            reverse=True
+        )
+
+        with _RECOMMENDATIONS_CACHE_LOCK:
+            if scored_stocks or _RECOMMENDATIONS_CACHE.get("data") is None:
+                _RECOMMENDATIONS_CACHE["data"] = {
+                    "scored": scored_stocks,
+                    "generatedAt": datetime.utcnow().isoformat(),
+                }
+                _RECOMMENDATIONS_CACHE["timestamp"] = time.time()
+        return {"scored": len(scored_stocks), "failed": len(results) - len(scored_stocks)}
+    finally:
+        _RECOMMENDATIONS_REFRESH_LOCK.release()
+
+
 def get_best_stocks_to_buy(limit: int = 10) -> Dict:
     """
     Find best stocks to buy today with regularly improving accuracy & profits.
@@ -878,106 +1095,34 @@ def get_best_stocks_to_buy(limit: int = 10) -> Dict:
       - 1 Day: Momentum, RSI, technical patterns
       - 1 Month: Predictions, technical + fundamental
       - 3 Months: Long-term trends, growth potential
-    
-    Returns top recommendations with confidence scores and model accuracy.
+
+    Serves the last completed snapshot with its age. Scoring happens in
+    refresh_recommendations (background refresher); a request only scores
+    inline when no snapshot exists yet, and a stale snapshot triggers a
+    refresh on a side thread instead of blocking the caller.
     """
-    import time
-    
-    # Check cache first (5-minute TTL)
-    now = time.time()
-    with _RECOMMENDATIONS_CACHE_LOCK:
-        cached_data = _RECOMMENDATIONS_CACHE.get("data")
-        cached_ts = _RECOMMENDATIONS_CACHE.get("timestamp", 0)
-        if cached_data and (now - cached_ts) < _RECOMMENDATIONS_CACHE_TTL:
-            return cached_data
-    
-    # Top NIFTY 50 stocks for analysis
-    top_stocks = [
-        "RELIANCE", "TCS", "HDFCBANK", "INFY", "ICICIBANK",
-        "HINDUNILVR", "ITC", "SBIN", "BHARTIARTL", "KOTAKBANK",
-        "LT", "AXISBANK", "BAJFINANCE", "ASIANPAINT", "MARUTI",
-        "TITAN", "SUNPHARMA", "TATAMOTORS", "WIPRO", "ULTRACEMCO",
-        "NESTLEIND", "HCLTECH", "TATASTEEL", "NTPC", "POWERGRID",
-        "TECHM", "BAJAJFINSV", "ONGC", "JSWSTEEL", "ADANIENT",
-        "HDFCLIFE", "DIVISLAB", "DRREDDY", "SBILIFE", "BRITANNIA",
-        "CIPLA", "EICHERMOT", "HEROMOTOCO", "APOLLOHOSP", "GRASIM",
-    ]
-    
-    scored_stocks = []
-    
     try:
-        # Score each stock for different timeframes
-        for symbol in top_stocks[:limit + 5]:  # Analyze a few more to ensure we have enough
-            try:
-                analysis = analyze_stock(symbol)
-                if "error" in analysis:
-                    continue
-                
-                # Extract scores for each timeframe
-                predictions = analysis.get("predictions", [])
-                one_day_pred = next((p for p in predictions if p.get("days") == 7), {})
-                one_month_pred = next((p for p in predictions if p.get("days") == 30), {})
-                three_month_pred = next((p for p in predictions if p.get("days") == 90), {})
-                
-                # Technical health (RSI, MACD)
-                technical = analysis.get("technical", {})
-                rsi = technical.get("rsi", 50)
-                macd = technical.get("macd", {})
-                
-                # Calculate confidence scores (0-100)
-                one_day_score = _calculate_recommendation_score(
-                    rsi=rsi,
-                    momentum_pct=one_day_pred.get("changePercent", 0),
-                    signal=analysis.get("signal", "HOLD"),
-                    timeframe="day"
-                )
-                
-                one_month_score = _calculate_recommendation_score(
-                    rsi=rsi,
-                    momentum_pct=one_month_pred.get("changePercent", 0),
-                    signal=analysis.get("signal", "HOLD"),
-                    pe_ratio=analysis.get("fundamental", {}).get("pe", 0),
-                    timeframe="month"
-                )
-                
-                three_month_score = _calculate_recommendation_score(
-                    rsi=rsi,
-                    momentum_pct=three_month_pred.get("changePercent", 0),
-                    signal=analysis.get("signal", "HOLD"),
-                    pe_ratio=analysis.get("fundamental", {}).get("pe", 0),
-                    roe=analysis.get("fundamental", {}).get("roe", 0),
-                    timeframe="quarter"
-                )
-                
-                scored_stocks.append({
-                    "symbol": symbol,
-                    "name": analysis.get("name", symbol),
-                    "price": analysis.get("currentPrice", 0),
-                    "sector": analysis.get("sector", "Unknown"),
-                    "signal": analysis.get("signal", "HOLD"),
-                    "overallScore": analysis.get("score", 50),
-                    "oneDayScore": one_day_score,
-                    "oneMonthScore": one_month_score,
-                    "threeMonthScore": three_month_score,
-                    "oneDayTarget": one_day_pred.get("predictedPrice", 0),
-                    "oneMonthTarget": one_month_pred.get("predictedPrice", 0),
-                    "threeMonthTarget": three_month_pred.get("predictedPrice", 0),
-                    "rsi": round(float(rsi), 2),
-                    "modelAccuracy": analysis.get("modelAccuracy", 65),
-                })
-            except Exception as e:
-                logger.warning(f"Error scoring {symbol}: {e}")
-                continue
-        
-        # Sort by composite score and return top recommendations
-        scored_stocks.sort(
-            key=lambda x: (x["oneMonthScore"] + x["threeMonthScore"]) / 2,
-            reverse=True
-        )
-        
-        result = {
+        with _RECOMMENDATIONS_CACHE_LOCK:
+            snapshot = _RECOMMENDATIONS_CACHE.get("data")
+            snapshot_ts = _RECOMMENDATIONS_CACHE.get("timestamp", 0)
+
+        if snapshot is None:
+            refresh_recommendations(if_missing=True)
+            with _RECOMMENDATIONS_CACHE_LOCK:
+                snapshot = _RECOMMENDATIONS_CACHE.get("data")
+                snapshot_ts = _RECOMMENDATIONS_CACHE.get("timestamp", 0)
+        elif time.time() - snapshot_ts >= _RECOMMENDATIONS_CACHE_TTL and not _RECOMMENDATIONS_REFRESH_LOCK.locked():
+            Thread(
+                target=refresh_recommendations,
+                kwargs={"blocking": False},
+                name="bysel-recommendations-stale",
+                daemon=True,
+            ).start()
+
+        scored_stocks = snapshot["scored"]
+        return {
             "recommendations": {
-                "oneDay": sorted([s for s in scored_stocks if s["oneDayScore"] >= 60], 
+                "oneDay": sorted([s for s in scored_stocks if s["oneDayScore"] >= 60],
                                key=lambda x: x["oneDayScore"], reverse=True)[:limit // 3 or 1],
                 "oneMonth": sorted([s for s in scored_stocks if s["oneMonthScore"] >= 60],
                                  key=lambda x: x["oneMonthScore"], reverse=True)[:limit // 3 or 1],
@@ -991,16 +1136,10 @@ def get_best_stocks_to_buy(limit: int = 10) -> Dict:
                 "threeMonths": _MODEL_PERFORMANCE.get("three_months", {}).get("accuracy", 62),
             },
             "disclaimer": "AI recommendations are for educational purposes. Not financial advice.",
-            "generatedAt": datetime.utcnow().isoformat(),
+            "generatedAt": snapshot["generatedAt"],
+            "snapshotAgeSeconds": round(max(0.0, time.time() - snapshot_ts), 1),
         }
-        
-        # Cache result
-        with _RECOMMENDATIONS_CACHE_LOCK:
-            _RECOMMENDATIONS_CACHE["data"] = result
-            _RECOMMENDATIONS_CACHE["timestamp"] = now
-        
-        return result
-    
+
     except Exception as e:
         logger.error(f"Error generating stock recommendations: {e}")
         return {
@@ -2716,13 +2855,12 @@ def _handle_52_week_query(query_lower: str, symbols: List[str]) -> Dict:
     results = []
     for sym in scope_stocks[:8]:
         try:
-            ticker = yf.Ticker(_yf_ticker(sym))
-            hist = ticker.history(period="1y")
-            if hist.empty:
+            series = get_price_series(sym, "1y")
+            if series.empty:
                 continue
-            high_52 = float(hist["High"].max())
-            low_52 = float(hist["Low"].min())
-            current = float(hist["Close"].iloc[-1])
+            high_52 = float(series.high.max())
+            low_52 = float(series.low.min())
+            current = float(series.close[-1])
             from_high = ((current - high_52) / high_52) * 100 if high_52 else 0
             from_low = ((current - low_52) / low_52) * 100 if low_52 else 0
             results.append({
@@ -2990,9 +3128,9 @@ def get_stop_loss_take_profit(symbol: str) -> Dict:
     """
     try:
         ticker = yf.Ticker(_yf_ticker(symbol))
-        hist = ticker.history(period="3mo")
+        series = get_price_series(symbol, "3mo", ticker=ticker)
         
-        if hist.empty or len(hist) < 20:
+        if series.empty or len(series) < 20:
             return {
                 "error": f"Insufficient data for {symbol}",
                 "entry_signal": None,
@@ -3001,7 +3139,7 @@ def get_stop_loss_take_profit(symbol: str) -> Dict:
             }
         
         # Get current and recent prices
-        closes = hist["Close"].values.astype(float)
+        closes = series.close
         current = closes[-1]
         high_52w = float(ticker.info.get("fiftyTwoWeekHigh", closes.max()))
         low_52w = float(ticker.info.get("fiftyTwoWeekLow", closes.min()))
@@ -3106,17 +3244,16 @@ def calculate_drawdown_risk(symbol: str) -> Dict:
         Dict with max drawdown %, current drawdown %, risk score, probability
     """
     try:
-        ticker = yf.Ticker(_yf_ticker(symbol))
-        hist = ticker.history(period="2y")  # 2 years for drawdown analysis
+        series = get_price_series(symbol, "2y")  # 2 years for drawdown analysis
         
-        if hist.empty or len(hist) < 60:
+        if series.empty or len(series) < 60:
             return {
                 "error": f"Insufficient data for {symbol}",
                 "symbol": symbol,
                 "riskScore": 50,
             }
         
-        closes = hist["Close"].values.astype(float)
+        closes = series.close
         current = closes[-1]
         
         # Calculate max drawdown (running max to trough)
@@ -3219,17 +3356,16 @@ def calculate_relative_strength(symbol: str) -> Dict:
         from .portfolio_scorer import SECTOR_MAP
         
         # Get stock performance
-        ticker = yf.Ticker(_yf_ticker(symbol))
-        hist = ticker.history(period="1y")
+        series = get_price_series(symbol, "1y")
         
-        if hist.empty or len(hist) < 200:
+        if series.empty or len(series) < 200:
             return {
                 "symbol": symbol,
                 "error": "Insufficient data for RS calculation",
                 "relativeStrength": 1.0,
             }
         
-        closes = hist["Close"].values.astype(float)
+        closes = series.close
         stock_return = (closes[-1] - closes[0]) / closes[0]  # 1-year return
         
         # Get sector for comparison
@@ -3241,9 +3377,9 @@ def calculate_relative_strength(symbol: str) -> Dict:
         sector_returns = []
         for peer in peer_symbols:
             try:
-                peer_hist = yf.Ticker(_yf_ticker(peer)).history(period="1y")
-                if not peer_hist.empty and len(peer_hist) >= 200:
-                    peer_return = (peer_hist["Close"].iloc[-1] - peer_hist["Close"].iloc[0]) / peer_hist["Close"].iloc[0]
+                peer_closes = get_price_series(peer, "1y").close
+                if len(peer_closes) >= 200:
+                    peer_return = (peer_closes[-1] - peer_closes[0]) / peer_closes[0]
                     sector_returns.append(peer_return)
             except:
                 pass
@@ -3255,9 +3391,9 @@ def calculate_relative_strength(symbol: str) -> Dict:
         nifty_returns = []
         for nifty_sym in nifty_proxies:
             try:
-                nifty_hist = yf.Ticker(_yf_ticker(nifty_sym)).history(period="1y")
-                if not nifty_hist.empty and len(nifty_hist) >= 200:
-                    n_return = (nifty_hist["Close"].iloc[-1] - nifty_hist["Close"].iloc[0]) / nifty_hist["Close"].iloc[0]
+                nifty_closes = get_price_series(nifty_sym, "1y").close
+                if len(nifty_closes) >= 200:
+                    n_return = (nifty_closes[-1] - nifty_closes[0]) / nifty_closes[0]
                     nifty_returns.append(n_return)
             except:
                 pass
@@ -3425,10 +3561,8 @@ def get_sector_rotation_signals() -> Dict:
                 
                 # Try to estimate RSI from recent data
                 try:
-                    ticker = yf.Ticker(_yf_ticker(quote.get("symbol", "")))
-                    hist = ticker.history(period="3mo")
-                    if not hist.empty and len(hist) >= 14:
-                        closes = hist["Close"].values.astype(float)
+                    closes = get_price_series(quote.get("symbol", ""), "3mo").close
+                    if len(closes) >= 14:
                         rsi = _compute_rsi(closes, 14)
                         sector_rsis.append(rsi)
                 except:
@@ -3538,14 +3672,11 @@ def get_earnings_calendar(next_days: int = 30) -> Dict:
         
         for symbol in major_stocks:
             try:
-                ticker = yf.Ticker(_yf_ticker(symbol))
-                
                 # Get historical earnings impact (volatility around earnings)
-                hist = ticker.history(period="1y")
-                if hist.empty or len(hist) < 60:
+                closes = get_price_series(symbol, "1y").close
+                if len(closes) < 60:
                     continue
                 
-                closes = hist["Close"].values.astype(float)
                 recent_vol = np.std(np.diff(closes[-20:]) / closes[-20:-1]) * np.sqrt(252)
                 
                 # Estimate next earnings (simplification: quarterly, assuming earnings on specific dates)
@@ -3658,13 +3789,11 @@ def advanced_stock_screener(filters: Dict) -> Dict:
                 
                 # Get technical analysis
                 try:
-                    ticker = yf.Ticker(_yf_ticker(symbol))
-                    hist = ticker.history(period="3mo")
+                    closes = get_price_series(symbol, "3mo").close
                     
-                    if hist.empty or len(hist) < 30:
+                    if len(closes) < 30:
                         continue
                     
-                    closes = hist["Close"].values.astype(float)
                     
                     # Calculate metrics
                     rsi = _compute_rsi(closes, 14)
@@ -273,21 +273,9 @@ class IndianMarketContext:
     @classmethod
     def is_market_open(cls) -> bool:
         """Check if Indian markets are currently open."""
-        from datetime import datetime
-        import pytz
+        from .trading_calendar import trading_calendar
 
-        ist = pytz.timezone('Asia/Kolkata')
-        now = datetime.now(ist)
-
-        # Check if it's a weekday
-        if now.weekday() >= 5:  # Saturday = 5, Sunday = 6
-            return False
-
-        # Check market hours (9:15 AM to 3:30 PM IST)
-        market_open = now.replace(hour=9, minute=15, second=0, microsecond=0)
-        market_close = now.replace(hour=15, minute=30, second=0, microsecond=0)
-
-        return market_open <= now <= market_close
+        return trading_calendar.is_open()
 
 # ──────────────────────────────────────────────────────────────
 # ENHANCED QUERY CLASSIFICATION & MULTI-INTENT EXTRACTION
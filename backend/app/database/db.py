@@ -1,11 +1,20 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, create_engine, text, inspect as sa_inspect
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Index, create_engine, event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+from collections import deque
 from datetime import datetime
 from pathlib import Path
+from threading import Lock
+from time import perf_counter
 import logging
 import os
-import sqlite3
+
+from .index_advisor import DB_INDEX_ADVISOR, index_advisor
+from .query_metrics import query_metrics
+from .schema import ensure_schema_current
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +32,283 @@ _DEFAULT_SQLITE_DB = _select_default_sqlite_path()
 _DEFAULT_DATABASE_URL = f"sqlite:///{_DEFAULT_SQLITE_DB.as_posix()}"
 DATABASE_URL = os.getenv("DATABASE_URL", _DEFAULT_DATABASE_URL)
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+_IS_SQLITE = DATABASE_URL.startswith("sqlite")
+_IS_SQLITE_MEMORY = _IS_SQLITE and (":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") in {"sqlite:", "sqlite:/"})
+
+# SQLite performance profile: WAL lets readers proceed while an order commit is
+# writing, and synchronous=NORMAL is durable across application crashes in WAL
+# mode (only a power loss can drop the last commits). Set SQLITE_PROFILE=default
+# to keep SQLite's stock rollback journal and settings.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance").strip().lower()
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").strip().upper()
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").strip().upper()
+SQLITE_BUSY_TIMEOUT_MS = _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_MMAP_SIZE_BYTES = _env_int("SQLITE_MMAP_SIZE_BYTES", 256 * 1024 * 1024)
+SQLITE_CACHE_SIZE_KIB = _env_int("SQLITE_CACHE_SIZE_KIB", 64 * 1024)
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY").strip().upper()
+
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 8 if _IS_SQLITE else 10, minimum=1)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 8 if _IS_SQLITE else 20)
+DB_POOL_TIMEOUT_SECONDS = _env_int("DB_POOL_TIMEOUT_SECONDS", 30, minimum=1)
+DB_POOL_RECYCLE_SECONDS = _env_int("DB_POOL_RECYCLE_SECONDS", 1800)
+DB_POOL_WAIT_WINDOW = 1000
+
+
+class _PoolWaitStats:
+    """Rolling record of how long connection checkouts waited for a free connection."""
+
+    def __init__(self, window: int = DB_POOL_WAIT_WINDOW):
+        self._lock = Lock()
+        self._samples: deque[float] = deque(maxlen=max(1, window))
+        self._checkouts = 0
+        self._timeouts = 0
+        self._max_wait_ms = 0.0
+
+    def record(self, wait_ms: float) -> None:
+        with self._lock:
+            self._checkouts += 1
+            self._samples.append(wait_ms)
+            self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._timeouts += 1
+
+    def snapshot(self) -> dict[str, float | int | None]:
+        with self._lock:
+            ordered = sorted(self._samples)
+            checkouts, timeouts, max_wait = self._checkouts, self._timeouts, self._max_wait_ms
+
+        def pick(pct: float) -> float | None:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct)))], 3)
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_p50": pick(0.50),
+            "wait_ms_p95": pick(0.95),
+            "wait_ms_p99": pick(0.99),
+            "wait_ms_max": round(max_wait, 3),
+        }
+
+
+pool_wait_stats = _PoolWaitStats()
+
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool that records the time each checkout waited for a connection."""
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            pool_wait_stats.record_timeout()
+            raise
+        pool_wait_stats.record((perf_counter() - started) * 1000.0)
+        return connection
+
+
+def _engine_options() -> dict:
+    if _IS_SQLITE_MEMORY:
+        # One shared connection: every new connection would see a different empty database.
+        return {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+    options = {
+        "poolclass": _TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    }
+    if _IS_SQLITE:
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0}
+    else:
+        options["pool_pre_ping"] = True
+        if DB_POOL_RECYCLE_SECONDS:
+            options["pool_recycle"] = DB_POOL_RECYCLE_SECONDS
+    return options
+
+
+engine = create_engine(DATABASE_URL, **_engine_options())
+
+
+def sqlite_profile_pragmas() -> list[tuple[str, str]]:
+    """PRAGMA statements applied to every new SQLite connection under the active profile."""
+    if SQLITE_PROFILE != "performance":
+        return [("busy_timeout", str(SQLITE_BUSY_TIMEOUT_MS))]
+    pragmas = [
+        ("busy_timeout", str(SQLITE_BUSY_TIMEOUT_MS)),
+        ("synchronous", SQLITE_SYNCHRONOUS),
+        ("cache_size", str(-SQLITE_CACHE_SIZE_KIB)),
+        ("temp_store", SQLITE_TEMP_STORE),
+        ("mmap_size", str(SQLITE_MMAP_SIZE_BYTES)),
+    ]
+    if not _IS_SQLITE_MEMORY:
+        pragmas.insert(0, ("journal_mode", SQLITE_JOURNAL_MODE))
+    return pragmas
+
+
+def _apply_sqlite_profile(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_profile_pragmas():
+            cursor.execute(f"PRAGMA {name}={value}")
+    except Exception as exc:
+        logger.warning("db.sqlite_profile.failed reason=%s", str(exc))
+    finally:
+        cursor.close()
+
+
+if _IS_SQLITE:
+    event.listen(engine, "connect", _apply_sqlite_profile)
+
+
+query_metrics.install(engine)
+if DB_INDEX_ADVISOR:
+    index_advisor.install(engine)
+
+
+def pool_metrics_snapshot() -> dict[str, float | int | str | None]:
+    pool = engine.pool
+    snapshot: dict[str, float | int | str | None] = {"pool_class": type(pool).__name__, "read_mode": READ_ENGINE_MODE}
+    if isinstance(pool, QueuePool):
+        snapshot.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": DB_MAX_OVERFLOW,
+            }
+        )
+    snapshot.update(pool_wait_stats.snapshot())
+    return snapshot
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg", "postgres": "postgresql+asyncpg"}
+
+
+def _async_database_url(url: str) -> str:
+    scheme, _, rest = url.partition("://")
+    backend = scheme.split("+", 1)[0]
+    return f"{_ASYNC_DRIVERS[backend]}://{rest}" if backend in _ASYNC_DRIVERS else url
+
+
+# Async sessions for read-heavy endpoints, so their queries yield the event loop
+# instead of blocking it. Same database and pool sizing as the sync engine; an
+# in-memory SQLite URL would give the async engine its own empty database.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "").strip() or _async_database_url(DATABASE_URL)
+
+
+def _async_engine_options() -> dict:
+    if _IS_SQLITE:
+        # aiosqlite runs each connection on its own thread; opening one per session is
+        # cheap for a local file and never hands a connection to a different event loop.
+        return {"poolclass": NullPool, "connect_args": {"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0}}
+    options: dict = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+        "pool_pre_ping": True,
+    }
+    if DB_POOL_RECYCLE_SECONDS:
+        options["pool_recycle"] = DB_POOL_RECYCLE_SECONDS
+    return options
+
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_async_engine_options())
+if _IS_SQLITE:
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_profile)
+query_metrics.install(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Read-only engine for reporting endpoints (history, dashboards, exports, metrics)
+# so they draw from their own pool instead of the slots order placement needs.
+# READ_DATABASE_URL points it at a replica; without one, a file-backed SQLite
+# database gets a second set of connections opened with mode=ro (WAL lets them
+# read while a commit is writing). Anything else falls back to the primary.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "").strip()
+DB_READ_POOL_SIZE = _env_int("DB_READ_POOL_SIZE", DB_POOL_SIZE, minimum=1)
+
+
+def _read_database_url() -> str | None:
+    if READ_DATABASE_URL:
+        return READ_DATABASE_URL
+    if _IS_SQLITE and not _IS_SQLITE_MEMORY and engine.url.database:
+        path = Path(engine.url.database).expanduser().resolve().as_posix()
+        return f"sqlite:///file:{path}?mode=ro&uri=true"
+    return None
+
+
+def _read_engine_options(url: str) -> dict:
+    options: dict = {
+        "pool_size": DB_READ_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    }
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0}
+    else:
+        options["pool_pre_ping"] = True
+        if DB_POOL_RECYCLE_SECONDS:
+            options["pool_recycle"] = DB_POOL_RECYCLE_SECONDS
+    return options
+
+
+def _apply_sqlite_read_profile(dbapi_connection, _connection_record) -> None:
+    # journal_mode and synchronous are writes; a mode=ro connection inherits WAL from the file.
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_profile_pragmas():
+            if name not in {"journal_mode", "synchronous"}:
+                cursor.execute(f"PRAGMA {name}={value}")
+        cursor.execute("PRAGMA query_only=ON")
+    except Exception as exc:
+        logger.warning("db.sqlite_read_profile.failed reason=%s", str(exc))
+    finally:
+        cursor.close()
+
+
+_READ_URL = _read_database_url()
+if _READ_URL is None:
+    READ_ENGINE_MODE = "primary"
+    read_engine = engine
+    async_read_engine = async_engine
+else:
+    READ_ENGINE_MODE = "replica" if READ_DATABASE_URL else "sqlite_ro"
+    read_engine = create_engine(_READ_URL, **_read_engine_options(_READ_URL))
+    if _READ_URL.startswith("sqlite"):
+        async_read_engine = create_async_engine(
+            _async_database_url(_READ_URL),
+            poolclass=NullPool,
+            connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000.0},
+        )
+        event.listen(read_engine, "connect", _apply_sqlite_read_profile)
+        event.listen(async_read_engine.sync_engine, "connect", _apply_sqlite_read_profile)
+    else:
+        async_read_engine = create_async_engine(
+            _async_database_url(_READ_URL),
+            **{key: value for key, value in _read_engine_options(_READ_URL).items() if key != "connect_args"},
+        )
+    query_metrics.install(read_engine)
+    query_metrics.install(async_read_engine.sync_engine)
+    if DB_INDEX_ADVISOR:
+        index_advisor.install(read_engine)
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 class QuoteModel(Base):
@@ -41,6 +322,7 @@ class QuoteModel(Base):
 class HoldingModel(Base):
     __tablename__ = "holdings"
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True, default=1)
     symbol = Column(String, index=True)
     quantity = Column(Integer)
     avg_price = Column(Float)
@@ -50,15 +332,19 @@ class HoldingModel(Base):
 
 class AlertModel(Base):
     __tablename__ = "alerts"
+    __table_args__ = (Index("ix_alerts_active_symbol", "is_active", "symbol"),)
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String, index=True)
     threshold_price = Column(Float)
     alert_type = Column(String)  # ABOVE or BELOW
     is_active = Column(Boolean, default=True)
+    triggered_price = Column(Float, nullable=True)
+    triggered_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 class OrderModel(Base):
     __tablename__ = "orders"
+    __table_args__ = (Index("ix_orders_status", "status"),)
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String, index=True)
     user_id = Column(Integer, nullable=False, index=True, default=1)
@@ -79,8 +365,41 @@ class OrderModel(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class OrderArchiveModel(Base):
+    """Terminal orders moved out of ``orders`` once they pass the archive horizon (see order_archive.py)."""
+
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        Index("ix_orders_archive_user_created_at", "user_id", "created_at"),
+        Index("ix_orders_archive_trace_id", "trace_id"),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    symbol = Column(String)
+    user_id = Column(Integer, nullable=False)
+    quantity = Column(Integer)
+    side = Column(String)
+    order_type = Column(String)
+    validity = Column(String)
+    limit_price = Column(Float, nullable=True)
+    trigger_price = Column(Float, nullable=True)
+    basket_id = Column(Integer, nullable=True)
+    tag = Column(String, nullable=True)
+    price = Column(Float)
+    total = Column(Float)
+    status = Column(String)
+    idempotency_key = Column(String, nullable=True)
+    request_fingerprint = Column(String, nullable=True)
+    trace_id = Column(String, nullable=True)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
 class TriggerOrderModel(Base):
     __tablename__ = "trigger_orders"
+    __table_args__ = (
+        Index("ix_trigger_orders_status_user_symbol", "status", "user_id", "symbol"),
+        Index("ix_trigger_orders_user_created_at", "user_id", "created_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False, index=True, default=1)
     symbol = Column(String, nullable=False, index=True)
@@ -169,8 +488,21 @@ class WalletModel(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+
+# --- Portfolio aggregate (per user, maintained on every fill) ---
+class PortfolioAggregateModel(Base):
+    __tablename__ = "portfolio_aggregates"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, unique=True, index=True)
+    invested_amount = Column(Float, nullable=False, default=0.0)
+    realized_pnl = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class RefreshTokenModel(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_active", "user_id", "revoked_at", "used_at", "expires_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, nullable=False, index=True)
     token_hash = Column(String, unique=True, index=True, nullable=False)
@@ -197,6 +529,7 @@ class PasswordResetTokenModel(Base):
 
 class OTPModel(Base):
     __tablename__ = "otps"
+    __table_args__ = (Index("ix_otps_mobile_created_at", "mobile_number", "created_at"),)
     id = Column(Integer, primary_key=True, index=True)
     mobile_number = Column(String, nullable=False, index=True)
     otp_code = Column(String, nullable=False)
@@ -274,244 +607,32 @@ class ETFModel(Base):
     aum_cr = Column(Float, nullable=True)
     expense_ratio = Column(Float, nullable=True)
 
-Base.metadata.create_all(bind=engine)
-
-
-def _table_has_column(table_name: str, column_name: str) -> bool:
-    inspector = sa_inspect(engine)
-    if table_name not in inspector.get_table_names():
-        return False
-    existing_columns = {column["name"] for column in inspector.get_columns(table_name)}
-    return column_name in existing_columns
-
-
-def _ensure_column(table_name: str, column_name: str, column_ddl: str) -> None:
-    inspector = sa_inspect(engine)
-    if table_name not in inspector.get_table_names():
-        return
-    if _table_has_column(table_name, column_name):
-        return
-    with engine.connect() as connection:
-        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
-        connection.commit()
-
-
-def _ensure_refresh_token_columns() -> None:
-    _ensure_column("refresh_tokens", "user_id", "user_id INTEGER NULL")
-    _ensure_column("refresh_tokens", "token_hash", "token_hash VARCHAR NULL")
-    _ensure_column("refresh_tokens", "expires_at", "expires_at TIMESTAMP NULL")
-    _ensure_column("refresh_tokens", "created_at", "created_at TIMESTAMP NULL")
-    _ensure_column("refresh_tokens", "used_at", "used_at TIMESTAMP NULL")
-    _ensure_column("refresh_tokens", "revoked_at", "revoked_at TIMESTAMP NULL")
-    _ensure_column("refresh_tokens", "replaced_by_hash", "replaced_by_hash VARCHAR NULL")
-    _ensure_column("refresh_tokens", "last_used_at", "last_used_at TIMESTAMP NULL")
-    _ensure_column("refresh_tokens", "client_ip", "client_ip VARCHAR NULL")
-    _ensure_column("refresh_tokens", "device_info", "device_info VARCHAR NULL")
-
-
-def _ensure_user_columns() -> None:
-    _ensure_column("users", "email", "email VARCHAR NULL")
-    _ensure_column("users", "mobile_number", "mobile_number VARCHAR NULL")
-    _ensure_column("users", "password_hash", "password_hash VARCHAR NULL")
-    _ensure_column("users", "created_at", "created_at TIMESTAMP NULL")
-    _ensure_column("users", "token_version", "token_version INTEGER NOT NULL DEFAULT 0")
-
-
-def _ensure_order_columns() -> None:
-    _ensure_column("orders", "user_id", "user_id INTEGER NOT NULL DEFAULT 1")
-    _ensure_column("orders", "order_type", "order_type VARCHAR NULL")
-    _ensure_column("orders", "validity", "validity VARCHAR NULL")
-    _ensure_column("orders", "limit_price", "limit_price FLOAT NULL")
-    _ensure_column("orders", "trigger_price", "trigger_price FLOAT NULL")
-    _ensure_column("orders", "basket_id", "basket_id INTEGER NULL")
-    _ensure_column("orders", "tag", "tag VARCHAR NULL")
-    _ensure_column("orders", "idempotency_key", "idempotency_key VARCHAR NULL")
-    _ensure_column("orders", "request_fingerprint", "request_fingerprint VARCHAR NULL")
-    _ensure_column("orders", "trace_id", "trace_id VARCHAR NULL")
-
-
-def _ensure_order_indexes() -> None:
-    inspector = sa_inspect(engine)
-    if "orders" not in inspector.get_table_names():
-        return
-
-    # Enforce one idempotency key per user while allowing NULL keys.
-    try:
-        with engine.begin() as connection:
-            connection.execute(
-                text(
-                    """
-                    CREATE UNIQUE INDEX IF NOT EXISTS uq_orders_user_idempotency_key
-                    ON orders (user_id, idempotency_key)
-                    WHERE idempotency_key IS NOT NULL
-                    """
-                )
-            )
-    except Exception as exc:
-        logger.warning("db.order_idempotency_index.skipped reason=%s", str(exc))
-
-
-def _active_sqlite_db_path() -> Path | None:
-    if engine.url.get_backend_name() != "sqlite":
-        return None
-
-    raw_path = engine.url.database
-    if not raw_path or raw_path == ":memory:":
-        return None
-
-    return Path(raw_path).expanduser().resolve()
-
-
-def _legacy_sqlite_candidates(active_db_path: Path) -> list[Path]:
-    candidates: list[Path] = []
-    seen: set[Path] = set()
-
-    # Include nearby ancestors (repo root and workspace root) where legacy DBs commonly lived.
-    for ancestor in list(active_db_path.parents)[:4]:
-        candidate = (ancestor / "bysel.db").resolve()
-        if candidate == active_db_path or not candidate.exists() or candidate in seen:
-            continue
-        seen.add(candidate)
-        candidates.append(candidate)
-
-    return candidates
-
-
-def _table_names(conn: sqlite3.Connection) -> set[str]:
-    rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
-    return {row["name"] for row in rows}
+# Tables, columns and indexes are owned by the migrations in database/migrations.
+ensure_schema_current(engine)
 
 
-def _merge_legacy_auth_rows_into_active_db() -> None:
-    active_db_path = _active_sqlite_db_path()
-    if active_db_path is None or not active_db_path.exists():
-        return
-
-    legacy_paths = _legacy_sqlite_candidates(active_db_path)
-    if not legacy_paths:
-        return
-
-    dst_conn = sqlite3.connect(str(active_db_path))
-    dst_conn.row_factory = sqlite3.Row
-
+def get_db():
+    db = SessionLocal()
     try:
-        dst_tables = _table_names(dst_conn)
-        if "users" not in dst_tables or "wallet" not in dst_tables:
-            return
-
-        existing_keys: set[str] = set()
-        for row in dst_conn.execute("SELECT username, email FROM users").fetchall():
-            username = (row["username"] or "").strip().lower()
-            email = (row["email"] or "").strip().lower()
-            if username:
-                existing_keys.add(username)
-            if email:
-                existing_keys.add(email)
-
-        for src_path in legacy_paths:
-            src_conn: sqlite3.Connection | None = None
-            try:
-                src_conn = sqlite3.connect(str(src_path))
-                src_conn.row_factory = sqlite3.Row
-
-                src_tables = _table_names(src_conn)
-                if "users" not in src_tables:
-                    continue
-
-                migrated_users = 0
-                migrated_wallets = 0
-                migrated_user_map: dict[int, int] = {}
-
-                user_rows = src_conn.execute("SELECT * FROM users").fetchall()
-                for user_row in user_rows:
-                    row_keys = set(user_row.keys())
-                    username = (user_row["username"] if "username" in row_keys else "") or ""
-                    email = (user_row["email"] if "email" in row_keys else "") or ""
-                    password_hash = (user_row["password_hash"] if "password_hash" in row_keys else "") or ""
-                    token_version = int((user_row["token_version"] if "token_version" in row_keys else 0) or 0)
-                    created_at = user_row["created_at"] if "created_at" in row_keys else None
-
-                    username = username.strip()
-                    email = email.strip().lower()
-                    password_hash = password_hash.strip()
-
-                    if not username or not email or not password_hash:
-                        continue
-
-                    username_key = username.lower()
-                    email_key = email.lower()
-                    if username_key in existing_keys or email_key in existing_keys:
-                        continue
-
-                    cursor = dst_conn.execute(
-                        """
-                        INSERT INTO users (username, email, password_hash, token_version, created_at)
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        (username, email, password_hash, token_version, created_at),
-                    )
-                    migrated_users += 1
-                    existing_keys.add(username_key)
-                    existing_keys.add(email_key)
-                    migrated_user_map[int(user_row["id"])] = int(cursor.lastrowid)
-
-                if migrated_user_map and "wallet" in src_tables:
-                    for src_user_id, dst_user_id in migrated_user_map.items():
-                        has_wallet = dst_conn.execute(
-                            "SELECT 1 FROM wallet WHERE user_id = ? LIMIT 1",
-                            (dst_user_id,),
-                        ).fetchone()
-                        if has_wallet is not None:
-                            continue
-
-                        wallet_row = src_conn.execute(
-                            "SELECT * FROM wallet WHERE user_id = ? ORDER BY id ASC LIMIT 1",
-                            (src_user_id,),
-                        ).fetchone()
-                        if wallet_row is None:
-                            continue
-
-                        wallet_keys = set(wallet_row.keys())
-                        balance = float((wallet_row["balance"] if "balance" in wallet_keys else 0.0) or 0.0)
-                        updated_at = wallet_row["updated_at"] if "updated_at" in wallet_keys else None
-                        dst_conn.execute(
-                            "INSERT INTO wallet (user_id, balance, updated_at) VALUES (?, ?, ?)",
-                            (dst_user_id, balance, updated_at),
-                        )
-                        migrated_wallets += 1
-
-                if migrated_users > 0 or migrated_wallets > 0:
-                    dst_conn.commit()
-                    logger.warning(
-                        "db.auth_legacy_merge.applied source=%s users=%s wallets=%s target=%s",
-                        str(src_path),
-                        migrated_users,
-                        migrated_wallets,
-                        str(active_db_path),
-                    )
-            except Exception as exc:
-                logger.exception(
-                    "db.auth_legacy_merge.failed source=%s target=%s reason=%s",
-                    str(src_path),
-                    str(active_db_path),
-                    str(exc),
-                )
-            finally:
-                if src_conn is not None:
-                    src_conn.close()
+        yield db
     finally:
-        dst_conn.close()
+        db.close()
 
 
-_ensure_refresh_token_columns()
-_ensure_user_columns()
-_ensure_order_columns()
-_ensure_order_indexes()
-_merge_legacy_auth_rows_into_active_db()
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
-def get_db():
-    db = SessionLocal()
+
+def get_read_db():
+    """Session on the read-only engine, for endpoints that never write."""
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
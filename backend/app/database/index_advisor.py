@@ -0,0 +1,138 @@
+"""
+Development-time index advisor.
+
+Each distinct SELECT/UPDATE/DELETE that runs against SQLite is explained once
+with ``EXPLAIN QUERY PLAN``. A plan step that scans a whole table (``SCAN
+orders`` with no index) on a table holding at least
+``DB_INDEX_ADVISOR_MIN_ROWS`` rows is logged as ``db.index_advisor.full_scan``
+with the plan and statement, so a new endpoint that misses an index shows up
+in the dev log instead of in production latency.
+
+Off unless ``DB_INDEX_ADVISOR=true`` is set explicitly: it runs ``EXPLAIN`` and
+``COUNT(*)`` on the request path, and ``DEBUG`` defaults to true in deployments
+that never set it. Only SQLite plans are understood; the advisor is a no-op on
+other backends.
+"""
+
+import logging
+import os
+import re
+import time
+from threading import Lock
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DB_INDEX_ADVISOR = os.getenv("DB_INDEX_ADVISOR", "false").strip().lower() == "true"
+DB_INDEX_ADVISOR_MIN_ROWS = max(0, int(os.getenv("DB_INDEX_ADVISOR_MIN_ROWS", "1000")))
+DB_INDEX_ADVISOR_MAX_STATEMENTS = 2000
+_ROW_COUNT_TTL_SECONDS = 60.0
+
+# "SCAN orders" / "SCAN TABLE orders" / "SCAN o" (alias). Index-backed scans
+# read "SCAN orders USING [COVERING] INDEX ..." and are not flagged.
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+class IndexAdvisor:
+    def __init__(self, min_rows: int = DB_INDEX_ADVISOR_MIN_ROWS, max_statements: int = DB_INDEX_ADVISOR_MAX_STATEMENTS):
+        self.min_rows = min_rows
+        self.max_statements = max_statements
+        self._lock = Lock()
+        self._seen: set[str] = set()
+        self._row_counts: dict[str, tuple[float, int]] = {}
+        self._findings: dict[str, dict[str, Any]] = {}
+        self._metrics = {"statements_explained": 0, "full_scans": 0, "explain_errors": 0}
+
+    def install(self, engine: Engine) -> None:
+        if engine.dialect.name != "sqlite":
+            return
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def metrics_snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._metrics, "statements_seen": len(self._seen)}
+
+    def findings(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._findings.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._seen.clear()
+            self._row_counts.clear()
+            self._findings.clear()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if executemany or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return
+        with self._lock:
+            if statement in self._seen or len(self._seen) >= self.max_statements:
+                return
+            self._seen.add(statement)
+        self.explain(conn.connection.driver_connection, statement, parameters)
+
+    def explain(self, dbapi_connection, statement: str, parameters: Any = ()) -> Optional[list[str]]:
+        """Explain ``statement`` and record any large full-table scan; returns the plan lines."""
+        try:
+            explain_cursor = dbapi_connection.cursor()
+            try:
+                plan = [row[-1] for row in explain_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())]
+            finally:
+                explain_cursor.close()
+        except Exception as exc:
+            with self._lock:
+                self._metrics["explain_errors"] += 1
+            logger.debug("db.index_advisor.explain_failed reason=%s", str(exc))
+            return None
+
+        with self._lock:
+            self._metrics["statements_explained"] += 1
+        for step in plan:
+            match = _FULL_SCAN.match(str(step).strip())
+            if match is None:
+                continue
+            table = match.group(1)
+            rows = self._row_count(dbapi_connection, table)
+            if rows is None or rows < self.min_rows:
+                continue
+            self._record(table, rows, plan, statement)
+        return plan
+
+    def _row_count(self, dbapi_connection, table: str) -> Optional[int]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._row_counts.get(table)
+            if cached is not None and now - cached[0] < _ROW_COUNT_TTL_SECONDS:
+                return cached[1]
+        try:
+            count_cursor = dbapi_connection.cursor()
+            try:
+                rows = int(count_cursor.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0])
+            finally:
+                count_cursor.close()
+        except Exception:
+            # Aliases and CTE names are not tables; nothing to count.
+            return None
+        with self._lock:
+            self._row_counts[table] = (now, rows)
+        return rows
+
+    def _record(self, table: str, rows: int, plan: list[str], statement: str) -> None:
+        compact = " ".join(statement.split())
+        with self._lock:
+            self._metrics["full_scans"] += 1
+            self._findings[compact] = {"table": table, "rows": rows, "plan": plan, "statement": compact}
+        logger.warning(
+            "db.index_advisor.full_scan table=%s rows=%s plan=%s sql=%s",
+            table,
+            rows,
+            " | ".join(plan),
+            compact[:500],
+        )
+
+
+index_advisor = IndexAdvisor()
@@ -0,0 +1,33 @@
+"""
+Deploy-time migration entry point::
+
+    python -m app.database.migrate upgrade   # apply pending revisions
+    python -m app.database.migrate check     # exit 1 unless at SCHEMA_HEAD
+    python -m app.database.migrate current   # print the stamped revision
+"""
+
+import argparse
+import sys
+from typing import Optional
+
+from .db import engine
+from .schema import SCHEMA_HEAD, current_revision, upgrade
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply or check BYSEL database migrations.")
+    parser.add_argument("action", choices=["upgrade", "check", "current"])
+    args = parser.parse_args(argv)
+
+    if args.action == "upgrade":
+        print(upgrade(engine))
+        return 0
+    revision = current_revision(engine)
+    print(revision)
+    if args.action == "check":
+        return 0 if revision == SCHEMA_HEAD else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""Alembic environment for the BYSEL schema.
+
+Migrations run through ``python -m app.database.migrate upgrade`` (or
+``app.database.schema.upgrade`` on boot), which hands over a live connection;
+there is no ``alembic.ini``.
+"""
+
+from alembic import context
+
+connection = context.config.attributes.get("connection")
+if connection is None:
+    raise RuntimeError("Run migrations with `python -m app.database.migrate upgrade`.")
+
+context.configure(connection=connection, target_metadata=None)
+
+with context.begin_transaction():
+    context.run_migrations()
@@ -0,0 +1,519 @@
+"""Baseline schema.
+
+Creates every table that is missing and brings databases created before
+migrations existed up to the same shape: columns that used to be added by the
+import-time ``_ensure_*`` helpers, plus the idempotency, order-history and
+per-user holdings indexes. Duplicate (user_id, symbol) holdings are merged
+before the unique holdings index is created.
+
+Revision ID: 0001_baseline
+Revises:
+"""
+
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Columns added to tables after they first shipped. Fresh tables already have them.
+_LEGACY_COLUMNS: dict[str, list[tuple[str, str]]] = {
+    "refresh_tokens": [
+        ("user_id", "user_id INTEGER NULL"),
+        ("token_hash", "token_hash VARCHAR NULL"),
+        ("expires_at", "expires_at TIMESTAMP NULL"),
+        ("created_at", "created_at TIMESTAMP NULL"),
+        ("used_at", "used_at TIMESTAMP NULL"),
+        ("revoked_at", "revoked_at TIMESTAMP NULL"),
+        ("replaced_by_hash", "replaced_by_hash VARCHAR NULL"),
+        ("last_used_at", "last_used_at TIMESTAMP NULL"),
+        ("client_ip", "client_ip VARCHAR NULL"),
+        ("device_info", "device_info VARCHAR NULL"),
+    ],
+    "users": [
+        ("email", "email VARCHAR NULL"),
+        ("mobile_number", "mobile_number VARCHAR NULL"),
+        ("password_hash", "password_hash VARCHAR NULL"),
+        ("created_at", "created_at TIMESTAMP NULL"),
+        ("token_version", "token_version INTEGER NOT NULL DEFAULT 0"),
+    ],
+    "orders": [
+        ("user_id", "user_id INTEGER NOT NULL DEFAULT 1"),
+        ("order_type", "order_type VARCHAR NULL"),
+        ("validity", "validity VARCHAR NULL"),
+        ("limit_price", "limit_price FLOAT NULL"),
+        ("trigger_price", "trigger_price FLOAT NULL"),
+        ("basket_id", "basket_id INTEGER NULL"),
+        ("tag", "tag VARCHAR NULL"),
+        ("idempotency_key", "idempotency_key VARCHAR NULL"),
+        ("request_fingerprint", "request_fingerprint VARCHAR NULL"),
+        ("trace_id", "trace_id VARCHAR NULL"),
+    ],
+    # Holdings predate per-user portfolios; existing rows belong to the default user.
+    "holdings": [("user_id", "user_id INTEGER NOT NULL DEFAULT 1")],
+    "alerts": [
+        ("triggered_price", "triggered_price FLOAT NULL"),
+        ("triggered_at", "triggered_at TIMESTAMP NULL"),
+    ],
+}
+
+# (log event, statement). Legacy data may violate a unique index, so a failure
+# is logged and skipped rather than failing the migration.
+_GUARDED_INDEXES: list[tuple[str, str]] = [
+    # Enforce one idempotency key per user while allowing NULL keys.
+    (
+        "db.order_idempotency_index.skipped",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_orders_user_idempotency_key "
+        "ON orders (user_id, idempotency_key) WHERE idempotency_key IS NOT NULL",
+    ),
+    # Keyset pagination of per-user order history walks (user_id, created_at).
+    (
+        "db.order_history_index.skipped",
+        "CREATE INDEX IF NOT EXISTS ix_orders_user_created_at ON orders (user_id, created_at)",
+    ),
+]
+
+# One position row per user and symbol; also serves per-user holdings reads.
+# Fills upsert against it, so duplicates are merged first and a failure aborts
+# the upgrade instead of leaving the index missing.
+_HOLDINGS_USER_SYMBOL_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_holdings_user_symbol ON holdings (user_id, symbol)"
+)
+
+
+def _create_missing_tables(existing: set[str]) -> None:
+    if "alerts" not in existing:
+        op.create_table(
+            "alerts",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("symbol", sa.String(), nullable=True),
+            sa.Column("threshold_price", sa.Float(), nullable=True),
+            sa.Column("alert_type", sa.String(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("triggered_price", sa.Float(), nullable=True),
+            sa.Column("triggered_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_alerts_id", "alerts", ["id"])
+        op.create_index("ix_alerts_symbol", "alerts", ["symbol"])
+    if "basket_order_legs" not in existing:
+        op.create_table(
+            "basket_order_legs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("basket_id", sa.Integer(), nullable=False),
+            sa.Column("symbol", sa.String(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("side", sa.String(), nullable=False),
+            sa.Column("order_type", sa.String(), nullable=False),
+            sa.Column("validity", sa.String(), nullable=False),
+            sa.Column("limit_price", sa.Float(), nullable=True),
+            sa.Column("trigger_price", sa.Float(), nullable=True),
+            sa.Column("tag", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_basket_order_legs_basket_id", "basket_order_legs", ["basket_id"])
+        op.create_index("ix_basket_order_legs_id", "basket_order_legs", ["id"])
+        op.create_index("ix_basket_order_legs_symbol", "basket_order_legs", ["symbol"])
+    if "basket_orders" not in existing:
+        op.create_table(
+            "basket_orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_basket_orders_id", "basket_orders", ["id"])
+        op.create_index("ix_basket_orders_user_id", "basket_orders", ["user_id"])
+    if "etfs" not in existing:
+        op.create_table(
+            "etfs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("symbol", sa.String(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("category", sa.String(), nullable=False),
+            sa.Column("last", sa.Float(), nullable=True),
+            sa.Column("pct_change", sa.Float(), nullable=True),
+            sa.Column("aum_cr", sa.Float(), nullable=True),
+            sa.Column("expense_ratio", sa.Float(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_etfs_category", "etfs", ["category"])
+        op.create_index("ix_etfs_id", "etfs", ["id"])
+        op.create_index("ix_etfs_symbol", "etfs", ["symbol"], unique=True)
+    if "family_members" not in existing:
+        op.create_table(
+            "family_members",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("relation", sa.String(), nullable=False),
+            sa.Column("equity_value", sa.Float(), nullable=False),
+            sa.Column("mutual_fund_value", sa.Float(), nullable=False),
+            sa.Column("us_value", sa.Float(), nullable=False),
+            sa.Column("cash_value", sa.Float(), nullable=False),
+            sa.Column("liabilities_value", sa.Float(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_family_members_id", "family_members", ["id"])
+        op.create_index("ix_family_members_user_id", "family_members", ["user_id"])
+    if "goal_plans" not in existing:
+        op.create_table(
+            "goal_plans",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("goal_name", sa.String(), nullable=False),
+            sa.Column("target_amount", sa.Float(), nullable=False),
+            sa.Column("current_amount", sa.Float(), nullable=False),
+            sa.Column("target_date", sa.String(), nullable=False),
+            sa.Column("monthly_contribution", sa.Float(), nullable=False),
+            sa.Column("risk_profile", sa.String(), nullable=False),
+            sa.Column("linked_instruments", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_goal_plans_id", "goal_plans", ["id"])
+        op.create_index("ix_goal_plans_user_id", "goal_plans", ["user_id"])
+    if "holdings" not in existing:
+        op.create_table(
+            "holdings",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("symbol", sa.String(), nullable=True),
+            sa.Column("quantity", sa.Integer(), nullable=True),
+            sa.Column("avg_price", sa.Float(), nullable=True),
+            sa.Column("last_price", sa.Float(), nullable=True),
+            sa.Column("pnl", sa.Float(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_holdings_id", "holdings", ["id"])
+        op.create_index("ix_holdings_symbol", "holdings", ["symbol"])
+        op.create_index("ix_holdings_user_id", "holdings", ["user_id"])
+    if "ipo_applications" not in existing:
+        op.create_table(
+            "ipo_applications",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("ipo_id", sa.String(), nullable=False),
+            sa.Column("lots", sa.Integer(), nullable=False),
+            sa.Column("bid_price", sa.Float(), nullable=False),
+            sa.Column("upi_id", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_ipo_applications_id", "ipo_applications", ["id"])
+        op.create_index("ix_ipo_applications_ipo_id", "ipo_applications", ["ipo_id"])
+        op.create_index("ix_ipo_applications_user_id", "ipo_applications", ["user_id"])
+    if "ipos" not in existing:
+        op.create_table(
+            "ipos",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("ipo_id", sa.String(), nullable=False),
+            sa.Column("company_name", sa.String(), nullable=False),
+            sa.Column("symbol", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("issue_open_date", sa.String(), nullable=False),
+            sa.Column("issue_close_date", sa.String(), nullable=False),
+            sa.Column("listing_date", sa.String(), nullable=True),
+            sa.Column("price_band_min", sa.Float(), nullable=True),
+            sa.Column("price_band_max", sa.Float(), nullable=True),
+            sa.Column("lot_size", sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_ipos_id", "ipos", ["id"])
+        op.create_index("ix_ipos_ipo_id", "ipos", ["ipo_id"], unique=True)
+        op.create_index("ix_ipos_status", "ipos", ["status"])
+        op.create_index("ix_ipos_symbol", "ipos", ["symbol"])
+    if "mutual_funds" not in existing:
+        op.create_table(
+            "mutual_funds",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("scheme_code", sa.String(), nullable=False),
+            sa.Column("scheme_name", sa.String(), nullable=False),
+            sa.Column("category", sa.String(), nullable=False),
+            sa.Column("nav", sa.Float(), nullable=True),
+            sa.Column("nav_date", sa.String(), nullable=False),
+            sa.Column("returns_1y", sa.Float(), nullable=True),
+            sa.Column("returns_3y", sa.Float(), nullable=True),
+            sa.Column("returns_5y", sa.Float(), nullable=True),
+            sa.Column("fund_house", sa.String(), nullable=True),
+            sa.Column("risk_level", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_mutual_funds_category", "mutual_funds", ["category"])
+        op.create_index("ix_mutual_funds_id", "mutual_funds", ["id"])
+        op.create_index("ix_mutual_funds_scheme_code", "mutual_funds", ["scheme_code"], unique=True)
+    if "orders" not in existing:
+        op.create_table(
+            "orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("symbol", sa.String(), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=True),
+            sa.Column("side", sa.String(), nullable=True),
+            sa.Column("order_type", sa.String(), nullable=True),
+            sa.Column("validity", sa.String(), nullable=True),
+            sa.Column("limit_price", sa.Float(), nullable=True),
+            sa.Column("trigger_price", sa.Float(), nullable=True),
+            sa.Column("basket_id", sa.Integer(), nullable=True),
+            sa.Column("tag", sa.String(), nullable=True),
+            sa.Column("price", sa.Float(), nullable=True),
+            sa.Column("total", sa.Float(), nullable=True),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("idempotency_key", sa.String(), nullable=True),
+            sa.Column("request_fingerprint", sa.String(), nullable=True),
+            sa.Column("trace_id", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_orders_id", "orders", ["id"])
+        op.create_index("ix_orders_idempotency_key", "orders", ["idempotency_key"])
+        op.create_index("ix_orders_request_fingerprint", "orders", ["request_fingerprint"])
+        op.create_index("ix_orders_symbol", "orders", ["symbol"])
+        op.create_index("ix_orders_trace_id", "orders", ["trace_id"])
+        op.create_index("ix_orders_user_id", "orders", ["user_id"])
+    if "otps" not in existing:
+        op.create_table(
+            "otps",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("mobile_number", sa.String(), nullable=False),
+            sa.Column("otp_code", sa.String(), nullable=False),
+            sa.Column("otp_hash", sa.String(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("used_at", sa.DateTime(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_otps_id", "otps", ["id"])
+        op.create_index("ix_otps_mobile_number", "otps", ["mobile_number"])
+        op.create_index("ix_otps_otp_hash", "otps", ["otp_hash"], unique=True)
+    if "password_reset_tokens" not in existing:
+        op.create_table(
+            "password_reset_tokens",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("token_hash", sa.String(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("used_at", sa.DateTime(), nullable=True),
+            sa.Column("revoked_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_password_reset_tokens_id", "password_reset_tokens", ["id"])
+        op.create_index("ix_password_reset_tokens_token_hash", "password_reset_tokens", ["token_hash"], unique=True)
+        op.create_index("ix_password_reset_tokens_user_id", "password_reset_tokens", ["user_id"])
+    if "portfolio_aggregates" not in existing:
+        op.create_table(
+            "portfolio_aggregates",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("invested_amount", sa.Float(), nullable=False),
+            sa.Column("realized_pnl", sa.Float(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_portfolio_aggregates_id", "portfolio_aggregates", ["id"])
+        op.create_index("ix_portfolio_aggregates_user_id", "portfolio_aggregates", ["user_id"], unique=True)
+    if "quotes" not in existing:
+        op.create_table(
+            "quotes",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("symbol", sa.String(), nullable=True),
+            sa.Column("last_price", sa.Float(), nullable=True),
+            sa.Column("pct_change", sa.Float(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_quotes_id", "quotes", ["id"])
+        op.create_index("ix_quotes_symbol", "quotes", ["symbol"], unique=True)
+    if "refresh_tokens" not in existing:
+        op.create_table(
+            "refresh_tokens",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("token_hash", sa.String(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("used_at", sa.DateTime(), nullable=True),
+            sa.Column("last_used_at", sa.DateTime(), nullable=True),
+            sa.Column("revoked_at", sa.DateTime(), nullable=True),
+            sa.Column("replaced_by_hash", sa.String(), nullable=True),
+            sa.Column("client_ip", sa.String(), nullable=True),
+            sa.Column("device_info", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_refresh_tokens_id", "refresh_tokens", ["id"])
+        op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True)
+        op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"])
+    if "sip_plans" not in existing:
+        op.create_table(
+            "sip_plans",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("scheme_code", sa.String(), nullable=False),
+            sa.Column("scheme_name", sa.String(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("frequency", sa.String(), nullable=True),
+            sa.Column("day_of_month", sa.Integer(), nullable=True),
+            sa.Column("next_installment_date", sa.String(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_sip_plans_id", "sip_plans", ["id"])
+        op.create_index("ix_sip_plans_scheme_code", "sip_plans", ["scheme_code"])
+        op.create_index("ix_sip_plans_user_id", "sip_plans", ["user_id"])
+    if "trigger_orders" not in existing:
+        op.create_table(
+            "trigger_orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("symbol", sa.String(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("side", sa.String(), nullable=False),
+            sa.Column("order_type", sa.String(), nullable=False),
+            sa.Column("validity", sa.String(), nullable=False),
+            sa.Column("limit_price", sa.Float(), nullable=True),
+            sa.Column("trigger_price", sa.Float(), nullable=True),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("tag", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_trigger_orders_id", "trigger_orders", ["id"])
+        op.create_index("ix_trigger_orders_symbol", "trigger_orders", ["symbol"])
+        op.create_index("ix_trigger_orders_user_id", "trigger_orders", ["user_id"])
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("mobile_number", sa.String(), nullable=True),
+            sa.Column("password_hash", sa.String(), nullable=False),
+            sa.Column("token_version", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_mobile_number", "users", ["mobile_number"], unique=True)
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+    if "wallet" not in existing:
+        op.create_table(
+            "wallet",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("balance", sa.Float(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_wallet_id", "wallet", ["id"])
+        op.create_index("ix_wallet_user_id", "wallet", ["user_id"])
+
+
+def _add_legacy_columns(inspector) -> None:
+    for table_name, columns in _LEGACY_COLUMNS.items():
+        present = {column["name"] for column in inspector.get_columns(table_name)}
+        for column_name, column_ddl in columns:
+            if column_name not in present:
+                op.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}")
+
+
+def _create_guarded_indexes() -> None:
+    bind = op.get_bind()
+    for event, statement in _GUARDED_INDEXES:
+        try:
+            with bind.begin_nested():
+                bind.execute(sa.text(statement))
+        except Exception as exc:
+            logger.warning("%s reason=%s", event, str(exc))
+
+
+def _merge_duplicate_holdings(present: set[str]) -> int:
+    """Fold duplicate (user_id, symbol) holdings into the oldest row.
+
+    Quantities are summed and the average price is quantity-weighted; the last
+    price comes from the newest row. Returns the number of rows removed.
+    """
+    bind = op.get_bind()
+    groups = bind.execute(
+        sa.text(
+            "SELECT user_id, symbol FROM holdings WHERE symbol IS NOT NULL "
+            "GROUP BY user_id, symbol HAVING COUNT(*) > 1"
+        )
+    ).all()
+    has_avg_price = "avg_price" in present
+    has_last_price = "last_price" in present
+    has_pnl = "pnl" in present
+    removed = 0
+    for user_id, symbol in groups:
+        columns = ["id", "quantity"]
+        columns += [name for name in ("avg_price", "last_price") if name in present]
+        rows = bind.execute(
+            sa.text(
+                f"SELECT {', '.join(columns)} FROM holdings "
+                "WHERE user_id = :user_id AND symbol = :symbol ORDER BY id"
+            ),
+            {"user_id": user_id, "symbol": symbol},
+        ).mappings().all()
+        keeper, duplicates = rows[0], rows[1:]
+        quantity = sum(int(row["quantity"] or 0) for row in rows)
+        values: dict[str, object] = {"id": keeper["id"], "quantity": quantity}
+        assignments = ["quantity = :quantity"]
+        if has_avg_price:
+            cost = sum(int(row["quantity"] or 0) * float(row["avg_price"] or 0.0) for row in rows)
+            values["avg_price"] = cost / quantity if quantity > 0 else keeper["avg_price"]
+            assignments.append("avg_price = :avg_price")
+        if has_last_price:
+            values["last_price"] = next(
+                (row["last_price"] for row in reversed(rows) if row["last_price"] is not None), None
+            )
+            assignments.append("last_price = :last_price")
+        if has_pnl and has_avg_price and has_last_price:
+            values["pnl"] = (
+                (float(values["last_price"]) - float(values["avg_price"] or 0.0)) * quantity
+                if values["last_price"] is not None
+                else None
+            )
+            assignments.append("pnl = :pnl")
+        bind.execute(sa.text(f"UPDATE holdings SET {', '.join(assignments)} WHERE id = :id"), values)
+        for row in duplicates:
+            bind.execute(sa.text("DELETE FROM holdings WHERE id = :id"), {"id": row["id"]})
+        removed += len(duplicates)
+    if removed:
+        logger.warning("db.holdings_duplicates_merged groups=%s rows_removed=%s", len(groups), removed)
+    return removed
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+    _create_missing_tables(existing)
+    # Tables that existed before the baseline may lack later columns.
+    _add_legacy_columns(sa.inspect(op.get_bind()))
+    _create_guarded_indexes()
+    _merge_duplicate_holdings({column["name"] for column in sa.inspect(op.get_bind()).get_columns("holdings")})
+    op.execute(_HOLDINGS_USER_SYMBOL_INDEX)
+
+
+def downgrade() -> None:
+    # The baseline adopts tables that existed before migrations did, so there
+    # is no earlier schema to restore and dropping them would destroy data.
+    # Downgrading past it only removes the revision stamp.
+    logger.warning("db.baseline_downgrade.noop tables_kept=true")
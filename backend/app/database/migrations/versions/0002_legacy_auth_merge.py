@@ -0,0 +1,181 @@
+"""Merge accounts from legacy SQLite files.
+
+Older builds resolved ``bysel.db`` relative to the working directory, so some
+installs ended up with users and wallets in a second database next to the
+repository or workspace root. Copy users (and their first wallet) that are not
+already present by username or email into the active database. This used to
+run on every import of ``database/db.py``; it now runs once.
+
+Revision ID: 0002_legacy_auth_merge
+Revises: 0001_baseline
+"""
+
+import logging
+import sqlite3
+from pathlib import Path
+
+from alembic import op
+
+revision = "0002_legacy_auth_merge"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _legacy_sqlite_candidates(active_db_path: Path) -> list[Path]:
+    candidates: list[Path] = []
+    seen: set[Path] = set()
+
+    # Include nearby ancestors (repo root and workspace root) where legacy DBs commonly lived.
+    for ancestor in list(active_db_path.parents)[:4]:
+        candidate = (ancestor / "bysel.db").resolve()
+        if candidate == active_db_path or not candidate.exists() or candidate in seen:
+            continue
+        seen.add(candidate)
+        candidates.append(candidate)
+
+    return candidates
+
+
+def _table_names(conn: sqlite3.Connection) -> set[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+    return {row["name"] for row in rows}
+
+
+def _merge_legacy_auth_rows(dst_conn: sqlite3.Connection, active_db_path: Path, legacy_paths: list[Path]) -> None:
+    dst_tables = _table_names(dst_conn)
+    if "users" not in dst_tables or "wallet" not in dst_tables:
+        return
+
+    existing_keys: set[str] = set()
+    for row in dst_conn.execute("SELECT username, email FROM users").fetchall():
+        username = (row["username"] or "").strip().lower()
+        email = (row["email"] or "").strip().lower()
+        if username:
+            existing_keys.add(username)
+        if email:
+            existing_keys.add(email)
+
+    for src_path in legacy_paths:
+        src_conn: sqlite3.Connection | None = None
+        # Each source merges atomically; a failed source leaves no partial rows behind.
+        dst_conn.execute("SAVEPOINT legacy_auth_merge")
+        try:
+            src_conn = sqlite3.connect(str(src_path))
+            src_conn.row_factory = sqlite3.Row
+
+            src_tables = _table_names(src_conn)
+            if "users" not in src_tables:
+                continue
+
+            migrated_users = 0
+            migrated_wallets = 0
+            migrated_user_map: dict[int, int] = {}
+
+            user_rows = src_conn.execute("SELECT * FROM users").fetchall()
+            for user_row in user_rows:
+                row_keys = set(user_row.keys())
+                username = (user_row["username"] if "username" in row_keys else "") or ""
+                email = (user_row["email"] if "email" in row_keys else "") or ""
+                password_hash = (user_row["password_hash"] if "password_hash" in row_keys else "") or ""
+                token_version = int((user_row["token_version"] if "token_version" in row_keys else 0) or 0)
+                created_at = user_row["created_at"] if "created_at" in row_keys else None
+
+                username = username.strip()
+                email = email.strip().lower()
+                password_hash = password_hash.strip()
+
+                if not username or not email or not password_hash:
+                    continue
+
+                username_key = username.lower()
+                email_key = email.lower()
+                if username_key in existing_keys or email_key in existing_keys:
+                    continue
+
+                cursor = dst_conn.execute(
+                    """
+                    INSERT INTO users (username, email, password_hash, token_version, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (username, email, password_hash, token_version, created_at),
+                )
+                migrated_users += 1
+                existing_keys.add(username_key)
+                existing_keys.add(email_key)
+                migrated_user_map[int(user_row["id"])] = int(cursor.lastrowid)
+
+            if migrated_user_map and "wallet" in src_tables:
+                for src_user_id, dst_user_id in migrated_user_map.items():
+                    has_wallet = dst_conn.execute(
+                        "SELECT 1 FROM wallet WHERE user_id = ? LIMIT 1",
+                        (dst_user_id,),
+                    ).fetchone()
+                    if has_wallet is not None:
+                        continue
+
+                    wallet_row = src_conn.execute(
+                        "SELECT * FROM wallet WHERE user_id = ? ORDER BY id ASC LIMIT 1",
+                        (src_user_id,),
+                    ).fetchone()
+                    if wallet_row is None:
+                        continue
+
+                    wallet_keys = set(wallet_row.keys())
+                    balance = float((wallet_row["balance"] if "balance" in wallet_keys else 0.0) or 0.0)
+                    updated_at = wallet_row["updated_at"] if "updated_at" in wallet_keys else None
+                    dst_conn.execute(
+                        "INSERT INTO wallet (user_id, balance, updated_at) VALUES (?, ?, ?)",
+                        (dst_user_id, balance, updated_at),
+                    )
+                    migrated_wallets += 1
+
+            if migrated_users > 0 or migrated_wallets > 0:
+                logger.warning(
+                    "db.auth_legacy_merge.applied source=%s users=%s wallets=%s target=%s",
+                    str(src_path),
+                    migrated_users,
+                    migrated_wallets,
+                    str(active_db_path),
+                )
+        except Exception as exc:
+            dst_conn.execute("ROLLBACK TO SAVEPOINT legacy_auth_merge")
+            logger.exception(
+                "db.auth_legacy_merge.failed source=%s target=%s reason=%s",
+                str(src_path),
+                str(active_db_path),
+                str(exc),
+            )
+        finally:
+            dst_conn.execute("RELEASE SAVEPOINT legacy_auth_merge")
+            if src_conn is not None:
+                src_conn.close()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    raw_path = bind.engine.url.database
+    if not raw_path or raw_path == ":memory:":
+        return
+
+    active_db_path = Path(raw_path).expanduser().resolve()
+    legacy_paths = _legacy_sqlite_candidates(active_db_path)
+    if not legacy_paths:
+        return
+
+    # Reuse the migration's connection so the merge commits with the revision stamp.
+    dst_conn = bind.connection.driver_connection
+    previous_row_factory = dst_conn.row_factory
+    dst_conn.row_factory = sqlite3.Row
+    try:
+        _merge_legacy_auth_rows(dst_conn, active_db_path, legacy_paths)
+    finally:
+        dst_conn.row_factory = previous_row_factory
+
+
+def downgrade() -> None:
+    pass
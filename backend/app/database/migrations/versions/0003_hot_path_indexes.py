@@ -0,0 +1,39 @@
+"""Composite indexes for hot access paths.
+
+- trigger_orders (status, user_id, symbol): pending-trigger loads and per-user
+  status filters; (user_id, created_at): the trigger list endpoint.
+- orders (status): order outcome counts in /metrics/slo.
+- alerts (is_active, symbol): active-alert sweeps by symbol.
+- refresh_tokens (user_id, revoked_at, used_at, expires_at): active-session
+  lookups and the per-user session cap.
+- otps (mobile_number, created_at): OTP rate limiting and latest-OTP lookup.
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_legacy_auth_merge
+"""
+
+from alembic import op
+
+revision = "0003_hot_path_indexes"
+down_revision = "0002_legacy_auth_merge"
+branch_labels = None
+depends_on = None
+
+_INDEXES: list[tuple[str, str, list[str]]] = [
+    ("ix_trigger_orders_status_user_symbol", "trigger_orders", ["status", "user_id", "symbol"]),
+    ("ix_trigger_orders_user_created_at", "trigger_orders", ["user_id", "created_at"]),
+    ("ix_orders_status", "orders", ["status"]),
+    ("ix_alerts_active_symbol", "alerts", ["is_active", "symbol"]),
+    ("ix_refresh_tokens_user_active", "refresh_tokens", ["user_id", "revoked_at", "used_at", "expires_at"]),
+    ("ix_otps_mobile_created_at", "otps", ["mobile_number", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in _INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _columns in reversed(_INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,53 @@
+"""Cold storage for old orders.
+
+``orders_archive`` mirrors ``orders`` (ids preserved) plus ``archived_at``.
+The archive job moves terminal orders past ``ORDER_ARCHIVE_AFTER_DAYS`` into
+it, so ``orders`` only holds the recent window that hot paths touch.
+
+Revision ID: 0004_orders_archive
+Revises: 0003_hot_path_indexes
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0004_orders_archive"
+down_revision = "0003_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if "orders_archive" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "orders_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("symbol", sa.String(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=True),
+        sa.Column("side", sa.String(), nullable=True),
+        sa.Column("order_type", sa.String(), nullable=True),
+        sa.Column("validity", sa.String(), nullable=True),
+        sa.Column("limit_price", sa.Float(), nullable=True),
+        sa.Column("trigger_price", sa.Float(), nullable=True),
+        sa.Column("basket_id", sa.Integer(), nullable=True),
+        sa.Column("tag", sa.String(), nullable=True),
+        sa.Column("price", sa.Float(), nullable=True),
+        sa.Column("total", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("idempotency_key", sa.String(), nullable=True),
+        sa.Column("request_fingerprint", sa.String(), nullable=True),
+        sa.Column("trace_id", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_orders_archive_user_created_at", "orders_archive", ["user_id", "created_at"])
+    op.create_index("ix_orders_archive_trace_id", "orders_archive", ["trace_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_archive_trace_id", table_name="orders_archive")
+    op.drop_index("ix_orders_archive_user_created_at", table_name="orders_archive")
+    op.drop_table("orders_archive")
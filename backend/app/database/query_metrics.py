@@ -0,0 +1,255 @@
+"""
+SQL statement timing.
+
+Cursor-execute hooks time every statement and fold it into a per-template
+record, where the template is the SQL with literals and expanded ``IN`` lists
+collapsed. Each template gets a count, total and max time, a fixed-bucket
+latency histogram, and the rows the driver reported. SQLite only reports
+rows for DML; Postgres reports them for SELECT too.
+
+The HTTP middleware opens a request scope, so statements are also charged to
+the route. A statement slower than ``DB_SLOW_QUERY_MS`` is logged with the
+request's trace id. A request that runs the same template at least
+``DB_N_PLUS_ONE_THRESHOLD`` times is logged as a likely N+1. Statements from
+background workers (trigger engine, order executor) have no request scope and
+are counted under ``<background>``. Requests that matched no route (404 scans)
+are counted under ``<unmatched>``, so raw paths never become keys, and routes
+past the cap share ``<other>``.
+"""
+
+import logging
+import os
+import re
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from threading import Lock
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+DB_QUERY_TOP_N = max(1, int(os.getenv("DB_QUERY_TOP_N", "10")))
+DB_N_PLUS_ONE_THRESHOLD = max(2, int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "10")))
+DB_QUERY_METRICS_MAX_TEMPLATES = 500
+DB_QUERY_METRICS_MAX_ROUTES = 300
+HISTOGRAM_BOUNDS_MS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0)
+BACKGROUND_ROUTE = "<background>"
+UNMATCHED_ROUTE = "<unmatched>"
+_OVERFLOW_TEMPLATE = "<other>"
+_OVERFLOW_ROUTE = "<other>"
+_START_KEY = "query_metrics_started"
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|:\w+|\$\d+)\s*,)+\s*(?:\?|%s|:\w+|\$\d+)\s*\)")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_template(statement: str) -> str:
+    """SQL with whitespace, literals and expanded IN lists normalized."""
+    template = _WHITESPACE.sub(" ", statement).strip()
+    template = _STRING_LITERAL.sub("?", template)
+    template = _NUMBER_LITERAL.sub("?", template)
+    return _IN_LIST.sub("(?...)", template)
+
+
+@dataclass
+class RequestQueryScope:
+    trace_id: str
+    queries: int = 0
+    db_ms: float = 0.0
+    templates: Counter = field(default_factory=Counter)
+
+
+@dataclass
+class _TemplateStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(HISTOGRAM_BOUNDS_MS) + 1))
+
+
+@dataclass
+class _RouteStats:
+    requests: int = 0
+    queries: int = 0
+    db_ms: float = 0.0
+    max_queries: int = 0
+    max_db_ms: float = 0.0
+
+
+_current_scope: ContextVar[Optional[RequestQueryScope]] = ContextVar("db_query_scope", default=None)
+
+
+class QueryMetrics:
+    def __init__(
+        self,
+        slow_query_ms: float = DB_SLOW_QUERY_MS,
+        n_plus_one_threshold: int = DB_N_PLUS_ONE_THRESHOLD,
+        max_templates: int = DB_QUERY_METRICS_MAX_TEMPLATES,
+        max_routes: int = DB_QUERY_METRICS_MAX_ROUTES,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.max_templates = max_templates
+        self.max_routes = max_routes
+        self._lock = Lock()
+        self._templates: dict[str, _TemplateStats] = {}
+        self._routes: dict[str, _RouteStats] = {}
+        self._template_cache: dict[str, str] = {}
+        self._totals = {"queries": 0, "db_ms": 0.0, "slow_queries": 0, "n_plus_one": 0}
+
+    def install(self, engine: Engine) -> None:
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    # -- request scope -------------------------------------------------
+
+    def start_request(self, trace_id: str) -> tuple[RequestQueryScope, Token]:
+        scope = RequestQueryScope(trace_id=trace_id)
+        return scope, _current_scope.set(scope)
+
+    def finish_request(self, scope: RequestQueryScope, token: Token, route: str) -> None:
+        _current_scope.reset(token)
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                if len(self._routes) >= self.max_routes:
+                    route = _OVERFLOW_ROUTE
+                stats = self._routes.setdefault(route, _RouteStats())
+            stats.requests += 1
+            stats.queries += scope.queries
+            stats.db_ms += scope.db_ms
+            stats.max_queries = max(stats.max_queries, scope.queries)
+            stats.max_db_ms = max(stats.max_db_ms, scope.db_ms)
+        if not scope.templates:
+            return
+        template, repeats = scope.templates.most_common(1)[0]
+        if repeats >= self.n_plus_one_threshold:
+            with self._lock:
+                self._totals["n_plus_one"] += 1
+            logger.warning(
+                "db.n_plus_one trace_id=%s route=%s repeats=%s sql=%s",
+                scope.trace_id,
+                route,
+                repeats,
+                template[:300],
+            )
+
+    # -- cursor hooks --------------------------------------------------
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault(_START_KEY, []).append(perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get(_START_KEY)
+        if not started:
+            return
+        duration_ms = (perf_counter() - started.pop()) * 1000.0
+        rowcount = getattr(cursor, "rowcount", -1)
+        self.record(statement, duration_ms, rowcount if isinstance(rowcount, int) else -1)
+
+    def record(self, statement: str, duration_ms: float, rowcount: int = -1) -> None:
+        template = self._template_cache.get(statement)
+        if template is None:
+            template = statement_template(statement)
+            if len(self._template_cache) < self.max_templates * 4:
+                self._template_cache[statement] = template
+
+        scope = _current_scope.get()
+        with self._lock:
+            stats = self._templates.get(template)
+            if stats is None:
+                if len(self._templates) >= self.max_templates:
+                    template = _OVERFLOW_TEMPLATE
+                stats = self._templates.setdefault(template, _TemplateStats())
+            stats.count += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            if rowcount > 0:
+                stats.rows += rowcount
+            stats.buckets[bisect_left(HISTOGRAM_BOUNDS_MS, duration_ms)] += 1
+            self._totals["queries"] += 1
+            self._totals["db_ms"] += duration_ms
+            if scope is None:
+                background = self._routes.setdefault(BACKGROUND_ROUTE, _RouteStats())
+                background.queries += 1
+                background.db_ms += duration_ms
+            slow = duration_ms >= self.slow_query_ms
+            if slow:
+                self._totals["slow_queries"] += 1
+
+        if scope is not None:
+            scope.queries += 1
+            scope.db_ms += duration_ms
+            scope.templates[template] += 1
+        if slow:
+            logger.warning(
+                "db.slow_query trace_id=%s duration_ms=%.1f rows=%s sql=%s",
+                scope.trace_id if scope is not None else "-",
+                duration_ms,
+                rowcount,
+                template[:500],
+            )
+
+    # -- snapshots -----------------------------------------------------
+
+    def reset(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self._routes.clear()
+            self._totals = {"queries": 0, "db_ms": 0.0, "slow_queries": 0, "n_plus_one": 0}
+
+    def totals_snapshot(self) -> dict[str, float | int]:
+        with self._lock:
+            totals = dict(self._totals)
+        totals["db_ms"] = round(totals["db_ms"], 2)
+        return totals
+
+    def top_statements(self, limit: int = DB_QUERY_TOP_N) -> list[dict]:
+        """Templates ordered by total time spent, slowest first."""
+        with self._lock:
+            ranked = sorted(self._templates.items(), key=lambda item: item[1].total_ms, reverse=True)[:limit]
+            return [
+                {
+                    "statement": template,
+                    "count": stats.count,
+                    "totalMs": round(stats.total_ms, 2),
+                    "avgMs": round(stats.total_ms / stats.count, 3) if stats.count else 0.0,
+                    "maxMs": round(stats.max_ms, 2),
+                    "rows": stats.rows,
+                    "histogramMs": {
+                        **{f"le_{bound:g}": count for bound, count in zip(HISTOGRAM_BOUNDS_MS, stats.buckets)},
+                        "gt_max": stats.buckets[-1],
+                    },
+                }
+                for template, stats in ranked
+            ]
+
+    def route_snapshot(self) -> list[dict]:
+        """Per-route DB time, heaviest first."""
+        with self._lock:
+            ranked = sorted(self._routes.items(), key=lambda item: item[1].db_ms, reverse=True)
+            return [
+                {
+                    "route": route,
+                    "requests": stats.requests,
+                    "queries": stats.queries,
+                    "dbMs": round(stats.db_ms, 2),
+                    "avgQueriesPerRequest": round(stats.queries / stats.requests, 2) if stats.requests else None,
+                    "avgDbMsPerRequest": round(stats.db_ms / stats.requests, 2) if stats.requests else None,
+                    "maxQueriesPerRequest": stats.max_queries,
+                    "maxDbMsPerRequest": round(stats.max_db_ms, 2),
+                }
+                for route, stats in ranked
+            ]
+
+
+query_metrics = QueryMetrics()
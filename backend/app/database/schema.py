@@ -0,0 +1,80 @@
+"""
+Versioned schema migrations.
+
+The schema is owned by the Alembic revisions in ``migrations/versions``. A
+deploy step applies them once::
+
+    python -m app.database.migrate upgrade
+
+and every process only compares the stamped revision with ``SCHEMA_HEAD`` when
+``database/db.py`` is imported, a single-row read instead of inspecting tables
+and legacy files. SQLite databases (local development, tests) are upgraded in
+place on a mismatch unless ``DB_AUTO_MIGRATE`` is false; other backends only
+log the mismatch so several workers never race a migration.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().with_name("migrations")
+# Newest revision in MIGRATIONS_DIR; bump together with each new revision file.
+SCHEMA_HEAD = "0004_orders_archive"
+
+
+def _auto_migrate_enabled(engine: Engine) -> bool:
+    raw = os.getenv("DB_AUTO_MIGRATE", "").strip().lower()
+    if raw:
+        return raw in {"1", "true", "yes", "on"}
+    return engine.dialect.name == "sqlite"
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    """Revision stamped in ``alembic_version``, or None for an unmigrated database."""
+    try:
+        with engine.connect() as connection:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except Exception:
+        return None
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    return config
+
+
+def upgrade(engine: Engine, revision: str = "head") -> Optional[str]:
+    """Apply pending revisions in one transaction and return the resulting revision."""
+    from alembic import command
+
+    config = _alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+    return current_revision(engine)
+
+
+def ensure_schema_current(engine: Engine) -> Optional[str]:
+    """Boot-time check: upgrade or report a database that is not at ``SCHEMA_HEAD``."""
+    revision = current_revision(engine)
+    if revision == SCHEMA_HEAD:
+        return revision
+    if not _auto_migrate_enabled(engine):
+        logger.error(
+            "db.schema.outdated current=%s expected=%s hint='python -m app.database.migrate upgrade'",
+            revision,
+            SCHEMA_HEAD,
+        )
+        return revision
+    upgraded = upgrade(engine)
+    logger.info("db.schema.migrated from=%s to=%s", revision, upgraded)
+    return upgraded
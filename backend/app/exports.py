@@ -0,0 +1,266 @@
+"""
+Streaming exports of holdings, orders and trigger history.
+
+Rows are read through a server-side cursor (``yield_per``) and encoded one
+batch of ``EXPORT_BATCH_SIZE`` rows at a time, so memory is bounded by the
+batch size rather than by the number of rows exported. CSV is emitted as text
+chunks per batch; Parquet writes one row group per batch and hands back the
+bytes as soon as each group is written. Parquet needs ``pyarrow``.
+"""
+
+import csv
+import io
+import logging
+import os
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .database.db import HoldingModel, OrderArchiveModel, OrderModel, TriggerOrderModel
+from .market_data import fetch_quotes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _PARQUET_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    _PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = max(1, int(os.getenv("EXPORT_BATCH_SIZE", "1000")))
+EXPORT_FORMATS = ("csv", "parquet")
+
+Row = tuple
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    name: str
+    kind: str  # int | float | str | datetime
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    name: str
+    model: type
+    source: tuple
+    columns: tuple[ExportColumn, ...]
+    # Optional per-batch transform from source rows to output rows.
+    transform: Optional[Callable[[list[Row]], list[Row]]] = None
+    # Cold table with the same columns, exported ahead of ``model``.
+    archive_model: Optional[type] = None
+
+
+def _revalue_holdings(rows: list[Row]) -> list[Row]:
+    """Price one batch of holdings from a single quote fetch."""
+    quotes = fetch_quotes([symbol for symbol, *_ in rows]) if rows else []
+    live = {(quote.get("symbol") or "").upper(): float(quote.get("last") or 0.0) for quote in quotes}
+    priced = []
+    for symbol, quantity, avg_price, last_price in rows:
+        quantity = int(quantity or 0)
+        avg_price = float(avg_price or 0.0)
+        last = live.get((symbol or "").upper()) or float(last_price or 0.0)
+        value = last * quantity
+        invested = avg_price * quantity
+        pnl = value - invested
+        pnl_pct = round((pnl / invested) * 100, 2) if invested > 0 else 0.0
+        priced.append((symbol, quantity, round(avg_price, 2), round(last, 2), round(value, 2), round(pnl, 2), pnl_pct))
+    return priced
+
+
+EXPORT_DATASETS: dict[str, ExportDataset] = {
+    "holdings": ExportDataset(
+        name="holdings",
+        model=HoldingModel,
+        source=(HoldingModel.symbol, HoldingModel.quantity, HoldingModel.avg_price, HoldingModel.last_price),
+        columns=(
+            ExportColumn("symbol", "str"),
+            ExportColumn("quantity", "int"),
+            ExportColumn("avg_price", "float"),
+            ExportColumn("last_price", "float"),
+            ExportColumn("value", "float"),
+            ExportColumn("pnl", "float"),
+            ExportColumn("pnl_pct", "float"),
+        ),
+        transform=_revalue_holdings,
+    ),
+    "orders": ExportDataset(
+        name="orders",
+        model=OrderModel,
+        archive_model=OrderArchiveModel,
+        source=(
+            OrderModel.id,
+            OrderModel.created_at,
+            OrderModel.symbol,
+            OrderModel.side,
+            OrderModel.quantity,
+            OrderModel.order_type,
+            OrderModel.validity,
+            OrderModel.price,
+            OrderModel.total,
+            OrderModel.status,
+            OrderModel.basket_id,
+            OrderModel.trace_id,
+        ),
+        columns=(
+            ExportColumn("id", "int"),
+            ExportColumn("created_at", "datetime"),
+            ExportColumn("symbol", "str"),
+            ExportColumn("side", "str"),
+            ExportColumn("quantity", "int"),
+            ExportColumn("order_type", "str"),
+            ExportColumn("validity", "str"),
+            ExportColumn("price", "float"),
+            ExportColumn("total", "float"),
+            ExportColumn("status", "str"),
+            ExportColumn("basket_id", "int"),
+            ExportColumn("trace_id", "str"),
+        ),
+    ),
+    "triggers": ExportDataset(
+        name="triggers",
+        model=TriggerOrderModel,
+        source=(
+            TriggerOrderModel.id,
+            TriggerOrderModel.created_at,
+            TriggerOrderModel.updated_at,
+            TriggerOrderModel.symbol,
+            TriggerOrderModel.side,
+            TriggerOrderModel.quantity,
+            TriggerOrderModel.order_type,
+            TriggerOrderModel.validity,
+            TriggerOrderModel.limit_price,
+            TriggerOrderModel.trigger_price,
+            TriggerOrderModel.status,
+            TriggerOrderModel.tag,
+        ),
+        columns=(
+            ExportColumn("id", "int"),
+            ExportColumn("created_at", "datetime"),
+            ExportColumn("updated_at", "datetime"),
+            ExportColumn("symbol", "str"),
+            ExportColumn("side", "str"),
+            ExportColumn("quantity", "int"),
+            ExportColumn("order_type", "str"),
+            ExportColumn("validity", "str"),
+            ExportColumn("limit_price", "float"),
+            ExportColumn("trigger_price", "float"),
+            ExportColumn("status", "str"),
+            ExportColumn("tag", "str"),
+        ),
+    ),
+}
+
+
+def parquet_available() -> bool:
+    return _PARQUET_AVAILABLE
+
+
+def iter_export_batches(
+    db: Session, dataset: ExportDataset, user_id: int, batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[list[Row]]:
+    """The user's rows of ``dataset`` in id order, one cursor batch at a time.
+
+    Datasets with an ``archive_model`` export the archived rows first; they are the
+    oldest, so the output stays in id order.
+    """
+    sources = [(dataset.model, dataset.source)]
+    if dataset.archive_model is not None:
+        archive_source = tuple(getattr(dataset.archive_model, column.key) for column in dataset.source)
+        sources.insert(0, (dataset.archive_model, archive_source))
+    for model, source in sources:
+        statement = (
+            select(*source)
+            .where(model.user_id == user_id)
+            .order_by(model.id.asc())
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in db.execute(statement).partitions():
+            rows = [tuple(row) for row in partition]
+            yield dataset.transform(rows) if dataset.transform else rows
+
+
+def stream_csv(
+    batches: Iterable[list[Row]],
+    header: Iterable[str],
+    footer: Optional[Callable[[], list[list]]] = None,
+) -> Iterator[str]:
+    """Encode batches as CSV, yielding one text chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(list(header))
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if footer is not None:
+        writer.writerows(footer())
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands its bytes back to the caller after each row group."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_ARROW_TYPES = {
+    "int": lambda: pa.int64(),
+    "float": lambda: pa.float64(),
+    "str": lambda: pa.string(),
+    "datetime": lambda: pa.timestamp("us"),
+}
+
+
+def stream_parquet(batches: Iterable[list[Row]], columns: Iterable[ExportColumn]) -> Iterator[bytes]:
+    """Encode batches as a Parquet file, yielding bytes after every row group."""
+    if not _PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet export requires pyarrow")
+    columns = list(columns)
+    schema = pa.schema([(column.name, _ARROW_TYPES[column.kind]()) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in batches:
+            if not rows:
+                continue
+            arrays = [
+                pa.array([row[index] for row in rows], type=schema.field(index).type)
+                for index in range(len(columns))
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    tail = sink.drain()
+    if tail:
+        yield tail
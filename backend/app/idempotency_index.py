@@ -0,0 +1,113 @@
+"""
+Bounded in-memory index of recent idempotent order submissions.
+
+Retried order requests are answered from here without a database round trip.
+Entries are keyed by ``(user_id, idempotency_key)`` and expire after a fixed
+TTL; the unique index ``uq_orders_user_idempotency_key`` on ``orders`` stays the
+source of truth, so a miss simply falls back to the database lookup.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+ORDER_IDEMPOTENCY_CACHE_TTL_SECONDS = int(os.getenv("ORDER_IDEMPOTENCY_CACHE_TTL_SECONDS", "900"))
+ORDER_IDEMPOTENCY_CACHE_MAX_ENTRIES = int(os.getenv("ORDER_IDEMPOTENCY_CACHE_MAX_ENTRIES", "10000"))
+
+
+@dataclass(frozen=True)
+class IdempotencyRecord:
+    """The persisted outcome of an idempotent order, shaped like the ``OrderModel`` fields replay needs."""
+
+    id: int
+    idempotency_key: str
+    request_fingerprint: str
+    status: str
+    price: float
+    total: float
+    trace_id: Optional[str]
+    symbol: str
+    quantity: int
+    side: str
+
+    @classmethod
+    def from_order_row(cls, row) -> "IdempotencyRecord":
+        return cls(
+            id=int(row.id),
+            idempotency_key=row.idempotency_key,
+            request_fingerprint=row.request_fingerprint or "",
+            status=row.status,
+            price=float(row.price or 0.0),
+            total=float(row.total or 0.0),
+            trace_id=row.trace_id,
+            symbol=row.symbol,
+            quantity=int(row.quantity or 0),
+            side=row.side,
+        )
+
+
+class IdempotencyIndex:
+    """TTL- and size-bounded map of ``(user_id, idempotency_key)`` to ``IdempotencyRecord``."""
+
+    def __init__(
+        self,
+        ttl_seconds: int = ORDER_IDEMPOTENCY_CACHE_TTL_SECONDS,
+        max_entries: int = ORDER_IDEMPOTENCY_CACHE_MAX_ENTRIES,
+    ):
+        # Insertion order equals expiry order because every entry shares one TTL.
+        self._entries: "OrderedDict[tuple[int, str], tuple[float, IdempotencyRecord]]" = OrderedDict()
+        self._ttl = max(1, int(ttl_seconds))
+        self._max_entries = max(1, int(max_entries))
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _evict_expired_locked(self, now: float) -> None:
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._entries.pop(key, None)
+
+    def get(self, user_id: int, idempotency_key: str) -> Optional[IdempotencyRecord]:
+        now = time.time()
+        with self._lock:
+            self._evict_expired_locked(now)
+            entry = self._entries.get((int(user_id), idempotency_key))
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            return entry[1]
+
+    def put(self, user_id: int, record: IdempotencyRecord) -> None:
+        now = time.time()
+        key = (int(user_id), record.idempotency_key)
+        with self._lock:
+            self._evict_expired_locked(now)
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self._ttl, record)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id: int, idempotency_key: str) -> None:
+        with self._lock:
+            self._entries.pop((int(user_id), idempotency_key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def metrics_snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+
+order_idempotency_index = IdempotencyIndex()
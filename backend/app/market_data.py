@@ -14,7 +14,7 @@ import urllib.request
 import json as _json
 from datetime import datetime
 from threading import Lock
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 
 logger = logging.getLogger(__name__)
 
@@ -653,6 +653,39 @@ _quote_cache = QuoteCache(
 )
 
 
+QuoteListener = Callable[[str, dict], None]
+_quote_listeners: List[QuoteListener] = []
+_quote_listeners_lock = Lock()
+
+
+def add_quote_listener(listener: QuoteListener) -> None:
+    """Register a callback invoked with (symbol, quote) whenever a fresh quote is fetched.
+
+    Listeners run on the fetching thread, so they must be cheap (e.g. enqueue work).
+    """
+    with _quote_listeners_lock:
+        if listener not in _quote_listeners:
+            _quote_listeners.append(listener)
+
+
+def remove_quote_listener(listener: QuoteListener) -> None:
+    with _quote_listeners_lock:
+        if listener in _quote_listeners:
+            _quote_listeners.remove(listener)
+
+
+def _publish_quote(symbol: str, quote: dict) -> None:
+    """Cache a freshly fetched quote and notify quote listeners."""
+    _quote_cache.put(symbol, quote)
+    with _quote_listeners_lock:
+        listeners = list(_quote_listeners)
+    for listener in listeners:
+        try:
+            listener(symbol, quote)
+        except Exception as e:
+            logger.warning(f"Quote listener failed for {symbol}: {e}")
+
+
 def _yf_ticker(symbol: str) -> str:
     """Convert symbol input into a Yahoo Finance ticker with NSE/BSE support."""
     raw_symbol = (symbol or "").strip().upper()
@@ -805,7 +838,7 @@ def fetch_quote(symbol: str) -> dict:
             "timestamp": int(datetime.utcnow().timestamp() * 1000),
         }
 
-        _quote_cache.put(symbol, quote)
+        _publish_quote(symbol, quote)
         logger.info(f"Fetched live quote: {symbol} = ₹{last_price:.2f} ({pct_change:+.2f}%)")
         return quote
 
@@ -900,7 +933,7 @@ def _fetch_batch_quotes(batch_symbols: List[str]) -> dict:
                         "twoHundredDayAverage": None,
                         "timestamp": int(datetime.utcnow().timestamp() * 1000),
                     }
-                    _quote_cache.put(symbol, quote)
+                    _publish_quote(symbol, quote)
                     results[symbol] = quote
             except Exception as e:
                 logger.warning(f"Parse failed for {symbol} in batch: {e}")
@@ -0,0 +1,419 @@
+"""
+Paper-trading matching engine for resting limit and stop orders.
+
+Each symbol keeps four heaps of resting orders:
+
+* bids - LIMIT BUY, best (highest) limit first, then oldest
+* asks - LIMIT SELL, best (lowest) limit first, then oldest
+* buy stops - SL/SLM BUY, lowest trigger first (fires once price >= trigger)
+* sell stops - SL/SLM SELL, highest trigger first (fires once price <= trigger)
+
+A tick first advances the expiry scheduler, then fires crossed stops (SLM
+becomes a market order, SL joins the limit book at its limit price) and
+finally fills crossed limits by price-time priority. A tick may carry the
+traded volume; fills on each side are capped by it, so large orders fill
+partially across ticks. Without a volume the tick is treated as unlimited
+liquidity. Fill prices follow the live order path: limits at their limit
+price, market and SLM orders at the tick price.
+
+IOC orders live for exactly one tick of their symbol and any remainder is
+cancelled. DAY orders expire at the close of the trading session they were
+placed in (the next session if placed after hours, per the trading calendar),
+and GTC orders rest until filled or cancelled.
+
+The engine is pure in-memory state with no database or network access, so a
+full day of ticks can be replayed for backtests (see ``replay``). A tick for a
+symbol whose book is not crossed costs a few comparisons against the heap tops.
+
+The module-level ``matching_engine`` can subscribe to the quote tick stream
+(``market_data.add_quote_listener``) between ``start`` and ``stop``; the app
+only does so when MATCHING_ENGINE_ENABLED is set (off by default). Live
+LIMIT/SL/SLM orders still go through the persisted trigger path
+(``trigger_book`` and the trigger engine), so nothing submits to the live
+engine yet; it exists for backtests and for paper-trading experiments that
+submit orders and register a fill listener themselves.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import RLock
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from .market_data import add_quote_listener, remove_quote_listener
+from .trading_calendar import IST, trading_calendar
+
+logger = logging.getLogger(__name__)
+
+
+def _is_truthy_env(value: str | None) -> bool:
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+MATCHING_ENGINE_ENABLED = _is_truthy_env(os.getenv("MATCHING_ENGINE_ENABLED", "false"))
+
+OPEN = "OPEN"
+PARTIALLY_FILLED = "PARTIALLY_FILLED"
+FILLED = "FILLED"
+CANCELLED = "CANCELLED"
+EXPIRED = "EXPIRED"
+_TERMINAL_STATUSES = {FILLED, CANCELLED, EXPIRED}
+
+
+def session_close_after(timestamp: float) -> float:
+    """Epoch seconds of the first NSE session close at or after ``timestamp``."""
+    return trading_calendar.next_close(timestamp).close_ts
+
+
+class Tick(NamedTuple):
+    timestamp: float
+    symbol: str
+    price: float
+    volume: Optional[int] = None
+
+
+@dataclass
+class RestingOrder:
+    order_id: int
+    symbol: str
+    side: str  # BUY | SELL
+    order_type: str  # LIMIT | SL | SLM
+    quantity: int
+    limit_price: Optional[float] = None
+    trigger_price: Optional[float] = None
+    validity: str = "DAY"  # DAY | IOC | GTC
+    user_id: int = 1
+    placed_at: Optional[float] = None  # epoch seconds; submit() stamps the current time when unset
+    filled_quantity: int = 0
+    status: str = OPEN
+    triggered: bool = False
+    sequence: int = field(default=0, compare=False)
+
+    @property
+    def remaining(self) -> int:
+        return self.quantity - self.filled_quantity
+
+    @property
+    def is_active(self) -> bool:
+        return self.status not in _TERMINAL_STATUSES
+
+
+@dataclass(frozen=True)
+class Fill:
+    order_id: int
+    user_id: int
+    symbol: str
+    side: str
+    quantity: int
+    price: float
+    timestamp: float
+    remaining: int
+
+
+@dataclass(frozen=True)
+class Expiry:
+    order_id: int
+    user_id: int
+    symbol: str
+    status: str  # EXPIRED | CANCELLED
+    remaining: int
+    timestamp: float
+    reason: str
+
+
+@dataclass
+class ReplayResult:
+    fills: list[Fill]
+    expiries: list[Expiry]
+    ticks: int
+
+
+class _SymbolBook:
+    __slots__ = ("bids", "asks", "buy_stops", "sell_stops", "market", "ioc", "active")
+
+    def __init__(self) -> None:
+        self.bids: list[tuple[float, int, RestingOrder]] = []
+        self.asks: list[tuple[float, int, RestingOrder]] = []
+        self.buy_stops: list[tuple[float, int, RestingOrder]] = []
+        self.sell_stops: list[tuple[float, int, RestingOrder]] = []
+        # Triggered SLM orders waiting for liquidity, in trigger order.
+        self.market: list[tuple[int, RestingOrder]] = []
+        self.ioc: list[RestingOrder] = []
+        self.active = 0
+
+
+def _prune(heap: list) -> None:
+    # Cancelled and expired orders are dropped lazily when they reach the top.
+    while heap and not heap[0][-1].is_active:
+        heapq.heappop(heap)
+
+
+class MatchingEngine:
+    """Per-symbol order books matched against quote ticks by price-time priority."""
+
+    def __init__(self, session_close: Callable[[float], float] = session_close_after):
+        self._lock = RLock()
+        self._books: dict[str, _SymbolBook] = {}
+        self._orders: dict[int, RestingOrder] = {}
+        self._expiries: list[tuple[float, int, RestingOrder]] = []
+        self._sequence = itertools.count(1)
+        self._session_close = session_close
+        self._fill_listeners: list[Callable[[Fill], None]] = []
+        self._listening = False
+        self._metrics = {
+            "orders_accepted": 0,
+            "ticks_processed": 0,
+            "fills": 0,
+            "partial_fills": 0,
+            "orders_expired": 0,
+            "orders_cancelled": 0,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._listening
+
+    def metrics_snapshot(self) -> dict[str, int | bool]:
+        with self._lock:
+            return {
+                **self._metrics,
+                "resting_orders": len(self._orders),
+                "symbols": len(self._books),
+                "running": self._listening,
+            }
+
+    def start(self) -> None:
+        """Match resting orders against live quote ticks."""
+        if self._listening:
+            return
+        add_quote_listener(self.on_quote)
+        self._listening = True
+        logger.info("matching_engine.started")
+
+    def stop(self) -> None:
+        remove_quote_listener(self.on_quote)
+        self._listening = False
+        logger.info("matching_engine.stopped")
+
+    def add_fill_listener(self, listener: Callable[[Fill], None]) -> None:
+        with self._lock:
+            if listener not in self._fill_listeners:
+                self._fill_listeners.append(listener)
+
+    def get(self, order_id: int) -> Optional[RestingOrder]:
+        with self._lock:
+            return self._orders.get(int(order_id))
+
+    def submit(self, order: RestingOrder) -> RestingOrder:
+        """Rest ``order`` on its symbol's book. It is matched from the next tick onward."""
+        order.symbol = (order.symbol or "").strip().upper()
+        order.side = (order.side or "").strip().upper()
+        order.order_type = (order.order_type or "").strip().upper()
+        order.validity = (order.validity or "DAY").strip().upper()
+        if order.side not in {"BUY", "SELL"}:
+            raise ValueError("side must be BUY or SELL")
+        if order.order_type not in {"LIMIT", "SL", "SLM"}:
+            raise ValueError("orderType must be LIMIT, SL or SLM")
+        if order.validity not in {"DAY", "IOC", "GTC"}:
+            raise ValueError("validity must be DAY, IOC or GTC")
+        if order.quantity <= 0:
+            raise ValueError("quantity must be positive")
+        if order.order_type in {"LIMIT", "SL"} and order.limit_price is None:
+            raise ValueError(f"limitPrice is required for {order.order_type} orders")
+        if order.order_type in {"SL", "SLM"} and order.trigger_price is None:
+            raise ValueError(f"triggerPrice is required for {order.order_type} orders")
+
+        if order.placed_at is None:
+            order.placed_at = time.time()
+
+        with self._lock:
+            if order.order_id in self._orders:
+                raise ValueError(f"order {order.order_id} is already resting")
+            order.sequence = next(self._sequence)
+            book = self._books.setdefault(order.symbol, _SymbolBook())
+            if order.order_type == "LIMIT":
+                self._rest_limit(book, order)
+            elif order.side == "BUY":
+                heapq.heappush(book.buy_stops, (float(order.trigger_price), order.sequence, order))
+            else:
+                heapq.heappush(book.sell_stops, (-float(order.trigger_price), order.sequence, order))
+            if order.validity == "IOC":
+                book.ioc.append(order)
+            elif order.validity == "DAY":
+                heapq.heappush(self._expiries, (self._session_close(order.placed_at), order.sequence, order))
+            book.active += 1
+            self._orders[order.order_id] = order
+            self._metrics["orders_accepted"] += 1
+        return order
+
+    def cancel(self, order_id: int, timestamp: float = 0.0) -> Optional[Expiry]:
+        with self._lock:
+            order = self._orders.get(int(order_id))
+            if order is None:
+                return None
+            return self._close(order, CANCELLED, timestamp, "cancelled by user")
+
+    def _rest_limit(self, book: _SymbolBook, order: RestingOrder) -> None:
+        if order.side == "BUY":
+            heapq.heappush(book.bids, (-float(order.limit_price), order.sequence, order))
+        else:
+            heapq.heappush(book.asks, (float(order.limit_price), order.sequence, order))
+
+    def _close(self, order: RestingOrder, status: str, timestamp: float, reason: str) -> Expiry:
+        order.status = status
+        self._orders.pop(order.order_id, None)
+        book = self._books.get(order.symbol)
+        if book is not None:
+            book.active -= 1
+            if book.active <= 0:
+                self._books.pop(order.symbol, None)
+        self._metrics["orders_expired" if status == EXPIRED else "orders_cancelled"] += 1
+        return Expiry(order.order_id, order.user_id, order.symbol, status, order.remaining, timestamp, reason)
+
+    def advance_time(self, timestamp: float) -> list[Expiry]:
+        """Expire DAY orders whose session closed at or before ``timestamp``."""
+        expired: list[Expiry] = []
+        with self._lock:
+            while self._expiries and self._expiries[0][0] <= timestamp:
+                _, _, order = heapq.heappop(self._expiries)
+                if order.is_active:
+                    expired.append(self._close(order, EXPIRED, timestamp, "DAY order expired at session close"))
+        return expired
+
+    def on_tick(
+        self, symbol: str, price: float, timestamp: float, volume: Optional[int] = None
+    ) -> tuple[list[Fill], list[Expiry]]:
+        """Match one tick. Returns the fills it produced and the orders it expired."""
+        with self._lock:
+            self._metrics["ticks_processed"] += 1
+            expiries = self.advance_time(timestamp) if self._expiries else []
+            book = self._books.get(symbol)
+            if book is None:
+                return [], expiries
+            fills = self._match(book, float(price), timestamp, volume)
+            if book.ioc:
+                pending_ioc, book.ioc = book.ioc, []
+                for order in pending_ioc:
+                    if order.is_active:
+                        expiries.append(self._close(order, CANCELLED, timestamp, "IOC remainder cancelled"))
+        if fills and self._fill_listeners:
+            for fill in fills:
+                for listener in list(self._fill_listeners):
+                    try:
+                        listener(fill)
+                    except Exception as exc:
+                        logger.warning("matching_engine.fill_listener_failed order_id=%s reason=%s", fill.order_id, str(exc))
+        return fills, expiries
+
+    def on_quote(self, symbol: str, quote: dict) -> None:
+        """Quote listener hook (see ``market_data.add_quote_listener``) for live paper trading."""
+        try:
+            price = float(quote.get("last") or 0.0)
+        except Exception:
+            return
+        key = (symbol or "").strip().upper()
+        if key and price > 0:
+            self.on_tick(key, price, datetime.now(IST).timestamp())
+
+    def _fire_stops(self, book: _SymbolBook, price: float) -> None:
+        buy_stops, sell_stops = book.buy_stops, book.sell_stops
+        _prune(buy_stops)
+        while buy_stops and buy_stops[0][0] <= price:
+            self._activate_stop(book, heapq.heappop(buy_stops)[2])
+            _prune(buy_stops)
+        _prune(sell_stops)
+        while sell_stops and -sell_stops[0][0] >= price:
+            self._activate_stop(book, heapq.heappop(sell_stops)[2])
+            _prune(sell_stops)
+
+    def _activate_stop(self, book: _SymbolBook, order: RestingOrder) -> None:
+        order.triggered = True
+        # A triggered stop queues behind orders already resting at its price.
+        order.sequence = next(self._sequence)
+        if order.order_type == "SLM":
+            book.market.append((order.sequence, order))
+        else:
+            self._rest_limit(book, order)
+
+    def _fill(
+        self, order: RestingOrder, quantity: int, fill_price: float, timestamp: float, fills: list[Fill]
+    ) -> None:
+        order.filled_quantity += quantity
+        fills.append(
+            Fill(order.order_id, order.user_id, order.symbol, order.side, quantity, fill_price, timestamp, order.remaining)
+        )
+        self._metrics["fills"] += 1
+        if order.remaining == 0:
+            order.status = FILLED
+            self._orders.pop(order.order_id, None)
+            book = self._books.get(order.symbol)
+            if book is not None:
+                book.active -= 1
+                if book.active <= 0:
+                    self._books.pop(order.symbol, None)
+        else:
+            order.status = PARTIALLY_FILLED
+            self._metrics["partial_fills"] += 1
+
+    def _match(self, book: _SymbolBook, price: float, timestamp: float, volume: Optional[int]) -> list[Fill]:
+        if book.buy_stops or book.sell_stops:
+            self._fire_stops(book, price)
+
+        fills: list[Fill] = []
+        unlimited = volume is None
+        liquidity = {"BUY": 0 if unlimited else int(volume), "SELL": 0 if unlimited else int(volume)}
+
+        def take(side: str, wanted: int) -> int:
+            if unlimited:
+                return wanted
+            granted = min(wanted, liquidity[side])
+            liquidity[side] -= granted
+            return granted
+
+        if book.market:
+            still_waiting: list[tuple[int, RestingOrder]] = []
+            for sequence, order in book.market:
+                if not order.is_active:
+                    continue
+                quantity = take(order.side, order.remaining)
+                if quantity:
+                    self._fill(order, quantity, price, timestamp, fills)
+                if order.is_active:
+                    still_waiting.append((sequence, order))
+            book.market = still_waiting
+
+        bids = book.bids
+        _prune(bids)
+        while bids and -bids[0][0] >= price and (unlimited or liquidity["BUY"] > 0):
+            limit, _, order = bids[0]
+            self._fill(order, take("BUY", order.remaining), -limit, timestamp, fills)
+            _prune(bids)
+
+        asks = book.asks
+        _prune(asks)
+        while asks and asks[0][0] <= price and (unlimited or liquidity["SELL"] > 0):
+            limit, _, order = asks[0]
+            self._fill(order, take("SELL", order.remaining), limit, timestamp, fills)
+            _prune(asks)
+        return fills
+
+    def replay(self, ticks: Iterable[Tick]) -> ReplayResult:
+        """Feed ``ticks`` (in time order) through the engine and collect every fill and expiry."""
+        fills: list[Fill] = []
+        expiries: list[Expiry] = []
+        count = 0
+        for tick in ticks:
+            tick_fills, tick_expiries = self.on_tick(tick.symbol, tick.price, tick.timestamp, tick.volume)
+            if tick_fills:
+                fills.extend(tick_fills)
+            if tick_expiries:
+                expiries.extend(tick_expiries)
+            count += 1
+        return ReplayResult(fills=fills, expiries=expiries, ticks=count)
+
+
+matching_engine = MatchingEngine()
@@ -44,6 +44,8 @@ class AlertCreate(AlertBase):
 class Alert(AlertBase):
     id: int
     isActive: bool = True
+    triggeredPrice: Optional[float] = None
+    triggeredAt: Optional[datetime] = None
     createdAt: Optional[datetime] = None
 
     class Config:
@@ -122,6 +124,8 @@ class PortfolioSummary(BaseModel):
     totalPnL: float
     totalPnLPercent: float
     holdingsCount: int
+    realizedPnL: Optional[float] = None
+    cashBalance: Optional[float] = None
 
 class PortfolioValue(BaseModel):
     value: float
@@ -0,0 +1,238 @@
+"""
+Background sync of AMFI mutual fund master data into ``mutual_funds``.
+
+The AMFI NAV feed lists about 15k schemes. A sync loads the stored rows in one
+SELECT and compares them with the parsed feed. Only new or changed schemes are
+written, using multi-row ``INSERT ... ON CONFLICT (scheme_code) DO UPDATE``
+batches inside a single transaction. A full NAV refresh is a handful of
+statements instead of a SELECT plus INSERT/UPDATE per scheme. The feed carries
+no return figures, so a NULL return in the feed keeps the stored value.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .database.db import MutualFundModel, SessionLocal
+from .models.schemas import MutualFund
+from .routes import _fetch_live_mutual_funds
+
+logger = logging.getLogger(__name__)
+
+
+def _is_truthy_env(value: str | None) -> bool:
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+MF_SYNC_ENABLED = _is_truthy_env(os.getenv("MF_SYNC_ENABLED", "true"))
+MF_SYNC_INTERVAL_SECONDS = max(60, int(os.getenv("MF_SYNC_INTERVAL_SECONDS", "21600")))
+MF_SYNC_BATCH_SIZE = max(1, int(os.getenv("MF_SYNC_BATCH_SIZE", "500")))
+
+_SYNC_COLUMNS = (
+    "scheme_name",
+    "category",
+    "nav",
+    "nav_date",
+    "returns_1y",
+    "returns_3y",
+    "returns_5y",
+    "fund_house",
+    "risk_level",
+)
+_RETURN_COLUMNS = frozenset({"returns_1y", "returns_3y", "returns_5y"})
+
+
+def _fund_row(fund: MutualFund) -> dict:
+    return {
+        "scheme_code": fund.schemeCode,
+        "scheme_name": fund.schemeName,
+        "category": fund.category,
+        "nav": fund.nav,
+        "nav_date": fund.navDate,
+        "returns_1y": fund.returns1Y,
+        "returns_3y": fund.returns3Y,
+        "returns_5y": fund.returns5Y,
+        "fund_house": fund.fundHouse,
+        "risk_level": fund.riskLevel,
+    }
+
+
+def _row_changed(stored, row: dict) -> bool:
+    for column in _SYNC_COLUMNS:
+        value = row[column]
+        if value is None and column in _RETURN_COLUMNS:
+            continue
+        if getattr(stored, column) != value:
+            return True
+    return False
+
+
+def _dialect_insert(dialect_name: str):
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def upsert_mutual_funds(db: Session, funds: list[MutualFund], batch_size: int = MF_SYNC_BATCH_SIZE) -> dict[str, int]:
+    """Write new and changed schemes from ``funds`` in batched upserts; returns row counts."""
+    table = MutualFundModel.__table__
+    incoming = {fund.schemeCode: _fund_row(fund) for fund in funds if fund.schemeCode}
+    stored = {
+        row.scheme_code: row
+        for row in db.execute(select(table.c.scheme_code, *(table.c[column] for column in _SYNC_COLUMNS)))
+    }
+
+    changed: list[dict] = []
+    inserted = 0
+    for code, row in incoming.items():
+        current = stored.get(code)
+        if current is None:
+            inserted += 1
+            changed.append(row)
+        elif _row_changed(current, row):
+            changed.append(row)
+
+    insert = _dialect_insert(db.get_bind().dialect.name)
+    try:
+        for start in range(0, len(changed), batch_size):
+            batch = changed[start : start + batch_size]
+            if insert is None:
+                for row in batch:
+                    existing = db.query(MutualFundModel).filter(MutualFundModel.scheme_code == row["scheme_code"]).first()
+                    if existing is None:
+                        db.add(MutualFundModel(**row))
+                        continue
+                    for column in _SYNC_COLUMNS:
+                        if row[column] is not None or column not in _RETURN_COLUMNS:
+                            setattr(existing, column, row[column])
+                db.flush()
+                continue
+
+            statement = insert(table).values(batch)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.scheme_code],
+                set_={
+                    column: (
+                        func.coalesce(statement.excluded[column], table.c[column])
+                        if column in _RETURN_COLUMNS
+                        else statement.excluded[column]
+                    )
+                    for column in _SYNC_COLUMNS
+                },
+            )
+            db.execute(statement)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {
+        "inserted": inserted,
+        "updated": len(changed) - inserted,
+        "unchanged": len(incoming) - len(changed),
+    }
+
+
+class MutualFundSyncWorker:
+    """Periodically refreshes ``mutual_funds`` from the AMFI feed on a background thread."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        fetch_funds: Callable[[], list[MutualFund]] = lambda: _fetch_live_mutual_funds(force_refresh=True),
+        interval_seconds: int = MF_SYNC_INTERVAL_SECONDS,
+    ):
+        self._session_factory = session_factory
+        self._fetch_funds = fetch_funds
+        self._interval = max(1, int(interval_seconds))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._metrics_lock = threading.Lock()
+        self._metrics: dict[str, int | float | str | None] = {
+            "runs": 0,
+            "errors": 0,
+            "rows_inserted": 0,
+            "rows_updated": 0,
+            "rows_unchanged": 0,
+            "last_error": None,
+            "last_sync_ms": None,
+            "last_synced_at": None,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def metrics_snapshot(self) -> dict[str, int | float | str | None]:
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot["running"] = self.is_running
+        snapshot["interval_seconds"] = self._interval
+        return snapshot
+
+    def sync_once(self) -> dict[str, int] | None:
+        """Fetch the feed and apply it. Safe to call directly (tests, manual refreshes)."""
+        started_at = time.perf_counter()
+        try:
+            funds = self._fetch_funds()
+            db = self._session_factory()
+            try:
+                counts = upsert_mutual_funds(db, funds)
+            finally:
+                db.close()
+        except Exception as exc:
+            with self._metrics_lock:
+                self._metrics["errors"] = int(self._metrics["errors"] or 0) + 1
+                self._metrics["last_error"] = str(exc)
+            logger.warning("mutual_fund_sync.failed reason=%s", str(exc))
+            return None
+
+        duration_ms = round((time.perf_counter() - started_at) * 1000.0, 2)
+        with self._metrics_lock:
+            self._metrics["runs"] = int(self._metrics["runs"] or 0) + 1
+            self._metrics["rows_inserted"] = int(self._metrics["rows_inserted"] or 0) + counts["inserted"]
+            self._metrics["rows_updated"] = int(self._metrics["rows_updated"] or 0) + counts["updated"]
+            self._metrics["rows_unchanged"] = int(self._metrics["rows_unchanged"] or 0) + counts["unchanged"]
+            self._metrics["last_sync_ms"] = duration_ms
+            self._metrics["last_synced_at"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        logger.info(
+            "mutual_fund_sync.completed inserted=%s updated=%s unchanged=%s duration_ms=%.1f",
+            counts["inserted"],
+            counts["updated"],
+            counts["unchanged"],
+            duration_ms,
+        )
+        return counts
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sync_once()
+            self._stop.wait(self._interval)
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bysel-mutual-fund-sync", daemon=True)
+        self._thread.start()
+        logger.info("mutual_fund_sync.started interval_seconds=%s", self._interval)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        logger.info("mutual_fund_sync.stopped")
+
+
+mutual_fund_sync = MutualFundSyncWorker()
@@ -0,0 +1,176 @@
+"""
+Hot/cold split of order history.
+
+Terminal orders (completed, rejected, cancelled, trigger-executed) older than
+``ORDER_ARCHIVE_AFTER_DAYS`` are moved from ``orders`` to ``orders_archive`` in
+id-ordered batches. Each batch is one INSERT ... SELECT plus one DELETE, in its
+own transaction. After that, ``orders`` only holds the recent window that
+order placement, idempotency checks and the /metrics/slo outcome counts read.
+
+Trade history, trace lookups and exports read both tables. Archived rows are
+always older than ``archive_cutoff()``, so a history page that ends inside the
+hot window never touches the archive. The horizon must stay well above the
+idempotency retry window: ``uq_orders_user_idempotency_key`` only covers
+``orders``.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from .database.db import OrderArchiveModel, OrderModel, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _is_truthy_env(value: str | None) -> bool:
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+ORDER_ARCHIVE_ENABLED = _is_truthy_env(os.getenv("ORDER_ARCHIVE_ENABLED", "true"))
+ORDER_ARCHIVE_AFTER_DAYS = max(1, int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "180")))
+ORDER_ARCHIVE_INTERVAL_SECONDS = max(60, int(os.getenv("ORDER_ARCHIVE_INTERVAL_SECONDS", "3600")))
+ORDER_ARCHIVE_BATCH_SIZE = max(1, int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "1000")))
+
+# Statuses with no outgoing transition in ORDER_STATUS_TRANSITIONS.
+ARCHIVABLE_ORDER_STATUSES = ("COMPLETED", "REJECTED", "TRIGGER_EXECUTED", "CANCELLED")
+
+_ORDER_COLUMNS = tuple(column.name for column in OrderModel.__table__.columns)
+
+
+def archive_cutoff(now: Optional[datetime] = None, after_days: int = ORDER_ARCHIVE_AFTER_DAYS) -> datetime:
+    """Orders created before this instant may live in ``orders_archive``."""
+    return (now or datetime.utcnow()) - timedelta(days=after_days)
+
+
+def archive_orders(db: Session, cutoff: datetime, batch_size: int = ORDER_ARCHIVE_BATCH_SIZE) -> int:
+    """Move terminal orders created before ``cutoff`` into the archive; returns rows moved."""
+    orders = OrderModel.__table__
+    archive = OrderArchiveModel.__table__
+    # SQLite hands out max(id) + 1 for new rows, so the newest order always stays
+    # hot; otherwise an emptied table would reissue ids already in the archive.
+    max_id = db.execute(select(func.max(orders.c.id))).scalar()
+    if max_id is None:
+        return 0
+
+    moved = 0
+    while True:
+        ids = list(
+            db.execute(
+                select(orders.c.id)
+                .where(
+                    orders.c.created_at < cutoff,
+                    orders.c.status.in_(ARCHIVABLE_ORDER_STATUSES),
+                    orders.c.id < max_id,
+                )
+                .order_by(orders.c.id.asc())
+                .limit(batch_size)
+            ).scalars()
+        )
+        if not ids:
+            return moved
+        try:
+            db.execute(
+                insert(archive).from_select(
+                    [*_ORDER_COLUMNS, "archived_at"],
+                    select(*(orders.c[name] for name in _ORDER_COLUMNS), literal(datetime.utcnow())).where(
+                        orders.c.id.in_(ids)
+                    ),
+                )
+            )
+            db.execute(delete(orders).where(orders.c.id.in_(ids)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        moved += len(ids)
+
+
+class OrderArchiver:
+    """Runs ``archive_orders`` on a background thread every ``ORDER_ARCHIVE_INTERVAL_SECONDS``."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        after_days: int = ORDER_ARCHIVE_AFTER_DAYS,
+        interval_seconds: int = ORDER_ARCHIVE_INTERVAL_SECONDS,
+        batch_size: int = ORDER_ARCHIVE_BATCH_SIZE,
+    ):
+        self._session_factory = session_factory
+        self._after_days = max(1, int(after_days))
+        self._interval = max(1, int(interval_seconds))
+        self._batch_size = max(1, int(batch_size))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._metrics_lock = threading.Lock()
+        self._metrics: dict[str, int | float | str | None] = {
+            "runs": 0,
+            "errors": 0,
+            "orders_archived": 0,
+            "last_error": None,
+            "last_run_ms": None,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def metrics_snapshot(self) -> dict[str, int | float | str | None]:
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot["running"] = self.is_running
+        snapshot["after_days"] = self._after_days
+        return snapshot
+
+    def run_once(self, now: Optional[datetime] = None) -> int:
+        """Archive everything past the horizon. Safe to call directly (tests, manual runs)."""
+        started_at = time.perf_counter()
+        db = self._session_factory()
+        try:
+            moved = archive_orders(db, archive_cutoff(now, self._after_days), self._batch_size)
+        except Exception as exc:
+            with self._metrics_lock:
+                self._metrics["errors"] = int(self._metrics["errors"] or 0) + 1
+                self._metrics["last_error"] = str(exc)
+            logger.exception("order_archive.failed")
+            return 0
+        finally:
+            db.close()
+
+        duration_ms = round((time.perf_counter() - started_at) * 1000.0, 2)
+        with self._metrics_lock:
+            self._metrics["runs"] = int(self._metrics["runs"] or 0) + 1
+            self._metrics["orders_archived"] = int(self._metrics["orders_archived"] or 0) + moved
+            self._metrics["last_run_ms"] = duration_ms
+        if moved:
+            logger.info("order_archive.completed orders=%s duration_ms=%.1f", moved, duration_ms)
+        return moved
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self._interval)
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bysel-order-archive", daemon=True)
+        self._thread.start()
+        logger.info("order_archive.started after_days=%s interval_seconds=%s", self._after_days, self._interval)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        logger.info("order_archive.stopped")
+
+
+order_archiver = OrderArchiver()
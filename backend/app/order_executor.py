@@ -0,0 +1,191 @@
+"""
+Per-user serialized order execution with group commit.
+
+Order fills read and rewrite the wallet and holdings, so two fills for the same
+user must never interleave. Jobs are routed to a writer shard by ``user_id``;
+each shard runs its jobs in FIFO order, which serializes a user's orders while
+users on other shards proceed in parallel. A shard drains everything queued
+into one session and commits once, so a burst of orders costs one commit
+instead of one per order. If the group commit fails, the batch is rolled back
+and each job is replayed in its own transaction so one bad order cannot take
+down its neighbours.
+
+A caller that times out only gives up on jobs still waiting in the queue; those
+are cancelled and skipped at dequeue. Once a shard has picked a job up, the
+caller waits for its outcome, so a placed order is never reported as failed.
+
+SQLite allows a single writer, so the default is one shard; raise
+``ORDER_EXECUTOR_WORKERS`` on databases with row-level locking.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from .database.db import DATABASE_URL, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ORDER_EXECUTOR_WORKERS = max(
+    1, int(os.getenv("ORDER_EXECUTOR_WORKERS", "1" if DATABASE_URL.startswith("sqlite") else "4"))
+)
+ORDER_EXECUTOR_MAX_BATCH = max(1, int(os.getenv("ORDER_EXECUTOR_MAX_BATCH", "64")))
+ORDER_EXECUTOR_TIMEOUT_SECONDS = max(1.0, float(os.getenv("ORDER_EXECUTOR_TIMEOUT_SECONDS", "30")))
+
+OrderJob = Callable[[Session], Any]
+
+
+class OrderExecutor:
+    """Sharded writer threads that run order jobs per user in submission order."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        workers: int = ORDER_EXECUTOR_WORKERS,
+        max_batch: int = ORDER_EXECUTOR_MAX_BATCH,
+    ):
+        self._session_factory = session_factory
+        self._worker_count = max(1, int(workers))
+        self._max_batch = max(1, int(max_batch))
+        self._queues: list[queue.Queue] = [queue.Queue() for _ in range(self._worker_count)]
+        self._threads: list[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics: dict[str, int | float | None] = {
+            "jobs_submitted": 0,
+            "jobs_completed": 0,
+            "jobs_failed": 0,
+            "jobs_cancelled": 0,
+            "batches_committed": 0,
+            "batch_fallbacks": 0,
+            "max_batch_size": 0,
+            "last_batch_size": 0,
+            "last_batch_ms": None,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _metric_inc(self, name: str, value: int = 1) -> None:
+        with self._metrics_lock:
+            self._metrics[name] = int(self._metrics.get(name, 0) or 0) + value
+
+    def metrics_snapshot(self) -> dict[str, int | float | None]:
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot["workers"] = self._worker_count
+        snapshot["queue_depth"] = sum(item.qsize() for item in self._queues)
+        snapshot["running"] = self.is_running
+        return snapshot
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self.is_running:
+                return
+            self._threads = [
+                threading.Thread(
+                    target=self._run,
+                    args=(shard,),
+                    name=f"bysel-order-executor-{shard}",
+                    daemon=True,
+                )
+                for shard in range(self._worker_count)
+            ]
+            for thread in self._threads:
+                thread.start()
+        logger.info("order_executor.started workers=%s max_batch=%s", self._worker_count, self._max_batch)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        threads = self._threads
+        for item in self._queues:
+            item.put(None)
+        for thread in threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        logger.info("order_executor.stopped")
+
+    def submit(self, user_id: int, job: OrderJob, timeout: float | None = None) -> Any:
+        """Run ``job(session)`` on ``user_id``'s shard and return its result (or re-raise its error).
+
+        The job must not commit; the executor commits after the batch. It may flush.
+        Raises ``TimeoutError`` only if the job was still queued, in which case it never runs.
+        """
+        if not self.is_running:
+            self.start()
+        future: Future = Future()
+        self._queues[int(user_id) % self._worker_count].put((job, future))
+        self._metric_inc("jobs_submitted")
+        try:
+            return future.result(timeout=timeout or ORDER_EXECUTOR_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise
+        # Already picked up by the shard: its commit decides the outcome.
+        return future.result()
+
+    def _drain(self, shard: int, first: tuple[OrderJob, Future]) -> tuple[list[tuple[OrderJob, Future]], bool]:
+        batch = [first]
+        work_queue = self._queues[shard]
+        while len(batch) < self._max_batch:
+            try:
+                item = work_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self, shard: int) -> None:
+        work_queue = self._queues[shard]
+        while True:
+            first = work_queue.get()
+            if first is None:
+                return
+            batch, stop_requested = self._drain(shard, first)
+            runnable = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if len(runnable) < len(batch):
+                self._metric_inc("jobs_cancelled", len(batch) - len(runnable))
+            if runnable:
+                self._run_batch(runnable)
+            if stop_requested:
+                return
+
+    def _run_batch(self, batch: list[tuple[OrderJob, Future]]) -> None:
+        started_at = time.perf_counter()
+        session = self._session_factory()
+        try:
+            results = [job(session) for job, _ in batch]
+            session.commit()
+        except Exception as exc:
+            session.rollback()
+            session.close()
+            if len(batch) == 1:
+                self._metric_inc("jobs_failed")
+                batch[0][1].set_exception(exc)
+                return
+            self._metric_inc("batch_fallbacks")
+            logger.warning("order_executor.batch_fallback size=%s reason=%s", len(batch), str(exc))
+            for job, future in batch:
+                self._run_batch([(job, future)])
+            return
+        session.close()
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        with self._metrics_lock:
+            self._metrics["jobs_completed"] = int(self._metrics["jobs_completed"] or 0) + len(batch)
+            self._metrics["batches_committed"] = int(self._metrics["batches_committed"] or 0) + 1
+            self._metrics["max_batch_size"] = max(int(self._metrics["max_batch_size"] or 0), len(batch))
+            self._metrics["last_batch_size"] = len(batch)
+            self._metrics["last_batch_ms"] = round((time.perf_counter() - started_at) * 1000.0, 2)
+
+
+order_executor = OrderExecutor()
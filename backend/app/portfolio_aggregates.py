@@ -0,0 +1,235 @@
+"""
+Materialized per-user portfolio aggregates.
+
+Each user's cash, positions (quantity and average price per symbol), invested
+amount and realized P&L are kept in memory and moved incrementally by fills,
+so portfolio totals are a dot product of cached quantities against the quote
+snapshot instead of a holdings scan.
+
+Fills record their resulting state in ``session.info`` and the store applies it
+only once the session commits; a rollback drops it. Realized P&L and invested
+amount are also persisted in ``portfolio_aggregates`` so they survive restarts,
+and a user missing from memory is loaded from the database on first read.
+
+Cached entries are reloaded after ``PORTFOLIO_AGGREGATE_TTL_SECONDS`` so writes
+this process never sees (another worker, an account deletion, a manual fix)
+cannot serve stale totals for longer than that.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .database.db import HoldingModel, PortfolioAggregateModel, WalletModel
+
+logger = logging.getLogger(__name__)
+
+_PENDING_DELTAS_KEY = "portfolio_aggregate_deltas"
+PORTFOLIO_AGGREGATE_TTL_SECONDS = float(os.getenv("PORTFOLIO_AGGREGATE_TTL_SECONDS", "60"))
+
+
+@dataclass
+class PositionState:
+    quantity: int
+    avg_price: float
+    last_price: float
+
+
+@dataclass
+class PortfolioAggregate:
+    user_id: int
+    cash: float = 0.0
+    invested: float = 0.0
+    realized_pnl: float = 0.0
+    positions: dict[str, PositionState] = field(default_factory=dict)
+
+    def valuation(self, prices: dict[str, float]) -> dict[str, float | int]:
+        """Value positions at ``prices``, falling back to each position's last known price."""
+        symbols = list(self.positions)
+        quantities = np.array([self.positions[symbol].quantity for symbol in symbols], dtype=float)
+        marks = np.array(
+            [prices.get(symbol) or self.positions[symbol].last_price for symbol in symbols],
+            dtype=float,
+        )
+        value = float(quantities @ marks) if symbols else 0.0
+        unrealized = value - self.invested
+        return {
+            "value": round(value, 2),
+            "invested": round(self.invested, 2),
+            "unrealizedPnl": round(unrealized, 2),
+            "unrealizedPnlPct": round((unrealized / self.invested) * 100, 2) if self.invested > 0 else 0.0,
+            "realizedPnl": round(self.realized_pnl, 2),
+            "cash": round(self.cash, 2),
+            "positions": len(symbols),
+        }
+
+
+@dataclass(frozen=True)
+class _FillDelta:
+    user_id: int
+    symbol: str | None
+    quantity: int
+    avg_price: float
+    last_price: float
+    cash: float
+    realized_delta: float
+
+
+class PortfolioAggregateStore:
+    def __init__(self, ttl_seconds: float = PORTFOLIO_AGGREGATE_TTL_SECONDS):
+        self._ttl = max(0.0, float(ttl_seconds))
+        self._lock = threading.Lock()
+        self._entries: dict[int, PortfolioAggregate] = {}
+        self._loaded_at: dict[int, float] = {}
+        # Bumped on every committed change so a load that raced a commit is discarded.
+        self._generations: dict[int, int] = {}
+        self._metrics = {"hits": 0, "loads": 0, "expired": 0, "deltas_applied": 0}
+
+    def metrics_snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._metrics, "users": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._loaded_at.clear()
+            self._generations.clear()
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+            self._loaded_at.pop(int(user_id), None)
+            self._generations[int(user_id)] = self._generations.get(int(user_id), 0) + 1
+
+    def get(self, db: Session, user_id: int) -> PortfolioAggregate:
+        """Cached aggregate for ``user_id``, loading it from the database on a miss."""
+        key = int(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if time.monotonic() - self._loaded_at.get(key, 0.0) < self._ttl:
+                    self._metrics["hits"] += 1
+                    return entry
+                self._entries.pop(key, None)
+                self._metrics["expired"] += 1
+            generation = self._generations.get(key, 0)
+
+        entry = self._load(db, key)
+        with self._lock:
+            self._metrics["loads"] += 1
+            if self._generations.get(key, 0) == generation:
+                self._entries[key] = entry
+                self._loaded_at[key] = time.monotonic()
+        return entry
+
+    def _load(self, db: Session, user_id: int) -> PortfolioAggregate:
+        from .routes.trading import DEFAULT_TRADING_WALLET_BALANCE
+
+        wallet = db.query(WalletModel).filter(WalletModel.user_id == user_id).first()
+        stored = db.query(PortfolioAggregateModel).filter(PortfolioAggregateModel.user_id == user_id).first()
+        positions = {
+            row.symbol: PositionState(
+                quantity=int(row.quantity or 0),
+                avg_price=float(row.avg_price or 0.0),
+                last_price=float(row.last_price or row.avg_price or 0.0),
+            )
+            for row in db.query(HoldingModel).filter(HoldingModel.user_id == user_id).all()
+            if int(row.quantity or 0) > 0
+        }
+        return PortfolioAggregate(
+            user_id=user_id,
+            cash=float(wallet.balance or 0.0) if wallet else DEFAULT_TRADING_WALLET_BALANCE,
+            invested=sum(position.quantity * position.avg_price for position in positions.values()),
+            realized_pnl=float(stored.realized_pnl or 0.0) if stored else 0.0,
+            positions=positions,
+        )
+
+    def _apply(self, deltas: list[_FillDelta]) -> None:
+        with self._lock:
+            for delta in deltas:
+                self._generations[delta.user_id] = self._generations.get(delta.user_id, 0) + 1
+                entry = self._entries.get(delta.user_id)
+                if entry is None:
+                    continue
+                entry.cash = delta.cash
+                entry.realized_pnl += delta.realized_delta
+                if delta.symbol is not None:
+                    previous = entry.positions.pop(delta.symbol, None)
+                    if previous is not None:
+                        entry.invested -= previous.quantity * previous.avg_price
+                    if delta.quantity > 0:
+                        entry.positions[delta.symbol] = PositionState(
+                            quantity=delta.quantity, avg_price=delta.avg_price, last_price=delta.last_price
+                        )
+                        entry.invested += delta.quantity * delta.avg_price
+                self._metrics["deltas_applied"] += 1
+
+
+portfolio_aggregates = PortfolioAggregateStore()
+
+
+def _pending_aggregate_row(db: Session, user_id: int) -> PortfolioAggregateModel | None:
+    return next(
+        (row for row in db.new if isinstance(row, PortfolioAggregateModel) and row.user_id == user_id),
+        None,
+    )
+
+
+def _aggregate_row(db: Session, user_id: int) -> PortfolioAggregateModel:
+    # Sessions do not autoflush, so the query cannot see a row that an earlier
+    # fill in this transaction (another basket leg, another order in the same
+    # group commit) added for a user who had none; adding a second one would
+    # trip the unique index and roll back the whole transaction.
+    row = _pending_aggregate_row(db, user_id)
+    if row is None:
+        row = db.query(PortfolioAggregateModel).filter(PortfolioAggregateModel.user_id == user_id).first()
+    if row is None:
+        row = PortfolioAggregateModel(user_id=user_id, invested_amount=0.0, realized_pnl=0.0)
+        db.add(row)
+    return row
+
+
+def record_fill(
+    db: Session,
+    user_id: int,
+    symbol: str,
+    previous_quantity: int,
+    previous_avg_price: float,
+    quantity: int,
+    avg_price: float,
+    execution_price: float,
+    cash: float,
+    realized_delta: float,
+) -> None:
+    """Persist the aggregate change for one fill and queue the in-memory update for commit."""
+    row = _aggregate_row(db, user_id)
+    row.invested_amount = float(row.invested_amount or 0.0) + (quantity * avg_price) - (
+        previous_quantity * previous_avg_price
+    )
+    row.realized_pnl = float(row.realized_pnl or 0.0) + realized_delta
+    db.info.setdefault(_PENDING_DELTAS_KEY, []).append(
+        _FillDelta(user_id, symbol, quantity, avg_price, execution_price, cash, realized_delta)
+    )
+
+
+def record_cash(db: Session, user_id: int, cash: float) -> None:
+    """Queue a wallet balance change (deposit/withdrawal) for the in-memory aggregate."""
+    db.info.setdefault(_PENDING_DELTAS_KEY, []).append(_FillDelta(user_id, None, 0, 0.0, 0.0, cash, 0.0))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_deltas(session: Session) -> None:
+    deltas = session.info.pop(_PENDING_DELTAS_KEY, None)
+    if deltas:
+        portfolio_aggregates._apply(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_deltas(session: Session) -> None:
+    session.info.pop(_PENDING_DELTAS_KEY, None)
@@ -0,0 +1,124 @@
+"""
+Background refresh of the /ai/recommendations snapshot.
+
+Each run scores the full recommendation universe through ``refresh_recommendations``
+on a pool of ``RECOMMENDATIONS_WORKERS`` threads, then swaps the finished
+snapshot in as one unit. The endpoint always serves the last completed snapshot
+and reports its age, so a request never waits on the ~40 ``analyze_stock``
+calls (history, info and news per symbol) behind a refresh.
+
+The refresher is off unless RECOMMENDATIONS_REFRESH_ENABLED is set, since each
+run downloads history, info and news for the whole universe. Without it the
+endpoint scores inline once, then refreshes a stale snapshot on a side thread
+when it is next requested.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from .ai_engine import _RECOMMENDATIONS_CACHE_TTL, _RECOMMENDATIONS_WORKERS, refresh_recommendations
+
+logger = logging.getLogger(__name__)
+
+
+def _is_truthy_env(value: str | None) -> bool:
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+RECOMMENDATIONS_REFRESH_ENABLED = _is_truthy_env(os.getenv("RECOMMENDATIONS_REFRESH_ENABLED", "false"))
+
+
+class RecommendationRefresher:
+    """Rebuilds the recommendations snapshot every ``RECOMMENDATIONS_REFRESH_SECONDS``."""
+
+    def __init__(
+        self,
+        refresh: Callable[..., Optional[dict[str, int]]] = refresh_recommendations,
+        interval_seconds: int = _RECOMMENDATIONS_CACHE_TTL,
+        workers: int = _RECOMMENDATIONS_WORKERS,
+    ):
+        self._refresh = refresh
+        self._interval = max(1, int(interval_seconds))
+        self._workers = max(1, int(workers))
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._metrics_lock = threading.Lock()
+        self._metrics: dict[str, int | float | str | None] = {
+            "runs": 0,
+            "errors": 0,
+            "last_scored": None,
+            "last_failed": None,
+            "last_error": None,
+            "last_refresh_ms": None,
+            "last_refreshed_at": None,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def metrics_snapshot(self) -> dict[str, int | float | str | None]:
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot["running"] = self.is_running
+        snapshot["workers"] = self._workers
+        snapshot["interval_seconds"] = self._interval
+        return snapshot
+
+    def refresh_once(self) -> dict[str, int] | None:
+        """Score the universe and swap the snapshot. Safe to call directly (tests, manual refreshes)."""
+        started_at = time.perf_counter()
+        try:
+            counts = self._refresh(workers=self._workers)
+        except Exception as exc:
+            with self._metrics_lock:
+                self._metrics["errors"] = int(self._metrics["errors"] or 0) + 1
+                self._metrics["last_error"] = str(exc)
+            logger.warning("recommendations_refresh.failed reason=%s", str(exc))
+            return None
+        if counts is None:
+            return None
+
+        duration_ms = round((time.perf_counter() - started_at) * 1000.0, 2)
+        with self._metrics_lock:
+            self._metrics["runs"] = int(self._metrics["runs"] or 0) + 1
+            self._metrics["last_scored"] = counts["scored"]
+            self._metrics["last_failed"] = counts["failed"]
+            self._metrics["last_refresh_ms"] = duration_ms
+            self._metrics["last_refreshed_at"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        logger.info(
+            "recommendations_refresh.completed scored=%s failed=%s duration_ms=%.1f",
+            counts["scored"],
+            counts["failed"],
+            duration_ms,
+        )
+        return counts
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh_once()
+            self._stop.wait(self._interval)
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="bysel-recommendations-refresh", daemon=True)
+        self._thread.start()
+        logger.info(
+            "recommendations_refresh.started interval_seconds=%s workers=%s", self._interval, self._workers
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        logger.info("recommendations_refresh.stopped")
+
+
+recommendation_refresher = RecommendationRefresher()
@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, Header, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Dict
 import logging
 import os
@@ -11,7 +15,12 @@ from math import erf, exp, log, sqrt
 from urllib import request as urllib_request
 from ..database.db import (
     get_db,
+    get_async_db,
+    get_async_read_db,
+    get_read_db,
+    ReadSessionLocal,
     AlertModel,
+    OrderArchiveModel,
     OrderModel,
     TriggerOrderModel,
     BasketOrderModel,
@@ -93,9 +102,11 @@ from ..models.schemas import (
     CopilotPortfolioActionsResponse,
 )
 from .trading import (
-    get_holdings, get_holding, place_order,
-    is_market_open, get_wallet, add_funds, withdraw_funds,
+    get_holdings, get_holdings_async, get_holding_async, get_portfolio_valuation, place_order,
+    is_market_open, get_wallet, add_funds, withdraw_funds, peek_holdings, peek_wallet_balance,
     evaluate_pending_triggers, build_pretrade_signal, build_pretrade_estimate,
+    cancel_trigger_order, execute_basket, LifecycleTransitionError,
+    query_trade_history_async, iter_trade_history, TRADE_HISTORY_DEFAULT_LIMIT, TRADE_HISTORY_MAX_LIMIT,
 )
 from ..market_data import (
     fetch_quote, fetch_quote_history, fetch_quotes, get_all_symbols, get_default_symbols,
@@ -107,7 +118,10 @@ from ..ai_engine import (
     calculate_trade_accuracy, get_sector_rotation_signals, get_earnings_calendar,
     advanced_stock_screener
 )
+from ..exports import EXPORT_DATASETS, EXPORT_FORMATS, iter_export_batches, parquet_available, stream_csv, stream_parquet
 from ..portfolio_scorer import calculate_portfolio_health
+from ..trigger_book import trigger_book
+from ..trigger_engine import trigger_engine
 from ..market_heatmap import SECTOR_STOCKS, get_market_heatmap, get_sector_detail
 
 router = APIRouter()
@@ -1143,10 +1157,13 @@ async def get_quotes_endpoint(
         sym_list = get_default_symbols()
 
     raw_quotes = fetch_quotes(sym_list)
-    try:
-        evaluate_pending_triggers(db=db, user_id=None, symbols=sym_list)
-    except Exception as exc:
-        logger.warning("trigger_evaluation_failed reason=%s", str(exc))
+    if not trigger_engine.is_running:
+        # The tick engine evaluates triggers off the request path; this fallback only
+        # covers deployments that run with TRIGGER_ENGINE_ENABLED=false.
+        try:
+            await run_in_threadpool(evaluate_pending_triggers, db=db, user_id=None, symbols=sym_list)
+        except Exception as exc:
+            logger.warning("trigger_evaluation_failed reason=%s", str(exc))
     return [Quote(
         symbol=q["symbol"],
         last=q["last"],
@@ -1195,15 +1212,15 @@ async def get_quote_history_endpoint(
 # ==================== HOLDINGS ====================
 
 @router.get("/holdings", response_model=list[Holding])
-async def get_holdings_endpoint(db: Session = Depends(get_db)):
-    """Get all holdings with live prices."""
-    return get_holdings(db)
+async def get_holdings_endpoint(db: AsyncSession = Depends(get_async_db), user_id: int = Header(1)):
+    """Get the caller's holdings with live prices."""
+    return await get_holdings_async(db, user_id=user_id)
 
 
 @router.get("/holdings/{symbol}", response_model=Holding)
-async def get_holding_endpoint(symbol: str, db: Session = Depends(get_db)):
+async def get_holding_endpoint(symbol: str, db: AsyncSession = Depends(get_async_db), user_id: int = Header(1)):
     """Get a single holding by symbol."""
-    holding = get_holding(db, symbol.upper())
+    holding = await get_holding_async(db, symbol.upper(), user_id=user_id)
     if not holding:
         raise HTTPException(status_code=404, detail=f"No holding found for {symbol}")
     return holding
@@ -1220,7 +1237,9 @@ async def place_order_endpoint(
     db: Session = Depends(get_db),
 ):
     """Place a buy or sell order at live market price."""
-    return place_order(db, order, user_id=user_id, idempotency_key=x_idempotency_key, trace_id=x_trace_id)
+    return await run_in_threadpool(
+        place_order, db, order, user_id=user_id, idempotency_key=x_idempotency_key, trace_id=x_trace_id
+    )
 
 
 @router.post("/trade/buy", response_model=OrderResponse)
@@ -1233,7 +1252,9 @@ async def buy_stock_endpoint(
 ):
     """Buy stock at live market price."""
     order.side = "BUY"
-    return place_order(db, order, user_id=user_id, idempotency_key=x_idempotency_key, trace_id=x_trace_id)
+    return await run_in_threadpool(
+        place_order, db, order, user_id=user_id, idempotency_key=x_idempotency_key, trace_id=x_trace_id
+    )
 
 
 @router.post("/trade/sell", response_model=OrderResponse)
@@ -1246,7 +1267,9 @@ async def sell_stock_endpoint(
 ):
     """Sell stock at live market price."""
     order.side = "SELL"
-    return place_order(db, order, user_id=user_id, idempotency_key=x_idempotency_key, trace_id=x_trace_id)
+    return await run_in_threadpool(
+        place_order, db, order, user_id=user_id, idempotency_key=x_idempotency_key, trace_id=x_trace_id
+    )
 
 
 @router.post("/orders/pre-trade-estimate", response_model=PreTradeEstimateResponse)
@@ -1303,11 +1326,8 @@ async def pre_trade_estimate_endpoint(
     )
 
 
-@router.get("/trades/history", response_model=list[TradeHistory])
-async def get_trade_history_endpoint(db: Session = Depends(get_db)):
-    """Get all trade history."""
-    orders = db.query(OrderModel).order_by(OrderModel.created_at.desc()).all()
-    return [TradeHistory(
+def _trade_history_item(o: OrderModel) -> TradeHistory:
+    return TradeHistory(
         id=o.id,
         symbol=o.symbol,
         side=o.side,
@@ -1315,42 +1335,102 @@ async def get_trade_history_endpoint(db: Session = Depends(get_db)):
         price=o.price or 0,
         total=o.total or 0,
         timestamp=int(o.created_at.timestamp() * 1000) if o.created_at else 0
-    ) for o in orders]
+    )
+
+
+async def _trade_history_response(
+    db: AsyncSession,
+    user_id: int,
+    symbol: str | None,
+    side: str | None,
+    from_date: date | None,
+    to_date: date | None,
+    cursor: str | None,
+    limit: int,
+    fmt: str,
+):
+    if side and side.strip().upper() not in {"BUY", "SELL"}:
+        raise HTTPException(status_code=400, detail="side must be BUY or SELL")
+    filters = {"symbol": symbol, "side": side, "from_date": from_date, "to_date": to_date}
+    if fmt == "ndjson":
+        def _stream():
+            # The request session may be closed before streaming finishes, so export uses its own.
+            stream_db = ReadSessionLocal()
+            try:
+                for row in iter_trade_history(stream_db, user_id, **filters):
+                    yield _trade_history_item(row).model_dump_json() + "\n"
+            finally:
+                stream_db.close()
+
+        return StreamingResponse(
+            _stream(),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=bysel_trade_history.ndjson"},
+        )
+    if fmt != "json":
+        raise HTTPException(status_code=400, detail="Unsupported format. Use fmt=json or fmt=ndjson")
+
+    try:
+        rows, next_cursor = await query_trade_history_async(db, user_id, cursor=cursor, limit=limit, **filters)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    response = JSONResponse(content=[_trade_history_item(row).model_dump() for row in rows])
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+@router.get("/trades/history", response_model=list[TradeHistory])
+async def get_trade_history_endpoint(
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(TRADE_HISTORY_DEFAULT_LIMIT, ge=1, le=TRADE_HISTORY_MAX_LIMIT),
+    side: str | None = Query(None, description="BUY or SELL"),
+    fromDate: date | None = Query(None),
+    toDate: date | None = Query(None),
+    fmt: str = "json",
+    db: AsyncSession = Depends(get_async_read_db),
+    user_id: int = Header(1),
+):
+    """Trade history, newest first. Pages via the X-Next-Cursor header; fmt=ndjson streams everything."""
+    return await _trade_history_response(db, user_id, None, side, fromDate, toDate, cursor, limit, fmt)
 
 
 @router.get("/trades/history/{symbol}", response_model=list[TradeHistory])
-async def get_trade_history_for_symbol(symbol: str, db: Session = Depends(get_db)):
-    """Get trade history for a specific symbol."""
-    orders = db.query(OrderModel).filter(
-        OrderModel.symbol == symbol.upper()
-    ).order_by(OrderModel.created_at.desc()).all()
-    return [TradeHistory(
-        id=o.id,
-        symbol=o.symbol,
-        side=o.side,
-        quantity=o.quantity,
-        price=o.price or 0,
-        total=o.total or 0,
-        timestamp=int(o.created_at.timestamp() * 1000) if o.created_at else 0
-    ) for o in orders]
+async def get_trade_history_for_symbol(
+    symbol: str,
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    limit: int = Query(TRADE_HISTORY_DEFAULT_LIMIT, ge=1, le=TRADE_HISTORY_MAX_LIMIT),
+    side: str | None = Query(None, description="BUY or SELL"),
+    fromDate: date | None = Query(None),
+    toDate: date | None = Query(None),
+    fmt: str = "json",
+    db: AsyncSession = Depends(get_async_read_db),
+    user_id: int = Header(1),
+):
+    """Trade history for a specific symbol, paged like /trades/history."""
+    return await _trade_history_response(db, user_id, symbol, side, fromDate, toDate, cursor, limit, fmt)
 
 
 @router.get("/orders/trace/{trace_id}", response_model=OrderTraceLookupResponse)
 async def get_order_by_trace_endpoint(
     trace_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user_id: int = Header(1),
 ):
     normalized_trace = trace_id.strip()
     if not normalized_trace:
         raise HTTPException(status_code=400, detail="trace_id is required")
 
-    order = (
-        db.query(OrderModel)
-        .filter(OrderModel.trace_id == normalized_trace, OrderModel.user_id == user_id)
-        .order_by(OrderModel.id.desc())
-        .first()
-    )
+    order = None
+    for model in (OrderModel, OrderArchiveModel):
+        order = (
+            db.query(model)
+            .filter(model.trace_id == normalized_trace, model.user_id == user_id)
+            .order_by(model.id.desc())
+            .first()
+        )
+        if order:
+            break
     if not order:
         raise HTTPException(status_code=404, detail=f"No order found for trace '{normalized_trace}'")
 
@@ -1385,77 +1465,110 @@ async def get_order_by_trace_endpoint(
 # ==================== PORTFOLIO ====================
 
 @router.get("/portfolio", response_model=PortfolioSummary)
-async def get_portfolio_endpoint(db: Session = Depends(get_db)):
+async def get_portfolio_endpoint(db: Session = Depends(get_db), user_id: int = Header(1)):
     """Get portfolio summary with live values."""
-    holdings = get_holdings(db)
-
-    total_value = sum(h.last * h.qty for h in holdings)
-    total_invested = sum(h.avgPrice * h.qty for h in holdings)
-    total_pnl = total_value - total_invested
-    total_pnl_pct = round((total_pnl / total_invested) * 100, 2) if total_invested > 0 else 0.0
-
+    valuation = get_portfolio_valuation(db, user_id)
     return PortfolioSummary(
-        totalValue=round(total_value, 2),
-        totalInvested=round(total_invested, 2),
-        totalPnL=round(total_pnl, 2),
-        totalPnLPercent=total_pnl_pct,
-        holdingsCount=len(holdings)
+        totalValue=valuation["value"],
+        totalInvested=valuation["invested"],
+        totalPnL=valuation["unrealizedPnl"],
+        totalPnLPercent=valuation["unrealizedPnlPct"],
+        holdingsCount=valuation["positions"],
+        realizedPnL=valuation["realizedPnl"],
+        cashBalance=valuation["cash"],
     )
 
 
 @router.get("/portfolio/value", response_model=PortfolioValue)
-async def get_portfolio_value_endpoint(db: Session = Depends(get_db)):
+async def get_portfolio_value_endpoint(db: Session = Depends(get_db), user_id: int = Header(1)):
     """Get portfolio current value with live prices."""
-    holdings = get_holdings(db)
+    valuation = get_portfolio_valuation(db, user_id)
+    return PortfolioValue(
+        value=valuation["value"],
+        invested=valuation["invested"],
+        pnl=valuation["unrealizedPnl"],
+        pnlPercent=valuation["unrealizedPnlPct"],
+    )
 
-    total_value = sum(h.last * h.qty for h in holdings)
-    total_invested = sum(h.avgPrice * h.qty for h in holdings)
-    total_pnl = total_value - total_invested
-    total_pnl_pct = round((total_pnl / total_invested) * 100, 2) if total_invested > 0 else 0.0
 
-    return PortfolioValue(
-        value=round(total_value, 2),
-        invested=round(total_invested, 2),
-        pnl=round(total_pnl, 2),
-        pnlPercent=total_pnl_pct
+_PORTFOLIO_EXPORT_HEADER = ["Symbol", "Qty", "Avg Price (\u20b9)", "Current Price (\u20b9)", "Value (\u20b9)", "P&L (\u20b9)", "P&L %"]
+
+
+def _export_response(
+    dataset_name: str,
+    user_id: int,
+    fmt: str,
+    filename: str,
+    header: list[str] | None = None,
+    wrap_batches=None,
+    footer=None,
+):
+    """Stream one export dataset as CSV or Parquet from a dedicated session.
+
+    ``header`` and ``footer`` only apply to CSV; Parquet keeps the dataset's column names.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported format. Use fmt=csv or fmt=parquet")
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="Parquet export is not available on this server")
+    dataset = EXPORT_DATASETS[dataset_name]
+
+    def _stream():
+        # The request session may be closed before streaming finishes, so export uses its own.
+        stream_db = ReadSessionLocal()
+        try:
+            batches = iter_export_batches(stream_db, dataset, user_id)
+            if wrap_batches is not None:
+                batches = wrap_batches(batches)
+            if fmt == "csv":
+                yield from stream_csv(batches, header or [column.name for column in dataset.columns], footer)
+            else:
+                yield from stream_parquet(batches, dataset.columns)
+        finally:
+            stream_db.close()
+
+    media_type = "text/csv" if fmt == "csv" else "application/vnd.apache.parquet"
+    return StreamingResponse(
+        _stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}.{fmt}"},
     )
 
 
 @router.get("/portfolio/export")
-async def export_portfolio_endpoint(fmt: str = "csv", db: Session = Depends(get_db)):
-    """Export portfolio as CSV. Usage: /portfolio/export?fmt=csv"""
-    from fastapi.responses import StreamingResponse
-    import io, csv as csvmod
-
-    holdings = get_holdings(db)
-
-    if fmt == "csv":
-        output = io.StringIO()
-        writer = csvmod.writer(output)
-        writer.writerow(["Symbol", "Qty", "Avg Price (\u20b9)", "Current Price (\u20b9)", "Value (\u20b9)", "P&L (\u20b9)", "P&L %"])
-        for h in holdings:
-            value = h.last * h.qty
-            invested = h.avgPrice * h.qty
-            pnl = value - invested
-            pnl_pct = round((pnl / invested) * 100, 2) if invested > 0 else 0.0
-            writer.writerow([h.symbol, h.qty, round(h.avgPrice, 2), round(h.last, 2), round(value, 2), round(pnl, 2), pnl_pct])
-
-        # Summary row
-        total_val = sum(h.last * h.qty for h in holdings)
-        total_inv = sum(h.avgPrice * h.qty for h in holdings)
-        total_pnl = total_val - total_inv
-        total_pct = round((total_pnl / total_inv) * 100, 2) if total_inv > 0 else 0.0
-        writer.writerow([])
-        writer.writerow(["TOTAL", "", "", "", round(total_val, 2), round(total_pnl, 2), total_pct])
-
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=bysel_portfolio.csv"}
-        )
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported format. Use fmt=csv")
+async def export_portfolio_endpoint(fmt: str = "csv", user_id: int = Header(1)):
+    """Export portfolio holdings at live prices. Usage: /portfolio/export?fmt=csv (or fmt=parquet)"""
+    totals = {"value": 0.0, "invested": 0.0}
+
+    def _accumulate(batches):
+        for rows in batches:
+            for _, qty, avg_price, _, value, _, _ in rows:
+                totals["value"] += value
+                totals["invested"] += avg_price * qty
+            yield rows
+
+    def _summary():
+        total_pnl = totals["value"] - totals["invested"]
+        total_pct = round((total_pnl / totals["invested"]) * 100, 2) if totals["invested"] > 0 else 0.0
+        return [[], ["TOTAL", "", "", "", round(totals["value"], 2), round(total_pnl, 2), total_pct]]
+
+    return _export_response(
+        "holdings",
+        user_id,
+        fmt,
+        "bysel_portfolio",
+        header=_PORTFOLIO_EXPORT_HEADER,
+        wrap_batches=_accumulate,
+        footer=_summary,
+    )
+
+
+@router.get("/exports/{dataset}")
+async def export_dataset_endpoint(dataset: str, fmt: str = "csv", user_id: int = Header(1)):
+    """Stream the caller's holdings, orders or trigger history. Usage: /exports/orders?fmt=parquet"""
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown export dataset. Use one of: {', '.join(EXPORT_DATASETS)}")
+    return _export_response(dataset, user_id, fmt, f"bysel_{dataset}")
 
 
 # ==================== WALLET ====================
@@ -1471,14 +1584,14 @@ async def get_wallet_endpoint(db: Session = Depends(get_db), user=Depends(get_cu
 @router.post("/wallet/add", response_model=WalletResponse)
 async def add_funds_endpoint(txn: WalletTransaction, db: Session = Depends(get_db), user=Depends(get_current_user)):
     """Add funds to the authenticated user's wallet."""
-    return add_funds(db, user.id, txn.amount)
+    return await run_in_threadpool(add_funds, db, user.id, txn.amount)
 
 
 
 @router.post("/wallet/withdraw", response_model=WalletResponse)
 async def withdraw_funds_endpoint(txn: WalletTransaction, db: Session = Depends(get_db), user=Depends(get_current_user)):
     """Withdraw funds from the authenticated user's wallet."""
-    return withdraw_funds(db, user.id, txn.amount)
+    return await run_in_threadpool(withdraw_funds, db, user.id, txn.amount)
 
 
 # ==================== MARKET STATUS ====================
@@ -1502,29 +1615,33 @@ async def market_news_endpoint(
 # ==================== ALERTS ====================
 
 @router.get("/alerts", response_model=list[Alert])
-async def get_alerts_endpoint(db: Session = Depends(get_db)):
+async def get_alerts_endpoint(db: AsyncSession = Depends(get_async_db)):
     """Get all alerts."""
-    alerts = db.query(AlertModel).all()
+    alerts = (await db.execute(select(AlertModel))).scalars().all()
     return [Alert(
         id=a.id,
         symbol=a.symbol,
         thresholdPrice=a.threshold_price,
         alertType=a.alert_type,
         isActive=a.is_active,
+        triggeredPrice=a.triggered_price,
+        triggeredAt=a.triggered_at,
         createdAt=a.created_at
     ) for a in alerts]
 
 
 @router.get("/alerts/active", response_model=list[Alert])
-async def get_active_alerts_endpoint(db: Session = Depends(get_db)):
+async def get_active_alerts_endpoint(db: AsyncSession = Depends(get_async_db)):
     """Get active alerts only."""
-    alerts = db.query(AlertModel).filter(AlertModel.is_active == True).all()
+    alerts = (await db.execute(select(AlertModel).where(AlertModel.is_active == True))).scalars().all()  # noqa: E712
     return [Alert(
         id=a.id,
         symbol=a.symbol,
         thresholdPrice=a.threshold_price,
         alertType=a.alert_type,
         isActive=a.is_active,
+        triggeredPrice=a.triggered_price,
+        triggeredAt=a.triggered_at,
         createdAt=a.created_at
     ) for a in alerts]
 
@@ -1838,10 +1955,10 @@ async def advanced_screener_endpoint(filters: Dict = None):
 # ==================== PORTFOLIO HEALTH SCORE ====================
 
 @router.get("/portfolio/health")
-async def portfolio_health_endpoint(db: Session = Depends(get_db)):
+async def portfolio_health_endpoint(db: Session = Depends(get_db), user_id: int = Header(1)):
     """Get portfolio health score (0-100) with breakdown and suggestions.
     Analyzes diversification, risk, quality, and balance."""
-    holdings_db = db.query(HoldingModel).all()
+    holdings_db = db.query(HoldingModel).filter(HoldingModel.user_id == user_id).all()
     holdings_list = []
     for h in holdings_db:
         holdings_list.append({
@@ -2094,13 +2211,14 @@ async def create_sip_plan_endpoint(
 
 
 @router.get("/sip/plans", response_model=list[SipPlan])
-async def get_sip_plans_endpoint(db: Session = Depends(get_db), user=Depends(get_current_user)):
+async def get_sip_plans_endpoint(db: AsyncSession = Depends(get_async_db), user=Depends(get_current_user)):
     plans = (
-        db.query(SipPlanModel)
-        .filter(SipPlanModel.user_id == int(user.id))
-        .order_by(SipPlanModel.created_at.desc())
-        .all()
-    )
+        await db.execute(
+            select(SipPlanModel)
+            .where(SipPlanModel.user_id == int(user.id))
+            .order_by(SipPlanModel.created_at.desc())
+        )
+    ).scalars().all()
     return [
         SipPlan(
             id=f"SIP-{item.id}",
@@ -2341,7 +2459,8 @@ async def place_advanced_order_endpoint(
         market_open=market.isOpen,
     )
 
-    response = place_order(
+    response = await run_in_threadpool(
+        place_order,
         db,
         order,
         user_id=user_id,
@@ -2392,6 +2511,7 @@ async def create_trigger_order_endpoint(
     db.add(trigger)
     db.commit()
     db.refresh(trigger)
+    trigger_book.add(trigger)
 
     return TriggerOrderSummary(
         id=trigger.id,
@@ -2408,13 +2528,14 @@ async def create_trigger_order_endpoint(
 
 
 @router.get("/orders/triggers", response_model=list[TriggerOrderSummary])
-async def get_trigger_orders_endpoint(db: Session = Depends(get_db), user_id: int = Header(1)):
+async def get_trigger_orders_endpoint(db: AsyncSession = Depends(get_async_db), user_id: int = Header(1)):
     rows = (
-        db.query(TriggerOrderModel)
-        .filter(TriggerOrderModel.user_id == user_id)
-        .order_by(TriggerOrderModel.created_at.desc())
-        .all()
-    )
+        await db.execute(
+            select(TriggerOrderModel)
+            .where(TriggerOrderModel.user_id == user_id)
+            .order_by(TriggerOrderModel.created_at.desc())
+        )
+    ).scalars().all()
     return [
         TriggerOrderSummary(
             id=row.id,
@@ -2432,6 +2553,34 @@ async def get_trigger_orders_endpoint(db: Session = Depends(get_db), user_id: in
     ]
 
 
+@router.post("/orders/triggers/{trigger_id}/cancel", response_model=TriggerOrderSummary)
+async def cancel_trigger_order_endpoint(
+    trigger_id: int,
+    db: Session = Depends(get_db),
+    user_id: int = Header(1),
+):
+    try:
+        trigger = cancel_trigger_order(db, trigger_id=trigger_id, user_id=user_id)
+    except LifecycleTransitionError as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail={"errorCode": exc.error_code, "message": str(exc)})
+    if trigger is None:
+        raise HTTPException(status_code=404, detail="Trigger order not found")
+
+    return TriggerOrderSummary(
+        id=trigger.id,
+        symbol=trigger.symbol,
+        qty=trigger.quantity,
+        side=trigger.side,
+        orderType=trigger.order_type,
+        validity=trigger.validity,
+        limitPrice=trigger.limit_price,
+        triggerPrice=trigger.trigger_price,
+        status=trigger.status,
+        createdAt=trigger.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
 @router.post("/orders/triggers/evaluate")
 async def evaluate_trigger_orders_endpoint(
     symbols: str | None = Query(None),
@@ -2439,7 +2588,7 @@ async def evaluate_trigger_orders_endpoint(
     user_id: int = Header(1),
 ):
     symbol_list = [item.strip().upper() for item in (symbols or "").split(",") if item.strip()]
-    processed = evaluate_pending_triggers(db=db, user_id=user_id, symbols=symbol_list)
+    processed = await run_in_threadpool(evaluate_pending_triggers, db=db, user_id=user_id, symbols=symbol_list)
     return {
         "status": "ok",
         "processedCount": len(processed),
@@ -2513,6 +2662,7 @@ async def get_baskets_endpoint(db: Session = Depends(get_db), user_id: int = Hea
 @router.post("/orders/baskets/{basket_id}/execute", response_model=BasketOrderResponse)
 async def execute_basket_endpoint(
     basket_id: int,
+    allowPartial: bool = Query(False, description="Execute the legs that can fill instead of rejecting the whole basket"),
     db: Session = Depends(get_db),
     user_id: int = Header(1),
     x_idempotency_key: str | None = Header(default=None, alias="X-Idempotency-Key"),
@@ -2526,58 +2676,16 @@ async def execute_basket_endpoint(
     if not legs:
         raise HTTPException(status_code=400, detail="Basket has no legs")
 
-    results: list[BasketLegExecution] = []
-    for leg in legs:
-        leg_idempotency_key: str | None = None
-        if x_idempotency_key:
-            digest = hashlib.sha1(
-                f"{x_idempotency_key}|{basket_id}|{leg.id}".encode("utf-8")
-            ).hexdigest()[:16]
-            leg_idempotency_key = f"basket-{basket_id}-leg-{leg.id}-{digest}"
-
-        leg_trace_id = (
-            f"{x_trace_id}-basket-{basket_id}-leg-{leg.id}"
-            if x_trace_id
-            else None
-        )
-
-        response = place_order(
-            db,
-            Order(
-                symbol=leg.symbol,
-                qty=leg.quantity,
-                side=leg.side,
-                orderType=leg.order_type,
-                validity=leg.validity,
-                limitPrice=leg.limit_price,
-                triggerPrice=leg.trigger_price,
-                tag=leg.tag,
-            ),
-            user_id=user_id,
-            idempotency_key=leg_idempotency_key,
-            trace_id=leg_trace_id,
-        )
-        results.append(
-            BasketLegExecution(
-                symbol=leg.symbol,
-                side=leg.side,
-                qty=leg.quantity,
-                status=response.status,
-                message=response.message or "",
-                orderId=response.orderId,
-            )
-        )
-
-    if all(item.status == "ok" for item in results):
-        basket.status = "EXECUTED"
-        message = "Basket executed"
-    elif any(item.status == "ok" for item in results):
-        basket.status = "PARTIAL"
-        message = "Basket partially executed"
-    else:
-        basket.status = "FAILED"
-        message = "Basket execution failed"
-    db.commit()
+    message, results = await run_in_threadpool(
+        execute_basket,
+        db,
+        basket,
+        legs,
+        user_id=user_id,
+        allow_partial=allowPartial,
+        idempotency_key=x_idempotency_key,
+        trace_id=x_trace_id,
+    )
 
     return BasketOrderResponse(
         basketId=basket.id,
@@ -2648,11 +2756,11 @@ async def upsert_family_member_endpoint(
 
 
 @router.get("/wealth/family/dashboard", response_model=FamilyDashboardResponse)
-async def family_dashboard_endpoint(db: Session = Depends(get_db), user_id: int = Header(1)):
+async def family_dashboard_endpoint(db: Session = Depends(get_read_db), user_id: int = Header(1)):
     members = db.query(FamilyMemberModel).filter(FamilyMemberModel.user_id == user_id).all()
-    holdings = get_holdings(db)
+    holdings = peek_holdings(db, user_id=user_id)
     holdings_value = sum((item.last * item.qty) for item in holdings)
-    wallet_balance = get_wallet(db, user_id).balance
+    wallet_balance = peek_wallet_balance(db, user_id)
 
     summaries: list[FamilyMemberSummary] = []
     family_assets = 0.0
@@ -2724,13 +2832,14 @@ async def create_goal_endpoint(
 
 
 @router.get("/wealth/goals", response_model=list[GoalPlanResponse])
-async def get_goals_endpoint(db: Session = Depends(get_db), user_id: int = Header(1)):
+async def get_goals_endpoint(db: AsyncSession = Depends(get_async_db), user_id: int = Header(1)):
     goals = (
-        db.query(GoalPlanModel)
-        .filter(GoalPlanModel.user_id == user_id)
-        .order_by(GoalPlanModel.created_at.desc())
-        .all()
-    )
+        await db.execute(
+            select(GoalPlanModel)
+            .where(GoalPlanModel.user_id == user_id)
+            .order_by(GoalPlanModel.created_at.desc())
+        )
+    ).scalars().all()
     return [_goal_to_response(goal) for goal in goals]
 
 
@@ -2783,7 +2892,10 @@ async def copilot_pre_trade_endpoint(
 
 @router.post("/ai/copilot/post-trade-review", response_model=CopilotPostTradeResponse)
 async def copilot_post_trade_endpoint(payload: CopilotPostTradeRequest, db: Session = Depends(get_db)):
-    order = db.query(OrderModel).filter(OrderModel.id == payload.orderId).first()
+    order = (
+        db.query(OrderModel).filter(OrderModel.id == payload.orderId).first()
+        or db.query(OrderArchiveModel).filter(OrderArchiveModel.id == payload.orderId).first()
+    )
     if not order:
         raise HTTPException(status_code=404, detail=f"Order '{payload.orderId}' not found")
 
@@ -2809,8 +2921,8 @@ async def copilot_post_trade_endpoint(payload: CopilotPostTradeRequest, db: Sess
 
 
 @router.get("/ai/copilot/portfolio-actions", response_model=CopilotPortfolioActionsResponse)
-async def copilot_portfolio_actions_endpoint(db: Session = Depends(get_db)):
-    holdings = get_holdings(db)
+async def copilot_portfolio_actions_endpoint(db: Session = Depends(get_db), user_id: int = Header(1)):
+    holdings = get_holdings(db, user_id=user_id)
     if not holdings:
         return CopilotPortfolioActionsResponse(
             actions=["Start with staggered entries in 2-3 diversified large-cap names.", "Create one downside alert before first trade."],
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Header, Request
-from sqlalchemy import text, func
+from sqlalchemy import select, text, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from passlib.context import CryptContext
 from pydantic import BaseModel
 from email.message import EmailMessage
 from ..config import DEBUG
-from ..database.db import SessionLocal, UserModel, WalletModel, RefreshTokenModel, PasswordResetTokenModel, OTPModel
+from ..database.db import SessionLocal, get_async_read_db, UserModel, WalletModel, RefreshTokenModel, PasswordResetTokenModel, OTPModel
+from ..portfolio_aggregates import portfolio_aggregates
 from datetime import datetime, timedelta
 from typing import List
 from collections import defaultdict, deque
@@ -959,6 +962,7 @@ def admin_delete_user(req: AdminDeleteRequest):
         db.query(WalletModel).filter(WalletModel.user_id == uid).delete()
         db.delete(user)
         db.commit()
+        portfolio_aggregates.invalidate(uid)
         return {"status": "ok", "deleted_user_id": uid, "username": user.username}
     except HTTPException:
         raise
@@ -1015,6 +1019,7 @@ def register(user: UserRegister, request: Request):
             wallet = WalletModel(user_id=user_id, balance=0.0)
             db.add(wallet)
             db.commit()
+            portfolio_aggregates.invalidate(user_id)
         except Exception as exc:
             db.rollback()
             logger.exception("auth.register.wallet_init_failed user_id=%s reason=%s", user_id, str(exc))
@@ -1556,20 +1561,26 @@ def auth_debug_session_health(x_debug_token: str | None = Header(default=None, a
 
 
 @router.get("/sessions", response_model=SessionsResponse)
-def list_sessions(authorization: str | None = Header(default=None, alias="Authorization")):
-    user_id = _get_user_id_from_authorization(authorization)
-    db: Session = SessionLocal()
+async def list_sessions(
+    authorization: str | None = Header(default=None, alias="Authorization"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    # Token validation is shared with the sync auth routes; keep it off the event loop.
+    user_id = await run_in_threadpool(_get_user_id_from_authorization, authorization)
     now = datetime.utcnow()
 
-    try:
-        active_sessions = db.query(RefreshTokenModel).filter(
-            RefreshTokenModel.user_id == user_id,
-            RefreshTokenModel.revoked_at.is_(None),
-            RefreshTokenModel.used_at.is_(None),
-            RefreshTokenModel.expires_at > now
-        ).order_by(RefreshTokenModel.created_at.desc()).all()
-    finally:
-        db.close()
+    active_sessions = (
+        await db.execute(
+            select(RefreshTokenModel)
+            .where(
+                RefreshTokenModel.user_id == user_id,
+                RefreshTokenModel.revoked_at.is_(None),
+                RefreshTokenModel.used_at.is_(None),
+                RefreshTokenModel.expires_at > now,
+            )
+            .order_by(RefreshTokenModel.created_at.desc())
+        )
+    ).scalars().all()
 
     return SessionsResponse(
         status="ok",
@@ -2005,6 +2016,7 @@ async def delete_account(
         # Delete the user
         db.delete(user)
         db.commit()
+        portfolio_aggregates.invalidate(user_id)
 
         logger.info("auth.account_deleted user_id=%s", user_id)
         return {"status": "ok", "detail": "Account permanently deleted"}
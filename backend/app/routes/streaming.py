@@ -7,7 +7,11 @@ from collections import deque
 from threading import Lock
 from uuid import uuid4
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import AsyncIterator, Awaitable, Callable
+
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from ..market_data import fetch_quotes, get_default_symbols
 
@@ -18,6 +22,7 @@ TRACE_HEADER = "X-Trace-Id"
 STREAM_PUSH_INTERVAL_MS = int(os.getenv("STREAM_PUSH_INTERVAL_MS", "1200"))
 STREAM_MAX_SYMBOLS = int(os.getenv("STREAM_MAX_SYMBOLS", "30"))
 STREAM_RESUME_BUFFER_SIZE = int(os.getenv("STREAM_RESUME_BUFFER_SIZE", "180"))
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "3000"))
 
 _stream_lock = Lock()
 _stream_sequence = 0
@@ -25,6 +30,8 @@ _stream_history: deque[dict] = deque(maxlen=STREAM_RESUME_BUFFER_SIZE)
 _stream_metrics: dict[str, int | str | float | None] = {
     "active_connections": 0,
     "total_connections": 0,
+    "sse_active_connections": 0,
+    "sse_total_connections": 0,
     "total_disconnects": 0,
     "last_trace_id": None,
     "quotes_messages_sent": 0,
@@ -178,9 +185,38 @@ def _parse_subscription_payload(payload: str) -> tuple[list[str] | None, int | N
     return None, None
 
 
-async def _send_replay_events(websocket: WebSocket, since_sequence: int, trace_id: str) -> int:
+def _subscribed_payload(symbols: list[str], trace_id: str) -> dict:
+    return {
+        "type": "subscribed",
+        "symbols": symbols,
+        "intervalMs": STREAM_PUSH_INTERVAL_MS,
+        "traceId": trace_id,
+        "source": "bysel-backend",
+        "latestSequence": _latest_stream_sequence(),
+    }
+
+
+def _build_quotes_payload(symbols: list[str]) -> dict:
+    quote_rows = fetch_quotes(symbols)
+    return {
+        "type": "quotes",
+        "quotes": quote_rows,
+        "sequence": _next_stream_sequence(),
+        "timestamp": int(time.time() * 1000),
+    }
+
+
+def _mark_quotes_payload_sent(payload: dict) -> None:
+    _metric_inc("quotes_messages_sent")
+    _metric_inc("quotes_rows_sent", len(payload.get("quotes") or []))
+    _set_metric("last_quotes_sent_at", int(time.time() * 1000))
+    _record_stream_payload(payload)
+
+
+def _replay_messages(since_sequence: int, trace_id: str) -> list[dict]:
+    """Replay header followed by buffered quote payloads newer than since_sequence."""
     events, latest_sequence = _stream_events_after(since_sequence)
-    await websocket.send_json(
+    messages = [
         {
             "type": "replay",
             "fromSequence": since_sequence,
@@ -189,12 +225,79 @@ async def _send_replay_events(websocket: WebSocket, since_sequence: int, trace_i
             "traceId": trace_id,
             "source": "bysel-backend",
         }
-    )
+    ]
     for event in events:
         replay_payload = dict(event)
         replay_payload["isReplay"] = True
-        await websocket.send_json(replay_payload)
-    return len(events)
+        messages.append(replay_payload)
+    return messages
+
+
+def _record_resume_request(since_sequence: int, replayed_count: int) -> None:
+    _metric_inc("resume_requests")
+    _set_metric("last_resume_from_sequence", since_sequence)
+    if replayed_count > 0:
+        _metric_inc("resume_events_sent", replayed_count)
+
+
+async def _send_replay_events(websocket: WebSocket, since_sequence: int, trace_id: str) -> int:
+    messages = _replay_messages(since_sequence, trace_id)
+    for message in messages:
+        await websocket.send_json(message)
+    replayed_count = len(messages) - 1
+    _record_resume_request(since_sequence, replayed_count)
+    return replayed_count
+
+
+def _format_sse_event(payload: dict) -> str:
+    lines: list[str] = []
+    sequence = payload.get("sequence")
+    if payload.get("type") == "quotes" and sequence is not None:
+        # Browsers echo this back as Last-Event-ID on reconnect.
+        lines.append(f"id: {int(sequence)}")
+    lines.append(f"event: {payload.get('type') or 'message'}")
+    lines.append(f"data: {json.dumps(payload, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _sse_quote_events(
+    symbols: list[str],
+    resume_from_sequence: int | None,
+    trace_id: str,
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[str]:
+    _metric_inc("sse_active_connections")
+    _metric_inc("sse_total_connections")
+    _set_metric("last_trace_id", trace_id)
+    logger.info("quotes_sse.connect trace_id=%s symbols=%s", trace_id, len(symbols))
+
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        yield _format_sse_event(_subscribed_payload(symbols, trace_id))
+
+        if resume_from_sequence is not None:
+            messages = _replay_messages(resume_from_sequence, trace_id)
+            for message in messages:
+                yield _format_sse_event(message)
+            _record_resume_request(resume_from_sequence, len(messages) - 1)
+
+        while not await is_disconnected():
+            # fetch_quotes blocks on the provider; keep it off the event loop.
+            payload = await run_in_threadpool(_build_quotes_payload, symbols)
+            yield _format_sse_event(payload)
+            _mark_quotes_payload_sent(payload)
+            await asyncio.sleep(max(STREAM_PUSH_INTERVAL_MS / 1000.0, 0.05))
+    except asyncio.CancelledError:
+        _set_metric("last_disconnect_reason", "client_disconnected")
+        raise
+    except Exception as exc:
+        _metric_inc("send_errors")
+        _set_metric("last_error", f"sse_error:{str(exc)}")
+        logger.warning("quotes_sse.send_error trace_id=%s error=%s", trace_id, str(exc))
+    finally:
+        _metric_inc("sse_active_connections", -1)
+        _metric_inc("total_disconnects")
+        logger.info("quotes_sse.closed trace_id=%s", trace_id)
 
 
 @router.get("/stream/health")
@@ -230,23 +333,10 @@ async def stream_quotes(websocket: WebSocket):
         symbols = ["RELIANCE", "TCS", "INFY"]
 
     try:
-        await websocket.send_json(
-            {
-                "type": "subscribed",
-                "symbols": symbols,
-                "intervalMs": STREAM_PUSH_INTERVAL_MS,
-                "traceId": stream_trace_id,
-                "source": "bysel-backend",
-                "latestSequence": _latest_stream_sequence(),
-            }
-        )
+        await websocket.send_json(_subscribed_payload(symbols, stream_trace_id))
 
         if resume_from_sequence is not None:
-            _metric_inc("resume_requests")
-            _set_metric("last_resume_from_sequence", resume_from_sequence)
-            replayed_count = await _send_replay_events(websocket, resume_from_sequence, stream_trace_id)
-            if replayed_count > 0:
-                _metric_inc("resume_events_sent", replayed_count)
+            await _send_replay_events(websocket, resume_from_sequence, stream_trace_id)
 
         while True:
             try:
@@ -258,23 +348,10 @@ async def stream_quotes(websocket: WebSocket):
                 if updated_symbols:
                     symbols = updated_symbols
                     _metric_inc("subscriptions_updated")
-                    await websocket.send_json(
-                        {
-                            "type": "subscribed",
-                            "symbols": symbols,
-                            "intervalMs": STREAM_PUSH_INTERVAL_MS,
-                            "traceId": stream_trace_id,
-                            "source": "bysel-backend",
-                            "latestSequence": _latest_stream_sequence(),
-                        }
-                    )
+                    await websocket.send_json(_subscribed_payload(symbols, stream_trace_id))
 
                 if resume_from is not None:
-                    _metric_inc("resume_requests")
-                    _set_metric("last_resume_from_sequence", resume_from)
-                    replayed_count = await _send_replay_events(websocket, resume_from, stream_trace_id)
-                    if replayed_count > 0:
-                        _metric_inc("resume_events_sent", replayed_count)
+                    await _send_replay_events(websocket, resume_from, stream_trace_id)
             except asyncio.TimeoutError:
                 pass
             except WebSocketDisconnect as disconnect:
@@ -295,21 +372,11 @@ async def stream_quotes(websocket: WebSocket):
                     str(exc),
                 )
 
-            quote_rows = fetch_quotes(symbols)
-            sequence = _next_stream_sequence()
-            payload = {
-                "type": "quotes",
-                "quotes": quote_rows,
-                "sequence": sequence,
-                "timestamp": int(time.time() * 1000),
-            }
+            payload = await run_in_threadpool(_build_quotes_payload, symbols)
 
             try:
                 await websocket.send_json(payload)
-                _metric_inc("quotes_messages_sent")
-                _metric_inc("quotes_rows_sent", len(quote_rows))
-                _set_metric("last_quotes_sent_at", int(time.time() * 1000))
-                _record_stream_payload(payload)
+                _mark_quotes_payload_sent(payload)
             except WebSocketDisconnect as disconnect:
                 _set_metric("last_disconnect_code", disconnect.code)
                 _set_metric("last_disconnect_reason", "client_disconnected")
@@ -332,3 +399,31 @@ async def stream_quotes(websocket: WebSocket):
         _metric_inc("total_disconnects")
         _metric_inc("active_connections", -1)
         logger.info("quotes_stream.closed trace_id=%s", stream_trace_id)
+
+
+@router.get("/stream/quotes")
+async def stream_quotes_sse(
+    request: Request,
+    symbols: str = Query(""),
+    since_seq: str | None = Query(None, alias="sinceSeq"),
+):
+    """Server-Sent Events variant of /ws/quotes for clients that cannot hold websockets."""
+    trace_id = (
+        getattr(request.state, "trace_id", None)
+        or request.query_params.get("traceId")
+        or f"trc-{uuid4().hex[:16]}"
+    ).strip()[:96]
+
+    requested = _normalize_symbols(symbols.split(",")) if symbols else []
+    resolved_symbols = requested or _normalize_symbols(get_default_symbols()) or ["RELIANCE", "TCS", "INFY"]
+    resume_from_sequence = _parse_resume_sequence(since_seq or request.headers.get("Last-Event-ID"))
+
+    return StreamingResponse(
+        _sse_quote_events(resolved_symbols, resume_from_sequence, trace_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -4,28 +4,41 @@ for prices, with local SQLite for portfolio/orders/alerts.
 Enforces market hours and wallet balance checks.
 """
 
-from datetime import datetime, time
-from typing import Iterable
+import base64
+from datetime import date, datetime, time, timedelta
+from threading import Lock
+from typing import Iterable, Iterator
 import hashlib
-import pytz
+import numpy as np
 from uuid import uuid4
+from sqlalchemy import select, tuple_
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from ..database.db import (
+    BasketOrderLegModel,
+    BasketOrderModel,
     HoldingModel,
+    OrderArchiveModel,
     OrderModel,
     AlertModel,
     WalletModel,
     TriggerOrderModel,
 )
-from ..models.schemas import Order, OrderResponse, Holding, Wallet, WalletResponse, MarketStatus
-from ..market_data import fetch_quote
+from ..models.schemas import BasketLegExecution, Order, OrderResponse, Holding, Wallet, WalletResponse, MarketStatus
+from ..market_data import fetch_quote, fetch_quotes
+from ..idempotency_index import IdempotencyRecord, order_idempotency_index
+from ..order_archive import archive_cutoff
+from ..order_executor import order_executor
+from ..portfolio_aggregates import portfolio_aggregates, record_cash, record_fill
+from ..trading_calendar import trading_calendar
+from ..trigger_book import FIRE_AT_OR_BELOW, BookEntry, entry_from_row, trigger_book
 
 import logging
 
 logger = logging.getLogger(__name__)
 
-IST = pytz.timezone("Asia/Kolkata")
 ORDER_STATUS_TRANSITIONS: dict[str, set[str]] = {
     "PENDING": {"COMPLETED", "REJECTED", "TRIGGER_EXECUTED", "CANCELLED"},
     "COMPLETED": set(),
@@ -42,10 +55,17 @@ TRIGGER_STATUS_TRANSITIONS: dict[str, set[str]] = {
 ORDER_TRANSITION_ERROR_CODE = "INVALID_ORDER_TRANSITION"
 TRIGGER_TRANSITION_ERROR_CODE = "INVALID_TRIGGER_TRANSITION"
 MAX_IDEMPOTENCY_KEY_LENGTH = 128
+TRADE_HISTORY_DEFAULT_LIMIT = 100
+TRADE_HISTORY_MAX_LIMIT = 500
 TRADING_WALLET_USER_ID = 0
 DEFAULT_TRADING_WALLET_BALANCE = 100000.0
 
 
+# Serializes trigger evaluation between the tick engine and request handlers so a
+# PENDING trigger cannot be filled twice by concurrent evaluators.
+_TRIGGER_EVALUATION_LOCK = Lock()
+
+
 class LifecycleTransitionError(ValueError):
     def __init__(self, *, entity: str, current_status: str, next_status: str, error_code: str) -> None:
         self.entity = entity
@@ -54,31 +74,6 @@ class LifecycleTransitionError(ValueError):
         self.error_code = error_code
         super().__init__(f"Invalid {entity} transition from {current_status} to {next_status}")
 
-# NSE market holidays 2026 (approximate - major holidays)
-NSE_HOLIDAYS_2026 = {
-    "2026-01-26",  # Republic Day
-    "2026-03-10",  # Maha Shivaratri
-    "2026-03-17",  # Holi
-    "2026-03-30",  # Id-Ul-Fitr (Ramadan)
-    "2026-04-02",  # Thursday before Good Friday
-    "2026-04-03",  # Good Friday
-    "2026-04-06",  # Shri Ram Navami
-    "2026-04-14",  # Dr. Ambedkar Jayanti
-    "2026-05-01",  # Maharashtra Day
-    "2026-06-05",  # Eid ul-Adha (Bakrid)
-    "2026-07-06",  # Muharram
-    "2026-08-15",  # Independence Day
-    "2026-08-18",  # Parsi New Year
-    "2026-09-04",  # Milad-un-Nabi
-    "2026-10-02",  # Mahatma Gandhi Jayanti
-    "2026-10-20",  # Dussehra
-    "2026-11-09",  # Diwali (Laxmi Pujan)
-    "2026-11-10",  # Diwali Balipratipada
-    "2026-11-27",  # Guru Nanak Jayanti
-    "2026-12-25",  # Christmas
-}
-
-
 def _normalize_order_payload(order: Order, idempotency_key: str | None = None) -> Order:
     """Normalize order payload for deterministic processing."""
     symbol = (order.symbol or "").strip().upper()
@@ -133,7 +128,22 @@ def _latest_order_by_idempotency_key(db: Session, user_id: int, idempotency_key:
     )
 
 
-def _is_same_idempotent_payload(existing: OrderModel, order: Order, fingerprint: str | None = None) -> bool:
+def _lookup_idempotent_order(
+    db: Session, user_id: int, idempotency_key: str
+) -> IdempotencyRecord | None:
+    """Resolve a prior submission from the in-memory index, falling back to the orders table."""
+    record = order_idempotency_index.get(user_id, idempotency_key)
+    if record is not None:
+        return record
+    existing = _latest_order_by_idempotency_key(db, user_id=user_id, idempotency_key=idempotency_key)
+    if existing is None:
+        return None
+    record = IdempotencyRecord.from_order_row(existing)
+    order_idempotency_index.put(user_id, record)
+    return record
+
+
+def _is_same_idempotent_payload(existing: OrderModel | IdempotencyRecord, order: Order, fingerprint: str | None = None) -> bool:
     existing_fingerprint = (existing.request_fingerprint or "").strip()
     if existing_fingerprint:
         expected = fingerprint or _build_request_fingerprint(order)
@@ -147,7 +157,7 @@ def _is_same_idempotent_payload(existing: OrderModel, order: Order, fingerprint:
     )
 
 
-def _idempotency_reused_response(order: Order, existing: OrderModel, fallback_trace_id: str) -> OrderResponse:
+def _idempotency_reused_response(order: Order, existing: OrderModel | IdempotencyRecord, fallback_trace_id: str) -> OrderResponse:
     return OrderResponse(
         status="error",
         order=order,
@@ -161,7 +171,7 @@ def _idempotency_reused_response(order: Order, existing: OrderModel, fallback_tr
     )
 
 
-def _duplicate_order_response(order: Order, existing: OrderModel, fallback_trace_id: str) -> OrderResponse:
+def _duplicate_order_response(order: Order, existing: OrderModel | IdempotencyRecord, fallback_trace_id: str) -> OrderResponse:
     return OrderResponse(
         status="ok",
         order=order,
@@ -205,52 +215,8 @@ def _transition_trigger_status(trigger_db: TriggerOrderModel, next_status: str)
 
 
 def is_market_open() -> MarketStatus:
-    """Check if NSE is currently open. Market hours: 9:15 AM - 3:30 PM IST, Mon-Fri."""
-    now_ist = datetime.now(IST)
-    today_str = now_ist.strftime("%Y-%m-%d")
-    weekday = now_ist.weekday()  # 0=Monday, 6=Sunday
-
-    market_open = time(9, 15)
-    market_close = time(15, 30)
-
-    if weekday >= 5:  # Saturday or Sunday
-        next_monday = now_ist.date()
-        days_until_monday = 7 - weekday
-        from datetime import timedelta
-        next_open_date = now_ist.date() + timedelta(days=days_until_monday)
-        return MarketStatus(
-            isOpen=False,
-            message="Market closed - Weekend",
-            nextOpen=f"{next_open_date} 09:15 IST"
-        )
-
-    if today_str in NSE_HOLIDAYS_2026:
-        return MarketStatus(
-            isOpen=False,
-            message="Market closed - Holiday",
-            nextOpen="Next trading day 09:15 IST"
-        )
-
-    current_time = now_ist.time()
-    if current_time < market_open:
-        return MarketStatus(
-            isOpen=False,
-            message=f"Market opens at 9:15 AM IST",
-            nextOpen=f"{today_str} 09:15 IST",
-            nextClose=f"{today_str} 15:30 IST"
-        )
-    elif current_time > market_close:
-        return MarketStatus(
-            isOpen=False,
-            message="Market closed for today (3:30 PM IST)",
-            nextOpen="Next trading day 09:15 IST"
-        )
-    else:
-        return MarketStatus(
-            isOpen=True,
-            message="Market is OPEN",
-            nextClose=f"{today_str} 15:30 IST"
-        )
+    """Check if NSE is currently open, from the cached trading calendar (9:15 AM - 3:30 PM IST sessions)."""
+    return trading_calendar.market_status()
 
 
 def _normalize_side(value: str) -> str:
@@ -274,13 +240,16 @@ def _normalize_validity(value: str | None) -> str:
     return token
 
 
-def _wallet_for_user(db: Session, user_id: int) -> WalletModel:
+def _wallet_for_user(db: Session, user_id: int, commit: bool = True) -> WalletModel:
     wallet = db.query(WalletModel).filter(WalletModel.user_id == user_id).first()
     if not wallet:
         wallet = WalletModel(user_id=user_id, balance=DEFAULT_TRADING_WALLET_BALANCE)
         db.add(wallet)
-        db.commit()
-        db.refresh(wallet)
+        if commit:
+            db.commit()
+            db.refresh(wallet)
+        else:
+            db.flush()
     return wallet
 
 
@@ -463,16 +432,17 @@ def add_funds(db: Session, user_id: int, amount: float) -> WalletResponse:
     if amount <= 0:
         return WalletResponse(status="error", balance=0, message="Amount must be positive")
 
-    wallet = _wallet_for_user(db, user_id)
-    wallet.balance += amount
-    db.commit()
-    db.refresh(wallet)
+    def _credit(session: Session) -> WalletResponse:
+        wallet = _wallet_for_user(session, user_id, commit=False)
+        wallet.balance += amount
+        record_cash(session, user_id, float(wallet.balance))
+        return WalletResponse(
+            status="ok",
+            balance=round(wallet.balance, 2),
+            message=f"Added ₹{amount:.2f}. New balance: ₹{wallet.balance:.2f}"
+        )
 
-    return WalletResponse(
-        status="ok",
-        balance=round(wallet.balance, 2),
-        message=f"Added ₹{amount:.2f}. New balance: ₹{wallet.balance:.2f}"
-    )
+    return order_executor.submit(user_id, _credit)
 
 
 
@@ -481,61 +451,109 @@ def withdraw_funds(db: Session, user_id: int, amount: float) -> WalletResponse:
     if amount <= 0:
         return WalletResponse(status="error", balance=0, message="Amount must be positive")
 
-    wallet = _wallet_for_user(db, user_id)
-    if not wallet or wallet.balance < amount:
-        current = round(wallet.balance, 2) if wallet else 0
+    def _debit(session: Session) -> WalletResponse:
+        wallet = _wallet_for_user(session, user_id, commit=False)
+        if not wallet or wallet.balance < amount:
+            current = round(wallet.balance, 2) if wallet else 0
+            return WalletResponse(
+                status="error",
+                balance=current,
+                message=f"Insufficient balance. Available: ₹{current:.2f}"
+            )
+
+        wallet.balance -= amount
+        record_cash(session, user_id, float(wallet.balance))
         return WalletResponse(
-            status="error",
-            balance=current,
-            message=f"Insufficient balance. Available: ₹{current:.2f}"
+            status="ok",
+            balance=round(wallet.balance, 2),
+            message=f"Withdrew ₹{amount:.2f}. Remaining: ₹{wallet.balance:.2f}"
         )
 
-    wallet.balance -= amount
-    db.commit()
-    db.refresh(wallet)
-
-    return WalletResponse(
-        status="ok",
-        balance=round(wallet.balance, 2),
-        message=f"Withdrew ₹{amount:.2f}. Remaining: ₹{wallet.balance:.2f}"
-    )
-
+    return order_executor.submit(user_id, _debit)
 
-def get_holdings(db: Session) -> list[Holding]:
-    """Get all holdings with live prices."""
-    holdings_db = db.query(HoldingModel).all()
-    holdings = []
-    for h in holdings_db:
-        # Fetch live price for each holding
-        live_quote = fetch_quote(h.symbol)
-        live_price = live_quote["last"] if live_quote["last"] > 0 else h.last_price
-
-        # Update stored price
-        h.last_price = live_price
-        h.pnl = round((live_price - h.avg_price) * h.quantity, 2)
-        db.commit()
 
+def _revalue_holdings(holdings_db: list[HoldingModel], quotes: list[dict]) -> tuple[list[Holding], bool]:
+    """Mark holdings to ``quotes`` in place; returns the response rows and whether any row changed."""
+    quote_prices = {
+        (quote.get("symbol") or "").upper(): float(quote.get("last") or 0.0)
+        for quote in quotes
+    }
+    stored = np.array([float(h.last_price or 0.0) for h in holdings_db])
+    fetched = np.array([quote_prices.get((h.symbol or "").upper(), 0.0) for h in holdings_db])
+    live = np.where(fetched > 0, fetched, stored)
+    avg = np.array([float(h.avg_price or 0.0) for h in holdings_db])
+    qty = np.array([float(h.quantity or 0) for h in holdings_db])
+    pnl = np.round((live - avg) * qty, 2)
+
+    changed = False
+    holdings: list[Holding] = []
+    for h, live_price, row_pnl in zip(holdings_db, live.tolist(), pnl.tolist()):
+        if h.last_price != live_price or h.pnl != row_pnl:
+            h.last_price = live_price
+            h.pnl = row_pnl
+            changed = True
         holdings.append(Holding(
             symbol=h.symbol,
             qty=h.quantity,
             avgPrice=round(h.avg_price, 2),
             last=round(live_price, 2),
-            pnl=round(h.pnl, 2)
+            pnl=round(row_pnl, 2)
         ))
+    return holdings, changed
+
+
+def _refresh_holding_prices(db: Session, holdings_db: list[HoldingModel]) -> list[Holding]:
+    """Revalue holdings from one batched quote fetch and persist changes in a single commit."""
+    if not holdings_db:
+        return []
+
+    holdings, changed = _revalue_holdings(holdings_db, fetch_quotes([h.symbol for h in holdings_db]))
+    if changed:
+        db.commit()
     return holdings
 
 
-def get_holding(db: Session, symbol: str) -> Holding | None:
-    """Get a single holding by symbol with live price."""
-    h = db.query(HoldingModel).filter(HoldingModel.symbol == symbol).first()
-    if not h:
-        return None
+def get_holdings(db: Session, user_id: int = 1) -> list[Holding]:
+    """Get the user's holdings with live prices."""
+    holdings_db = db.query(HoldingModel).filter(HoldingModel.user_id == user_id).all()
+    return _refresh_holding_prices(db, holdings_db)
+
+
+def peek_holdings(db: Session, user_id: int = 1) -> list[Holding]:
+    """``get_holdings`` without persisting the new prices, for read-only sessions."""
+    holdings_db = db.query(HoldingModel).filter(HoldingModel.user_id == user_id).all()
+    if not holdings_db:
+        return []
+    return _revalue_holdings(holdings_db, fetch_quotes([h.symbol for h in holdings_db]))[0]
+
+
+def peek_wallet_balance(db: Session, user_id: int) -> float:
+    """Wallet balance without creating the wallet; a user without one has the opening balance."""
+    balance = db.query(WalletModel.balance).filter(WalletModel.user_id == user_id).scalar()
+    return round(float(DEFAULT_TRADING_WALLET_BALANCE if balance is None else balance), 2)
+
+
+async def get_holdings_async(db: AsyncSession, user_id: int = 1) -> list[Holding]:
+    """``get_holdings`` on an async session; the quote fetch runs in the threadpool."""
+    holdings_db = list((await db.execute(select(HoldingModel).where(HoldingModel.user_id == user_id))).scalars())
+    if not holdings_db:
+        return []
 
-    live_quote = fetch_quote(symbol)
+    quotes = await run_in_threadpool(fetch_quotes, [h.symbol for h in holdings_db])
+    holdings, changed = _revalue_holdings(holdings_db, quotes)
+    if changed:
+        await db.commit()
+    return holdings
+
+
+def _holding_response(db_holding: HoldingModel, live_quote: dict) -> tuple[Holding, bool]:
+    h = db_holding
     live_price = live_quote["last"] if live_quote["last"] > 0 else h.last_price
-    h.last_price = live_price
-    h.pnl = round((live_price - h.avg_price) * h.quantity, 2)
-    db.commit()
+    pnl = round((live_price - h.avg_price) * h.quantity, 2)
+    changed = h.last_price != live_price or h.pnl != pnl
+    if changed:
+        h.last_price = live_price
+        h.pnl = pnl
 
     return Holding(
         symbol=h.symbol,
@@ -543,146 +561,256 @@ def get_holding(db: Session, symbol: str) -> Holding | None:
         avgPrice=round(h.avg_price, 2),
         last=round(live_price, 2),
         pnl=round(h.pnl, 2)
+    ), changed
+
+
+def get_holding(db: Session, symbol: str, user_id: int = 1) -> Holding | None:
+    """Get one of the user's holdings by symbol with live price."""
+    h = _holding_for_user(db, user_id, symbol)
+    if not h:
+        return None
+
+    holding, changed = _holding_response(h, fetch_quote(symbol))
+    if changed:
+        db.commit()
+    return holding
+
+
+async def get_holding_async(db: AsyncSession, symbol: str, user_id: int = 1) -> Holding | None:
+    h = (
+        await db.execute(select(HoldingModel).where(HoldingModel.user_id == user_id, HoldingModel.symbol == symbol))
+    ).scalars().first()
+    if not h:
+        return None
+
+    holding, changed = _holding_response(h, await run_in_threadpool(fetch_quote, symbol))
+    if changed:
+        await db.commit()
+    return holding
+
+
+def _holding_for_user(db: Session, user_id: int, symbol: str) -> HoldingModel | None:
+    return (
+        db.query(HoldingModel)
+        .filter(HoldingModel.user_id == user_id, HoldingModel.symbol == symbol)
+        .first()
     )
 
 
-def _execute_order_at_price(
-    db: Session,
+def get_portfolio_valuation(db: Session, user_id: int) -> dict[str, float | int]:
+    """Value the user's maintained portfolio aggregate against one batched quote snapshot."""
+    aggregate = portfolio_aggregates.get(db, user_id)
+    symbols = list(aggregate.positions)
+    prices = {
+        (quote.get("symbol") or "").upper(): float(quote.get("last") or 0.0)
+        for quote in (fetch_quotes(symbols) if symbols else [])
+    }
+    return aggregate.valuation(prices)
+
+
+def _persist(db: Session, row: object, commit: bool) -> None:
+    if commit:
+        db.commit()
+        db.refresh(row)
+    else:
+        db.flush()
+
+
+def _build_order_row(
     order: Order,
+    *,
+    user_id: int,
+    side: str,
+    order_type: str,
+    validity: str,
     execution_price: float,
-    user_id: int = 1,
+    status: str,
     basket_id: int | None = None,
-    status: str = "COMPLETED",
-    idempotency_key: str | None = None,
     trace_id: str | None = None,
-) -> tuple[OrderResponse, OrderModel]:
-    normalized_order = _normalize_order_payload(order, idempotency_key=idempotency_key)
-    resolved_trace_id = (trace_id or f"trc-{uuid4().hex[:16]}").strip()
-    side = _normalize_side(normalized_order.side)
-    order_type = _normalize_order_type(getattr(normalized_order, "orderType", "MARKET"))
-    validity = _normalize_validity(getattr(normalized_order, "validity", "DAY"))
-    execution_price = float(execution_price)
-    if execution_price <= 0:
-        raise ValueError("execution_price must be positive")
+) -> OrderModel:
+    return OrderModel(
+        user_id=user_id,
+        symbol=order.symbol,
+        quantity=order.qty,
+        side=side,
+        order_type=order_type,
+        validity=validity,
+        limit_price=getattr(order, "limitPrice", None),
+        trigger_price=getattr(order, "triggerPrice", None),
+        basket_id=basket_id,
+        tag=getattr(order, "tag", None),
+        price=execution_price,
+        total=round(execution_price * order.qty, 2),
+        status=status,
+        idempotency_key=order.idempotencyKey,
+        request_fingerprint=_build_request_fingerprint(order),
+        trace_id=trace_id,
+    )
 
-    wallet = _wallet_for_user(db, user_id)
-    existing = db.query(HoldingModel).filter(HoldingModel.symbol == normalized_order.symbol).first()
 
+def _fill_rejection(
+    order: Order,
+    side: str,
+    execution_price: float,
+    wallet_balance: float,
+    held_quantity: int,
+) -> tuple[str, str] | None:
+    """Return ``(error_code, message)`` when the wallet or holding cannot cover the fill."""
     if side == "BUY":
-        order_cost = execution_price * normalized_order.qty
-        if wallet.balance < order_cost:
-            response = OrderResponse(
-                status="error",
-                order=normalized_order,
-                message=f"Insufficient funds. Need ₹{order_cost:.2f} but wallet has ₹{wallet.balance:.2f}",
-                traceId=resolved_trace_id,
-                idempotencyKey=normalized_order.idempotencyKey,
-                errorCode="INSUFFICIENT_FUNDS",
+        order_cost = execution_price * order.qty
+        if wallet_balance < order_cost:
+            return (
+                "INSUFFICIENT_FUNDS",
+                f"Insufficient funds. Need ₹{order_cost:.2f} but wallet has ₹{wallet_balance:.2f}",
             )
-            failed_order = OrderModel(
-                user_id=user_id,
-                symbol=normalized_order.symbol,
-                quantity=normalized_order.qty,
-                side=side,
-                order_type=order_type,
-                validity=validity,
-                limit_price=getattr(normalized_order, "limitPrice", None),
-                trigger_price=getattr(normalized_order, "triggerPrice", None),
-                basket_id=basket_id,
-                tag=getattr(normalized_order, "tag", None),
-                price=execution_price,
-                total=round(order_cost, 2),
-                status="REJECTED",
-                idempotency_key=normalized_order.idempotencyKey,
-                request_fingerprint=_build_request_fingerprint(normalized_order),
-                trace_id=resolved_trace_id,
-            )
-            db.add(failed_order)
-            db.commit()
-            db.refresh(failed_order)
-            return response, failed_order
+        return None
+    if held_quantity < order.qty:
+        return (
+            "INSUFFICIENT_HOLDINGS",
+            f"Insufficient holdings: have {held_quantity}, trying to sell {order.qty}",
+        )
+    return None
+
+
+def _apply_fill(
+    db: Session,
+    wallet: WalletModel,
+    existing: HoldingModel | None,
+    symbol: str,
+    side: str,
+    qty: int,
+    execution_price: float,
+) -> HoldingModel | None:
+    """Move cash and position for a validated fill. Returns the holding left afterwards."""
+    previous_quantity = int(existing.quantity or 0) if existing else 0
+    previous_avg_price = float(existing.avg_price or 0.0) if existing else 0.0
+    realized_delta = 0.0
 
-        wallet.balance -= order_cost
+    if side == "BUY":
+        wallet.balance -= execution_price * qty
         if existing:
-            total_cost = (existing.avg_price * existing.quantity) + (execution_price * normalized_order.qty)
-            existing.quantity += normalized_order.qty
+            total_cost = (existing.avg_price * existing.quantity) + (execution_price * qty)
+            existing.quantity += qty
             existing.avg_price = round(total_cost / existing.quantity, 2)
             existing.last_price = execution_price
             existing.pnl = round((execution_price - existing.avg_price) * existing.quantity, 2)
+            holding = existing
         else:
-            db.add(
-                HoldingModel(
-                    symbol=normalized_order.symbol,
-                    quantity=normalized_order.qty,
-                    avg_price=execution_price,
-                    last_price=execution_price,
-                    pnl=0.0,
-                )
+            holding = HoldingModel(
+                user_id=wallet.user_id,
+                symbol=symbol,
+                quantity=qty,
+                avg_price=execution_price,
+                last_price=execution_price,
+                pnl=0.0,
             )
+            db.add(holding)
     else:
-        if not existing or existing.quantity < normalized_order.qty:
-            response = OrderResponse(
-                status="error",
-                order=normalized_order,
-                message=f"Insufficient holdings: have {existing.quantity if existing else 0}, trying to sell {normalized_order.qty}",
-                traceId=resolved_trace_id,
-                idempotencyKey=normalized_order.idempotencyKey,
-                errorCode="INSUFFICIENT_HOLDINGS",
-            )
-            failed_order = OrderModel(
-                user_id=user_id,
-                symbol=normalized_order.symbol,
-                quantity=normalized_order.qty,
-                side=side,
-                order_type=order_type,
-                validity=validity,
-                limit_price=getattr(normalized_order, "limitPrice", None),
-                trigger_price=getattr(normalized_order, "triggerPrice", None),
-                basket_id=basket_id,
-                tag=getattr(normalized_order, "tag", None),
-                price=execution_price,
-                total=round(execution_price * normalized_order.qty, 2),
-                status="REJECTED",
-                idempotency_key=normalized_order.idempotencyKey,
-                request_fingerprint=_build_request_fingerprint(normalized_order),
-                trace_id=resolved_trace_id,
-            )
-            db.add(failed_order)
-            db.commit()
-            db.refresh(failed_order)
-            return response, failed_order
-
-        sale_proceeds = execution_price * normalized_order.qty
-        wallet.balance += sale_proceeds
-        existing.quantity -= normalized_order.qty
+        wallet.balance += execution_price * qty
+        realized_delta = (execution_price - previous_avg_price) * qty
+        existing.quantity -= qty
         existing.last_price = execution_price
         if existing.quantity == 0:
             db.delete(existing)
+            # Flush the delete now so a re-buy in the same transaction does not collide
+            # with this row on the (user_id, symbol) unique index.
+            db.flush()
+            holding = None
         else:
             existing.pnl = round((execution_price - existing.avg_price) * existing.quantity, 2)
+            holding = existing
+
+    record_fill(
+        db,
+        user_id=wallet.user_id,
+        symbol=symbol,
+        previous_quantity=previous_quantity,
+        previous_avg_price=previous_avg_price,
+        quantity=int(holding.quantity) if holding else 0,
+        avg_price=float(holding.avg_price) if holding else 0.0,
+        execution_price=execution_price,
+        cash=float(wallet.balance),
+        realized_delta=realized_delta,
+    )
+    return holding
+
+
+def _execute_order_at_price(
+    db: Session,
+    order: Order,
+    execution_price: float,
+    user_id: int = 1,
+    basket_id: int | None = None,
+    status: str = "COMPLETED",
+    idempotency_key: str | None = None,
+    trace_id: str | None = None,
+    commit: bool = True,
+) -> tuple[OrderResponse, OrderModel]:
+    """Fill ``order`` at ``execution_price`` against the wallet and holdings.
+
+    With ``commit=False`` the changes are only flushed, for callers that commit a
+    group of fills together (see ``order_executor``).
+    """
+    normalized_order = _normalize_order_payload(order, idempotency_key=idempotency_key)
+    resolved_trace_id = (trace_id or f"trc-{uuid4().hex[:16]}").strip()
+    side = _normalize_side(normalized_order.side)
+    order_type = _normalize_order_type(getattr(normalized_order, "orderType", "MARKET"))
+    validity = _normalize_validity(getattr(normalized_order, "validity", "DAY"))
+    execution_price = float(execution_price)
+    if execution_price <= 0:
+        raise ValueError("execution_price must be positive")
+
+    wallet = _wallet_for_user(db, user_id, commit=commit)
+    existing = _holding_for_user(db, user_id, normalized_order.symbol)
+
+    rejection = _fill_rejection(
+        normalized_order,
+        side,
+        execution_price,
+        wallet_balance=wallet.balance,
+        held_quantity=existing.quantity if existing else 0,
+    )
+    if rejection is not None:
+        error_code, message = rejection
+        response = OrderResponse(
+            status="error",
+            order=normalized_order,
+            message=message,
+            traceId=resolved_trace_id,
+            idempotencyKey=normalized_order.idempotencyKey,
+            errorCode=error_code,
+        )
+        failed_order = _build_order_row(
+            normalized_order,
+            user_id=user_id,
+            side=side,
+            order_type=order_type,
+            validity=validity,
+            execution_price=execution_price,
+            status="REJECTED",
+            basket_id=basket_id,
+            trace_id=resolved_trace_id,
+        )
+        db.add(failed_order)
+        _persist(db, failed_order, commit)
+        return response, failed_order
 
-    order_db = OrderModel(
+    _apply_fill(db, wallet, existing, normalized_order.symbol, side, normalized_order.qty, execution_price)
+
+    order_db = _build_order_row(
+        normalized_order,
         user_id=user_id,
-        symbol=normalized_order.symbol,
-        quantity=normalized_order.qty,
         side=side,
         order_type=order_type,
         validity=validity,
-        limit_price=getattr(normalized_order, "limitPrice", None),
-        trigger_price=getattr(normalized_order, "triggerPrice", None),
-        basket_id=basket_id,
-        tag=getattr(normalized_order, "tag", None),
-        price=execution_price,
-        total=round(execution_price * normalized_order.qty, 2),
+        execution_price=execution_price,
         status="PENDING",
-        idempotency_key=normalized_order.idempotencyKey,
-        request_fingerprint=_build_request_fingerprint(normalized_order),
+        basket_id=basket_id,
         trace_id=resolved_trace_id,
     )
     db.add(order_db)
     _transition_order_status(order_db, status.upper())
-    db.commit()
-    db.refresh(order_db)
+    _persist(db, order_db, commit)
 
     logger.info(
         "Order executed trace_id=%s: %s %sx %s @ ₹%.2f | Wallet: ₹%.2f | user=%s",
@@ -728,31 +856,133 @@ def _create_trigger_entry(db: Session, order: Order, user_id: int = 1) -> Trigge
     db.add(trigger)
     db.commit()
     db.refresh(trigger)
+    trigger_book.add(trigger)
     return trigger
 
 
+def cancel_trigger_order(db: Session, trigger_id: int, user_id: int) -> TriggerOrderModel | None:
+    """Cancel a PENDING trigger owned by ``user_id``. Returns None when it does not exist."""
+    with _TRIGGER_EVALUATION_LOCK:
+        trigger = (
+            db.query(TriggerOrderModel)
+            .filter(TriggerOrderModel.id == trigger_id, TriggerOrderModel.user_id == user_id)
+            .first()
+        )
+        if trigger is None:
+            return None
+        _transition_trigger_status(trigger, "CANCELLED")
+        db.commit()
+        trigger_book.remove(trigger.id)
+        return trigger
+
+
+def _trigger_fill_job(trigger_id: int, order: Order, execution_price: float):
+    """Executor job that fills a trigger and marks it EXECUTED/FAILED in the same transaction."""
+
+    def job(session: Session) -> dict | None:
+        trigger = session.query(TriggerOrderModel).filter(TriggerOrderModel.id == trigger_id).first()
+        if trigger is None or (trigger.status or "").upper() != "PENDING":
+            return None
+        response, order_row = _execute_order_at_price(
+            db=session,
+            order=order,
+            execution_price=execution_price,
+            user_id=trigger.user_id,
+            status="TRIGGER_EXECUTED",
+            commit=False,
+        )
+        _transition_trigger_status(trigger, "EXECUTED" if response.status == "ok" else "FAILED")
+        return {
+            "triggerId": trigger.id,
+            "symbol": trigger.symbol,
+            "status": trigger.status,
+            "orderId": order_row.id,
+            "message": response.message,
+        }
+
+    return job
+
+
 def evaluate_pending_triggers(
     db: Session,
     user_id: int | None = None,
     symbols: Iterable[str] | None = None,
+    prices: dict[str, float] | None = None,
+    price_ranges: dict[str, tuple[float, float]] | None = None,
 ) -> list[dict]:
-    query = db.query(TriggerOrderModel).filter(TriggerOrderModel.status == "PENDING")
-    if user_id is not None:
-        query = query.filter(TriggerOrderModel.user_id == user_id)
+    """Execute or expire PENDING triggers whose conditions are met.
+
+    ``prices`` lets tick-driven callers pass the prices they already hold; symbols
+    missing from it fall back to ``fetch_quote``. ``price_ranges`` adds the
+    (low, high) traded since the last evaluation: triggers that fire at or below
+    their level are checked against the low, those that fire at or above against
+    the high, and the rest against the last price.
+    """
+    with _TRIGGER_EVALUATION_LOCK:
+        return _evaluate_pending_triggers_locked(
+            db, user_id=user_id, symbols=symbols, prices=prices, price_ranges=price_ranges
+        )
+
 
-    pending = query.order_by(TriggerOrderModel.created_at.asc()).all()
+def _crossing_price(entry: BookEntry, live_price: float, price_range: tuple[float, float] | None) -> float:
+    if price_range is None or entry.direction is None:
+        return live_price
+    low, high = price_range
+    return low if entry.direction == FIRE_AT_OR_BELOW else high
+
+
+def _evaluate_pending_triggers_locked(
+    db: Session,
+    user_id: int | None,
+    symbols: Iterable[str] | None,
+    prices: dict[str, float] | None,
+    price_ranges: dict[str, tuple[float, float]] | None,
+) -> list[dict]:
+    trigger_book.sync(db)
     symbol_filter = {symbol.strip().upper() for symbol in (symbols or []) if symbol and symbol.strip()}
+    candidate_symbols = sorted(symbol_filter) if symbol_filter else trigger_book.symbols()
 
-    results: list[dict] = []
-    for entry in pending:
-        if symbol_filter and entry.symbol.upper() not in symbol_filter:
+    candidate_ids: list[int] = []
+    live_prices: dict[str, float] = {}
+    for symbol in candidate_symbols:
+        if not trigger_book.has_pending(symbol, user_id=user_id):
             continue
-
-        quote = fetch_quote(entry.symbol)
-        live_price = float(quote.get("last") or 0.0)
+        known_price = (prices or {}).get(symbol)
+        if known_price is not None:
+            live_price = float(known_price)
+        else:
+            quote = fetch_quote(symbol)
+            live_price = float(quote.get("last") or 0.0)
         if live_price <= 0:
             continue
+        live_prices[symbol] = live_price
+        price_range = (price_ranges or {}).get(symbol)
+        if price_range is None:
+            candidate_ids.extend(trigger_book.candidates(symbol, live_price, user_id=user_id))
+        else:
+            candidate_ids.extend(
+                trigger_book.candidates(symbol, price_range[0], user_id=user_id, high=price_range[1])
+            )
+
+    if not candidate_ids:
+        return []
+
+    rows = (
+        db.query(TriggerOrderModel)
+        .filter(TriggerOrderModel.id.in_(candidate_ids))
+        .order_by(TriggerOrderModel.created_at.asc(), TriggerOrderModel.id.asc())
+        .all()
+    )
+    stale_ids = set(candidate_ids) - {row.id for row in rows}
+
+    results: list[dict] = []
+    for entry in rows:
+        if (entry.status or "").upper() != "PENDING":
+            stale_ids.add(entry.id)
+            continue
 
+        symbol = entry.symbol.upper()
+        live_price = _crossing_price(entry_from_row(entry), live_prices[symbol], (price_ranges or {}).get(symbol))
         simulated_order = Order(
             symbol=entry.symbol,
             qty=entry.quantity,
@@ -765,29 +995,18 @@ def evaluate_pending_triggers(
         )
 
         if _should_trigger(simulated_order, live_price):
-            exec_price = _execution_price(simulated_order, live_price)
-            response, order_row = _execute_order_at_price(
-                db=db,
-                order=simulated_order,
-                execution_price=exec_price,
-                user_id=entry.user_id,
-                status="TRIGGER_EXECUTED",
-            )
-            next_status = "EXECUTED" if response.status == "ok" else "FAILED"
-            _transition_trigger_status(entry, next_status)
-            db.commit()
-            results.append(
-                {
-                    "triggerId": entry.id,
-                    "symbol": entry.symbol,
-                    "status": entry.status,
-                    "orderId": order_row.id,
-                    "message": response.message,
-                }
+            filled = order_executor.submit(
+                entry.user_id,
+                _trigger_fill_job(entry.id, simulated_order, _execution_price(simulated_order, live_price)),
             )
+            db.expire(entry)
+            trigger_book.remove(entry.id)
+            if filled is not None:
+                results.append(filled)
         elif entry.validity == "IOC":
             _transition_trigger_status(entry, "CANCELLED")
             db.commit()
+            trigger_book.remove(entry.id)
             results.append(
                 {
                     "triggerId": entry.id,
@@ -798,20 +1017,211 @@ def evaluate_pending_triggers(
                 }
             )
 
+    for trigger_id in stale_ids:
+        trigger_book.remove(trigger_id)
     return results
 
 
-def place_order(
+def _alert_crossed(alert: AlertModel, live_price: float) -> bool:
+    threshold = float(alert.threshold_price or 0.0)
+    if threshold <= 0:
+        return False
+    alert_type = (alert.alert_type or "").strip().upper()
+    if alert_type == "ABOVE":
+        return live_price >= threshold
+    if alert_type == "BELOW":
+        return live_price <= threshold
+    return False
+
+
+def evaluate_price_alerts(
     db: Session,
-    order: Order,
-    user_id: int = 1,
-    idempotency_key: str | None = None,
-    trace_id: str | None = None,
-) -> OrderResponse:
-    """Place a buy or sell order with idempotency and deterministic status handling."""
-    normalized_order = _normalize_order_payload(order, idempotency_key=idempotency_key)
-    resolved_trace_id = (trace_id or f"trc-{uuid4().hex[:16]}").strip()
+    prices: dict[str, float],
+    price_ranges: dict[str, tuple[float, float]] | None = None,
+) -> list[dict]:
+    """Fire active ABOVE/BELOW alerts crossed by ``prices`` and deactivate them.
+
+    With ``price_ranges`` (low, high per symbol), ABOVE alerts are checked
+    against the high and BELOW alerts against the low.
+    """
+    live_prices = {
+        symbol.strip().upper(): float(price)
+        for symbol, price in prices.items()
+        if symbol and price is not None and float(price) > 0
+    }
+    if not live_prices:
+        return []
 
+    active = (
+        db.query(AlertModel)
+        .filter(AlertModel.is_active == True, AlertModel.symbol.in_(list(live_prices)))  # noqa: E712
+        .all()
+    )
+
+    fired: list[dict] = []
+    fired_at = datetime.utcnow()
+    for alert in active:
+        symbol = (alert.symbol or "").upper()
+        live_price = live_prices.get(symbol)
+        price_range = (price_ranges or {}).get(symbol)
+        if live_price is not None and price_range is not None:
+            live_price = price_range[1] if (alert.alert_type or "").strip().upper() == "ABOVE" else price_range[0]
+        if live_price is None or not _alert_crossed(alert, live_price):
+            continue
+        alert.is_active = False
+        alert.triggered_price = live_price
+        alert.triggered_at = fired_at
+        fired.append(
+            {
+                "alertId": alert.id,
+                "symbol": alert.symbol,
+                "alertType": alert.alert_type,
+                "thresholdPrice": alert.threshold_price,
+                "triggeredPrice": live_price,
+            }
+        )
+
+    if fired:
+        db.commit()
+        for item in fired:
+            logger.info(
+                "alert.fired id=%s symbol=%s type=%s threshold=%.2f price=%.2f",
+                item["alertId"],
+                item["symbol"],
+                item["alertType"],
+                float(item["thresholdPrice"] or 0.0),
+                item["triggeredPrice"],
+            )
+    return fired
+
+
+def encode_history_cursor(created_at: datetime, order_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{int(order_id)}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of ``encode_history_cursor``; raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at_raw, order_id_raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|", 1)
+        return datetime.fromisoformat(created_at_raw), int(order_id_raw)
+    except Exception as exc:
+        raise ValueError("Invalid history cursor") from exc
+
+
+def _trade_history_statement(
+    user_id: int,
+    symbol: str | None,
+    side: str | None,
+    from_date: date | None,
+    to_date: date | None,
+    cursor: str | None,
+    limit: int,
+    model: type = OrderModel,
+):
+    statement = select(model).where(model.user_id == user_id)
+    if symbol:
+        statement = statement.where(model.symbol == symbol.strip().upper())
+    if side:
+        statement = statement.where(model.side == _normalize_side(side))
+    if from_date:
+        statement = statement.where(model.created_at >= datetime.combine(from_date, time.min))
+    if to_date:
+        statement = statement.where(model.created_at < datetime.combine(to_date + timedelta(days=1), time.min))
+    if cursor:
+        cursor_created_at, cursor_id = decode_history_cursor(cursor)
+        statement = statement.where(tuple_(model.created_at, model.id) < (cursor_created_at, cursor_id))
+    return statement.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+
+def _history_reaches_archive(hot_rows: list[OrderModel], limit: int, from_date: date | None) -> bool:
+    """Whether ``orders_archive`` can hold rows for this page.
+
+    Archived orders are all older than ``archive_cutoff()``, so a full hot page whose
+    last row is inside the hot window, or a range starting inside it, is complete.
+    """
+    cutoff = archive_cutoff()
+    if from_date and datetime.combine(from_date, time.min) >= cutoff:
+        return False
+    if len(hot_rows) <= limit:
+        return True
+    return hot_rows[-1].created_at is None or hot_rows[-1].created_at < cutoff
+
+
+def _merge_history_rows(hot_rows: list, archived_rows: list, limit: int) -> list:
+    rows = hot_rows + archived_rows
+    rows.sort(key=lambda row: (row.created_at or datetime.min, row.id), reverse=True)
+    return rows[: limit + 1]
+
+
+def _trade_history_page(rows: list[OrderModel], limit: int) -> tuple[list[OrderModel], str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_history_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def query_trade_history(
+    db: Session,
+    user_id: int,
+    symbol: str | None = None,
+    side: str | None = None,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    cursor: str | None = None,
+    limit: int = TRADE_HISTORY_DEFAULT_LIMIT,
+) -> tuple[list[OrderModel], str | None]:
+    """One page of a user's orders, newest first, keyed on ``(created_at, id)``.
+
+    Returns the rows and the cursor for the next page (None on the last page). Each
+    page is an index range scan on ``ix_orders_user_created_at``, so its cost does not
+    grow with the length of the history. Pages that reach past the archive horizon
+    also read ``orders_archive`` and merge the two by ``(created_at, id)``.
+    """
+    limit = max(1, min(int(limit), TRADE_HISTORY_MAX_LIMIT))
+    filters = (user_id, symbol, side, from_date, to_date, cursor, limit)
+    rows = list(db.execute(_trade_history_statement(*filters)).scalars())
+    if _history_reaches_archive(rows, limit, from_date):
+        archived = list(db.execute(_trade_history_statement(*filters, model=OrderArchiveModel)).scalars())
+        rows = _merge_history_rows(rows, archived, limit)
+    return _trade_history_page(rows, limit)
+
+
+async def query_trade_history_async(
+    db: AsyncSession,
+    user_id: int,
+    symbol: str | None = None,
+    side: str | None = None,
+    from_date: date | None = None,
+    to_date: date | None = None,
+    cursor: str | None = None,
+    limit: int = TRADE_HISTORY_DEFAULT_LIMIT,
+) -> tuple[list[OrderModel], str | None]:
+    """``query_trade_history`` on an async session."""
+    limit = max(1, min(int(limit), TRADE_HISTORY_MAX_LIMIT))
+    filters = (user_id, symbol, side, from_date, to_date, cursor, limit)
+    rows = list((await db.execute(_trade_history_statement(*filters))).scalars())
+    if _history_reaches_archive(rows, limit, from_date):
+        archived = list((await db.execute(_trade_history_statement(*filters, model=OrderArchiveModel))).scalars())
+        rows = _merge_history_rows(rows, archived, limit)
+    return _trade_history_page(rows, limit)
+
+
+def iter_trade_history(db: Session, user_id: int, page_size: int = TRADE_HISTORY_MAX_LIMIT, **filters) -> Iterator[OrderModel]:
+    """Every matching order, newest first, fetched page by page for bulk export."""
+    cursor: str | None = None
+    while True:
+        rows, cursor = query_trade_history(db, user_id, cursor=cursor, limit=page_size, **filters)
+        yield from rows
+        if cursor is None:
+            return
+        # Release the finished page before loading the next one.
+        db.expunge_all()
+
+
+def _order_validation_error(normalized_order: Order, resolved_trace_id: str) -> OrderResponse | None:
+    """Normalize side/type/validity in place and return an error response for invalid payloads."""
     try:
         normalized_order.side = _normalize_side(normalized_order.side)
         normalized_order.orderType = _normalize_order_type(getattr(normalized_order, "orderType", "MARKET"))
@@ -875,14 +1285,28 @@ def place_order(
             errorCode="INVALID_IDEMPOTENCY_KEY",
         )
 
+    return None
+
+
+def place_order(
+    db: Session,
+    order: Order,
+    user_id: int = 1,
+    idempotency_key: str | None = None,
+    trace_id: str | None = None,
+) -> OrderResponse:
+    """Place a buy or sell order with idempotency and deterministic status handling."""
+    normalized_order = _normalize_order_payload(order, idempotency_key=idempotency_key)
+    resolved_trace_id = (trace_id or f"trc-{uuid4().hex[:16]}").strip()
+
+    validation_error = _order_validation_error(normalized_order, resolved_trace_id)
+    if validation_error is not None:
+        return validation_error
+
     current_fingerprint: str | None = None
     if normalized_order.idempotencyKey:
         current_fingerprint = _build_request_fingerprint(normalized_order)
-        duplicate_order = _latest_order_by_idempotency_key(
-            db,
-            user_id=user_id,
-            idempotency_key=normalized_order.idempotencyKey,
-        )
+        duplicate_order = _lookup_idempotent_order(db, user_id, normalized_order.idempotencyKey)
         if duplicate_order:
             same_payload = _is_same_idempotent_payload(
                 duplicate_order,
@@ -940,14 +1364,23 @@ def place_order(
 
     exec_price = _execution_price(normalized_order, live_price)
     try:
-        response, _ = _execute_order_at_price(
-            db=db,
-            order=normalized_order,
-            execution_price=exec_price,
-            user_id=user_id,
-            idempotency_key=normalized_order.idempotencyKey,
-            trace_id=resolved_trace_id,
-        )
+        def _execute(session: Session) -> tuple[OrderResponse, IdempotencyRecord | None]:
+            response, order_row = _execute_order_at_price(
+                db=session,
+                order=normalized_order,
+                execution_price=exec_price,
+                user_id=user_id,
+                idempotency_key=normalized_order.idempotencyKey,
+                trace_id=resolved_trace_id,
+                commit=False,
+            )
+            record = IdempotencyRecord.from_order_row(order_row) if order_row.idempotency_key else None
+            return response, record
+
+        response, record = order_executor.submit(user_id, _execute)
+        if record is not None:
+            # Only published after the executor committed, so the index never runs ahead of the DB.
+            order_idempotency_index.put(user_id, record)
         return response
     except LifecycleTransitionError as exc:
         db.rollback()
@@ -970,11 +1403,7 @@ def place_order(
     except IntegrityError:
         db.rollback()
         if normalized_order.idempotencyKey:
-            duplicate_order = _latest_order_by_idempotency_key(
-                db,
-                user_id=user_id,
-                idempotency_key=normalized_order.idempotencyKey,
-            )
+            duplicate_order = _lookup_idempotent_order(db, user_id, normalized_order.idempotencyKey)
             if duplicate_order:
                 same_payload = _is_same_idempotent_payload(
                     duplicate_order,
@@ -999,3 +1428,321 @@ def place_order(
             idempotencyKey=normalized_order.idempotencyKey,
             errorCode="ORDER_EXECUTION_FAILED",
         )
+
+
+def _basket_leg_idempotency_key(idempotency_key: str | None, basket_id: int, leg_id: int) -> str | None:
+    if not idempotency_key:
+        return None
+    digest = hashlib.sha1(f"{idempotency_key}|{basket_id}|{leg_id}".encode("utf-8")).hexdigest()[:16]
+    return f"basket-{basket_id}-leg-{leg_id}-{digest}"
+
+
+def _basket_leg_result(
+    leg: tuple[str, str, int], status: str, message: str, order_id: int | None = None
+) -> BasketLegExecution:
+    symbol, side, qty = leg
+    return BasketLegExecution(
+        symbol=symbol,
+        side=side,
+        qty=qty,
+        status=status,
+        message=message or "",
+        orderId=order_id,
+    )
+
+
+def execute_basket(
+    db: Session,
+    basket: BasketOrderModel,
+    legs: list[BasketOrderLegModel],
+    user_id: int = 1,
+    allow_partial: bool = False,
+    idempotency_key: str | None = None,
+    trace_id: str | None = None,
+) -> tuple[str, list[BasketLegExecution]]:
+    """Execute every basket leg from one quote snapshot and commit the result once.
+
+    By default the basket is all-or-nothing: if any leg cannot be filled, nothing is
+    written and the basket is marked FAILED. With ``allow_partial`` the failing legs are
+    rejected individually (as REJECTED orders where a fill was attempted) and the rest
+    execute, giving the EXECUTED/PARTIAL/FAILED outcome of per-leg placement.
+    Returns ``(message, leg_results)``; ``basket.status`` is updated in the same commit.
+    """
+    started_at = datetime.utcnow()
+    base_trace_id = (trace_id or f"trc-{uuid4().hex[:16]}").strip()
+
+    # Leg fields are captured up front so building results never reloads expired rows.
+    prepared: list[tuple[tuple[str, str, int], Order, str]] = []
+    results: list[BasketLegExecution | None] = [None] * len(legs)
+    for index, leg in enumerate(legs):
+        leg_trace_id = f"{base_trace_id}-basket-{basket.id}-leg-{leg.id}"
+        leg_order = _normalize_order_payload(
+            Order(
+                symbol=leg.symbol,
+                qty=leg.quantity,
+                side=leg.side,
+                orderType=leg.order_type,
+                validity=leg.validity,
+                limitPrice=leg.limit_price,
+                triggerPrice=leg.trigger_price,
+                tag=leg.tag,
+            ),
+            idempotency_key=_basket_leg_idempotency_key(idempotency_key, basket.id, leg.id),
+        )
+        leg_fields = (leg.symbol, leg.side, leg.quantity)
+        validation_error = _order_validation_error(leg_order, leg_trace_id)
+        if validation_error is not None:
+            results[index] = _basket_leg_result(leg_fields, "error", validation_error.message)
+        prepared.append((leg_fields, leg_order, leg_trace_id))
+
+    # Idempotent replays resolve from one lookup instead of one query per leg.
+    leg_keys = [order.idempotencyKey for _, order, _ in prepared if order.idempotencyKey]
+    existing_by_key: dict[str, OrderModel] = {}
+    if leg_keys:
+        for row in (
+            db.query(OrderModel)
+            .filter(OrderModel.user_id == user_id, OrderModel.idempotency_key.in_(leg_keys))
+            .order_by(OrderModel.id.asc())
+            .all()
+        ):
+            existing_by_key[row.idempotency_key] = row
+    for index, (leg, leg_order, _) in enumerate(prepared):
+        existing = existing_by_key.get(leg_order.idempotencyKey or "")
+        if results[index] is not None or existing is None:
+            continue
+        if _is_same_idempotent_payload(existing, leg_order):
+            results[index] = _basket_leg_result(
+                leg, "ok", "Duplicate order request acknowledged. Returning existing execution result.", existing.id
+            )
+        else:
+            results[index] = _basket_leg_result(
+                leg, "error", "Idempotency key already used with a different order payload", existing.id
+            )
+
+    to_execute = [index for index, result in enumerate(results) if result is None]
+    market = is_market_open() if to_execute else None
+    if market is not None and not market.isOpen:
+        for index in to_execute:
+            results[index] = _basket_leg_result(prepared[index][0], "error", f"Cannot trade: {market.message}")
+        to_execute = []
+
+    symbols = sorted({prepared[index][1].symbol for index in to_execute})
+    live_prices = {
+        (quote.get("symbol") or "").upper(): float(quote.get("last") or 0.0)
+        for quote in (fetch_quotes(symbols) if symbols else [])
+    }
+
+    # Leg pricing needs no DB state; the wallet/holding checks and writes run on the
+    # user's executor shard so they serialize with the user's other orders.
+    pending_fills: list[tuple[int, float]] = []
+    triggers: list[int] = []
+    for index in to_execute:
+        leg, leg_order, _ = prepared[index]
+        live_price = live_prices.get(leg_order.symbol, 0.0)
+        if live_price <= 0:
+            results[index] = _basket_leg_result(leg, "error", f"Could not fetch live price for {leg_order.symbol}")
+        elif leg_order.orderType in {"LIMIT", "SL", "SLM"} and not _should_trigger(leg_order, live_price):
+            if leg_order.validity == "IOC":
+                results[index] = _basket_leg_result(
+                    leg, "error", "IOC order cancelled because trigger/limit condition was not met"
+                )
+            else:
+                triggers.append(index)
+        else:
+            pending_fills.append((index, _execution_price(leg_order, live_price)))
+
+    basket_id = basket.id
+
+    def _write(session: Session) -> dict:
+        job_results = list(results)
+        wallet = _wallet_for_user(session, user_id, commit=False)
+        holdings = {
+            row.symbol: row
+            for row in (
+                session.query(HoldingModel)
+                .filter(HoldingModel.user_id == user_id, HoldingModel.symbol.in_(symbols))
+                .all()
+                if symbols
+                else []
+            )
+        }
+        # Validate against a running projection of cash and positions so later legs see earlier fills.
+        projected_cash = float(wallet.balance or 0.0)
+        projected_qty = {symbol: int(row.quantity or 0) for symbol, row in holdings.items()}
+
+        fills: list[tuple[int, float]] = []
+        rejected: list[tuple[int, float]] = []
+        for index, exec_price in pending_fills:
+            leg, leg_order, _ = prepared[index]
+            rejection = _fill_rejection(
+                leg_order,
+                leg_order.side,
+                exec_price,
+                wallet_balance=projected_cash,
+                held_quantity=projected_qty.get(leg_order.symbol, 0),
+            )
+            if rejection is not None:
+                job_results[index] = _basket_leg_result(leg, "error", rejection[1])
+                rejected.append((index, exec_price))
+                continue
+            signed_qty = leg_order.qty if leg_order.side == "BUY" else -leg_order.qty
+            projected_cash -= exec_price * signed_qty
+            projected_qty[leg_order.symbol] = projected_qty.get(leg_order.symbol, 0) + signed_qty
+            fills.append((index, exec_price))
+
+        basket_row = session.query(BasketOrderModel).filter(BasketOrderModel.id == basket_id).first()
+        failed_leg = next(
+            (index for index, result in enumerate(job_results) if result is not None and result.status != "ok"),
+            None,
+        )
+        if failed_leg is not None and not allow_partial:
+            failed_symbol = prepared[failed_leg][1].symbol
+            for index, result in enumerate(job_results):
+                if result is None:
+                    job_results[index] = _basket_leg_result(
+                        prepared[index][0], "error", f"Not executed: leg {failed_leg + 1} ({failed_symbol}) failed"
+                    )
+            basket_row.status = "FAILED"
+            return {
+                "status": basket_row.status,
+                "message": f"Basket rejected: {job_results[failed_leg].message}",
+                "results": job_results,
+                "failed_leg": failed_leg,
+            }
+
+        order_rows: list[tuple[int, OrderModel]] = []
+        for index, exec_price in fills:
+            _, leg_order, leg_trace_id = prepared[index]
+            holdings[leg_order.symbol] = _apply_fill(
+                session, wallet, holdings.get(leg_order.symbol), leg_order.symbol, leg_order.side, leg_order.qty, exec_price
+            )
+            order_row = _build_order_row(
+                leg_order,
+                user_id=user_id,
+                side=leg_order.side,
+                order_type=leg_order.orderType,
+                validity=leg_order.validity,
+                execution_price=exec_price,
+                status="PENDING",
+                basket_id=basket_id,
+                trace_id=leg_trace_id,
+            )
+            _transition_order_status(order_row, "COMPLETED")
+            order_rows.append((index, order_row))
+        for index, exec_price in rejected:
+            _, leg_order, leg_trace_id = prepared[index]
+            order_rows.append(
+                (
+                    index,
+                    _build_order_row(
+                        leg_order,
+                        user_id=user_id,
+                        side=leg_order.side,
+                        order_type=leg_order.orderType,
+                        validity=leg_order.validity,
+                        execution_price=exec_price,
+                        status="REJECTED",
+                        basket_id=basket_id,
+                        trace_id=leg_trace_id,
+                    ),
+                )
+            )
+        trigger_rows = [
+            (
+                index,
+                TriggerOrderModel(
+                    user_id=user_id,
+                    symbol=prepared[index][1].symbol,
+                    quantity=prepared[index][1].qty,
+                    side=prepared[index][1].side,
+                    order_type=prepared[index][1].orderType,
+                    validity=prepared[index][1].validity,
+                    limit_price=prepared[index][1].limitPrice,
+                    trigger_price=prepared[index][1].triggerPrice,
+                    status="PENDING",
+                    tag=prepared[index][1].tag,
+                ),
+            )
+            for index in triggers
+        ]
+
+        session.add_all([row for _, row in order_rows])
+        session.add_all([row for _, row in trigger_rows])
+        if all(result is None or result.status == "ok" for result in job_results):
+            basket_row.status = "EXECUTED"
+            message = "Basket executed"
+        elif fills or triggers or any(result is not None and result.status == "ok" for result in job_results):
+            basket_row.status = "PARTIAL"
+            message = "Basket partially executed"
+        else:
+            basket_row.status = "FAILED"
+            message = "Basket execution failed"
+
+        # Flush once so ids come back from the batched INSERTs, then snapshot what the
+        # response needs before the executor's commit expires the rows.
+        session.flush()
+        for index, row in order_rows:
+            if row.status == "COMPLETED":
+                leg_order = prepared[index][1]
+                job_results[index] = _basket_leg_result(
+                    prepared[index][0],
+                    "ok",
+                    f"{leg_order.side} {leg_order.qty} shares of {leg_order.symbol} @ ₹{row.price:.2f} = ₹{row.total:.2f}",
+                    row.id,
+                )
+            else:
+                job_results[index].orderId = row.id
+        trigger_entries = [entry_from_row(row) for _, row in trigger_rows]
+        for (index, _), entry in zip(trigger_rows, trigger_entries):
+            job_results[index] = _basket_leg_result(
+                prepared[index][0],
+                "ok",
+                f"Order accepted as server-side trigger (id={entry.trigger_id}) and will execute when conditions are met",
+            )
+        return {
+            "status": basket_row.status,
+            "message": message,
+            "results": job_results,
+            "failed_leg": None,
+            "fills": len(fills),
+            "trigger_entries": trigger_entries,
+            "wallet_balance": float(wallet.balance or 0.0),
+        }
+
+    try:
+        outcome = order_executor.submit(user_id, _write)
+    except IntegrityError:
+        logger.exception("basket.execution.integrity_error basket_id=%s user_id=%s trace_id=%s", basket_id, user_id, base_trace_id)
+        return "Could not process basket at this time. Please retry.", [
+            result or _basket_leg_result(prepared[index][0], "error", "Could not process order at this time. Please retry.")
+            for index, result in enumerate(results)
+        ]
+    db.refresh(basket)
+
+    if outcome["failed_leg"] is not None:
+        logger.info(
+            "basket.rejected basket_id=%s user_id=%s legs=%s failed_leg=%s trace_id=%s",
+            basket_id,
+            user_id,
+            len(legs),
+            outcome["failed_leg"] + 1,
+            base_trace_id,
+        )
+        return outcome["message"], outcome["results"]
+
+    for entry in outcome["trigger_entries"]:
+        trigger_book.add_entry(entry)
+    logger.info(
+        "basket.executed basket_id=%s user_id=%s legs=%s fills=%s triggers=%s status=%s quotes=%s wallet=%.2f elapsed_ms=%.1f trace_id=%s",
+        basket_id,
+        user_id,
+        len(legs),
+        outcome["fills"],
+        len(outcome["trigger_entries"]),
+        outcome["status"],
+        len(symbols),
+        outcome["wallet_balance"],
+        (datetime.utcnow() - started_at).total_seconds() * 1000.0,
+        base_trace_id,
+    )
+    return outcome["message"], outcome["results"]
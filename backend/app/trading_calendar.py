@@ -0,0 +1,288 @@
+"""
+NSE trading calendar.
+
+Session boundaries (09:15-15:30 IST, Mon-Fri, minus exchange holidays, plus any
+special sessions such as Muhurat trading) are precomputed once per year into
+sorted epoch arrays, so "open now?", "next open" and "previous close" are a
+bisect instead of timezone arithmetic on every call. ``market_status`` also
+caches its answer until the next session boundary or IST midnight, whichever
+comes first, so hot callers (order placement, the market status endpoint,
+the trigger engine sweep) mostly hit a tuple comparison.
+
+Holidays and special sessions for years not built in can be supplied through
+``NSE_CALENDAR_FILE``, a JSON document of the form::
+
+    {"holidays": ["2027-01-26", ...], "specialSessions": {"2026-11-08": ["18:00", "19:15"]}}
+"""
+
+import bisect
+import json
+import logging
+import os
+import time as time_module
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Optional
+
+import pytz
+
+from .models.schemas import MarketStatus
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone("Asia/Kolkata")
+REGULAR_OPEN = time(9, 15)
+REGULAR_CLOSE = time(15, 30)
+NSE_CALENDAR_FILE = os.getenv("NSE_CALENDAR_FILE", "").strip()
+
+# NSE market holidays (approximate - major holidays)
+NSE_HOLIDAYS: dict[int, frozenset[str]] = {
+    2026: frozenset(
+        {
+            "2026-01-26",  # Republic Day
+            "2026-03-10",  # Maha Shivaratri
+            "2026-03-17",  # Holi
+            "2026-03-30",  # Id-Ul-Fitr (Ramadan)
+            "2026-04-02",  # Thursday before Good Friday
+            "2026-04-03",  # Good Friday
+            "2026-04-06",  # Shri Ram Navami
+            "2026-04-14",  # Dr. Ambedkar Jayanti
+            "2026-05-01",  # Maharashtra Day
+            "2026-06-05",  # Eid ul-Adha (Bakrid)
+            "2026-07-06",  # Muharram
+            "2026-08-15",  # Independence Day
+            "2026-08-18",  # Parsi New Year
+            "2026-09-04",  # Milad-un-Nabi
+            "2026-10-02",  # Mahatma Gandhi Jayanti
+            "2026-10-20",  # Dussehra
+            "2026-11-09",  # Diwali (Laxmi Pujan)
+            "2026-11-10",  # Diwali Balipratipada
+            "2026-11-27",  # Guru Nanak Jayanti
+            "2026-12-25",  # Christmas
+        }
+    ),
+}
+
+
+@dataclass(frozen=True)
+class TradingSession:
+    day: date
+    open_at: datetime
+    close_at: datetime
+    special: bool = False
+
+    @property
+    def open_ts(self) -> float:
+        return self.open_at.timestamp()
+
+    @property
+    def close_ts(self) -> float:
+        return self.close_at.timestamp()
+
+
+def _clock_label(value: time) -> str:
+    return f"{value.hour % 12 or 12}:{value.minute:02d} {'AM' if value.hour < 12 else 'PM'}"
+
+
+def _parse_clock(value: str) -> time:
+    hour, minute = str(value).split(":", 1)
+    return time(int(hour), int(minute))
+
+
+def _load_calendar_file(path: str) -> tuple[set[str], dict[str, tuple[time, time]]]:
+    try:
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        holidays = {str(item) for item in raw.get("holidays") or []}
+        special = {
+            str(day): (_parse_clock(bounds[0]), _parse_clock(bounds[1]))
+            for day, bounds in (raw.get("specialSessions") or {}).items()
+        }
+        return holidays, special
+    except Exception as exc:
+        logger.warning("trading_calendar.file_load_failed path=%s reason=%s", path, str(exc))
+        return set(), {}
+
+
+class TradingCalendar:
+    """Precomputed NSE sessions with cached open/next-open/previous-close lookups."""
+
+    def __init__(
+        self,
+        holidays: Optional[set[str]] = None,
+        special_sessions: Optional[dict[str, tuple[time, time]]] = None,
+        clock: Callable[[], float] = time_module.time,
+    ):
+        if holidays is None:
+            holidays = {day for days in NSE_HOLIDAYS.values() for day in days}
+        self._holidays = set(holidays)
+        self._special = dict(special_sessions or {})
+        self._clock = clock
+        self._lock = Lock()
+        self._years: set[int] = set()
+        self._sessions: list[TradingSession] = []
+        self._opens: list[float] = []
+        self._closes: list[float] = []
+        self._status_cache: Optional[tuple[float, float, MarketStatus]] = None
+        self._metrics = {"status_hits": 0, "status_misses": 0, "years_built": 0}
+
+    @classmethod
+    def from_env(cls) -> "TradingCalendar":
+        holidays = {day for days in NSE_HOLIDAYS.values() for day in days}
+        special: dict[str, tuple[time, time]] = {}
+        if NSE_CALENDAR_FILE:
+            extra_holidays, special = _load_calendar_file(NSE_CALENDAR_FILE)
+            holidays |= extra_holidays
+        return cls(holidays=holidays, special_sessions=special)
+
+    def metrics_snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._metrics, "sessions": len(self._sessions)}
+
+    def _build_year_locked(self, year: int) -> None:
+        if year in self._years:
+            return
+        day = date(year, 1, 1)
+        built: list[TradingSession] = []
+        while day.year == year:
+            key = day.isoformat()
+            if key in self._special:
+                open_clock, close_clock = self._special[key]
+                special = True
+            elif day.weekday() < 5 and key not in self._holidays:
+                open_clock, close_clock = REGULAR_OPEN, REGULAR_CLOSE
+                special = False
+            else:
+                day += timedelta(days=1)
+                continue
+            built.append(
+                TradingSession(
+                    day=day,
+                    open_at=IST.localize(datetime.combine(day, open_clock)),
+                    close_at=IST.localize(datetime.combine(day, close_clock)),
+                    special=special,
+                )
+            )
+            day += timedelta(days=1)
+        self._sessions = sorted(self._sessions + built, key=lambda session: session.open_ts)
+        self._opens = [session.open_ts for session in self._sessions]
+        self._closes = [session.close_ts for session in self._sessions]
+        self._years.add(year)
+        self._metrics["years_built"] += 1
+
+    def _ensure_covers_locked(self, ts: float) -> None:
+        year = datetime.fromtimestamp(ts, IST).year
+        # Neighbouring years keep next-open/previous-close lookups valid across New Year.
+        for candidate in (year - 1, year, year + 1):
+            self._build_year_locked(candidate)
+
+    def _now(self, ts: Optional[float]) -> float:
+        return float(self._clock() if ts is None else ts)
+
+    def session_on(self, day: date) -> Optional[TradingSession]:
+        with self._lock:
+            self._build_year_locked(day.year)
+            opens_on_day = IST.localize(datetime.combine(day, time(0, 0))).timestamp()
+            index = bisect.bisect_left(self._opens, opens_on_day)
+            if index < len(self._sessions) and self._sessions[index].day == day:
+                return self._sessions[index]
+        return None
+
+    def current_session(self, ts: Optional[float] = None) -> Optional[TradingSession]:
+        """The session in progress at ``ts``, if any."""
+        now = self._now(ts)
+        with self._lock:
+            self._ensure_covers_locked(now)
+            index = bisect.bisect_right(self._opens, now) - 1
+            if index >= 0 and now <= self._closes[index]:
+                return self._sessions[index]
+        return None
+
+    def is_open(self, ts: Optional[float] = None) -> bool:
+        return self.current_session(ts) is not None
+
+    def next_open(self, ts: Optional[float] = None) -> TradingSession:
+        """The first session that opens strictly after ``ts``."""
+        now = self._now(ts)
+        with self._lock:
+            self._ensure_covers_locked(now)
+            index = bisect.bisect_right(self._opens, now)
+            while index >= len(self._sessions):
+                self._build_year_locked(max(self._years) + 1)
+                index = bisect.bisect_right(self._opens, now)
+            return self._sessions[index]
+
+    def next_close(self, ts: Optional[float] = None) -> TradingSession:
+        """The session whose close is the first at or after ``ts`` (the current one while open)."""
+        now = self._now(ts)
+        with self._lock:
+            self._ensure_covers_locked(now)
+            index = bisect.bisect_left(self._closes, now)
+            while index >= len(self._sessions):
+                self._build_year_locked(max(self._years) + 1)
+                index = bisect.bisect_left(self._closes, now)
+            return self._sessions[index]
+
+    def previous_close(self, ts: Optional[float] = None) -> Optional[TradingSession]:
+        """The last session that closed at or before ``ts``."""
+        now = self._now(ts)
+        with self._lock:
+            self._ensure_covers_locked(now)
+            index = bisect.bisect_right(self._closes, now) - 1
+            return self._sessions[index] if index >= 0 else None
+
+    def market_status(self, ts: Optional[float] = None) -> MarketStatus:
+        """``MarketStatus`` for ``ts``, reused until the next session boundary or IST midnight."""
+        now = self._now(ts)
+        with self._lock:
+            cached = self._status_cache
+            if cached is not None and cached[0] <= now < cached[1]:
+                self._metrics["status_hits"] += 1
+                return cached[2]
+            self._metrics["status_misses"] += 1
+
+        status, valid_until = self._compute_status(now)
+        with self._lock:
+            self._status_cache = (now, valid_until, status)
+        return status
+
+    def _compute_status(self, now: float) -> tuple[MarketStatus, float]:
+        local = datetime.fromtimestamp(now, IST)
+        next_midnight = IST.localize(datetime.combine(local.date() + timedelta(days=1), time(0, 0))).timestamp()
+        today = self.session_on(local.date())
+        current = self.current_session(now)
+        upcoming = self.next_open(now)
+        next_open_label = f"{upcoming.day.isoformat()} {upcoming.open_at:%H:%M} IST"
+
+        if current is not None:
+            status = MarketStatus(
+                isOpen=True,
+                message="Market is OPEN",
+                nextClose=f"{current.day.isoformat()} {current.close_at:%H:%M} IST",
+            )
+            # The session stays open through its close instant.
+            return status, min(current.close_ts + 1e-6, next_midnight)
+
+        if today is None:
+            message = "Market closed - Weekend" if local.weekday() >= 5 else "Market closed - Holiday"
+            return MarketStatus(isOpen=False, message=message, nextOpen=next_open_label), min(upcoming.open_ts, next_midnight)
+
+        if now < today.open_ts:
+            status = MarketStatus(
+                isOpen=False,
+                message=f"Market opens at {_clock_label(today.open_at.time())} IST",
+                nextOpen=f"{today.day.isoformat()} {today.open_at:%H:%M} IST",
+                nextClose=f"{today.day.isoformat()} {today.close_at:%H:%M} IST",
+            )
+            return status, min(today.open_ts, next_midnight)
+
+        status = MarketStatus(
+            isOpen=False,
+            message=f"Market closed for today ({_clock_label(today.close_at.time())} IST)",
+            nextOpen=next_open_label,
+        )
+        return status, min(upcoming.open_ts, next_midnight)
+
+
+trading_calendar = TradingCalendar.from_env()
@@ -0,0 +1,236 @@
+"""
+Price-indexed in-memory book of PENDING trigger orders.
+
+Triggers are grouped per symbol into two sorted ladders by crossing direction:
+
+* ``fire_at_or_below`` - LIMIT BUY and SL/SLM SELL, which fire once price <= level
+* ``fire_at_or_above`` - LIMIT SELL and SL/SLM BUY, which fire once price >= level
+
+A price update therefore finds crossed triggers with one bisect per ladder
+(O(log n + k)) instead of loading every PENDING row. IOC triggers are kept
+aside because any evaluation either fills or cancels them, as are rows with
+no price level, which are always handed back for the caller to decide.
+
+The database stays the source of truth: callers re-read candidate rows and
+confirm they are still PENDING, and ``sync`` reconciles the book with the
+PENDING id set so rows created, cancelled or executed by other workers are
+picked up or dropped regardless of commit order.
+"""
+
+import bisect
+import logging
+from dataclasses import dataclass
+from threading import RLock
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from .database.db import TriggerOrderModel
+
+logger = logging.getLogger(__name__)
+
+FIRE_AT_OR_BELOW = "fire_at_or_below"
+FIRE_AT_OR_ABOVE = "fire_at_or_above"
+
+
+@dataclass(frozen=True)
+class BookEntry:
+    trigger_id: int
+    user_id: int
+    symbol: str
+    direction: str | None
+    level: float | None
+    is_ioc: bool
+
+
+def _book_direction(side: str, order_type: str) -> str | None:
+    side = (side or "").strip().upper()
+    order_type = (order_type or "").strip().upper()
+    if order_type == "LIMIT":
+        return FIRE_AT_OR_BELOW if side == "BUY" else FIRE_AT_OR_ABOVE
+    if order_type in {"SL", "SLM"}:
+        return FIRE_AT_OR_ABOVE if side == "BUY" else FIRE_AT_OR_BELOW
+    return None
+
+
+def entry_from_row(row: TriggerOrderModel) -> BookEntry:
+    order_type = (row.order_type or "").strip().upper()
+    raw_level = row.limit_price if order_type == "LIMIT" else row.trigger_price
+    direction = _book_direction(row.side, order_type)
+    return BookEntry(
+        trigger_id=int(row.id),
+        user_id=int(row.user_id or 0),
+        symbol=(row.symbol or "").strip().upper(),
+        direction=direction if raw_level is not None else None,
+        level=float(raw_level) if raw_level is not None else None,
+        is_ioc=(row.validity or "").strip().upper() == "IOC",
+    )
+
+
+class _SymbolLadders:
+    __slots__ = ("below", "above", "ioc", "unpriced")
+
+    def __init__(self) -> None:
+        # Each ladder holds (level, trigger_id) sorted ascending.
+        self.below: list[tuple[float, int]] = []
+        self.above: list[tuple[float, int]] = []
+        self.ioc: set[int] = set()
+        self.unpriced: set[int] = set()
+
+    def is_empty(self) -> bool:
+        return not (self.below or self.above or self.ioc or self.unpriced)
+
+
+class TriggerBook:
+    """Per-symbol sorted trigger ladders mirroring PENDING rows in ``trigger_orders``."""
+
+    def __init__(self) -> None:
+        self._lock = RLock()
+        self._symbols: dict[str, _SymbolLadders] = {}
+        self._entries: dict[int, BookEntry] = {}
+        self._user_symbol_counts: dict[tuple[int, str], int] = {}
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def symbols(self) -> list[str]:
+        with self._lock:
+            return sorted(self._symbols)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._symbols.clear()
+            self._entries.clear()
+            self._user_symbol_counts.clear()
+            self._loaded = False
+
+    def add(self, row: TriggerOrderModel) -> None:
+        if (row.status or "PENDING").upper() != "PENDING" or row.id is None:
+            return
+        self.add_entry(entry_from_row(row))
+
+    def add_entry(self, entry: BookEntry) -> None:
+        with self._lock:
+            self._remove_locked(entry.trigger_id)
+            ladders = self._symbols.setdefault(entry.symbol, _SymbolLadders())
+            if entry.is_ioc:
+                ladders.ioc.add(entry.trigger_id)
+            elif entry.direction is None:
+                ladders.unpriced.add(entry.trigger_id)
+            else:
+                ladder = ladders.below if entry.direction == FIRE_AT_OR_BELOW else ladders.above
+                bisect.insort(ladder, (entry.level, entry.trigger_id))
+            self._entries[entry.trigger_id] = entry
+            count_key = (entry.user_id, entry.symbol)
+            self._user_symbol_counts[count_key] = self._user_symbol_counts.get(count_key, 0) + 1
+
+    def remove(self, trigger_id: int) -> None:
+        with self._lock:
+            self._remove_locked(int(trigger_id))
+
+    def _remove_locked(self, trigger_id: int) -> None:
+        entry = self._entries.pop(trigger_id, None)
+        if entry is None:
+            return
+        count_key = (entry.user_id, entry.symbol)
+        remaining = self._user_symbol_counts.get(count_key, 0) - 1
+        if remaining > 0:
+            self._user_symbol_counts[count_key] = remaining
+        else:
+            self._user_symbol_counts.pop(count_key, None)
+        ladders = self._symbols.get(entry.symbol)
+        if ladders is None:
+            return
+        if entry.is_ioc:
+            ladders.ioc.discard(trigger_id)
+        elif entry.direction is None:
+            ladders.unpriced.discard(trigger_id)
+        else:
+            ladder = ladders.below if entry.direction == FIRE_AT_OR_BELOW else ladders.above
+            index = bisect.bisect_left(ladder, (entry.level, trigger_id))
+            if index < len(ladder) and ladder[index] == (entry.level, trigger_id):
+                ladder.pop(index)
+        if ladders.is_empty():
+            self._symbols.pop(entry.symbol, None)
+
+    def has_pending(self, symbol: str, user_id: int | None = None) -> bool:
+        key = (symbol or "").strip().upper()
+        with self._lock:
+            if user_id is None:
+                return key in self._symbols
+            return (user_id, key) in self._user_symbol_counts
+
+    def candidates(
+        self, symbol: str, price: float, user_id: int | None = None, high: float | None = None
+    ) -> list[int]:
+        """Trigger ids that ``price`` crosses for ``symbol`` plus its IOC and unpriced triggers.
+
+        With ``high``, ``price`` is the low of a tick range: it is checked against
+        the at-or-below ladder and ``high`` against the at-or-above ladder.
+        """
+        key = (symbol or "").strip().upper()
+        with self._lock:
+            ladders = self._symbols.get(key)
+            if ladders is None:
+                return []
+            start = bisect.bisect_left(ladders.below, (price, -1))
+            crossed = [trigger_id for _, trigger_id in ladders.below[start:]]
+            end = bisect.bisect_right(ladders.above, (price if high is None else high, float("inf")))
+            crossed.extend(trigger_id for _, trigger_id in ladders.above[:end])
+            crossed.extend(ladders.ioc)
+            crossed.extend(ladders.unpriced)
+            if user_id is not None:
+                crossed = [trigger_id for trigger_id in crossed if self._entries[trigger_id].user_id == user_id]
+        return sorted(crossed)
+
+    def _load_rows(self, rows: Iterable[TriggerOrderModel]) -> int:
+        loaded = 0
+        for row in rows:
+            self.add(row)
+            loaded += 1
+        return loaded
+
+    def rebuild(self, db: Session) -> int:
+        """Replace the book with every PENDING row from the database."""
+        rows = db.query(TriggerOrderModel).filter(TriggerOrderModel.status == "PENDING").all()
+        with self._lock:
+            self.clear()
+            loaded = self._load_rows(rows)
+            self._loaded = True
+        logger.info("trigger_book.rebuilt pending=%s symbols=%s", loaded, len(self._symbols))
+        return loaded
+
+    def sync(self, db: Session) -> int:
+        """Reconcile with the PENDING rows in the database (e.g. after another worker's writes).
+
+        Only ids are read for the comparison; full rows are loaded just for
+        triggers the book is missing, and entries no longer PENDING are dropped.
+        Returns the number of rows loaded.
+        """
+        if not self._loaded:
+            return self.rebuild(db)
+        # Snapshot before querying so a trigger added locally after its commit
+        # is never mistaken for one that stopped being PENDING.
+        with self._lock:
+            known_ids = set(self._entries)
+        pending_ids = {
+            int(row[0]) for row in db.query(TriggerOrderModel.id).filter(TriggerOrderModel.status == "PENDING").all()
+        }
+        missing_ids = pending_ids - known_ids
+        rows = (
+            db.query(TriggerOrderModel).filter(TriggerOrderModel.id.in_(missing_ids)).all() if missing_ids else []
+        )
+        with self._lock:
+            # Entries removed locally while the query ran are already current.
+            for trigger_id in (known_ids - pending_ids) & set(self._entries):
+                self._remove_locked(trigger_id)
+            return self._load_rows(row for row in rows if row.id not in self._entries)
+
+
+trigger_book = TriggerBook()
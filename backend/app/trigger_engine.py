@@ -0,0 +1,205 @@
+"""
+Tick-driven evaluation of pending trigger orders and price alerts.
+
+Fresh quotes published by the market data layer are coalesced per symbol and
+evaluated on a background worker, so fills happen within one tick instead of
+whenever someone next polls /quotes. Coalescing keeps the low and high seen
+since the last drain as well as the last price, so a dip or spike that
+reverses before the worker runs still crosses the triggers and alerts it
+touched. A periodic sweep fetches quotes for
+symbols that have pending work but no active viewers.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from .database.db import AlertModel, SessionLocal
+from .market_data import add_quote_listener, fetch_quotes, remove_quote_listener
+from .routes.trading import evaluate_pending_triggers, evaluate_price_alerts, is_market_open
+from .trigger_book import trigger_book
+
+logger = logging.getLogger(__name__)
+
+
+def _is_truthy_env(value: str | None) -> bool:
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+TRIGGER_ENGINE_ENABLED = _is_truthy_env(os.getenv("TRIGGER_ENGINE_ENABLED", "true"))
+TRIGGER_ENGINE_SWEEP_SECONDS = max(5, int(os.getenv("TRIGGER_ENGINE_SWEEP_SECONDS", "30")))
+
+
+class TickEvaluationEngine:
+    """Background worker that evaluates triggers and alerts as quote ticks arrive."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        sweep_interval_seconds: int = TRIGGER_ENGINE_SWEEP_SECONDS,
+    ):
+        self._session_factory = session_factory
+        self._sweep_interval = max(1, int(sweep_interval_seconds))
+        # symbol -> (last, low, high) since the last drain
+        self._pending: dict[str, tuple[float, float, float]] = {}
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._metrics_lock = threading.Lock()
+        self._metrics: dict[str, int | float | str | None] = {
+            "ticks_received": 0,
+            "ticks_coalesced": 0,
+            "evaluation_cycles": 0,
+            "triggers_processed": 0,
+            "alerts_fired": 0,
+            "sweeps": 0,
+            "errors": 0,
+            "last_error": None,
+            "last_cycle_ms": None,
+        }
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _metric_inc(self, name: str, value: int = 1) -> None:
+        with self._metrics_lock:
+            self._metrics[name] = int(self._metrics.get(name, 0) or 0) + value
+
+    def _set_metric(self, name: str, value: int | float | str | None) -> None:
+        with self._metrics_lock:
+            self._metrics[name] = value
+
+    def metrics_snapshot(self) -> dict[str, int | float | str | None]:
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        with self._condition:
+            snapshot["pending_symbols"] = len(self._pending)
+        snapshot["running"] = self.is_running
+        snapshot["sweep_interval_seconds"] = self._sweep_interval
+        return snapshot
+
+    def on_quote(self, symbol: str, quote: dict) -> None:
+        """Quote listener: fold the price into ``symbol``'s pending range and wake the worker."""
+        try:
+            price = float(quote.get("last") or 0.0)
+        except Exception:
+            return
+        key = (symbol or "").strip().upper()
+        if not key or price <= 0:
+            return
+
+        with self._condition:
+            previous = self._pending.get(key)
+            if previous is None:
+                self._pending[key] = (price, price, price)
+            else:
+                self._metric_inc("ticks_coalesced")
+                self._pending[key] = (price, min(previous[1], price), max(previous[2], price))
+            self._condition.notify()
+        self._metric_inc("ticks_received")
+
+    def process_pending(self) -> dict[str, list[dict]]:
+        """Evaluate every coalesced tick once. Safe to call directly (tests, manual drains)."""
+        with self._condition:
+            pending = dict(self._pending)
+            self._pending.clear()
+        if not pending:
+            return {"triggers": [], "alerts": []}
+        prices = {symbol: last for symbol, (last, _, _) in pending.items()}
+        price_ranges = {symbol: (low, high) for symbol, (_, low, high) in pending.items()}
+
+        started_at = time.perf_counter()
+        db = self._session_factory()
+        try:
+            triggers = evaluate_pending_triggers(
+                db=db, symbols=list(prices), prices=prices, price_ranges=price_ranges
+            )
+            alerts = evaluate_price_alerts(db, prices, price_ranges=price_ranges)
+        except Exception as exc:
+            db.rollback()
+            self._metric_inc("errors")
+            self._set_metric("last_error", str(exc))
+            logger.exception("trigger_engine.evaluation_failed symbols=%s", len(prices))
+            return {"triggers": [], "alerts": []}
+        finally:
+            db.close()
+
+        self._metric_inc("evaluation_cycles")
+        self._metric_inc("triggers_processed", len(triggers))
+        self._metric_inc("alerts_fired", len(alerts))
+        self._set_metric("last_cycle_ms", round((time.perf_counter() - started_at) * 1000.0, 2))
+        return {"triggers": triggers, "alerts": alerts}
+
+    def watched_symbols(self) -> list[str]:
+        db = self._session_factory()
+        try:
+            trigger_book.sync(db)
+            trigger_symbols = set(trigger_book.symbols())
+            alert_symbols = {
+                row[0]
+                for row in db.query(AlertModel.symbol)
+                .filter(AlertModel.is_active == True)  # noqa: E712
+                .distinct()
+                .all()
+            }
+        finally:
+            db.close()
+        return sorted({(symbol or "").upper() for symbol in trigger_symbols | alert_symbols if symbol})
+
+    def sweep(self) -> int:
+        """Queue current prices for symbols with pending work, even if nobody is viewing them."""
+        if not is_market_open().isOpen:
+            return 0
+        symbols = self.watched_symbols()
+        # Fresh fetches already reach on_quote via the listener; cached rows are queued here.
+        for quote in fetch_quotes(symbols) if symbols else []:
+            self.on_quote(str(quote.get("symbol") or ""), quote)
+        self._metric_inc("sweeps")
+        return len(symbols)
+
+    def _run(self) -> None:
+        next_sweep_at = time.monotonic()
+        while not self._stop.is_set():
+            with self._condition:
+                if not self._pending:
+                    self._condition.wait(timeout=max(0.0, next_sweep_at - time.monotonic()))
+            if self._stop.is_set():
+                break
+
+            self.process_pending()
+
+            if time.monotonic() >= next_sweep_at:
+                try:
+                    self.sweep()
+                except Exception as exc:
+                    self._metric_inc("errors")
+                    self._set_metric("last_error", str(exc))
+                    logger.warning("trigger_engine.sweep_failed reason=%s", str(exc))
+                next_sweep_at = time.monotonic() + self._sweep_interval
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._stop.clear()
+        add_quote_listener(self.on_quote)
+        self._thread = threading.Thread(target=self._run, name="bysel-trigger-engine", daemon=True)
+        self._thread.start()
+        logger.info("trigger_engine.started sweep_interval_seconds=%s", self._sweep_interval)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        remove_quote_listener(self.on_quote)
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        logger.info("trigger_engine.stopped")
+
+
+trigger_engine = TickEvaluationEngine()
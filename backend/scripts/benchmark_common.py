@@ -0,0 +1,228 @@
+"""
+Shared helpers for BYSEL benchmark scripts
+==========================================
+Deterministic replay quote provider, latency summaries and a JSON result
+format that can be diffed across builds.
+"""
+
+import csv
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+RESULT_SCHEMA_VERSION = 1
+
+
+# ---------------------------------------------------------------------------
+# Replay quote provider
+# ---------------------------------------------------------------------------
+
+class ReplayQuoteProvider:
+    """Quote source that replays recorded ticks, or a seeded random walk when none are given.
+
+    Each call to ``fetch_quote``/``fetch_quotes`` advances the symbol by one tick so a
+    benchmark run sees a moving, reproducible price series without touching Yahoo Finance.
+    """
+
+    def __init__(
+        self,
+        ticks: dict[str, list[float]] | None = None,
+        seed: int = 7,
+        base_price: float = 100.0,
+        volatility_pct: float = 0.15,
+    ):
+        self._ticks = {symbol.upper(): list(prices) for symbol, prices in (ticks or {}).items() if prices}
+        self._seed = int(seed)
+        self._base_price = float(base_price)
+        self._volatility = float(volatility_pct) / 100.0
+        self._cursor: dict[str, int] = {}
+        self._last: dict[str, float] = {}
+        self._rngs: dict[str, random.Random] = {}
+        self._lock = Lock()
+
+    @classmethod
+    def from_file(cls, path: str | Path, **kwargs) -> "ReplayQuoteProvider":
+        """Load ticks from JSON (``{"SYMBOL": [prices...]}``) or CSV (``symbol,price`` rows)."""
+        file_path = Path(path)
+        ticks: dict[str, list[float]] = {}
+        if file_path.suffix.lower() == ".json":
+            raw = json.loads(file_path.read_text(encoding="utf-8"))
+            for symbol, prices in raw.items():
+                ticks[str(symbol).upper()] = [float(price) for price in prices]
+        else:
+            with file_path.open(newline="", encoding="utf-8") as handle:
+                for row in csv.DictReader(handle):
+                    symbol = (row.get("symbol") or "").strip().upper()
+                    if not symbol:
+                        continue
+                    ticks.setdefault(symbol, []).append(float(row.get("price") or row.get("last") or 0.0))
+        return cls(ticks=ticks, **kwargs)
+
+    def _rng_locked(self, symbol: str) -> random.Random:
+        rng = self._rngs.get(symbol)
+        if rng is None:
+            rng = random.Random(self._seed ^ zlib.crc32(symbol.encode("utf-8")))
+            self._rngs[symbol] = rng
+        return rng
+
+    def next_price(self, symbol: str) -> tuple[float, float]:
+        """Advance ``symbol`` one tick and return ``(price, previous_price)``."""
+        key = (symbol or "").strip().upper()
+        with self._lock:
+            previous = self._last.get(key)
+            recorded = self._ticks.get(key)
+            if recorded:
+                index = self._cursor.get(key, 0)
+                price = recorded[index % len(recorded)]
+                self._cursor[key] = index + 1
+            else:
+                rng = self._rng_locked(key)
+                if previous is None:
+                    price = self._base_price * (0.5 + rng.random())
+                else:
+                    price = max(0.05, previous * (1.0 + rng.gauss(0.0, self._volatility)))
+            price = round(price, 2)
+            self._last[key] = price
+        return price, (previous if previous is not None else price)
+
+    def fetch_quote(self, symbol: str) -> dict:
+        price, previous = self.next_price(symbol)
+        pct_change = round(((price - previous) / previous) * 100.0, 2) if previous > 0 else 0.0
+        return {
+            "symbol": (symbol or "").strip().upper(),
+            "last": price,
+            "pctChange": pct_change,
+            "open": previous,
+            "high": max(price, previous),
+            "low": min(price, previous),
+            "previousClose": previous,
+            "volume": 0,
+            "timestamp": int(time.time() * 1000),
+        }
+
+    def fetch_quotes(self, symbols: list[str]) -> list[dict]:
+        return [self.fetch_quote(symbol) for symbol in symbols]
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+def percentile(samples: list[float], pct: float) -> float | None:
+    """Linear-interpolated percentile, matching the /metrics/slo computation."""
+    if not samples:
+        return None
+    ordered = sorted(float(item) for item in samples)
+    if len(ordered) == 1:
+        return round(ordered[0], 3)
+    rank = (len(ordered) - 1) * (pct / 100.0)
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    value = ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+    return round(value, 3)
+
+
+def latency_summary(samples: list[float]) -> dict[str, float | int | None]:
+    return {
+        "count": len(samples),
+        "p50": percentile(samples, 50.0),
+        "p95": percentile(samples, 95.0),
+        "p99": percentile(samples, 99.0),
+        "max": round(max(samples), 3) if samples else None,
+    }
+
+
+def process_rss_kb(pid: int | None = None) -> int | None:
+    """Resident set size of ``pid`` (default: this process) in KiB, or None where /proc is unavailable."""
+    status_path = Path(f"/proc/{pid or os.getpid()}/status")
+    try:
+        for line in status_path.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    except Exception:
+        return None
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Result files
+# ---------------------------------------------------------------------------
+
+def _git_revision() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except Exception:
+        return None
+    revision = output.stdout.strip()
+    return revision or None
+
+
+def build_result_document(benchmark: str, config: dict, metrics: dict, label: str | None = None) -> dict:
+    return {
+        "schemaVersion": RESULT_SCHEMA_VERSION,
+        "benchmark": benchmark,
+        "label": label or _git_revision() or "local",
+        "gitRevision": _git_revision(),
+        "generatedAt": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "metrics": metrics,
+    }
+
+
+def write_result_document(path: str | Path, document: dict) -> Path:
+    output_path = Path(path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return output_path
+
+
+def _flatten_numeric(prefix: str, value: object, out: dict[str, float]) -> None:
+    if isinstance(value, bool):
+        return
+    if isinstance(value, (int, float)):
+        out[prefix] = float(value)
+    elif isinstance(value, dict):
+        for key, nested in value.items():
+            _flatten_numeric(f"{prefix}.{key}" if prefix else str(key), nested, out)
+
+
+def compare_metrics(baseline: dict, current: dict) -> list[dict]:
+    """Per-metric deltas between two result documents (numeric leaves of ``metrics`` only)."""
+    base_values: dict[str, float] = {}
+    current_values: dict[str, float] = {}
+    _flatten_numeric("", baseline.get("metrics", {}), base_values)
+    _flatten_numeric("", current.get("metrics", {}), current_values)
+
+    rows: list[dict] = []
+    for key in sorted(set(base_values) & set(current_values)):
+        before = base_values[key]
+        after = current_values[key]
+        change_pct = round(((after - before) / before) * 100.0, 2) if before else None
+        rows.append({"metric": key, "baseline": before, "current": after, "changePct": change_pct})
+    return rows
+
+
+def print_comparison(rows: list[dict], baseline_label: str, current_label: str) -> None:
+    if not rows:
+        print("No comparable metrics found.")
+        return
+    width = max(len(row["metric"]) for row in rows)
+    print(f"  {'metric':<{width}}  {baseline_label:>14}  {current_label:>14}  {'change':>9}")
+    for row in rows:
+        change = f"{row['changePct']:+.2f}%" if row["changePct"] is not None else "n/a"
+        print(f"  {row['metric']:<{width}}  {row['baseline']:>14.3f}  {row['current']:>14.3f}  {change:>9}")
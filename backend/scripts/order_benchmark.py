@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+BYSEL Order Pipeline Benchmark
+==============================
+Drives market, limit, basket and trigger orders through the in-process order
+path (place_order -> order executor -> _execute_order_at_price -> commit)
+against a temporary database, with quotes served by the deterministic replay
+provider. Reports orders/sec, p50/p95/p99 latency per workload and the time
+spent waiting on the order executor queue and the trigger evaluation lock.
+
+Usage (temporary SQLite database, 8 concurrent submitters):
+    python backend/scripts/order_benchmark.py --orders 2000 --concurrency 8
+
+Usage (only market and basket orders):
+    python backend/scripts/order_benchmark.py --workloads market,basket
+
+Usage (Postgres; the database must be empty or disposable, and psycopg2 plus
+asyncpg must be installed; pending migrations are applied on start):
+    python backend/scripts/order_benchmark.py --database-url postgresql://bench@localhost/bysel_bench
+
+Usage (release gate: fail on >10% throughput or p95 regression against a baseline):
+    python backend/scripts/order_benchmark.py --output results/orders-new.json \\
+        --compare results/orders-main.json --max-regression-pct 10
+
+Exit codes:
+    0  Run completed (and no regression beyond --max-regression-pct)
+    1  Regression beyond --max-regression-pct
+    2  Could not set up the benchmark database
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from scripts.benchmark_common import (  # noqa: E402
+    ReplayQuoteProvider,
+    build_result_document,
+    compare_metrics,
+    latency_summary,
+    print_comparison,
+    write_result_document,
+)
+
+WORKLOADS = ("market", "limit", "basket", "trigger")
+DEFAULT_SYMBOL_UNIVERSE = [
+    "RELIANCE", "TCS", "INFY", "HDFCBANK", "SBIN", "WIPRO", "ICICIBANK", "KOTAKBANK",
+    "HINDUNILVR", "ITC", "BHARTIARTL", "LT", "AXISBANK", "BAJFINANCE", "TATAMOTORS",
+    "SUNPHARMA", "TITAN", "MARUTI", "HCLTECH", "TATASTEEL",
+]
+BENCHMARK_USER_ID_BASE = 900_000
+BENCHMARK_WALLET_BALANCE = 1_000_000_000.0
+BASKET_LEGS = 3
+
+
+@dataclass(frozen=True)
+class OrderTask:
+    index: int
+    workload: str
+    user_id: int
+    symbol: str
+    side: str
+
+
+@dataclass
+class WorkloadStats:
+    operations: int = 0
+    orders: int = 0
+    errors: int = 0
+    latencies_ms: list[float] = field(default_factory=list)
+
+
+@dataclass
+class WaitSamples:
+    executor_queue_ms: list[float] = field(default_factory=list)
+    trigger_lock_ms: list[float] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, bucket: str, value_ms: float) -> None:
+        with self.lock:
+            getattr(self, bucket).append(value_ms)
+
+
+def build_order_plan(
+    orders: int,
+    workloads: list[str],
+    users: int,
+    seed: int,
+    universe: list[str] | None = None,
+) -> list[OrderTask]:
+    """Deterministic interleaving of workloads across users and symbols.
+
+    Market orders alternate BUY/SELL per user so positions stay bounded across long runs.
+    """
+    rng = random.Random(seed)
+    pool = list(universe or DEFAULT_SYMBOL_UNIVERSE)
+    plan: list[OrderTask] = []
+    for index in range(orders):
+        workload = workloads[index % len(workloads)]
+        user_id = BENCHMARK_USER_ID_BASE + (index % max(1, users))
+        side = "BUY" if (index // max(1, users * len(workloads))) % 2 == 0 else "SELL"
+        plan.append(OrderTask(index, workload, user_id, rng.choice(pool), side if workload == "market" else "BUY"))
+    return plan
+
+
+def summarize_order_run(
+    stats: dict[str, WorkloadStats],
+    waits: WaitSamples,
+    elapsed_s: float,
+    executor_metrics: dict,
+) -> dict:
+    all_latencies = [sample for item in stats.values() for sample in item.latencies_ms]
+    total_orders = sum(item.orders for item in stats.values())
+    return {
+        "elapsedSeconds": round(elapsed_s, 3),
+        "operations": sum(item.operations for item in stats.values()),
+        "orders": total_orders,
+        "errors": sum(item.errors for item in stats.values()),
+        "ordersPerSecond": round(total_orders / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "latencyMs": latency_summary(all_latencies),
+        "workloads": {
+            name: {
+                "operations": item.operations,
+                "orders": item.orders,
+                "errors": item.errors,
+                "ordersPerSecond": round(item.orders / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+                "latencyMs": latency_summary(item.latencies_ms),
+            }
+            for name, item in stats.items()
+        },
+        "lockWaitMs": {
+            "executorQueue": latency_summary(waits.executor_queue_ms),
+            "triggerEvaluation": latency_summary(waits.trigger_lock_ms),
+        },
+        "executor": {
+            "batchesCommitted": int(executor_metrics.get("batches_committed", 0) or 0),
+            "batchFallbacks": int(executor_metrics.get("batch_fallbacks", 0) or 0),
+            "maxBatchSize": int(executor_metrics.get("max_batch_size", 0) or 0),
+        },
+    }
+
+
+def regression_failures(baseline: dict, current: dict, max_regression_pct: float) -> list[str]:
+    """Throughput drops or p95 latency rises larger than ``max_regression_pct``."""
+    failures: list[str] = []
+    for row in compare_metrics(baseline, current):
+        change = row["changePct"]
+        if change is None:
+            continue
+        metric = row["metric"]
+        if metric.endswith("ordersPerSecond") and change < -max_regression_pct:
+            failures.append(f"{metric} fell {abs(change):.2f}%")
+        elif metric.endswith("latencyMs.p95") and change > max_regression_pct:
+            failures.append(f"{metric} rose {change:.2f}%")
+    return failures
+
+
+class _TimedLock:
+    """Drop-in for ``threading.Lock`` that records how long each acquire waited."""
+
+    def __init__(self, inner, waits: WaitSamples):
+        self._inner = inner
+        self._waits = waits
+
+    def __enter__(self):
+        started = time.perf_counter()
+        self._inner.acquire()
+        self._waits.add("trigger_lock_ms", (time.perf_counter() - started) * 1000.0)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._inner.release()
+        return False
+
+
+def run_benchmark(
+    orders: int,
+    concurrency: int,
+    workloads: list[str],
+    users: int,
+    seed: int,
+    replay_file: str | None = None,
+) -> dict:
+    """Run the plan in this process. The database is whatever ``app.database.db`` is bound to."""
+    import app.routes.trading as trading
+    from app.database.db import BasketOrderLegModel, BasketOrderModel, SessionLocal, WalletModel
+    from app.models.schemas import MarketStatus, Order
+    from app.order_executor import order_executor
+
+    provider = ReplayQuoteProvider.from_file(replay_file, seed=seed) if replay_file else ReplayQuoteProvider(seed=seed)
+    waits = WaitSamples()
+    stats = {name: WorkloadStats() for name in workloads}
+    stats_lock = threading.Lock()
+    plan = build_order_plan(orders, workloads, users, seed)
+
+    db = SessionLocal()
+    try:
+        for offset in range(users):
+            user_id = BENCHMARK_USER_ID_BASE + offset
+            wallet = db.query(WalletModel).filter(WalletModel.user_id == user_id).first()
+            if wallet is None:
+                db.add(WalletModel(user_id=user_id, balance=BENCHMARK_WALLET_BALANCE))
+            else:
+                wallet.balance = BENCHMARK_WALLET_BALANCE
+        db.commit()
+    finally:
+        db.close()
+
+    originals = {
+        "fetch_quote": trading.fetch_quote,
+        "fetch_quotes": trading.fetch_quotes,
+        "is_market_open": trading.is_market_open,
+        "_TRIGGER_EVALUATION_LOCK": trading._TRIGGER_EVALUATION_LOCK,
+    }
+    original_submit = order_executor.submit
+
+    def timed_submit(user_id, job, timeout=None):
+        enqueued = time.perf_counter()
+
+        def timed_job(session):
+            waits.add("executor_queue_ms", (time.perf_counter() - enqueued) * 1000.0)
+            return job(session)
+
+        return original_submit(user_id, timed_job, timeout)
+
+    def place(db, task: OrderTask, order: Order) -> bool:
+        response = trading.place_order(db, order, user_id=task.user_id, trace_id=f"bench-{task.index}")
+        return response.status == "ok"
+
+    def run_market(db, task: OrderTask) -> tuple[int, bool]:
+        order = Order(symbol=task.symbol, qty=1, side="BUY", orderType="MARKET", validity="DAY")
+        ok = place(db, task, order)
+        if ok and task.side == "SELL":
+            ok = place(db, task, Order(symbol=task.symbol, qty=1, side="SELL", orderType="MARKET", validity="DAY"))
+            return 2, ok
+        return 1, ok
+
+    def run_limit(db, task: OrderTask) -> tuple[int, bool]:
+        last = provider.next_price(task.symbol)[0]
+        # Half the limits are marketable, half rest as server-side triggers.
+        limit_price = round(last * (1.01 if task.index % 2 == 0 else 0.99), 2)
+        order = Order(symbol=task.symbol, qty=1, side="BUY", orderType="LIMIT", limitPrice=limit_price, validity="GTC")
+        return 1, place(db, task, order)
+
+    def run_basket(db, task: OrderTask) -> tuple[int, bool]:
+        basket = BasketOrderModel(user_id=task.user_id, name=f"bench-{task.index}", status="DRAFT")
+        db.add(basket)
+        db.flush()
+        legs = [
+            BasketOrderLegModel(
+                basket_id=basket.id,
+                symbol=DEFAULT_SYMBOL_UNIVERSE[(task.index + step) % len(DEFAULT_SYMBOL_UNIVERSE)],
+                quantity=1,
+                side="BUY",
+                order_type="MARKET",
+                validity="DAY",
+            )
+            for step in range(BASKET_LEGS)
+        ]
+        db.add_all(legs)
+        db.commit()
+        _, results = trading.execute_basket(db, basket, legs, user_id=task.user_id, trace_id=f"bench-{task.index}")
+        return len(legs), all(result.status == "ok" for result in results)
+
+    def run_trigger(db, task: OrderTask) -> tuple[int, bool]:
+        last = provider.next_price(task.symbol)[0]
+        order = trading._normalize_order_payload(
+            Order(symbol=task.symbol, qty=1, side="BUY", orderType="LIMIT", limitPrice=round(last * 1.05, 2), validity="GTC")
+        )
+        trading._create_trigger_entry(db, order, user_id=task.user_id)
+        trading.evaluate_pending_triggers(db, user_id=task.user_id, symbols=[task.symbol])
+        return 1, True
+
+    runners = {"market": run_market, "limit": run_limit, "basket": run_basket, "trigger": run_trigger}
+
+    def execute(task: OrderTask) -> None:
+        db = SessionLocal()
+        started = time.perf_counter()
+        try:
+            order_count, ok = runners[task.workload](db, task)
+        except Exception:
+            order_count, ok = 1, False
+        finally:
+            db.close()
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        with stats_lock:
+            item = stats[task.workload]
+            item.operations += 1
+            item.orders += order_count
+            item.errors += 0 if ok else 1
+            item.latencies_ms.append(elapsed_ms)
+
+    trading.fetch_quote = provider.fetch_quote
+    trading.fetch_quotes = provider.fetch_quotes
+    trading.is_market_open = lambda: MarketStatus(isOpen=True, message="Market is OPEN (benchmark)")
+    trading._TRIGGER_EVALUATION_LOCK = _TimedLock(originals["_TRIGGER_EVALUATION_LOCK"], waits)
+    order_executor.submit = timed_submit
+    try:
+        order_executor.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="bench-order") as pool:
+            list(pool.map(execute, plan))
+        elapsed = time.perf_counter() - started
+    finally:
+        for name, value in originals.items():
+            setattr(trading, name, value)
+        del order_executor.submit
+
+    return summarize_order_run(stats, waits, elapsed, order_executor.metrics_snapshot())
+
+
+# ---------------------------------------------------------------------------
+# CLI entry point
+# ---------------------------------------------------------------------------
+
+def _print_report(metrics: dict, config: dict) -> None:
+    width = 68
+    print()
+    print("=" * width)
+    print("  BYSEL Order Pipeline Benchmark")
+    print("=" * width)
+    print(f"  orders              {metrics['orders']} in {metrics['elapsedSeconds']:.2f} s ({metrics['errors']} errors)")
+    print(f"  orders/sec          {metrics['ordersPerSecond']:.1f} at concurrency {config['concurrency']}")
+    for name, item in metrics["workloads"].items():
+        latency = item["latencyMs"]
+        print(f"  {name:<19} {item['ordersPerSecond']:>8.1f}/s  p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} ms")
+    queue = metrics["lockWaitMs"]["executorQueue"]
+    trigger = metrics["lockWaitMs"]["triggerEvaluation"]
+    print(f"  executor queue ms   p50={queue['p50']} p95={queue['p95']} p99={queue['p99']}")
+    print(f"  trigger lock ms     p50={trigger['p50']} p95={trigger['p95']} p99={trigger['p99']}")
+    print(f"  group commits       {metrics['executor']['batchesCommitted']} (max batch {metrics['executor']['maxBatchSize']})")
+    print("=" * width)
+    print()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="BYSEL order pipeline throughput benchmark with a replay quote provider.")
+    parser.add_argument("--orders", type=int, default=1000, help="Operations to run across all workloads (default: 1000)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent submitting threads (default: 8)")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help=f"Comma-separated subset of {','.join(WORKLOADS)}")
+    parser.add_argument("--users", type=int, default=None, help="Distinct trading users (default: --concurrency)")
+    parser.add_argument("--database-url", default=None, help="Benchmark database URL (default: temporary SQLite file)")
+    parser.add_argument("--replay-file", default=None, help="CSV (symbol,price) or JSON ({symbol: [prices]}) ticks to replay")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the plan and the random-walk provider (default: 7)")
+    parser.add_argument("--output", default="order-benchmark.json", help="Result file (default: order-benchmark.json)")
+    parser.add_argument("--label", default=None, help="Build label stored in the result file (default: git revision)")
+    parser.add_argument("--compare", default=None, help="Previous result file to diff against")
+    parser.add_argument("--max-regression-pct", type=float, default=None, help="With --compare, exit 1 on a larger regression")
+    args = parser.parse_args(argv)
+
+    workloads = [item.strip().lower() for item in args.workloads.split(",") if item.strip()]
+    unknown = sorted(set(workloads) - set(WORKLOADS))
+    if not workloads or unknown:
+        parser.error(f"unknown workloads: {', '.join(unknown) or '(none)'}")
+    users = args.users or max(1, args.concurrency)
+
+    temp_dir: tempfile.TemporaryDirectory | None = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        # Only SQLite migrates on import by default; a disposable benchmark database may too.
+        os.environ.setdefault("DB_AUTO_MIGRATE", "true")
+    else:
+        temp_dir = tempfile.TemporaryDirectory(prefix="bysel-order-bench-")
+        os.environ["SQLITE_DB_PATH"] = str(Path(temp_dir.name) / "order-bench.db")
+    # The tick engine would evaluate triggers behind the benchmark's back.
+    os.environ["TRIGGER_ENGINE_ENABLED"] = "false"
+
+    try:
+        import logging
+
+        try:
+            import app  # noqa: F401  (binds the engines and migrates the schema)
+        except Exception as exc:
+            print(f"ERROR: could not initialise the benchmark database: {exc}", file=sys.stderr)
+            return 2
+        # Per-order INFO logs would dominate the measured time.
+        logging.getLogger("app").setLevel(logging.WARNING)
+        metrics = run_benchmark(args.orders, args.concurrency, workloads, users, args.seed, args.replay_file)
+    finally:
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    config = {
+        "orders": args.orders,
+        "concurrency": args.concurrency,
+        "workloads": workloads,
+        "users": users,
+        "database": "custom" if args.database_url else "sqlite-temp",
+        "replayFile": args.replay_file,
+        "seed": args.seed,
+    }
+    document = build_result_document("order-pipeline", config, metrics, label=args.label)
+    output_path = write_result_document(args.output, document)
+    _print_report(metrics, config)
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print()
+        print_comparison(compare_metrics(baseline, document), baseline.get("label", "baseline"), document["label"])
+        if args.max_regression_pct is not None:
+            failures = regression_failures(baseline, document, args.max_regression_pct)
+            for failure in failures:
+                print(f"REGRESSION: {failure}", file=sys.stderr)
+            if failures:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
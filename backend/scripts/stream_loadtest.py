@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+BYSEL Quote Stream Load Test
+============================
+Spins up N simulated /ws/quotes clients against a local backend whose quote
+source is replaced by a deterministic replay provider, then reports
+throughput, frame latency, server memory per connection and send errors.
+
+Usage (spawn a local server and run 200 clients for 30 s):
+    python backend/scripts/stream_loadtest.py --clients 200 --duration 30
+
+Usage (mix in slow readers and resuming clients):
+    python backend/scripts/stream_loadtest.py --clients 500 --slow-reader-pct 10 \\
+        --slow-reader-delay-ms 250 --resume-pct 20 --resume-after 5
+
+Usage (replay recorded ticks and compare against a previous build):
+    python backend/scripts/stream_loadtest.py --replay-file ticks.csv \\
+        --output results/stream-new.json --compare results/stream-main.json
+
+Usage (drive an already running server; memory is reported only with --server-pid):
+    python backend/scripts/stream_loadtest.py --base-url ws://127.0.0.1:8000 --server-pid 4242
+
+Exit codes:
+    0  Run completed
+    2  Could not start or reach the backend
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from scripts.benchmark_common import (  # noqa: E402
+    ReplayQuoteProvider,
+    build_result_document,
+    compare_metrics,
+    latency_summary,
+    print_comparison,
+    process_rss_kb,
+    write_result_document,
+)
+
+DEFAULT_SYMBOL_UNIVERSE = [
+    "RELIANCE", "TCS", "INFY", "HDFCBANK", "SBIN", "WIPRO", "ICICIBANK", "KOTAKBANK",
+    "HINDUNILVR", "ITC", "BHARTIARTL", "LT", "AXISBANK", "BAJFINANCE", "TATAMOTORS",
+    "SUNPHARMA", "TITAN", "MARUTI", "HCLTECH", "TATASTEEL",
+]
+
+
+@dataclass
+class ClientStats:
+    messages: int = 0
+    rows: int = 0
+    replayed: int = 0
+    resumes: int = 0
+    connect_errors: int = 0
+    receive_errors: int = 0
+    latencies_ms: list[float] = field(default_factory=list)
+
+
+@dataclass
+class ClientPlan:
+    index: int
+    symbols: list[str]
+    slow_delay_s: float
+    resume_after: int | None
+
+
+def build_client_plans(
+    clients: int,
+    symbols_per_client: int,
+    slow_reader_pct: float,
+    slow_reader_delay_ms: int,
+    resume_pct: float,
+    resume_after: int,
+    universe: list[str] | None = None,
+) -> list[ClientPlan]:
+    """Deterministically assign subscriptions and behaviours to each simulated client."""
+    pool = list(universe or DEFAULT_SYMBOL_UNIVERSE)
+    per_client = max(1, min(symbols_per_client, len(pool)))
+    slow_every = int(round(100.0 / slow_reader_pct)) if slow_reader_pct > 0 else 0
+    resume_every = int(round(100.0 / resume_pct)) if resume_pct > 0 else 0
+
+    plans: list[ClientPlan] = []
+    for index in range(clients):
+        offset = (index * per_client) % len(pool)
+        symbols = [pool[(offset + step) % len(pool)] for step in range(per_client)]
+        is_slow = slow_every > 0 and index % slow_every == 0
+        is_resumer = resume_every > 0 and index % resume_every == (resume_every // 2)
+        plans.append(
+            ClientPlan(
+                index=index,
+                symbols=symbols,
+                slow_delay_s=(slow_reader_delay_ms / 1000.0) if is_slow else 0.0,
+                resume_after=max(1, resume_after) if is_resumer else None,
+            )
+        )
+    return plans
+
+
+def summarize_run(stats: list[ClientStats], elapsed_s: float, rss_before_kb: int | None, rss_after_kb: int | None, server_metrics: dict) -> dict:
+    latencies = [sample for item in stats for sample in item.latencies_ms]
+    messages = sum(item.messages for item in stats)
+    connected = sum(1 for item in stats if item.connect_errors == 0)
+    rss_delta = (rss_after_kb - rss_before_kb) if rss_before_kb is not None and rss_after_kb is not None else None
+
+    return {
+        "clientsConnected": connected,
+        "elapsedSeconds": round(elapsed_s, 3),
+        "messagesReceived": messages,
+        "rowsReceived": sum(item.rows for item in stats),
+        "messagesPerSecond": round(messages / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "frameLatencyMs": latency_summary(latencies),
+        "resumes": sum(item.resumes for item in stats),
+        "replayedMessages": sum(item.replayed for item in stats),
+        "clientErrors": {
+            "connect": sum(item.connect_errors for item in stats),
+            "receive": sum(item.receive_errors for item in stats),
+        },
+        "serverSendErrors": int(server_metrics.get("send_errors", 0) or 0),
+        "serverReceiveErrors": int(server_metrics.get("receive_errors", 0) or 0),
+        "serverRssKb": {"beforeClients": rss_before_kb, "withClients": rss_after_kb},
+        "memoryPerConnectionKb": round(rss_delta / connected, 2) if rss_delta is not None and connected else None,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Server side (runs in a subprocess)
+# ---------------------------------------------------------------------------
+
+def _serve(port: int, replay_file: str | None, seed: int) -> None:
+    import logging
+
+    import uvicorn
+
+    from app import app as fastapi_app
+    import app.routes.streaming as streaming_module
+
+    provider = (
+        ReplayQuoteProvider.from_file(replay_file, seed=seed)
+        if replay_file
+        else ReplayQuoteProvider(seed=seed)
+    )
+    streaming_module.fetch_quotes = provider.fetch_quotes
+    # Per-connection INFO logs would dominate the measured CPU time.
+    logging.getLogger("app").setLevel(logging.WARNING)
+    uvicorn.run(fastapi_app, host="127.0.0.1", port=port, log_level="warning", ws_max_queue=32)
+
+
+def _spawn_server(args: argparse.Namespace, db_path: Path) -> subprocess.Popen:
+    env = dict(os.environ)
+    env["SQLITE_DB_PATH"] = str(db_path)
+    env["STREAM_PUSH_INTERVAL_MS"] = str(args.push_interval_ms)
+    env["STREAM_MAX_SYMBOLS"] = str(max(args.symbols_per_client, 1))
+    command = [sys.executable, str(Path(__file__).resolve()), "--serve", "--port", str(args.port), "--seed", str(args.seed)]
+    if args.replay_file:
+        command += ["--replay-file", str(args.replay_file)]
+    return subprocess.Popen(command, env=env, cwd=str(BACKEND_DIR))
+
+
+def _http_base(ws_base: str) -> str:
+    if ws_base.startswith("wss://"):
+        return "https://" + ws_base[len("wss://"):]
+    if ws_base.startswith("ws://"):
+        return "http://" + ws_base[len("ws://"):]
+    return ws_base
+
+
+def _fetch_stream_health(http_base: str, timeout: float = 5.0) -> dict:
+    with urllib.request.urlopen(http_base.rstrip("/") + "/stream/health", timeout=timeout) as resp:
+        return json.loads(resp.read().decode()).get("stream", {})
+
+
+def _wait_for_server(http_base: str, timeout_s: float) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            _fetch_stream_health(http_base, timeout=1.0)
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Client side
+# ---------------------------------------------------------------------------
+
+async def _run_client(plan: ClientPlan, ws_base: str, connected: asyncio.Event, stop_at: float, stats: ClientStats) -> None:
+    import websockets
+
+    last_sequence: int | None = None
+    since_connect = 0
+    first_connection = True
+
+    while time.monotonic() < stop_at:
+        url = f"{ws_base.rstrip('/')}/ws/quotes?traceId=loadtest-{plan.index}"
+        if last_sequence is not None:
+            url += f"&sinceSeq={last_sequence}"
+        try:
+            # A tiny receive queue lets slow readers push back on the server as real phones do.
+            async with websockets.connect(url, max_queue=4, open_timeout=10) as websocket:
+                if first_connection:
+                    connected.set()
+                    first_connection = False
+                await websocket.send(json.dumps({"action": "subscribe", "symbols": plan.symbols}))
+                since_connect = 0
+
+                while time.monotonic() < stop_at:
+                    remaining = stop_at - time.monotonic()
+                    try:
+                        raw = await asyncio.wait_for(websocket.recv(), timeout=max(remaining, 0.01))
+                    except asyncio.TimeoutError:
+                        break
+                    received_ms = time.time() * 1000.0
+                    message = json.loads(raw)
+                    if message.get("type") != "quotes":
+                        continue
+
+                    sequence = int(message.get("sequence") or 0)
+                    if message.get("isReplay"):
+                        stats.replayed += 1
+                    else:
+                        stats.messages += 1
+                        stats.rows += len(message.get("quotes") or [])
+                        stats.latencies_ms.append(max(0.0, received_ms - float(message.get("timestamp") or received_ms)))
+                        since_connect += 1
+                    last_sequence = max(last_sequence or 0, sequence)
+
+                    if plan.slow_delay_s:
+                        await asyncio.sleep(plan.slow_delay_s)
+                    if plan.resume_after is not None and since_connect >= plan.resume_after:
+                        stats.resumes += 1
+                        break
+                else:
+                    return
+                if plan.resume_after is None:
+                    return
+        except Exception:
+            if first_connection:
+                stats.connect_errors += 1
+                connected.set()
+                return
+            stats.receive_errors += 1
+            await asyncio.sleep(0.1)
+
+
+async def _drive_clients(args: argparse.Namespace, ws_base: str, server_pid: int | None) -> tuple[list[ClientStats], float, int | None, int | None]:
+    plans = build_client_plans(
+        clients=args.clients,
+        symbols_per_client=args.symbols_per_client,
+        slow_reader_pct=args.slow_reader_pct,
+        slow_reader_delay_ms=args.slow_reader_delay_ms,
+        resume_pct=args.resume_pct,
+        resume_after=args.resume_after,
+    )
+    stats = [ClientStats() for _ in plans]
+    events = [asyncio.Event() for _ in plans]
+
+    rss_before = process_rss_kb(server_pid) if server_pid else None
+    started = time.monotonic()
+    stop_at = started + args.ramp_seconds + args.duration
+
+    tasks = []
+    ramp_step = (args.ramp_seconds / len(plans)) if plans and args.ramp_seconds > 0 else 0.0
+    for plan, client_stats, event in zip(plans, stats, events):
+        tasks.append(asyncio.create_task(_run_client(plan, ws_base, event, stop_at, client_stats)))
+        if ramp_step:
+            await asyncio.sleep(ramp_step)
+
+    await asyncio.gather(*(event.wait() for event in events))
+    rss_after = process_rss_kb(server_pid) if server_pid else None
+    measure_started = time.monotonic()
+    await asyncio.gather(*tasks)
+    return stats, time.monotonic() - measure_started, rss_before, rss_after
+
+
+# ---------------------------------------------------------------------------
+# CLI entry point
+# ---------------------------------------------------------------------------
+
+def _print_report(metrics: dict, config: dict) -> None:
+    width = 60
+    latency = metrics["frameLatencyMs"]
+    print()
+    print("=" * width)
+    print("  BYSEL Quote Stream Load Test")
+    print("=" * width)
+    print(f"  clients             {metrics['clientsConnected']}/{config['clients']} connected")
+    print(f"  duration            {metrics['elapsedSeconds']:.1f} s")
+    print(f"  messages/sec        {metrics['messagesPerSecond']:.1f} ({metrics['messagesReceived']} total)")
+    print(f"  frame latency ms    p50={latency['p50']} p95={latency['p95']} p99={latency['p99']}")
+    print(f"  resumes             {metrics['resumes']} ({metrics['replayedMessages']} replayed frames)")
+    print(f"  memory/connection   {metrics['memoryPerConnectionKb']} KiB")
+    print(f"  server send errors  {metrics['serverSendErrors']}")
+    print(f"  client errors       {metrics['clientErrors']}")
+    print("=" * width)
+    print()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="BYSEL /ws/quotes load test with a replay quote provider.")
+    parser.add_argument("--clients", type=int, default=100, help="Simulated websocket clients (default: 100)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds after ramp-up (default: 20)")
+    parser.add_argument("--ramp-seconds", type=float, default=2.0, help="Spread client connects over this window (default: 2)")
+    parser.add_argument("--symbols-per-client", type=int, default=5, help="Symbols each client subscribes to (default: 5)")
+    parser.add_argument("--slow-reader-pct", type=float, default=0.0, help="Percent of clients that read slowly (default: 0)")
+    parser.add_argument("--slow-reader-delay-ms", type=int, default=200, help="Delay per frame for slow readers (default: 200)")
+    parser.add_argument("--resume-pct", type=float, default=0.0, help="Percent of clients that reconnect with sinceSeq (default: 0)")
+    parser.add_argument("--resume-after", type=int, default=5, help="Frames a resuming client reads before reconnecting (default: 5)")
+    parser.add_argument("--push-interval-ms", type=int, default=250, help="Server STREAM_PUSH_INTERVAL_MS (default: 250)")
+    parser.add_argument("--replay-file", default=None, help="CSV (symbol,price) or JSON ({symbol: [prices]}) ticks to replay")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for the synthetic random-walk provider (default: 7)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the spawned server (default: 8765)")
+    parser.add_argument("--base-url", default=None, help="Use an already running server, e.g. ws://127.0.0.1:8000")
+    parser.add_argument("--server-pid", type=int, default=None, help="PID of --base-url server for memory sampling")
+    parser.add_argument("--output", default="stream-loadtest.json", help="Result file (default: stream-loadtest.json)")
+    parser.add_argument("--label", default=None, help="Build label stored in the result file (default: git revision)")
+    parser.add_argument("--compare", default=None, help="Previous result file to diff against")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        _serve(args.port, args.replay_file, args.seed)
+        return 0
+
+    server: subprocess.Popen | None = None
+    temp_dir: tempfile.TemporaryDirectory | None = None
+    ws_base = args.base_url or f"ws://127.0.0.1:{args.port}"
+    http_base = _http_base(ws_base)
+    server_pid = args.server_pid
+
+    try:
+        if not args.base_url:
+            temp_dir = tempfile.TemporaryDirectory(prefix="bysel-loadtest-")
+            server = _spawn_server(args, Path(temp_dir.name) / "loadtest.db")
+            server_pid = server.pid
+        if not _wait_for_server(http_base, timeout_s=30.0):
+            print(f"ERROR: backend did not become ready at {http_base}", file=sys.stderr)
+            return 2
+
+        stats, elapsed, rss_before, rss_after = asyncio.run(_drive_clients(args, ws_base, server_pid))
+        try:
+            server_metrics = _fetch_stream_health(http_base)
+        except Exception:
+            server_metrics = {}
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    config = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in {"serve", "output", "compare", "label", "server_pid"}
+    }
+    metrics = summarize_run(stats, elapsed, rss_before, rss_after, server_metrics)
+    document = build_result_document("quotes-stream", config, metrics, label=args.label)
+    output_path = write_result_document(args.output, document)
+
+    _print_report(metrics, config)
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print()
+        print_comparison(compare_metrics(baseline, document), baseline.get("label", "baseline"), document["label"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
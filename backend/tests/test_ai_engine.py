@@ -106,3 +106,144 @@ def test_ai_assistant_routes_technical_sector_query_to_screening(monkeypatch):
 
     assert response["type"] == "screening"
     assert response["stocks"]
+
+
+def test_price_series_cache_downloads_once_and_slices_shorter_periods(monkeypatch):
+    import pandas as pd
+
+    downloads: list[tuple[str, str]] = []
+
+    class _FakeTicker:
+        def __init__(self, ticker_symbol: str):
+            self.ticker_symbol = ticker_symbol
+
+        def history(self, period: str = "1y"):
+            downloads.append((self.ticker_symbol, period))
+            days = ai_engine._PERIOD_DAYS[period]
+            index = pd.date_range(end=pd.Timestamp.now(tz="UTC").normalize(), periods=days, freq="D")
+            closes = [100.0 + offset for offset in range(days)]
+            return pd.DataFrame(
+                {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": [1000] * days},
+                index=index,
+            )
+
+    monkeypatch.setattr(ai_engine.yf, "Ticker", _FakeTicker)
+    monkeypatch.setattr(ai_engine, "_PRICE_SERIES_CACHE", {})
+    before = ai_engine.price_series_cache_snapshot()
+
+    quarter = ai_engine.get_price_series("CACHETEST", "3mo")
+    year = ai_engine.get_price_series("cachetest", "1y")
+    assert len(downloads) == 1 and downloads[0][1] == "1y"
+    assert 85 <= len(quarter) <= 93
+    assert len(year) > len(quarter)
+    assert year.close[-1] == quarter.close[-1]
+    assert not quarter.close.flags.writeable
+
+    prediction = ai_engine.predict_price("CACHETEST")
+    assert prediction["predictions"]
+    assert len(downloads) == 1
+
+    ai_engine.calculate_drawdown_risk("CACHETEST")
+    ai_engine.get_price_series("CACHETEST", "1y")
+    assert [period for _, period in downloads] == ["1y", "2y"]
+
+    after = ai_engine.price_series_cache_snapshot()
+    assert after["misses"] - before["misses"] == 2
+    assert after["hits"] - before["hits"] == 3
+
+
+def test_recommendations_refresh_scores_universe_in_parallel_and_serves_snapshot(monkeypatch):
+    import threading
+    import time
+
+    from app.recommendation_refresh import RecommendationRefresher
+
+    calls: list[str] = []
+    calls_lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def _slow_analysis(symbol: str):
+        with calls_lock:
+            calls.append(symbol)
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.01)
+        with calls_lock:
+            active["now"] -= 1
+        if symbol == "ITC":
+            return {"error": "no data"}
+        return _fake_analysis(symbol)
+
+    monkeypatch.setattr(ai_engine, "analyze_stock", _slow_analysis)
+    monkeypatch.setattr(ai_engine, "_RECOMMENDATIONS_CACHE", {"data": None, "timestamp": 0})
+    universe = len(ai_engine._RECOMMENDATION_UNIVERSE)
+
+    # Cold start scores inline, once, across the whole universe.
+    cold = ai_engine.get_best_stocks_to_buy(limit=10)
+    assert len(calls) == universe
+    assert len(cold["allScored"]) == 10
+    assert cold["snapshotAgeSeconds"] < 5
+
+    warm = ai_engine.get_best_stocks_to_buy(limit=50)
+    assert len(calls) == universe
+    assert len(warm["allScored"]) == universe - 1
+    assert warm["generatedAt"] == cold["generatedAt"]
+
+    refresher = RecommendationRefresher(workers=4)
+    active["peak"] = 0
+    counts = refresher.refresh_once()
+    assert counts == {"scored": universe - 1, "failed": 1}
+    assert len(calls) == 2 * universe
+    assert 1 < active["peak"] <= 4
+    metrics = refresher.metrics_snapshot()
+    assert metrics["runs"] == 1 and metrics["last_scored"] == universe - 1 and metrics["running"] is False
+
+    # A stale snapshot is served as-is while a refresh runs off the request path.
+    ai_engine._RECOMMENDATIONS_CACHE["timestamp"] -= ai_engine._RECOMMENDATIONS_CACHE_TTL + 60
+    stale = ai_engine.get_best_stocks_to_buy(limit=10)
+    assert stale["snapshotAgeSeconds"] >= ai_engine._RECOMMENDATIONS_CACHE_TTL
+    deadline = time.time() + 5
+    while len(calls) < 3 * universe and time.time() < deadline:
+        time.sleep(0.01)
+    with ai_engine._RECOMMENDATIONS_REFRESH_LOCK:
+        pass
+    assert len(calls) == 3 * universe
+    assert ai_engine.get_best_stocks_to_buy(limit=10)["snapshotAgeSeconds"] < 5
+
+
+def test_cold_recommendation_requests_reuse_the_refresh_in_flight(monkeypatch):
+    import threading
+    import time
+
+    calls: list[str] = []
+    calls_lock = threading.Lock()
+    release = threading.Event()
+
+    def _gated_analysis(symbol: str):
+        release.wait(timeout=5)
+        with calls_lock:
+            calls.append(symbol)
+        return _fake_analysis(symbol)
+
+    monkeypatch.setattr(ai_engine, "analyze_stock", _gated_analysis)
+    monkeypatch.setattr(ai_engine, "_RECOMMENDATIONS_CACHE", {"data": None, "timestamp": 0})
+
+    # Startup refresh is running when the first requests arrive.
+    refresh = threading.Thread(target=ai_engine.refresh_recommendations)
+    refresh.start()
+    while not ai_engine._RECOMMENDATIONS_REFRESH_LOCK.locked():
+        pass
+    responses: list[dict] = []
+    requests = [
+        threading.Thread(target=lambda: responses.append(ai_engine.get_best_stocks_to_buy(limit=10))) for _ in range(3)
+    ]
+    for request in requests:
+        request.start()
+    time.sleep(0.1)  # let the requests queue on the refresh lock
+    release.set()
+    for thread in [refresh, *requests]:
+        thread.join(timeout=10)
+
+    assert len(calls) == len(ai_engine._RECOMMENDATION_UNIVERSE)
+    assert len(responses) == 3
+    assert len({response["generatedAt"] for response in responses}) == 1
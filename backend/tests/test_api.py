@@ -1,20 +1,48 @@
+import asyncio
+import io
+import json
+import threading
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 import sys
 from pathlib import Path
 import time
+from datetime import datetime, timedelta
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app import app
 from app import ai_engine
+from app import exports as exports_module
 import app.routes as routes_module
 import app.routes.trading as trading_module
 import app.routes.streaming as streaming_module
-from app.database.db import SessionLocal, WalletModel, OrderModel
-from app.models.schemas import MarketStatus
+from app.database.db import (
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    SessionLocal,
+    WalletModel,
+    OrderModel,
+    TriggerOrderModel,
+    AlertModel,
+    HoldingModel,
+    MutualFundModel,
+    OrderArchiveModel,
+    PortfolioAggregateModel,
+    engine,
+    read_engine,
+)
+from app.database.query_metrics import QueryMetrics, query_metrics, statement_template
+from app.trigger_book import TriggerBook, trigger_book
+from app.trigger_engine import TickEvaluationEngine
+from app.order_executor import OrderExecutor
+from app.mutual_fund_sync import MutualFundSyncWorker
+from app.order_archive import ARCHIVABLE_ORDER_STATUSES, OrderArchiver
+from app.portfolio_aggregates import PortfolioAggregateStore, portfolio_aggregates, record_fill
+from app.models.schemas import MarketStatus, MutualFund, Order
 from app.routes import auth as auth_routes
 
 client = TestClient(app)
@@ -52,6 +80,19 @@ def _seed_trading_wallet(user_id: int = 1, balance: float = 1_000_000.0) -> None
         db.close()
 
 
+def _reset_trading_user(user_id: int, balance: float) -> None:
+    """Drop a fixed test user's positions, orders and aggregate so a reused test database starts clean."""
+    db = SessionLocal()
+    try:
+        for model in (HoldingModel, OrderModel, OrderArchiveModel, PortfolioAggregateModel):
+            db.query(model).filter(model.user_id == user_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    portfolio_aggregates.invalidate(user_id)
+    _seed_trading_wallet(user_id=user_id, balance=balance)
+
+
 def _mock_live_market(monkeypatch, price: float = 100.0) -> None:
     monkeypatch.setattr(
         "app.routes.trading.is_market_open",
@@ -69,6 +110,10 @@ def _mock_live_market(monkeypatch, price: float = 100.0) -> None:
         "app.routes.fetch_quote",
         lambda symbol: {"symbol": symbol.upper(), "last": price, "pctChange": 0.0},
     )
+    monkeypatch.setattr(
+        "app.routes.trading.fetch_quotes",
+        lambda symbols: [{"symbol": symbol.upper(), "last": price, "pctChange": 0.0} for symbol in symbols],
+    )
 
 
 def _mock_news_payload(prefix: str, sentiment: str = "mixed") -> dict:
@@ -194,6 +239,122 @@ def test_slo_metrics_endpoint_returns_latency_error_and_success_rates(monkeypatc
     assert int(slo["http"]["totalRequests"]) >= 1
 
 
+def test_sqlite_profile_pragmas_and_pool_metrics():
+    with engine.connect() as conn:
+        assert str(conn.execute(text("PRAGMA journal_mode")).scalar()).lower() == "wal"
+        assert int(conn.execute(text("PRAGMA synchronous")).scalar()) == 1  # NORMAL
+        assert int(conn.execute(text("PRAGMA busy_timeout")).scalar()) > 0
+
+    pool = client.get("/metrics/slo").json()["slo"]["databasePool"]
+    assert pool["poolClass"] == "_TimedQueuePool"
+    assert pool["checkouts"] >= 1
+    assert pool["timeouts"] == 0
+    assert pool["waitMsP95"] is not None
+
+
+def test_query_metrics_templates_routes_and_slow_query_trace(caplog, monkeypatch):
+    assert statement_template("SELECT * FROM orders WHERE id IN (?, ?, ?) AND qty > 5\n  AND symbol = 'TCS'") == (
+        "SELECT * FROM orders WHERE id IN (?...) AND qty > ? AND symbol = ?"
+    )
+
+    monkeypatch.setattr(query_metrics, "slow_query_ms", 0.0)
+    with caplog.at_level("WARNING", logger="app.database.query_metrics"):
+        response = client.get("/holdings", headers={"X-Trace-Id": "trc-query-metrics"})
+    assert response.status_code == 200
+    assert any("db.slow_query trace_id=trc-query-metrics" in record.getMessage() for record in caplog.records)
+
+    block = client.get("/metrics/slo").json()["slo"]["databaseQueries"]
+    assert block["queries"] >= 1
+    assert block["slowQueries"] >= 1
+    holdings_route = next(item for item in block["routes"] if item["route"] == "GET /holdings")
+    assert holdings_route["requests"] >= 1
+    assert holdings_route["queries"] >= 1
+    top = block["topStatements"][0]
+    assert top["count"] >= 1
+    assert sum(top["histogramMs"].values()) == top["count"]
+
+    # Unmatched paths share one key instead of growing the route table.
+    for index in range(3):
+        assert client.get(f"/no-such-route/{index}").status_code == 404
+    routes = {item["route"] for item in client.get("/metrics/slo").json()["slo"]["databaseQueries"]["routes"]}
+    assert "<unmatched>" in routes
+    assert not any("no-such-route" in route for route in routes)
+
+    capped = QueryMetrics(max_routes=2)
+    for route in ("GET /a", "GET /b", "GET /c", "GET /d"):
+        capped.finish_request(*capped.start_request("trc-cap"), route)
+    assert {item["route"]: item["requests"] for item in capped.route_snapshot()} == {"GET /a": 1, "GET /b": 1, "<other>": 2}
+
+
+def test_mutual_fund_sync_applies_only_changed_schemes():
+    prefix = f"T{time.time_ns() % 10_000_000}"
+    funds = [
+        MutualFund(
+            schemeCode=f"{prefix}-{index}",
+            schemeName=f"Sync Test Fund {index}",
+            category="EQUITY",
+            nav=100.0 + index,
+            navDate="2026-10-16",
+            fundHouse="Test Mutual Fund",
+            riskLevel="HIGH",
+        )
+        for index in range(1200)
+    ]
+    worker = MutualFundSyncWorker(fetch_funds=lambda: funds)
+
+    first = worker.sync_once()
+    assert first["inserted"] == 1200
+    assert first["updated"] == 0
+
+    db = SessionLocal()
+    try:
+        row = db.query(MutualFundModel).filter(MutualFundModel.scheme_code == f"{prefix}-7").one()
+        row.returns_1y = 12.5
+        db.commit()
+    finally:
+        db.close()
+
+    funds[7] = funds[7].model_copy(update={"nav": 250.0, "navDate": "2026-10-17"})
+    second = worker.sync_once()
+    assert second == {"inserted": 0, "updated": 1, "unchanged": 1199}
+
+    db = SessionLocal()
+    try:
+        row = db.query(MutualFundModel).filter(MutualFundModel.scheme_code == f"{prefix}-7").one()
+        assert row.nav == 250.0
+        assert row.nav_date == "2026-10-17"
+        assert row.returns_1y == 12.5  # feed carries no returns; stored value kept
+    finally:
+        db.close()
+
+    snapshot = worker.metrics_snapshot()
+    assert snapshot["runs"] == 2
+    assert snapshot["rows_inserted"] == 1200
+    assert snapshot["rows_updated"] == 1
+
+
+def test_reporting_reads_use_read_only_engine():
+    assert read_engine is not engine
+    assert client.get("/metrics/slo").json()["slo"]["databasePool"]["readMode"] == "sqlite_ro"
+
+    db = ReadSessionLocal()
+    try:
+        with pytest.raises(Exception, match="readonly|read-only|query_only"):
+            db.execute(text("DELETE FROM orders WHERE id = -1"))
+    finally:
+        db.close()
+
+    user_id = 470_000 + time.time_ns() % 10_000
+    response = client.get("/wealth/family/dashboard", headers={"user-id": str(user_id)})
+    assert response.status_code == 200
+    assert response.json()["totalAssets"] == 100000.0
+    db = SessionLocal()
+    try:
+        assert db.query(WalletModel).filter(WalletModel.user_id == user_id).count() == 0
+    finally:
+        db.close()
+
+
 def test_get_quotes():
     """Test getting quotes"""
     response = client.get("/quotes?symbols=RELIANCE,TCS")
@@ -423,6 +584,453 @@ def test_advanced_order_retries_return_same_order_id(monkeypatch):
     assert second_data["orderId"] == first_data["orderId"]
 
 
+def test_tick_engine_executes_crossed_trigger_without_quote_poll(monkeypatch):
+    _seed_trading_wallet(user_id=1, balance=1_000_000.0)
+    _mock_live_market(monkeypatch, price=105.0)
+
+    create_response = client.post(
+        "/orders/triggers",
+        json={"symbol": "TICKLMT", "qty": 2, "side": "BUY", "orderType": "LIMIT", "limitPrice": 100.0, "validity": "GTC"},
+        headers={"user-id": "1"},
+    )
+    assert create_response.status_code == 200
+    trigger_id = create_response.json()["id"]
+
+    engine = TickEvaluationEngine()
+    engine.on_quote("TICKLMT", {"last": 104.0})
+    assert engine.process_pending()["triggers"] == []
+
+    engine.on_quote("ticklmt", {"last": 101.0})
+    engine.on_quote("TICKLMT", {"last": 99.5})
+    processed = engine.process_pending()["triggers"]
+
+    assert [item["triggerId"] for item in processed] == [trigger_id]
+    assert processed[0]["status"] == "EXECUTED"
+    assert engine.metrics_snapshot()["ticks_coalesced"] == 1
+
+    db = SessionLocal()
+    try:
+        trigger = db.query(TriggerOrderModel).filter(TriggerOrderModel.id == trigger_id).first()
+        order = db.query(OrderModel).filter(OrderModel.id == processed[0]["orderId"]).first()
+        assert trigger.status == "EXECUTED"
+        assert order.status == "TRIGGER_EXECUTED"
+        assert order.price == 100.0
+    finally:
+        db.close()
+
+
+def test_tick_engine_crosses_triggers_and_alerts_on_a_range_that_reverses_before_the_drain(monkeypatch):
+    _seed_trading_wallet(user_id=1, balance=1_000_000.0)
+    _mock_live_market(monkeypatch, price=105.0)
+
+    buy = client.post(
+        "/orders/triggers",
+        json={"symbol": "TICKRNG", "qty": 1, "side": "BUY", "orderType": "LIMIT", "limitPrice": 100.0, "validity": "GTC"},
+        headers={"user-id": "1"},
+    ).json()
+    sell = client.post(
+        "/orders/triggers",
+        json={"symbol": "TICKRNG", "qty": 1, "side": "SELL", "orderType": "LIMIT", "limitPrice": 200.0, "validity": "GTC"},
+        headers={"user-id": "1"},
+    ).json()
+    above = client.post("/alerts", json={"symbol": "TICKRNG", "thresholdPrice": 110.0, "alertType": "ABOVE"}).json()
+    below = client.post("/alerts", json={"symbol": "TICKRNG", "thresholdPrice": 98.0, "alertType": "BELOW"}).json()
+
+    # The dip to 99 and the spike to 111 both reverse before the worker drains;
+    # the last price alone (105) crosses nothing.
+    engine = TickEvaluationEngine()
+    for last in (99.0, 111.0, 105.0):
+        engine.on_quote("TICKRNG", {"last": last})
+    result = engine.process_pending()
+
+    assert [item["triggerId"] for item in result["triggers"]] == [buy["id"]]
+    assert [item["alertId"] for item in result["alerts"]] == [above["id"]]
+    assert result["alerts"][0]["triggeredPrice"] == 111.0
+    assert engine.metrics_snapshot()["ticks_coalesced"] == 2
+
+    db = SessionLocal()
+    try:
+        assert db.query(TriggerOrderModel).filter(TriggerOrderModel.id == sell["id"]).first().status == "PENDING"
+        assert db.query(AlertModel).filter(AlertModel.id == below["id"]).first().is_active is True
+    finally:
+        db.close()
+
+
+def test_tick_engine_fires_and_deactivates_price_alerts():
+    above = client.post("/alerts", json={"symbol": "TICKALRT", "thresholdPrice": 250.0, "alertType": "ABOVE"}).json()
+    below = client.post("/alerts", json={"symbol": "TICKALRT", "thresholdPrice": 200.0, "alertType": "BELOW"}).json()
+
+    engine = TickEvaluationEngine()
+    engine.on_quote("TICKALRT", {"last": 251.0})
+    fired = engine.process_pending()["alerts"]
+
+    assert [item["alertId"] for item in fired] == [above["id"]]
+
+    db = SessionLocal()
+    try:
+        above_row = db.query(AlertModel).filter(AlertModel.id == above["id"]).first()
+        below_row = db.query(AlertModel).filter(AlertModel.id == below["id"]).first()
+        assert above_row.is_active is False
+        assert above_row.triggered_price == 251.0
+        assert above_row.triggered_at is not None
+        assert below_row.is_active is True
+    finally:
+        db.close()
+
+    engine.on_quote("TICKALRT", {"last": 260.0})
+    assert engine.process_pending()["alerts"] == []
+
+
+def test_trigger_book_returns_only_crossed_levels():
+    book = TriggerBook()
+    rows = [
+        TriggerOrderModel(id=1, user_id=1, symbol="BOOK", side="BUY", order_type="LIMIT", validity="GTC", limit_price=100.0, status="PENDING"),
+        TriggerOrderModel(id=2, user_id=1, symbol="BOOK", side="BUY", order_type="LIMIT", validity="GTC", limit_price=95.0, status="PENDING"),
+        TriggerOrderModel(id=3, user_id=2, symbol="BOOK", side="SELL", order_type="LIMIT", validity="GTC", limit_price=110.0, status="PENDING"),
+        TriggerOrderModel(id=4, user_id=1, symbol="BOOK", side="SELL", order_type="SL", validity="DAY", trigger_price=98.0, status="PENDING"),
+        TriggerOrderModel(id=5, user_id=2, symbol="BOOK", side="BUY", order_type="SLM", validity="DAY", trigger_price=105.0, status="PENDING"),
+        TriggerOrderModel(id=6, user_id=1, symbol="BOOK", side="BUY", order_type="LIMIT", validity="IOC", limit_price=90.0, status="PENDING"),
+        TriggerOrderModel(id=7, user_id=1, symbol="BOOK", side="BUY", order_type="LIMIT", validity="GTC", limit_price=80.0, status="EXECUTED"),
+    ]
+    for row in rows:
+        book.add(row)
+
+    assert book.size() == 6
+    assert book.candidates("BOOK", 102.0) == [6]
+    assert book.candidates("book", 97.0) == [1, 4, 6]
+    assert book.candidates("BOOK", 110.0) == [3, 5, 6]
+    assert book.candidates("BOOK", 110.0, user_id=2) == [3, 5]
+    assert book.has_pending("BOOK", user_id=2) is True
+
+    book.remove(3)
+    book.remove(5)
+    assert book.candidates("BOOK", 110.0) == [6]
+    assert book.has_pending("BOOK", user_id=2) is False
+    assert book.candidates("OTHER", 1.0) == []
+
+
+
+def test_trigger_book_sync_reconciles_out_of_order_and_foreign_changes():
+    db = SessionLocal()
+    try:
+        rows = [
+            TriggerOrderModel(user_id=1, symbol="BOOKSYNC", quantity=1, side="BUY", order_type="LIMIT", validity="GTC", limit_price=level, status="PENDING")
+            for level in (90.0, 95.0)
+        ]
+        db.add_all(rows)
+        db.commit()
+        earlier_id, later_id = rows[0].id, rows[1].id
+
+        # The later row reached this worker first; the earlier one committed elsewhere.
+        book = TriggerBook()
+        book.rebuild(db)
+        book.remove(earlier_id)
+        assert earlier_id not in book.candidates("BOOKSYNC", 90.0)
+        book.sync(db)
+        assert {earlier_id, later_id} <= set(book.candidates("BOOKSYNC", 90.0))
+
+        # Another process cancels a trigger this book still holds.
+        rows[1].status = "CANCELLED"
+        db.commit()
+        book.sync(db)
+        assert later_id not in book.candidates("BOOKSYNC", 90.0)
+        assert earlier_id in book.candidates("BOOKSYNC", 90.0)
+    finally:
+        for row in rows:
+            db.delete(row)
+        db.commit()
+        db.close()
+
+def test_cancelled_trigger_leaves_book_and_is_not_executed(monkeypatch):
+    _seed_trading_wallet(user_id=1, balance=1_000_000.0)
+    _mock_live_market(monkeypatch, price=120.0)
+
+    create_response = client.post(
+        "/orders/triggers",
+        json={"symbol": "BOOKCXL", "qty": 1, "side": "SELL", "orderType": "LIMIT", "limitPrice": 150.0, "validity": "GTC"},
+        headers={"user-id": "1"},
+    )
+    trigger_id = create_response.json()["id"]
+    assert trigger_id in trigger_book.candidates("BOOKCXL", 151.0)
+
+    foreign = client.post(f"/orders/triggers/{trigger_id}/cancel", headers={"user-id": "2"})
+    assert foreign.status_code == 404
+
+    cancelled = client.post(f"/orders/triggers/{trigger_id}/cancel", headers={"user-id": "1"})
+    assert cancelled.status_code == 200
+    assert cancelled.json()["status"] == "CANCELLED"
+    assert trigger_id not in trigger_book.candidates("BOOKCXL", 151.0)
+
+    engine = TickEvaluationEngine()
+    engine.on_quote("BOOKCXL", {"last": 151.0})
+    assert engine.process_pending()["triggers"] == []
+
+    repeat = client.post(f"/orders/triggers/{trigger_id}/cancel", headers={"user-id": "1"})
+    assert repeat.status_code == 409
+
+
+def test_holdings_revaluation_batches_quotes_and_commits_once(monkeypatch):
+    quote_batches: list[list[str]] = []
+
+    def fake_fetch_quotes(symbols):
+        quote_batches.append(list(symbols))
+        return [{"symbol": symbol, "last": 0.0 if symbol == "BATCHC" else 120.0} for symbol in symbols]
+
+    def fail_fetch_quote(symbol):
+        raise AssertionError(f"unexpected per-symbol quote fetch for {symbol}")
+
+    monkeypatch.setattr(trading_module, "fetch_quotes", fake_fetch_quotes)
+    monkeypatch.setattr(trading_module, "fetch_quote", fail_fetch_quote)
+
+    rows = [
+        HoldingModel(symbol="BATCHA", quantity=2, avg_price=100.0, last_price=100.0, pnl=0.0),
+        HoldingModel(symbol="BATCHB", quantity=1, avg_price=150.0, last_price=150.0, pnl=0.0),
+        HoldingModel(symbol="BATCHC", quantity=3, avg_price=50.0, last_price=55.0, pnl=15.0),
+    ]
+    db = SessionLocal()
+    commits: list[int] = []
+    original_commit = db.commit
+    monkeypatch.setattr(db, "commit", lambda: (commits.append(1), original_commit())[1])
+    try:
+        holdings = trading_module._refresh_holding_prices(db, rows)
+        assert quote_batches == [["BATCHA", "BATCHB", "BATCHC"]]
+        assert [(item.symbol, item.last, item.pnl) for item in holdings] == [
+            ("BATCHA", 120.0, 40.0),
+            ("BATCHB", 120.0, -30.0),
+            ("BATCHC", 55.0, 15.0),
+        ]
+        assert len(commits) == 1
+
+        trading_module._refresh_holding_prices(db, rows)
+        assert len(quote_batches) == 2
+        assert len(commits) == 1
+    finally:
+        db.close()
+
+
+def test_portfolio_aggregate_moves_on_fill_and_serves_portfolio_without_scan(monkeypatch):
+    user_id = 35
+    symbol = "AGGFILL"
+    _reset_trading_user(user_id, balance=10_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+
+    db = SessionLocal()
+    try:
+        aggregate = portfolio_aggregates.get(db, user_id)
+    finally:
+        db.close()
+    assert aggregate.realized_pnl == 0.0
+    assert aggregate.cash == 10_000.0
+
+    headers = {"user-id": str(user_id)}
+    assert client.post("/order", json={"symbol": symbol, "qty": 2, "side": "BUY"}, headers=headers).status_code == 200
+    assert aggregate.positions[symbol].quantity == 2
+    assert aggregate.cash == 9_800.0
+
+    _mock_live_market(monkeypatch, price=120.0)
+    assert client.post("/order", json={"symbol": symbol, "qty": 1, "side": "SELL"}, headers=headers).status_code == 200
+    assert aggregate.positions[symbol].quantity == 1
+    assert aggregate.realized_pnl == 20.0
+    assert aggregate.cash == 9_920.0
+
+    # A rolled-back fill never reaches the cached aggregate.
+    db = SessionLocal()
+    try:
+        record_fill(db, user_id, symbol, 1, 100.0, 0, 0.0, 120.0, 10_040.0, 20.0)
+        db.rollback()
+    finally:
+        db.close()
+    assert aggregate.positions[symbol].quantity == 1
+
+    def fail_load(db, user_id):
+        raise AssertionError("portfolio read should be served from the cached aggregate")
+
+    monkeypatch.setattr(portfolio_aggregates, "_load", fail_load)
+    response = client.get("/portfolio", headers=headers)
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["cashBalance"] == 9_920.0
+    assert payload["realizedPnL"] == 20.0
+    assert payload["holdingsCount"] == len(aggregate.positions)
+
+
+
+def test_portfolio_aggregate_defaults_cash_and_reloads_out_of_band_writes():
+    user_id = 353
+    db = SessionLocal()
+    try:
+        for model in (HoldingModel, PortfolioAggregateModel, WalletModel):
+            db.query(model).filter(model.user_id == user_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    store = PortfolioAggregateStore(ttl_seconds=60)
+    db = SessionLocal()
+    try:
+        # A user without a wallet row has the opening balance, as in peek_wallet_balance.
+        assert store.get(db, user_id).cash == trading_module.DEFAULT_TRADING_WALLET_BALANCE
+    finally:
+        db.close()
+
+    _seed_trading_wallet(user_id=user_id, balance=2_500.0)
+    db = SessionLocal()
+    try:
+        # A write this store never saw stays invisible until the entry outlives its TTL.
+        assert store.get(db, user_id).cash == trading_module.DEFAULT_TRADING_WALLET_BALANCE
+        store._loaded_at[user_id] -= 61
+        assert store.get(db, user_id).cash == 2_500.0
+    finally:
+        db.close()
+    assert store.metrics_snapshot()["expired"] == 1
+
+def test_fills_for_a_new_user_in_one_transaction_share_one_aggregate_row(monkeypatch):
+    _mock_live_market(monkeypatch, price=100.0)
+
+    # Basket legs commit together.
+    basket_user = 351
+    _reset_trading_user(basket_user, balance=10_000.0)
+    basket_id = _create_basket(
+        [
+            {"symbol": f"NEWLEG{leg}", "qty": leg + 1, "side": "BUY", "orderType": "MARKET", "validity": "DAY"}
+            for leg in range(3)
+        ],
+        user_id=basket_user,
+    )
+    response = client.post(f"/orders/baskets/{basket_id}/execute", headers={"user-id": str(basket_user)})
+    assert response.json()["status"] == "EXECUTED"
+
+    # So do orders drained into one executor batch.
+    batch_user = 352
+    _reset_trading_user(batch_user, balance=10_000.0)
+    executor = OrderExecutor(workers=1, max_batch=16)
+    monkeypatch.setattr(trading_module, "order_executor", executor)
+    release = threading.Event()
+    responses: list = []
+
+    def place(symbol: str) -> None:
+        db = SessionLocal()
+        try:
+            responses.append(trading_module.place_order(db, Order(symbol=symbol, qty=2, side="BUY"), user_id=batch_user))
+        finally:
+            db.close()
+
+    gate = threading.Thread(target=executor.submit, args=(batch_user, lambda session: release.wait(timeout=5)))
+    try:
+        gate.start()
+        while executor.metrics_snapshot()["jobs_submitted"] < 1:
+            time.sleep(0.01)
+        threads = [threading.Thread(target=place, args=(f"GRPNEW{index}",)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        while executor.metrics_snapshot()["queue_depth"] < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in [gate, *threads]:
+            thread.join(timeout=10)
+        assert [item.status for item in responses] == ["ok", "ok"]
+        assert executor.metrics_snapshot()["last_batch_size"] == 2
+        assert executor.metrics_snapshot()["batch_fallbacks"] == 0
+    finally:
+        release.set()
+        executor.stop()
+
+    db = SessionLocal()
+    try:
+        for user_id, invested in ((basket_user, 600.0), (batch_user, 400.0)):
+            rows = db.query(PortfolioAggregateModel).filter(PortfolioAggregateModel.user_id == user_id).all()
+            assert [round(row.invested_amount, 2) for row in rows] == [invested]
+    finally:
+        db.close()
+
+
+def test_holdings_are_scoped_per_user(monkeypatch):
+    owner, other, stranger = 361, 362, 363
+    for user_id in (owner, other, stranger):
+        _reset_trading_user(user_id, balance=10_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+    symbol = f"OWN{time.time_ns()}"
+
+    first = client.post("/order", json={"symbol": symbol, "qty": 3, "side": "BUY"}, headers={"user-id": str(owner)})
+    second = client.post("/order", json={"symbol": symbol, "qty": 1, "side": "BUY"}, headers={"user-id": str(other)})
+    assert first.json()["status"] == "ok"
+    assert second.json()["status"] == "ok"
+
+    held = {item["symbol"]: item["qty"] for item in client.get("/holdings", headers={"user-id": str(owner)}).json()}
+    assert held == {symbol: 3}
+    assert client.get(f"/holdings/{symbol}", headers={"user-id": str(other)}).json()["qty"] == 1
+    assert client.get(f"/holdings/{symbol}", headers={"user-id": str(stranger)}).status_code == 404
+
+    # Another user's position cannot back a sell.
+    oversell = client.post("/order", json={"symbol": symbol, "qty": 2, "side": "SELL"}, headers={"user-id": str(other)})
+    assert oversell.json()["status"] == "error"
+
+    # Closing a position and reopening it in one transaction respects the (user_id, symbol) index.
+    basket_id = _create_basket(
+        [
+            {"symbol": symbol, "qty": 3, "side": "SELL", "orderType": "MARKET", "validity": "DAY"},
+            {"symbol": symbol, "qty": 2, "side": "BUY", "orderType": "MARKET", "validity": "DAY"},
+        ],
+        user_id=owner,
+    )
+    executed = client.post(f"/orders/baskets/{basket_id}/execute", headers={"user-id": str(owner)})
+    assert executed.json()["status"] == "EXECUTED"
+    assert client.get(f"/holdings/{symbol}", headers={"user-id": str(owner)}).json()["qty"] == 2
+
+
+def test_exports_stream_csv_in_cursor_batches(monkeypatch):
+    user_id = 370_000 + time.time_ns() % 10_000
+    _seed_trading_wallet(user_id=user_id, balance=10_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+    monkeypatch.setattr(exports_module, "fetch_quotes", lambda symbols: [{"symbol": s, "last": 110.0} for s in symbols])
+    headers = {"user-id": str(user_id)}
+    symbols = [f"EXP{index}{time.time_ns()}" for index in range(3)]
+    for symbol in symbols:
+        assert client.post("/order", json={"symbol": symbol, "qty": 2, "side": "BUY"}, headers=headers).status_code == 200
+
+    db = SessionLocal()
+    try:
+        batches = list(exports_module.iter_export_batches(db, exports_module.EXPORT_DATASETS["orders"], user_id, batch_size=2))
+    finally:
+        db.close()
+    assert [len(rows) for rows in batches] == [2, 1]
+
+    portfolio = client.get("/portfolio/export?fmt=csv", headers=headers)
+    assert portfolio.status_code == 200
+    lines = portfolio.text.strip().splitlines()
+    assert lines[0].startswith("Symbol,Qty")
+    assert lines[-1] == "TOTAL,,,,660.0,60.0,10.0"
+
+    orders = client.get("/exports/orders?fmt=csv", headers=headers)
+    assert orders.status_code == 200
+    assert orders.headers["content-disposition"].endswith("bysel_orders.csv")
+    assert orders.text.splitlines()[0].startswith("id,created_at,symbol,side")
+    assert {line.split(",")[2] for line in orders.text.strip().splitlines()[1:]} >= set(symbols)
+
+    assert client.get("/exports/ledger?fmt=csv", headers=headers).status_code == 404
+    assert client.get("/exports/orders?fmt=xlsx", headers=headers).status_code == 400
+
+
+def test_exports_parquet_round_trips(monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    user_id = 372
+    _seed_trading_wallet(user_id=user_id, balance=10_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+    symbol = f"PQ{time.time_ns()}"
+    client.post(
+        "/orders/triggers",
+        json={"symbol": symbol, "qty": 1, "side": "BUY", "orderType": "LIMIT", "limitPrice": 90.0, "validity": "GTC"},
+        headers={"user-id": str(user_id)},
+    )
+
+    response = client.get("/exports/triggers?fmt=parquet", headers={"user-id": str(user_id)})
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column_names[:4] == ["id", "created_at", "updated_at", "symbol"]
+    assert symbol in table.column("symbol").to_pylist()
+
+
 def test_send_otp():
     """Test sending OTP to mobile number"""
     response = client.post("/auth/send-otp", json={"mobile_number": "9876543210"})
@@ -554,6 +1162,499 @@ def test_basket_execution_with_idempotency_key_is_retry_safe(monkeypatch):
         db.close()
 
 
+def _seed_history_orders(user_id: int, rows: list[tuple[str, str, datetime]]) -> list[int]:
+    db = SessionLocal()
+    try:
+        db.query(OrderModel).filter(OrderModel.user_id == user_id).delete(synchronize_session=False)
+        db.query(OrderArchiveModel).filter(OrderArchiveModel.user_id == user_id).delete(synchronize_session=False)
+        models = [
+            OrderModel(
+                user_id=user_id, symbol=symbol, side=side, quantity=1, price=10.0, total=10.0,
+                status="COMPLETED", created_at=created_at,
+            )
+            for symbol, side, created_at in rows
+        ]
+        db.add_all(models)
+        db.commit()
+        return [model.id for model in models]
+    finally:
+        db.close()
+
+
+def test_trade_history_pages_by_cursor_with_filters():
+    user_id = 4401
+    base = datetime(2026, 3, 2, 10, 0, 0)
+    ids = _seed_history_orders(
+        user_id,
+        [
+            ("HISTA", "BUY", base),
+            ("HISTA", "SELL", base + timedelta(minutes=1)),
+            ("HISTB", "BUY", base + timedelta(minutes=1)),
+            ("HISTA", "BUY", base + timedelta(days=1)),
+            ("HISTB", "SELL", base + timedelta(days=2)),
+        ],
+    )
+    headers = {"user-id": str(user_id)}
+
+    seen: list[int] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/trades/history", params=params, headers=headers)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert pages == 3
+    assert seen == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+
+    sells = client.get("/trades/history", params={"side": "sell"}, headers=headers).json()
+    assert [item["id"] for item in sells] == [ids[4], ids[1]]
+
+    first_day = client.get(
+        "/trades/history/hista", params={"fromDate": "2026-03-02", "toDate": "2026-03-02"}, headers=headers
+    ).json()
+    assert [item["id"] for item in first_day] == [ids[1], ids[0]]
+
+    assert client.get("/trades/history", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+    assert client.get("/trades/history", params={"side": "HOLD"}, headers=headers).status_code == 400
+
+
+def test_trade_history_streams_ndjson_export(monkeypatch):
+    user_id = 4402
+    base = datetime(2026, 4, 1, 9, 30, 0)
+    ids = _seed_history_orders(user_id, [("NDJ", "BUY", base + timedelta(seconds=index)) for index in range(7)])
+    monkeypatch.setattr(trading_module, "TRADE_HISTORY_MAX_LIMIT", 3)
+
+    response = client.get("/trades/history", params={"fmt": "ndjson"}, headers={"user-id": str(user_id)})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [item["id"] for item in lines] == list(reversed(ids))
+
+
+def test_order_archive_moves_old_terminal_orders_and_history_reads_both():
+    user_id = 450_000 + time.time_ns() % 10_000
+    old = datetime.utcnow() - timedelta(days=400)
+    ids = _seed_history_orders(
+        user_id,
+        [("ARCH", "BUY", old + timedelta(minutes=index)) for index in range(3)]
+        + [("ARCH", "SELL", datetime.utcnow() - timedelta(minutes=5))],
+    )
+    db = SessionLocal()
+    try:
+        pending = OrderModel(
+            user_id=user_id, symbol="ARCH", side="BUY", quantity=1, price=0.0, total=0.0,
+            status="PENDING", created_at=old, trace_id=f"trc-arch-{user_id}",
+        )
+        db.add(pending)
+        db.query(OrderModel).filter(OrderModel.id == ids[0]).update({"trace_id": f"trc-arch-old-{user_id}"})
+        db.commit()
+        pending_id = pending.id
+    finally:
+        db.close()
+
+    assert OrderArchiver(batch_size=2).run_once() >= 3
+    assert set(ARCHIVABLE_ORDER_STATUSES) == {
+        status for status, targets in trading_module.ORDER_STATUS_TRANSITIONS.items() if not targets
+    }
+
+    db = SessionLocal()
+    try:
+        hot_ids = {row.id for row in db.query(OrderModel).filter(OrderModel.user_id == user_id)}
+        archived_ids = {row.id for row in db.query(OrderArchiveModel).filter(OrderArchiveModel.user_id == user_id)}
+    finally:
+        db.close()
+    assert hot_ids == {ids[3], pending_id}
+    assert archived_ids == set(ids[:3])
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/trades/history", params=params, headers={"user-id": str(user_id)})
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    # pending and ids[0] share created_at; the tie breaks on id, newest first.
+    assert seen == [ids[3], ids[2], ids[1], pending_id, ids[0]]
+
+    lookup = client.get(f"/orders/trace/trc-arch-old-{user_id}", headers={"user-id": str(user_id)})
+    assert lookup.status_code == 200
+    assert lookup.json()["orderId"] == ids[0]
+
+
+def test_async_holdings_read_leaves_event_loop_free(monkeypatch):
+    user_id = 360_000 + time.time_ns() % 10_000
+    db = SessionLocal()
+    try:
+        db.add(HoldingModel(user_id=user_id, symbol="ASYNCH", quantity=2, avg_price=100.0, last_price=100.0, pnl=0.0))
+        db.commit()
+    finally:
+        db.close()
+
+    def slow_fetch_quotes(symbols):
+        time.sleep(0.2)
+        return [{"symbol": symbol, "last": 110.0} for symbol in symbols]
+
+    monkeypatch.setattr(trading_module, "fetch_quotes", slow_fetch_quotes)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.create_task(ticker())
+        async with AsyncSessionLocal() as session:
+            holdings = await trading_module.get_holdings_async(session, user_id=user_id)
+        ticking.cancel()
+        return holdings, ticks
+
+    holdings, ticks = asyncio.run(scenario())
+    assert [(item.symbol, item.last, item.pnl) for item in holdings] == [("ASYNCH", 110.0, 20.0)]
+    assert ticks >= 5
+    assert client.get("/holdings", headers={"user-id": str(user_id)}).json()[0]["last"] == 110.0
+
+
+def test_idempotent_retry_is_answered_from_memory_without_db_lookup(monkeypatch):
+    _seed_trading_wallet(user_id=1, balance=1_000_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+    idem_key = f"mem-idem-{time.time_ns()}"
+    payload = {"symbol": "INFY", "qty": 1, "side": "BUY", "orderType": "MARKET", "validity": "DAY"}
+
+    first = client.post("/order", json=payload, headers={"X-Idempotency-Key": idem_key})
+    assert first.status_code == 200
+    assert first.json()["status"] == "ok"
+
+    def fail_db_lookup(*args, **kwargs):
+        raise AssertionError("idempotent retry should not query the orders table")
+
+    monkeypatch.setattr(trading_module, "_latest_order_by_idempotency_key", fail_db_lookup)
+
+    retry = client.post("/order", json=payload, headers={"X-Idempotency-Key": idem_key})
+    assert retry.json()["isDuplicate"] is True
+    assert retry.json()["orderId"] == first.json()["orderId"]
+
+    changed = client.post("/order", json={**payload, "qty": 2}, headers={"X-Idempotency-Key": idem_key})
+    assert changed.json()["errorCode"] == "IDEMPOTENCY_KEY_REUSED"
+
+
+def test_concurrent_orders_for_one_user_never_overdraw_wallet(monkeypatch):
+    user_id = 4301
+    _seed_trading_wallet(user_id=user_id, balance=1_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+    symbol = f"SERIAL{time.time_ns()}"
+    responses = []
+
+    def place():
+        db = SessionLocal()
+        try:
+            responses.append(
+                trading_module.place_order(
+                    db,
+                    trading_module.Order(symbol=symbol, qty=1, side="BUY", orderType="MARKET", validity="DAY"),
+                    user_id=user_id,
+                )
+            )
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=place) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(response.status for response in responses).count("ok") == 10
+    assert {response.errorCode for response in responses if response.status != "ok"} == {"INSUFFICIENT_FUNDS"}
+
+    db = SessionLocal()
+    try:
+        assert db.query(WalletModel).filter(WalletModel.user_id == user_id).first().balance == 0.0
+        assert db.query(HoldingModel).filter(HoldingModel.symbol == symbol).first().quantity == 10
+    finally:
+        db.close()
+
+
+def test_order_executor_group_commits_and_isolates_failing_job():
+    executor = OrderExecutor(workers=1, max_batch=16)
+    release = threading.Event()
+    results: dict[str, object] = {}
+    user_ids = [4311, 4312]
+
+    def blocking_job(session):
+        release.wait(timeout=5)
+        return "first"
+
+    def credit_job(user_id):
+        def job(session):
+            wallet = trading_module._wallet_for_user(session, user_id, commit=False)
+            wallet.balance = 777.0
+            return user_id
+
+        return job
+
+    def failing_job(session):
+        raise ValueError("bad order")
+
+    def run(name, job):
+        try:
+            results[name] = executor.submit(1, job)
+        except Exception as exc:
+            results[name] = exc
+
+    db = SessionLocal()
+    try:
+        db.query(WalletModel).filter(WalletModel.user_id.in_(user_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    try:
+        threads = [threading.Thread(target=run, args=("first", blocking_job))]
+        threads[0].start()
+        while executor.metrics_snapshot()["jobs_submitted"] < 1:
+            time.sleep(0.01)
+        for name, job in (("a", credit_job(user_ids[0])), ("bad", failing_job), ("c", credit_job(user_ids[1]))):
+            thread = threading.Thread(target=run, args=(name, job))
+            thread.start()
+            threads.append(thread)
+        while executor.metrics_snapshot()["queue_depth"] < 3:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        assert results["first"] == "first"
+        assert results["a"] == user_ids[0]
+        assert results["c"] == user_ids[1]
+        assert isinstance(results["bad"], ValueError)
+
+        metrics = executor.metrics_snapshot()
+        assert metrics["batch_fallbacks"] == 1
+        assert metrics["max_batch_size"] == 1
+        assert metrics["jobs_failed"] == 1
+    finally:
+        executor.stop()
+
+    db = SessionLocal()
+    try:
+        balances = {row.user_id: row.balance for row in db.query(WalletModel).filter(WalletModel.user_id.in_(user_ids))}
+        assert balances == {user_ids[0]: 777.0, user_ids[1]: 777.0}
+    finally:
+        db.close()
+
+
+def test_order_executor_commits_queued_jobs_as_one_batch():
+    executor = OrderExecutor(workers=1, max_batch=16)
+    release = threading.Event()
+    outcomes: list[object] = []
+
+    def run(job):
+        outcomes.append(executor.submit(1, job))
+
+    try:
+        threads = [threading.Thread(target=run, args=(lambda session: release.wait(timeout=5),))]
+        threads[0].start()
+        while executor.metrics_snapshot()["jobs_submitted"] < 1:
+            time.sleep(0.01)
+        for index in range(5):
+            thread = threading.Thread(target=run, args=(lambda session, value=index: value,))
+            thread.start()
+            threads.append(thread)
+        while executor.metrics_snapshot()["queue_depth"] < 5:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        metrics = executor.metrics_snapshot()
+        assert metrics["jobs_completed"] == 6
+        assert metrics["batches_committed"] == 2
+        assert metrics["max_batch_size"] == 5
+    finally:
+        executor.stop()
+
+
+def test_order_executor_timeout_drops_queued_job_but_waits_for_running_one():
+    executor = OrderExecutor(workers=1, max_batch=16)
+    release = threading.Event()
+    ran: list[str] = []
+
+    def blocking_job(session):
+        ran.append("blocking")
+        release.wait(timeout=5)
+        return "blocking"
+
+    try:
+        # The running job outlives the caller's timeout but still reports its result.
+        releaser = threading.Timer(0.5, release.set)
+        releaser.start()
+        assert executor.submit(1, blocking_job, timeout=0.2) == "blocking"
+
+        release.clear()
+        holder = threading.Thread(target=executor.submit, args=(1, blocking_job))
+        holder.start()
+        while executor.metrics_snapshot()["jobs_submitted"] < 2 or executor.metrics_snapshot()["queue_depth"]:
+            time.sleep(0.01)
+        with pytest.raises(TimeoutError):
+            executor.submit(1, lambda session: ran.append("timed_out"), timeout=0.05)
+        release.set()
+        holder.join(timeout=5)
+        assert executor.submit(1, lambda session: "after") == "after"
+
+        assert ran == ["blocking", "blocking"]
+        assert executor.metrics_snapshot()["jobs_cancelled"] == 1
+    finally:
+        release.set()
+        executor.stop()
+
+
+def test_concurrent_http_orders_share_a_group_commit(monkeypatch):
+    import httpx
+
+    executor = OrderExecutor(workers=1, max_batch=16)
+    monkeypatch.setattr(trading_module, "order_executor", executor)
+    user_id = 320_000 + time.time_ns() % 10_000
+    _seed_trading_wallet(user_id=user_id, balance=100_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+    release = threading.Event()
+    orders = 5
+
+    def release_when_queued():
+        # With a blocking handler only one order ever reaches the queue; give up after 5s.
+        deadline = time.time() + 5
+        while executor.metrics_snapshot()["queue_depth"] < orders and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+
+    async def place_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            return await asyncio.gather(
+                *(
+                    http.post(
+                        "/order",
+                        json={"symbol": f"GRP{index}{time.time_ns()}", "qty": 1, "side": "BUY"},
+                        headers={"user-id": str(user_id)},
+                    )
+                    for index in range(orders)
+                )
+            )
+
+    gate = threading.Thread(target=executor.submit, args=(user_id, lambda session: release.wait(timeout=10)))
+    try:
+        gate.start()
+        while executor.metrics_snapshot()["jobs_submitted"] < 1:
+            time.sleep(0.01)
+        threading.Thread(target=release_when_queued, daemon=True).start()
+        responses = asyncio.run(place_all())
+        gate.join(timeout=10)
+
+        assert [response.json()["status"] for response in responses] == ["ok"] * orders
+        metrics = executor.metrics_snapshot()
+        assert metrics["max_batch_size"] > 1
+        assert metrics["last_batch_size"] == orders
+    finally:
+        release.set()
+        executor.stop()
+
+
+def _create_basket(legs: list[dict], user_id: int = 1) -> int:
+    created = client.post("/orders/baskets", json={"name": "Batch Basket", "legs": legs}, headers={"user-id": str(user_id)})
+    assert created.status_code == 200
+    return created.json()["basketId"]
+
+
+def test_basket_execution_is_atomic_by_default(monkeypatch):
+    _seed_trading_wallet(user_id=1, balance=10_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+
+    symbol_a = f"ATOMA{time.time_ns()}"
+    symbol_b = f"ATOMB{time.time_ns()}"
+    basket_id = _create_basket(
+        [
+            {"symbol": symbol_a, "qty": 5, "side": "BUY", "orderType": "MARKET", "validity": "DAY"},
+            {"symbol": symbol_b, "qty": 1, "side": "SELL", "orderType": "MARKET", "validity": "DAY"},
+        ]
+    )
+
+    response = client.post(f"/orders/baskets/{basket_id}/execute")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "FAILED"
+    assert data["message"].startswith("Basket rejected")
+    assert all(item["status"] == "error" and item["orderId"] is None for item in data["legResults"])
+    assert "Insufficient holdings" in data["legResults"][1]["message"]
+
+    db = SessionLocal()
+    try:
+        assert db.query(OrderModel).filter(OrderModel.basket_id == basket_id).count() == 0
+        assert db.query(HoldingModel).filter(HoldingModel.symbol == symbol_a).count() == 0
+        assert db.query(WalletModel).filter(WalletModel.user_id == 1).first().balance == 10_000.0
+    finally:
+        db.close()
+
+
+def test_basket_execution_prices_legs_from_one_snapshot_and_allows_partial(monkeypatch):
+    _seed_trading_wallet(user_id=1, balance=1_000.0)
+    _mock_live_market(monkeypatch, price=100.0)
+    quote_batches: list[list[str]] = []
+    batched_quotes = trading_module.fetch_quotes
+
+    def counting_fetch_quotes(symbols):
+        quote_batches.append(list(symbols))
+        return batched_quotes(symbols)
+
+    monkeypatch.setattr(trading_module, "fetch_quotes", counting_fetch_quotes)
+
+    symbol_a = f"PARTA{time.time_ns()}"
+    symbol_b = f"PARTB{time.time_ns()}"
+    basket_id = _create_basket(
+        [
+            {"symbol": symbol_a, "qty": 6, "side": "BUY", "orderType": "MARKET", "validity": "DAY"},
+            {"symbol": symbol_a, "qty": 2, "side": "SELL", "orderType": "MARKET", "validity": "DAY"},
+            {"symbol": symbol_b, "qty": 7, "side": "BUY", "orderType": "MARKET", "validity": "DAY"},
+            {"symbol": symbol_b, "qty": 1, "side": "BUY", "orderType": "LIMIT", "limitPrice": 90.0, "validity": "GTC"},
+        ]
+    )
+
+    response = client.post(f"/orders/baskets/{basket_id}/execute?allowPartial=true")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "PARTIAL"
+    assert [item["status"] for item in data["legResults"]] == ["ok", "ok", "error", "ok"]
+    assert "Insufficient funds" in data["legResults"][2]["message"]
+    assert "server-side trigger" in data["legResults"][3]["message"]
+    assert len(quote_batches) == 1
+    assert sorted(quote_batches[0]) == sorted([symbol_a, symbol_b])
+
+    db = SessionLocal()
+    try:
+        rows = db.query(OrderModel).filter(OrderModel.basket_id == basket_id).order_by(OrderModel.id.asc()).all()
+        assert [(row.symbol, row.side, row.status) for row in rows] == [
+            (symbol_a, "BUY", "COMPLETED"),
+            (symbol_a, "SELL", "COMPLETED"),
+            (symbol_b, "BUY", "REJECTED"),
+        ]
+        assert data["legResults"][2]["orderId"] == rows[2].id
+        holding = db.query(HoldingModel).filter(HoldingModel.symbol == symbol_a).first()
+        assert holding.quantity == 4
+        assert db.query(WalletModel).filter(WalletModel.user_id == 1).first().balance == 600.0
+        assert db.query(TriggerOrderModel).filter(TriggerOrderModel.symbol == symbol_b).count() == 1
+    finally:
+        db.close()
+
+
 def test_pre_trade_estimate_returns_server_charge_breakdown(monkeypatch):
     _seed_trading_wallet(user_id=1, balance=100_000.0)
     _mock_live_market(monkeypatch, price=100.0)
@@ -1045,6 +2146,88 @@ def test_quotes_websocket_stream_uses_trace_id_from_header_or_query(monkeypatch)
         assert replay_meta["traceId"] == header_trace_id
 
 
+def _collect_sse_events(generator, max_events: int) -> list[dict]:
+    async def _drain() -> list[str]:
+        chunks: list[str] = []
+        async for chunk in generator:
+            chunks.append(chunk)
+            if len(chunks) >= max_events:
+                break
+        await generator.aclose()
+        return chunks
+
+    events: list[dict] = []
+    for chunk in asyncio.run(_drain()):
+        fields: dict[str, str] = {}
+        for line in chunk.strip().splitlines():
+            key, _, value = line.partition(": ")
+            fields[key] = value
+        events.append(fields)
+    return events
+
+
+def test_quotes_sse_stream_shares_sequence_numbers_with_websocket(monkeypatch):
+    monkeypatch.setattr("app.routes.streaming.STREAM_PUSH_INTERVAL_MS", 10)
+    fetch_threads: list[threading.Thread] = []
+
+    def _fetch_quotes(symbols):
+        fetch_threads.append(threading.current_thread())
+        return [{"symbol": symbol, "last": 100.0, "pctChange": 0.0} for symbol in symbols]
+
+    monkeypatch.setattr("app.routes.streaming.fetch_quotes", _fetch_quotes)
+
+    with streaming_module._stream_lock:
+        streaming_module._stream_history.clear()
+        streaming_module._stream_sequence = 0
+
+    async def _connected() -> bool:
+        return False
+
+    events = _collect_sse_events(
+        streaming_module._sse_quote_events(["INFY", "SBIN"], None, "trc-sse-001", _connected),
+        max_events=4,
+    )
+
+    assert events[0]["retry"] == str(streaming_module.SSE_RETRY_MS)
+    assert events[1]["event"] == "subscribed"
+    assert json.loads(events[1]["data"])["traceId"] == "trc-sse-001"
+    assert [event["event"] for event in events[2:]] == ["quotes", "quotes"]
+    assert [int(event["id"]) for event in events[2:]] == [1, 2]
+    assert {row["symbol"] for row in json.loads(events[2]["data"])["quotes"]} == {"INFY", "SBIN"}
+    assert streaming_module._latest_stream_sequence() == 2
+    # Quote fetches block on the provider, so they run in the threadpool, not on the event loop.
+    assert fetch_threads and threading.main_thread() not in fetch_threads
+
+
+def test_quotes_sse_stream_replays_from_last_event_id(monkeypatch):
+    monkeypatch.setattr("app.routes.streaming.STREAM_PUSH_INTERVAL_MS", 10)
+    monkeypatch.setattr(
+        "app.routes.streaming.fetch_quotes",
+        lambda symbols: [{"symbol": symbol, "last": 100.0, "pctChange": 0.0} for symbol in symbols],
+    )
+
+    with streaming_module._stream_lock:
+        streaming_module._stream_history.clear()
+        streaming_module._stream_sequence = 0
+    for _ in range(3):
+        streaming_module._mark_quotes_payload_sent(streaming_module._build_quotes_payload(["TCS"]))
+
+    async def _disconnected() -> bool:
+        return True
+
+    events = _collect_sse_events(
+        streaming_module._sse_quote_events(["TCS"], 1, "trc-sse-002", _disconnected),
+        max_events=10,
+    )
+
+    assert [event["event"] for event in events[1:]] == ["subscribed", "replay", "quotes", "quotes"]
+    replay_meta = json.loads(events[2]["data"])
+    assert replay_meta["fromSequence"] == 1
+    assert replay_meta["count"] == 2
+    assert [int(event["id"]) for event in events[3:]] == [2, 3]
+    assert json.loads(events[3]["data"])["isReplay"] is True
+
+
 def test_auth_debug_session_health_endpoint(monkeypatch):
     monkeypatch.setattr(auth_routes, "AUTH_DEBUG_ENDPOINTS_ENABLED", True)
     monkeypatch.setattr(auth_routes, "AUTH_DEBUG_TOKEN", "debug-token")
@@ -1393,6 +2576,96 @@ def test_release_gate_evaluate_uses_live_slo_endpoint():
         )
 
 
+from scripts.benchmark_common import ReplayQuoteProvider, compare_metrics  # noqa: E402
+from scripts.stream_loadtest import ClientStats, build_client_plans, summarize_run  # noqa: E402
+from scripts.order_benchmark import (  # noqa: E402
+    WaitSamples,
+    WorkloadStats,
+    build_order_plan,
+    regression_failures,
+    summarize_order_run,
+)
+
+
+def test_replay_quote_provider_is_deterministic_and_replays_recorded_ticks():
+    first = ReplayQuoteProvider(seed=11)
+    second = ReplayQuoteProvider(seed=11)
+    assert [first.fetch_quote("TCS")["last"] for _ in range(5)] == [
+        second.fetch_quote("TCS")["last"] for _ in range(5)
+    ]
+
+    recorded = ReplayQuoteProvider(ticks={"INFY": [100.0, 101.5]})
+    prices = [row["last"] for row in recorded.fetch_quotes(["INFY", "INFY", "INFY"])]
+    assert prices == [100.0, 101.5, 100.0]
+
+
+def test_stream_loadtest_client_plans_mix_slow_readers_and_resumers():
+    plans = build_client_plans(
+        clients=20,
+        symbols_per_client=3,
+        slow_reader_pct=10,
+        slow_reader_delay_ms=250,
+        resume_pct=25,
+        resume_after=4,
+    )
+
+    assert len(plans) == 20
+    assert all(len(plan.symbols) == 3 for plan in plans)
+    assert sum(1 for plan in plans if plan.slow_delay_s == 0.25) == 2
+    assert sum(1 for plan in plans if plan.resume_after == 4) == 5
+
+
+def test_stream_loadtest_summary_reports_throughput_latency_and_memory():
+    stats = [
+        ClientStats(messages=10, rows=50, latencies_ms=[1.0, 2.0, 3.0]),
+        ClientStats(messages=10, rows=50, resumes=1, replayed=2, latencies_ms=[4.0]),
+        ClientStats(connect_errors=1),
+    ]
+    metrics = summarize_run(stats, 2.0, 1000, 1200, {"send_errors": 3})
+
+    assert metrics["clientsConnected"] == 2
+    assert metrics["messagesPerSecond"] == 10.0
+    assert metrics["frameLatencyMs"]["p50"] == 2.5
+    assert metrics["memoryPerConnectionKb"] == 100.0
+    assert metrics["serverSendErrors"] == 3
+    assert metrics["clientErrors"]["connect"] == 1
+
+    rows = compare_metrics({"metrics": {"messagesPerSecond": 8.0}}, {"metrics": metrics})
+    assert rows == [{"metric": "messagesPerSecond", "baseline": 8.0, "current": 10.0, "changePct": 25.0}]
+
+
+def test_order_benchmark_plan_is_deterministic_and_covers_workloads():
+    plan = build_order_plan(orders=16, workloads=["market", "basket"], users=4, seed=3)
+    assert plan == build_order_plan(orders=16, workloads=["market", "basket"], users=4, seed=3)
+    assert [task.workload for task in plan[:4]] == ["market", "basket", "market", "basket"]
+    assert len({task.user_id for task in plan}) == 4
+    assert {task.side for task in plan if task.workload == "market"} == {"BUY", "SELL"}
+
+
+def test_order_benchmark_summary_and_regression_gate():
+    stats = {
+        "market": WorkloadStats(operations=4, orders=6, latencies_ms=[1.0, 2.0, 3.0, 4.0]),
+        "basket": WorkloadStats(operations=2, orders=6, errors=1, latencies_ms=[10.0, 20.0]),
+    }
+    waits = WaitSamples(executor_queue_ms=[0.5, 1.5], trigger_lock_ms=[])
+    metrics = summarize_order_run(stats, waits, 2.0, {"batches_committed": 3, "max_batch_size": 2})
+
+    assert metrics["orders"] == 12
+    assert metrics["ordersPerSecond"] == 6.0
+    assert metrics["errors"] == 1
+    assert metrics["workloads"]["basket"]["ordersPerSecond"] == 3.0
+    assert metrics["lockWaitMs"]["executorQueue"]["p50"] == 1.0
+    assert metrics["lockWaitMs"]["triggerEvaluation"]["count"] == 0
+    assert metrics["executor"]["maxBatchSize"] == 2
+
+    baseline = {"metrics": {"ordersPerSecond": 10.0, "latencyMs": {"p95": 10.0}}}
+    assert regression_failures(baseline, {"metrics": {"ordersPerSecond": 9.5, "latencyMs": {"p95": 10.5}}}, 10.0) == []
+    assert regression_failures(baseline, {"metrics": {"ordersPerSecond": 8.0, "latencyMs": {"p95": 12.0}}}, 10.0) == [
+        "latencyMs.p95 rose 20.00%",
+        "ordersPerSecond fell 20.00%",
+    ]
+
+
 def test_futures_contracts_endpoint_returns_contract_set(monkeypatch):
     monkeypatch.setattr(
         "app.routes.fetch_quote",
@@ -0,0 +1,125 @@
+from datetime import datetime
+
+from app.matching_engine import (
+    CANCELLED,
+    EXPIRED,
+    IST,
+    PARTIALLY_FILLED,
+    MatchingEngine,
+    RestingOrder,
+    Tick,
+)
+
+SESSION_START = IST.localize(datetime(2026, 3, 2, 10, 0)).timestamp()
+
+
+def _limit(order_id: int, side: str, qty: int, price: float, validity: str = "GTC", placed_at: float = SESSION_START):
+    return RestingOrder(order_id, "INFY", side, "LIMIT", qty, limit_price=price, validity=validity, placed_at=placed_at)
+
+
+def test_limits_fill_by_price_then_time_with_partial_fills():
+    engine = MatchingEngine()
+    engine.submit(_limit(1, "BUY", 50, 99.0))
+    engine.submit(_limit(2, "BUY", 50, 100.0))
+    engine.submit(_limit(3, "BUY", 50, 100.0))
+
+    fills, _ = engine.on_tick("INFY", 98.5, SESSION_START + 1, volume=80)
+    assert [(fill.order_id, fill.quantity, fill.price) for fill in fills] == [(2, 50, 100.0), (3, 30, 100.0)]
+    assert engine.get(3).status == PARTIALLY_FILLED
+
+    fills, _ = engine.on_tick("INFY", 98.5, SESSION_START + 2, volume=1_000)
+    assert [(fill.order_id, fill.quantity, fill.remaining) for fill in fills] == [(3, 20, 0), (1, 50, 0)]
+    assert engine.get(1) is None
+
+    # A tick that does not cross the book leaves resting orders alone.
+    engine.submit(_limit(4, "SELL", 10, 105.0))
+    assert engine.on_tick("INFY", 104.0, SESSION_START + 3) == ([], [])
+    assert engine.get(4).remaining == 10
+
+
+def test_stops_trigger_then_fill_as_market_or_limit():
+    engine = MatchingEngine()
+    engine.submit(RestingOrder(1, "INFY", "SELL", "SLM", 10, trigger_price=95.0, validity="GTC", placed_at=SESSION_START))
+    engine.submit(
+        RestingOrder(2, "INFY", "BUY", "SL", 10, trigger_price=105.0, limit_price=106.0, validity="GTC", placed_at=SESSION_START)
+    )
+
+    assert engine.on_tick("INFY", 100.0, SESSION_START + 1) == ([], [])
+
+    fills, _ = engine.on_tick("INFY", 94.0, SESSION_START + 2)
+    assert [(fill.order_id, fill.price) for fill in fills] == [(1, 94.0)]
+
+    # The SL BUY triggers above its limit, rests at 106 and fills once price comes back.
+    assert engine.on_tick("INFY", 107.0, SESSION_START + 3)[0] == []
+    assert engine.get(2).triggered
+    fills, _ = engine.on_tick("INFY", 105.5, SESSION_START + 4)
+    assert [(fill.order_id, fill.price) for fill in fills] == [(2, 106.0)]
+
+
+def test_ioc_remainder_is_cancelled_and_day_orders_expire_at_close():
+    engine = MatchingEngine()
+    ioc = engine.submit(_limit(1, "BUY", 100, 100.0, validity="IOC"))
+    day = engine.submit(_limit(2, "SELL", 10, 120.0, validity="DAY"))
+    gtc = engine.submit(_limit(3, "SELL", 10, 130.0, validity="GTC"))
+
+    fills, expiries = engine.on_tick("INFY", 99.0, SESSION_START + 1, volume=40)
+    assert [(fill.order_id, fill.quantity) for fill in fills] == [(1, 40)]
+    assert [(item.order_id, item.status, item.remaining) for item in expiries] == [(1, CANCELLED, 60)]
+    assert ioc.status == CANCELLED
+
+    after_close = IST.localize(datetime(2026, 3, 2, 15, 31)).timestamp()
+    result = engine.replay([Tick(after_close, "TCS", 3_000.0)])
+    assert [(item.order_id, item.status) for item in result.expiries] == [(2, EXPIRED)]
+    assert day.status == EXPIRED
+    assert gtc.is_active
+
+    assert engine.cancel(3).status == CANCELLED
+    assert engine.metrics_snapshot()["resting_orders"] == 0
+
+
+def test_replay_runs_a_day_of_ticks_and_reports_fills():
+    engine = MatchingEngine()
+    engine.submit(_limit(1, "BUY", 10, 95.0))
+    engine.submit(_limit(2, "SELL", 10, 105.0))
+    ticks = [Tick(SESSION_START + minute * 60, "INFY", 100.0 + (minute % 20) - 10, 5) for minute in range(375)]
+
+    result = engine.replay(ticks)
+    assert result.ticks == 375
+    assert sum(fill.quantity for fill in result.fills if fill.order_id == 1) == 10
+    assert sum(fill.quantity for fill in result.fills if fill.order_id == 2) == 10
+    assert all(fill.quantity <= 5 for fill in result.fills)
+    assert engine.get(1) is None and engine.get(2) is None
+
+
+def test_started_engine_matches_live_quote_ticks_until_stopped():
+    from app import market_data
+
+    engine = MatchingEngine()
+    fills = []
+    engine.add_fill_listener(fills.append)
+    engine.submit(RestingOrder(1, "LIVEQ", "BUY", "LIMIT", 10, limit_price=100.0, validity="GTC"))
+    engine.submit(RestingOrder(2, "LIVEQ", "BUY", "LIMIT", 10, limit_price=90.0, validity="GTC"))
+
+    engine.start()
+    try:
+        assert engine.is_running
+        market_data._publish_quote("LIVEQ", {"symbol": "LIVEQ", "last": 99.0, "pctChange": 0.0})
+        assert [(fill.order_id, fill.price) for fill in fills] == [(1, 100.0)]
+    finally:
+        engine.stop()
+
+    market_data._publish_quote("LIVEQ", {"symbol": "LIVEQ", "last": 85.0, "pctChange": 0.0})
+    assert [fill.order_id for fill in fills] == [1]
+    assert engine.metrics_snapshot()["running"] is False
+
+
+def test_day_order_without_placed_at_rests_until_the_current_session_closes():
+    import time
+
+    engine = MatchingEngine()
+    order = engine.submit(RestingOrder(1, "NOW", "BUY", "LIMIT", 5, limit_price=100.0, validity="DAY"))
+    assert order.placed_at is not None and order.placed_at > SESSION_START
+
+    fills, expiries = engine.on_tick("NOW", 100.0, time.time())
+    assert expiries == []
+    assert [(fill.order_id, fill.quantity) for fill in fills] == [(1, 5)]
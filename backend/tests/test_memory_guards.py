@@ -6,6 +6,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app import ai_engine
+from app import idempotency_index
 from app import market_data
 from app.routes import auth as auth_routes
 
@@ -108,3 +109,37 @@ def test_auth_rate_limit_prunes_stale_keys_and_expired_lockouts(monkeypatch):
     assert "stale-lockout" not in auth_routes._login_failure_buckets
     assert "stale-lockout" not in auth_routes._login_lockouts
     auth_routes._reset_debug_state()
+
+
+def _idempotency_record(key: str, order_id: int = 1) -> idempotency_index.IdempotencyRecord:
+    return idempotency_index.IdempotencyRecord(
+        id=order_id,
+        idempotency_key=key,
+        request_fingerprint="fp",
+        status="COMPLETED",
+        price=100.0,
+        total=100.0,
+        trace_id=None,
+        symbol="AAA",
+        quantity=1,
+        side="BUY",
+    )
+
+
+def test_idempotency_index_is_bounded_and_expires(monkeypatch):
+    clock = {"now": 3000.0}
+    monkeypatch.setattr(idempotency_index.time, "time", lambda: clock["now"])
+
+    index = idempotency_index.IdempotencyIndex(ttl_seconds=10, max_entries=2)
+    index.put(1, _idempotency_record("k1"))
+    index.put(2, _idempotency_record("k1", order_id=2))
+    index.put(1, _idempotency_record("k2", order_id=3))
+
+    assert index.size() == 2
+    assert index.get(1, "k1") is None
+    assert index.get(2, "k1").id == 2
+
+    clock["now"] += 11
+    assert index.get(1, "k2") is None
+    assert index.size() == 0
+    assert index.metrics_snapshot() == {"entries": 0, "hits": 1, "misses": 2}
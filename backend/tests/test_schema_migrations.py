@@ -0,0 +1,132 @@
+import sqlite3
+
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+
+from app.database import schema
+from app.database.db import Base
+from app.database.index_advisor import IndexAdvisor
+
+
+def test_schema_head_matches_latest_revision():
+    assert ScriptDirectory.from_config(schema._alembic_config()).get_current_head() == schema.SCHEMA_HEAD
+
+
+def test_fresh_database_is_migrated_to_the_model_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert schema.current_revision(engine) is None
+
+    assert schema.ensure_schema_current(engine) == schema.SCHEMA_HEAD
+
+    with engine.connect() as connection:
+        diffs = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    # Only the raw-SQL composite/partial indexes live outside the models.
+    assert [diff for diff in diffs if diff[0] != "remove_index"] == []
+
+
+def test_legacy_database_gains_columns_and_is_stamped_once(tmp_path):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute((
+                "CREATE TABLE orders (id INTEGER PRIMARY KEY, symbol VARCHAR, quantity INTEGER, side VARCHAR, "
+                "price FLOAT, total FLOAT, status VARCHAR, created_at TIMESTAMP)"
+            ))
+        conn.execute("CREATE TABLE holdings (id INTEGER PRIMARY KEY, symbol VARCHAR, quantity INTEGER)")
+        conn.execute("INSERT INTO holdings (symbol, quantity) VALUES ('TCS', 3)")
+    engine = create_engine(f"sqlite:///{path}")
+
+    assert schema.ensure_schema_current(engine) == schema.SCHEMA_HEAD
+
+    inspector = inspect(engine)
+    order_columns = {column["name"] for column in inspector.get_columns("orders")}
+    assert {"user_id", "idempotency_key", "trace_id"} <= order_columns
+    assert "uq_holdings_user_symbol" in {index["name"] for index in inspector.get_indexes("holdings")}
+    assert "wallet" in inspector.get_table_names()
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT user_id FROM holdings").fetchone() == (1,)
+
+    # A current database is only read, never migrated again.
+    assert schema.ensure_schema_current(engine) == schema.SCHEMA_HEAD
+
+
+
+def test_legacy_duplicate_holdings_are_merged_before_the_unique_index(tmp_path):
+    path = tmp_path / "duplicates.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE holdings (id INTEGER PRIMARY KEY, user_id INTEGER, symbol VARCHAR, quantity INTEGER, "
+            "avg_price FLOAT, last_price FLOAT, pnl FLOAT, created_at TIMESTAMP)"
+        )
+        conn.executemany(
+            "INSERT INTO holdings (user_id, symbol, quantity, avg_price, last_price) VALUES (?, ?, ?, ?, ?)",
+            [(1, "TCS", 2, 100.0, 110.0), (2, "TCS", 5, 90.0, 110.0), (1, "TCS", 3, 200.0, 120.0)],
+        )
+    engine = create_engine(f"sqlite:///{path}")
+
+    assert schema.ensure_schema_current(engine) == schema.SCHEMA_HEAD
+
+    assert "uq_holdings_user_symbol" in {index["name"] for index in inspect(engine).get_indexes("holdings")}
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT id, user_id, quantity, avg_price, last_price, pnl FROM holdings ORDER BY id").fetchall()
+    assert rows == [(1, 1, 5, 160.0, 120.0, -200.0), (2, 2, 5, 90.0, 110.0, None)]
+
+
+def test_downgrade_to_base_keeps_baseline_tables(tmp_path):
+    from alembic import command
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'downgrade.db'}")
+    schema.ensure_schema_current(engine)
+
+    config = schema._alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.downgrade(config, "base")
+
+    assert schema.current_revision(engine) is None
+    tables = set(inspect(engine).get_table_names())
+    assert {"users", "orders", "holdings"} <= tables
+    assert "orders_archive" not in tables
+
+def _explain(engine, sql: str) -> str:
+    with engine.connect() as connection:
+        return " | ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+def test_hot_path_queries_use_composite_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    schema.ensure_schema_current(engine)
+
+    assert "ix_trigger_orders_status_user_symbol" in _explain(
+        engine, "SELECT * FROM trigger_orders WHERE status = 'PENDING' AND user_id = 1 AND symbol = 'TCS'"
+    )
+    assert "ix_orders_status" in _explain(engine, "SELECT status, COUNT(id) FROM orders GROUP BY status")
+    assert "ix_alerts_active_symbol" in _explain(engine, "SELECT * FROM alerts WHERE is_active = 1 AND symbol = 'TCS'")
+    assert "ix_otps_mobile_created_at" in _explain(
+        engine, "SELECT COUNT(*) FROM otps WHERE mobile_number = '9' AND created_at >= '2026-01-01'"
+    )
+
+
+def test_index_advisor_flags_full_scans_on_large_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'advisor.db'}")
+    schema.ensure_schema_current(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO orders (symbol, user_id, quantity, side, status, tag) VALUES "
+            + ", ".join(f"('S{i}', 1, 1, 'BUY', 'COMPLETED', 't{i}')" for i in range(20))
+        )
+    advisor = IndexAdvisor(min_rows=10)
+    advisor.install(engine)
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SELECT id FROM orders WHERE tag = ?", ("t1",)).all()
+        connection.exec_driver_sql("SELECT id FROM orders WHERE tag = ?", ("t2",)).all()
+        connection.exec_driver_sql("SELECT id FROM orders WHERE status = ?", ("PENDING",)).all()
+        connection.exec_driver_sql("SELECT id FROM alerts WHERE threshold_price > ?", (1.0,)).all()
+
+    findings = advisor.findings()
+    assert [finding["table"] for finding in findings] == ["orders"]
+    assert findings[0]["rows"] == 20
+    assert "tag" in findings[0]["statement"]
+    assert advisor.metrics_snapshot()["statements_explained"] == 3
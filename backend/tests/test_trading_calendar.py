@@ -0,0 +1,59 @@
+from datetime import date, datetime, time
+
+from app.trading_calendar import IST, TradingCalendar
+
+
+def _ts(year: int, month: int, day: int, hour: int = 0, minute: int = 0) -> float:
+    return IST.localize(datetime(year, month, day, hour, minute)).timestamp()
+
+
+def test_sessions_skip_weekends_and_holidays():
+    calendar = TradingCalendar(holidays={"2026-01-26"})
+
+    assert calendar.is_open(_ts(2026, 1, 23, 10, 0))  # Friday
+    assert not calendar.is_open(_ts(2026, 1, 24, 10, 0))  # Saturday
+    assert not calendar.is_open(_ts(2026, 1, 26, 10, 0))  # Republic Day
+    assert calendar.is_open(_ts(2026, 1, 23, 15, 30))
+    assert not calendar.is_open(_ts(2026, 1, 23, 15, 31))
+
+    friday_evening = _ts(2026, 1, 23, 18, 0)
+    assert calendar.next_open(friday_evening).day == date(2026, 1, 27)
+    assert calendar.previous_close(friday_evening).day == date(2026, 1, 23)
+    assert calendar.next_close(friday_evening).day == date(2026, 1, 27)
+    assert calendar.next_open(_ts(2025, 12, 31, 16, 0)).day == date(2026, 1, 1)
+
+
+def test_special_sessions_open_on_closed_days():
+    calendar = TradingCalendar(holidays={"2026-11-09"}, special_sessions={"2026-11-08": (time(18, 0), time(19, 15))})
+
+    assert not calendar.is_open(_ts(2026, 11, 8, 12, 0))
+    session = calendar.current_session(_ts(2026, 11, 8, 18, 30))
+    assert session is not None and session.special
+    assert calendar.next_open(_ts(2026, 11, 7, 12, 0)).day == date(2026, 11, 8)
+
+
+def test_market_status_is_cached_until_the_next_boundary():
+    now = {"ts": _ts(2026, 3, 2, 9, 0)}
+    calendar = TradingCalendar(holidays=set(), clock=lambda: now["ts"])
+
+    before_open = calendar.market_status()
+    assert not before_open.isOpen
+    assert before_open.message == "Market opens at 9:15 AM IST"
+    assert before_open.nextOpen == "2026-03-02 09:15 IST"
+
+    now["ts"] = _ts(2026, 3, 2, 9, 10)
+    assert calendar.market_status() is before_open
+    assert calendar.metrics_snapshot()["status_hits"] == 1
+
+    now["ts"] = _ts(2026, 3, 2, 9, 15)
+    status = calendar.market_status()
+    assert status.isOpen
+    assert status.nextClose == "2026-03-02 15:30 IST"
+
+    now["ts"] = _ts(2026, 3, 6, 16, 0)  # Friday after close
+    status = calendar.market_status()
+    assert status.message == "Market closed for today (3:30 PM IST)"
+    assert status.nextOpen == "2026-03-09 09:15 IST"
+
+    now["ts"] = _ts(2026, 3, 7, 11, 0)
+    assert calendar.market_status().message == "Market closed - Weekend"